@@ -0,0 +1,188 @@
+"""
+Control de admisión por filas en curso y descarte de carga según SLO.
+
+Cada petición de inferencia reserva tantas "filas" como clientes puntúa.
+Si hay capacidad libre se admite al instante; si no, espera en una cola
+FIFO. La espera está acotada por el SLO de cola: una petición que no se
+admite a tiempo se rechaza con 503, y si la cola ya tiene demasiadas filas
+se rechaza de inmediato con 429. Ambas respuestas incluyen ``Retry-After``
+estimado a partir del tiempo de servicio reciente por fila.
+
+Se usa desde un único event loop (no requiere locks). ``/health`` y los
+demás endpoints que no ejecutan inferencia no pasan por el controlador.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+import numpy as np
+
+
+class Overloaded(Exception):
+    """
+    Petición rechazada por sobrecarga.
+
+    Args:
+        status_code: 429 (cola llena) o 503 (espera mayor que el SLO)
+        retry_after: Segundos sugeridos antes de reintentar
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limita las filas de inferencia en curso y descarta carga cuando la cola no cumple el SLO.
+
+    Args:
+        max_inflight_rows: Filas puntuándose a la vez
+        max_queued_rows: Filas en espera antes de rechazar con 429
+        queue_timeout_ms: Espera máxima en cola (SLO) antes de rechazar con 503
+        latency_window: Esperas recientes usadas para los percentiles
+    """
+
+    def __init__(self, max_inflight_rows: int = 512, max_queued_rows: int = 4096,
+                 queue_timeout_ms: float = 200.0, latency_window: int = 1000):
+        self.max_inflight_rows = max_inflight_rows
+        self.max_queued_rows = max_queued_rows
+        self.queue_timeout_ms = queue_timeout_ms
+        self.inflight_rows = 0
+        self.queued_rows = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.row_service_ms = 1.0
+        self._waiters: deque = deque()
+        self._queue_waits_ms: deque = deque(maxlen=latency_window)
+
+    @property
+    def overloaded(self) -> bool:
+        """
+        True si hay peticiones esperando (el trabajo opcional debe descartarse).
+        """
+        return bool(self._waiters)
+
+    def _retry_after(self) -> int:
+        backlog_ms = (self.inflight_rows + self.queued_rows) * self.row_service_ms
+        return max(1, math.ceil(backlog_ms / 1000))
+
+    def _wake(self):
+        while self._waiters:
+            rows, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.inflight_rows and self.inflight_rows + rows > self.max_inflight_rows:
+                break
+            self._waiters.popleft()
+            self.queued_rows -= rows
+            self.inflight_rows += rows
+            future.set_result(None)
+
+    async def acquire(self, rows: int) -> float:
+        """
+        Reserva capacidad para `rows` filas, esperando como mucho el SLO de cola.
+
+        Una petición mayor que max_inflight_rows se admite cuando no hay
+        ninguna otra en curso.
+
+        Returns:
+            float: Tiempo de espera en cola (ms)
+
+        Raises:
+            Overloaded: Si la cola está llena (429) o la espera supera el SLO (503)
+        """
+        if not self._waiters and (
+            self.inflight_rows == 0 or self.inflight_rows + rows <= self.max_inflight_rows
+        ):
+            self.inflight_rows += rows
+            self.admitted += 1
+            self._queue_waits_ms.append(0.0)
+            return 0.0
+
+        if self.queued_rows + rows > self.max_queued_rows:
+            self.rejected_queue_full += 1
+            raise Overloaded(
+                f"Cola de inferencia llena ({self.queued_rows} filas en espera)",
+                status_code=429,
+                retry_after=self._retry_after(),
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((rows, future))
+        self.queued_rows += rows
+        start = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout_ms / 1000)
+        except BaseException:
+            # Cancelada mientras esperaba: liberar lo que se haya reservado
+            if future.done():
+                self.release(rows, 0.0)
+            else:
+                future.cancel()
+                self.queued_rows -= rows
+                self._wake()
+            raise
+
+        if not future.done():
+            future.cancel()
+            self.queued_rows -= rows
+            self.rejected_timeout += 1
+            self._wake()
+            raise Overloaded(
+                f"Tiempo de espera en cola superior al SLO ({self.queue_timeout_ms:.0f} ms)",
+                status_code=503,
+                retry_after=self._retry_after(),
+            )
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.admitted += 1
+        self._queue_waits_ms.append(wait_ms)
+        return wait_ms
+
+    def release(self, rows: int, service_ms: float):
+        """
+        Libera la capacidad reservada y actualiza el tiempo de servicio por fila.
+        """
+        self.inflight_rows -= rows
+        if rows and service_ms > 0:
+            # Media móvil exponencial del coste por fila (para Retry-After)
+            self.row_service_ms = 0.9 * self.row_service_ms + 0.1 * (service_ms / rows)
+        self._wake()
+
+    @asynccontextmanager
+    async def admit(self, rows: int):
+        """
+        Context manager: reserva `rows` filas durante el bloque.
+        """
+        await self.acquire(rows)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(rows, (time.perf_counter() - start) * 1000)
+
+    def report(self) -> Dict[str, Any]:
+        waits = np.fromiter(self._queue_waits_ms, dtype=np.float64)
+        return {
+            "inflight_rows": self.inflight_rows,
+            "queued_rows": self.queued_rows,
+            "max_inflight_rows": self.max_inflight_rows,
+            "max_queued_rows": self.max_queued_rows,
+            "queue_timeout_ms": self.queue_timeout_ms,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "row_service_ms": round(self.row_service_ms, 4),
+            "queue_wait_ms": {
+                "p50": round(float(np.percentile(waits, 50)), 3) if len(waits) else None,
+                "p99": round(float(np.percentile(waits, 99)), 3) if len(waits) else None,
+            },
+        }
@@ -5,18 +5,57 @@ Este servicio permite realizar predicciones en tiempo real utilizando
 el modelo entrenado de machine learning.
 """
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import joblib
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import hmac
+import io
 import logging
+import os
+import platform
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Literal, Optional
 
-from .schemas import CustomerData, ChurnPrediction, HealthResponse
+from .schemas import (
+    CustomerData, CustomerIdsRequest, ChurnPrediction, HealthResponse, ExplanationResponse, WhatIfRequest,
+    FeedbackRequest
+)
+from .explain import TreeContributionExplainer
+from .drift import DriftMonitor, ReferenceProfile
+from .shadow import ShadowScorer
+from .ensemble import EnsemblePredictor, parse_weights
+from .cascade import DEFAULT_BAND, DEFAULT_FIRST_STAGE_PATH, CascadePredictor, parse_band
+from .features import (
+    DATA_DIR,
+    customer_key,
+    customers_to_frame,
+    get_risk_level,
+    load_pipeline,
+    model_version,
+    set_xgboost_threads,
+    split_pipeline,
+    thread_limited_pipeline,
+)
+from .coalesce import SingleFlight
+from .warmup import ModelWarmup
+from .autotune import DEFAULT_BATCH_SIZES as AUTOTUNE_BATCH_SIZES, Autotuner
+from .admission import AdmissionController, Overloaded
+from .profiling import AllocationTracer, SamplingProfiler
+from .ws_scoring import ScoringChannel
+from .streaming import NDJSON_MEDIA_TYPE, StreamCompressor, ndjson_line, ndjson_predictions, negotiate_encoding
+from .score_store import DEFAULT_STORE_PATH, ScoreStore
+from .feedback import FeedbackMonitor, PredictionLog, load_offline_metrics
+from .scenarios import DEFAULT_SCENARIOS, ScenarioScorer, summarize, validate_scenarios
+from .feature_store import DEFAULT_FEATURE_STORE_PATH, FeatureStore, preprocessor_signature
+from .batch_jobs import DEFAULT_JOBS_DIR, BatchJobManager, InvalidJobInput, JobQueueFull
 
 # Configuración de logging
 logging.basicConfig(
@@ -49,17 +88,109 @@ app.add_middleware(
 MODEL = None
 MODEL_PATH = Path(__file__).parent / "model.joblib"
 MODEL_TYPE = None
+MODEL_VERSION = None
+EXPLAINER = None
+SCENARIO_SCORER = None
+DRIFT_MONITOR = None
+# Observaciones mínimas antes de evaluar el drift (antes, estado insufficient_data)
+DRIFT_MIN_OBSERVATIONS = int(os.getenv("DRIFT_MIN_OBSERVATIONS", "500"))
+# Filas pendientes máximas en la cola del monitor (memoria acotada; el exceso se descarta)
+DRIFT_MAX_QUEUED_ROWS = int(os.getenv("DRIFT_MAX_QUEUED_ROWS", "50000"))
+SHADOW_SCORER = None
+
+# Modelos retadores en sombra, p. ej. SHADOW_MODELS="lightgbm,catboost"
+SHADOW_MODELS = [name.strip() for name in os.getenv("SHADOW_MODELS", "").split(",") if name.strip()]
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "1.0"))
+
+# Ensemble con presupuesto de latencia, p. ej. ENSEMBLE_WEIGHTS="catboost:2,lightgbm:1,xgboost:1"
+ENSEMBLE = None
+ENSEMBLE_WEIGHTS = parse_weights(os.getenv("ENSEMBLE_WEIGHTS", ""))
+ENSEMBLE_BUDGET_MS = float(os.getenv("ENSEMBLE_BUDGET_MS", "50"))
+
+# Cascada (mode=cascade): primera etapa lineal, modelo principal solo en la banda de incertidumbre
+CASCADE = None
+CASCADE_PATH = Path(os.getenv("CASCADE_PATH", str(DEFAULT_FIRST_STAGE_PATH)))
+CASCADE_BAND = parse_band(os.getenv("CASCADE_BAND", ",".join(map(str, DEFAULT_BAND))))
+
+# Almacén de puntuaciones de la base de clientes (generado por jobs.score_customers)
+SCORE_STORE = None
+SCORE_STORE_PATH = Path(os.getenv("SCORE_STORE_PATH", str(DEFAULT_STORE_PATH)))
+
+# Almacén de características por customerID (generado por jobs.build_feature_store)
+FEATURE_STORE = None
+FEATURE_STORE_PATH = Path(os.getenv("FEATURE_STORE_PATH", str(DEFAULT_FEATURE_STORE_PATH)))
+
+# Trabajos batch asíncronos (POST /jobs)
+JOB_MANAGER = None
+JOBS_DIR = Path(os.getenv("JOBS_DIR", str(DEFAULT_JOBS_DIR)))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "16"))
+
+# Calentamiento al arrancar; /ready responde 503 hasta que termina (WARMUP=0 lo omite)
+WARMUP = None
+WARMUP_ENABLED = os.getenv("WARMUP", "1") != "0"
+WARMUP_MAX_SECONDS = float(os.getenv("WARMUP_MAX_SECONDS", "30"))
+
+# Autoajuste de bloque e hilos al cargar el modelo y con POST /admin/autotune (AUTOTUNE=0 lo omite al arrancar)
+AUTOTUNER = None
+AUTOTUNE_ENABLED = os.getenv("AUTOTUNE", "1") != "0"
+AUTOTUNE_LATENCY_MS = float(os.getenv("AUTOTUNE_LATENCY_MS", "50"))
+AUTOTUNE_MAX_SECONDS = float(os.getenv("AUTOTUNE_MAX_SECONDS", "15"))
+# Resultado compartido entre los workers del nodo (y reutilizado al reiniciar con el mismo modelo)
+AUTOTUNE_CACHE_PATH = Path(os.getenv("AUTOTUNE_CACHE_PATH", str(DATA_DIR / "autotune.json")))
+# Workers que comparten el nodo (uvicorn --workers / WEB_CONCURRENCY): acotan los hilos por worker
+SERVING_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Una sola medición bajo demanda a la vez
+AUTOTUNE_LOCK = threading.Lock()
+# Hilos de inferencia elegidos por el autoajuste (None = los del modelo), aplicados a todos los caminos
+SERVING_THREADS: Optional[int] = None
+# Argumentos de predict_proba del modelo principal (hilos de LightGBM y CatBoost, que se pasan por llamada)
+PREDICT_KWARGS: Dict[str, Any] = {}
+
+# Control de admisión: filas de inferencia en curso, cola acotada por SLO y tamaño máximo de lote
+ADMISSION = AdmissionController(
+    max_inflight_rows=int(os.getenv("ADMISSION_MAX_INFLIGHT_ROWS", "512")),
+    max_queued_rows=int(os.getenv("ADMISSION_MAX_QUEUED_ROWS", "4096")),
+    queue_timeout_ms=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "200")),
+)
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "10000"))
+BATCH_CHUNK_ROWS = int(os.getenv("BATCH_CHUNK_ROWS", "500"))
+
+# Resultados observados (/feedback): predicciones recordadas y ventana de métricas por versión
+PREDICTION_LOG = PredictionLog(max_entries=int(os.getenv("PREDICTION_LOG_SIZE", "100000")))
+FEEDBACK = FeedbackMonitor(
+    window=int(os.getenv("FEEDBACK_WINDOW", "5000")),
+    min_observations=int(os.getenv("FEEDBACK_MIN_OBSERVATIONS", "200")),
+)
+OFFLINE_METRICS = None
+
+# Escenarios what-if por petición (/what-if)
+MAX_SCENARIOS = int(os.getenv("MAX_SCENARIOS", "64"))
+
+# Canal WebSocket /ws/predict: micro-lotes y mensajes pendientes por conexión
+WS_MAX_BATCH = int(os.getenv("WS_MAX_BATCH", "64"))
+WS_MAX_WAIT_MS = float(os.getenv("WS_MAX_WAIT_MS", "2"))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "256"))
+
+# Perfilado bajo demanda (solo administradores): desactivado si ADMIN_TOKEN no está definido
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_LOCK = threading.Lock()
+ALLOCATION_TRACER = AllocationTracer()
+
+# Coalescencia de predicciones idénticas en curso en /predict (COALESCE_REQUESTS=0 la desactiva)
+COALESCER = SingleFlight() if os.getenv("COALESCE_REQUESTS", "1") != "0" else None
 
 
 def load_model():
     """
-    Carga el modelo entrenado desde disco.
+    Carga el modelo entrenado desde disco y le aplica el autoajuste de hilos.
     """
-    global MODEL, MODEL_TYPE
+    global MODEL, MODEL_TYPE, MODEL_VERSION, EXPLAINER, SCENARIO_SCORER, OFFLINE_METRICS
     
     try:
         logger.info(f"Cargando modelo desde: {MODEL_PATH}")
-        MODEL = joblib.load(MODEL_PATH)
+        MODEL = load_pipeline(MODEL_PATH)
+        MODEL_VERSION = model_version(MODEL_PATH)
         
         # Detectar tipo de modelo
         if hasattr(MODEL, 'named_steps'):
@@ -72,6 +203,25 @@ def load_model():
             MODEL_TYPE = type(MODEL).__name__
         
         logger.info(f" Modelo cargado exitosamente: {MODEL_TYPE}")
+        OFFLINE_METRICS = load_offline_metrics(MODEL_TYPE)
+        tune_model()
+        
+        # Los componentes siguientes reciben los hilos elegidos (SERVING_THREADS)
+        
+        # Explicador de contribuciones nativas (solo boosters)
+        try:
+            EXPLAINER = TreeContributionExplainer(MODEL, n_threads=SERVING_THREADS)
+        except ValueError as e:
+            EXPLAINER = None
+            logger.warning(f"Explicaciones no disponibles: {str(e)}")
+        
+        # Escenarios what-if (requiere un preprocesador separable por campo)
+        try:
+            SCENARIO_SCORER = ScenarioScorer(MODEL, n_threads=SERVING_THREADS)
+        except ValueError as e:
+            SCENARIO_SCORER = None
+            logger.warning(f"Escenarios what-if no disponibles: {str(e)}")
+        
         return True
         
     except FileNotFoundError:
@@ -83,22 +233,207 @@ def load_model():
         return False
 
 
-def get_risk_level(probability: float) -> str:
+def start_drift_monitor():
     """
-    Determina el nivel de riesgo basado en la probabilidad de churn.
+    Calcula el perfil de referencia (una sola vez) y arranca el monitor de drift.
+    """
+    global DRIFT_MONITOR
     
-    Args:
-        probability: Probabilidad de churn (0-1)
+    try:
+        reference = ReferenceProfile.from_csv(model=MODEL)
+        DRIFT_MONITOR = DriftMonitor(
+            reference, max_queued_rows=DRIFT_MAX_QUEUED_ROWS, min_observations=DRIFT_MIN_OBSERVATIONS
+        )
+        DRIFT_MONITOR.start()
+        logger.info(f" Monitor de drift activo (referencia: {reference.size} registros)")
+    except Exception as e:
+        DRIFT_MONITOR = None
+        logger.warning(f"Monitor de drift no disponible: {str(e)}")
+
+
+def start_shadow_scorer():
+    """
+    Carga los modelos retadores configurados en SHADOW_MODELS.
+    """
+    global SHADOW_SCORER
     
-    Returns:
-        str: 'Low', 'Medium', o 'High'
+    if not SHADOW_MODELS:
+        return
+    
+    try:
+        SHADOW_SCORER = ShadowScorer.from_names(SHADOW_MODELS, sample_rate=SHADOW_SAMPLE_RATE)
+        logger.info(f" Modo sombra activo con retadores: {', '.join(SHADOW_MODELS)}")
+    except Exception as e:
+        SHADOW_SCORER = None
+        logger.warning(f"Modo sombra no disponible: {str(e)}")
+
+
+def start_ensemble():
+    """
+    Carga los miembros del ensemble (todos los model_*.joblib o los de ENSEMBLE_WEIGHTS).
+    """
+    global ENSEMBLE
+    
+    try:
+        ENSEMBLE = EnsemblePredictor.from_names(weights=ENSEMBLE_WEIGHTS or None, n_threads=SERVING_THREADS)
+        logger.info(f" Ensemble disponible: {ENSEMBLE.normalized_weights}")
+    except Exception as e:
+        ENSEMBLE = None
+        logger.warning(f"Ensemble no disponible: {str(e)}")
+
+
+def start_cascade():
+    """
+    Carga la primera etapa de la cascada si fue entrenada (jobs/train_cascade.py).
+    """
+    global CASCADE
+    
+    if not CASCADE_PATH.exists():
+        logger.warning(f"Cascada no disponible: no existe {CASCADE_PATH} (ejecutar: python -m jobs.train_cascade)")
+        return
+    
+    try:
+        CASCADE = CascadePredictor(
+            load_pipeline(CASCADE_PATH), MODEL, band=CASCADE_BAND, n_threads=SERVING_THREADS
+        )
+        logger.info(f" Cascada disponible (banda de incertidumbre: {CASCADE_BAND})")
+    except Exception as e:
+        CASCADE = None
+        logger.warning(f"Cascada no disponible: {str(e)}")
+
+
+def open_score_store():
+    """
+    Abre el almacén de puntuaciones si ya fue generado.
+    """
+    global SCORE_STORE
+    
+    if not SCORE_STORE_PATH.exists():
+        logger.warning(f"Almacén de puntuaciones no encontrado en: {SCORE_STORE_PATH}")
+        logger.warning("   Ejecutar: python -m jobs.score_customers")
+        return
+    
+    try:
+        SCORE_STORE = ScoreStore(SCORE_STORE_PATH)
+        logger.info(f" Almacén de puntuaciones abierto: {SCORE_STORE.stats()['customers']} clientes")
+    except Exception as e:
+        SCORE_STORE = None
+        logger.warning(f"Almacén de puntuaciones no disponible: {str(e)}")
+
+
+def open_feature_store():
+    """
+    Abre el almacén de características si existe y es compatible con el modelo cargado.
+    """
+    global FEATURE_STORE
+    
+    if not (FEATURE_STORE_PATH / "manifest.json").exists():
+        logger.warning(f"Almacén de características no encontrado en: {FEATURE_STORE_PATH}")
+        logger.warning("   Ejecutar: python -m jobs.build_feature_store")
+        return
+    
+    try:
+        preprocessor, _ = split_pipeline(MODEL)
+        FEATURE_STORE = FeatureStore(FEATURE_STORE_PATH, signature=preprocessor_signature(preprocessor))
+        logger.info(f" Almacén de características abierto: {len(FEATURE_STORE)} clientes")
+    except Exception as e:
+        FEATURE_STORE = None
+        logger.warning(f"Almacén de características no disponible: {str(e)}")
+
+
+def start_job_manager():
+    """
+    Arranca el pool de trabajos batch y reanuda los trabajos pendientes en disco.
+    """
+    global JOB_MANAGER
+    
+    try:
+        JOB_MANAGER = BatchJobManager(
+            MODEL, JOBS_DIR, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+            n_threads=SERVING_THREADS
+        )
+        JOB_MANAGER.recover()
+        logger.info(f" Trabajos batch activos en: {JOBS_DIR}")
+    except Exception as e:
+        JOB_MANAGER = None
+        logger.warning(f"Trabajos batch no disponibles: {str(e)}")
+
+
+def _warmup_predict(frame: pd.DataFrame):
+    MODEL.predict_proba(frame, **PREDICT_KWARGS)
+    if ENSEMBLE is not None:
+        ENSEMBLE.predict_proba(frame)
+
+
+def build_autotuner(model) -> Autotuner:
+    """
+    Autoajuste del modelo principal: bloque de /predict-batch e hilos de inferencia.
+    
+    Si BATCH_CHUNK_ROWS está definido solo se ajustan los hilos; los bloques
+    medidos no superan MAX_BATCH_ROWS ni la capacidad del control de admisión.
+    """
+    if "BATCH_CHUNK_ROWS" in os.environ:
+        batch_sizes = [BATCH_CHUNK_ROWS]
+    else:
+        limit = min(MAX_BATCH_ROWS, ADMISSION.max_inflight_rows)
+        batch_sizes = [size for size in AUTOTUNE_BATCH_SIZES if size <= limit] or [limit]
+    return Autotuner(
+        model, batch_sizes=batch_sizes, workers=SERVING_WORKERS,
+        latency_cap_ms=AUTOTUNE_LATENCY_MS, max_seconds=AUTOTUNE_MAX_SECONDS
+    )
+
+
+def _autotune_key(tuner: Autotuner) -> Dict[str, Any]:
+    return tuner.cache_key(model_version=MODEL_VERSION, host=platform.node())
+
+
+def tune_model():
+    """
+    Ajusta bloque e hilos del modelo recién cargado, antes de atender peticiones.
+    
+    Se mide una copia; el resultado se aplica sin copiar el pipeline
+    cargado (compartido en modo pre-fork): PREDICT_KWARGS limita LightGBM
+    y CatBoost por llamada, XGBoost recibe el límite del proceso
+    (``set_xgboost_threads``) y
+    SERVING_THREADS llega a los componentes que se crean después (ensemble,
+    cascada, escenarios y trabajos batch). El bloque solo se aplica si
+    cumple el límite de latencia. Con varios workers solo mide el primero;
+    el resto reutiliza su resultado de AUTOTUNE_CACHE_PATH.
+    """
+    global AUTOTUNER, MODEL, PREDICT_KWARGS, SERVING_THREADS, BATCH_CHUNK_ROWS
+    
+    AUTOTUNER = build_autotuner(MODEL)
+    if not AUTOTUNE_ENABLED:
+        logger.info("Autoajuste desactivado (AUTOTUNE=0)")
+        return
+    
+    try:
+        choice = AUTOTUNER.load_or_run(AUTOTUNE_CACHE_PATH, _autotune_key(AUTOTUNER))
+    except OSError as e:
+        logger.warning(f"No se pudo compartir el autoajuste en {AUTOTUNE_CACHE_PATH}: {str(e)}")
+        choice = AUTOTUNER.run()
+    if choice is None:
+        return
+    if choice["threads"]:
+        SERVING_THREADS = choice["threads"]
+        set_xgboost_threads(SERVING_THREADS)
+        MODEL, PREDICT_KWARGS = thread_limited_pipeline(MODEL, SERVING_THREADS)
+    if choice["within_cap"]:
+        BATCH_CHUNK_ROWS = choice["batch_size"]
+
+
+def start_warmup():
     """
-    if probability < 0.3:
-        return "Low"
-    elif probability < 0.7:
-        return "Medium"
+    Calienta el modelo (y el ensemble) en segundo plano; /ready espera a que termine.
+    """
+    global WARMUP
+    
+    WARMUP = ModelWarmup(_warmup_predict, max_seconds=WARMUP_MAX_SECONDS)
+    if WARMUP_ENABLED:
+        WARMUP.start()
     else:
-        return "High"
+        WARMUP.state = "ready"
+        logger.info("Calentamiento desactivado (WARMUP=0)")
 
 
 # Eventos de inicio y cierre
@@ -113,11 +448,19 @@ async def startup_event():
     logger.info("=" * 80)
     
     success = load_model()
+    start_ensemble()
+    open_score_store()
     
     if not success:
         logger.warning("El servicio se inició sin un modelo cargado")
         logger.warning("La API funcionará pero las predicciones fallarán")
     else:
+        start_cascade()
+        open_feature_store()
+        start_drift_monitor()
+        start_shadow_scorer()
+        start_job_manager()
+        start_warmup()
         logger.info("Servicio iniciado correctamente")
     
     logger.info("=" * 80)
@@ -129,6 +472,17 @@ async def shutdown_event():
     Se ejecuta al cerrar la aplicación.
     """
     logger.info("Cerrando Telco Churn Prediction API")
+    
+    if DRIFT_MONITOR is not None:
+        DRIFT_MONITOR.stop()
+    if SHADOW_SCORER is not None:
+        SHADOW_SCORER.shutdown()
+    if ENSEMBLE is not None:
+        ENSEMBLE.shutdown()
+    if SCORE_STORE is not None:
+        SCORE_STORE.close()
+    if JOB_MANAGER is not None:
+        JOB_MANAGER.shutdown()
 
 
 # Endpoints
@@ -154,20 +508,132 @@ async def health_check():
     Returns:
         HealthResponse: Estado del servicio y del modelo.
     """
+    ready = WARMUP is not None and WARMUP.ready
+    if MODEL is None:
+        service_status = "degraded"
+    else:
+        service_status = "healthy" if ready else "warming_up"
+    
     return HealthResponse(
-        status="healthy" if MODEL is not None else "degraded",
+        status=service_status,
         model_loaded=MODEL is not None,
-        model_type=MODEL_TYPE if MODEL_TYPE else "No model loaded"
+        model_type=MODEL_TYPE if MODEL_TYPE else "No model loaded",
+        ready=ready
     )
 
 
-@app.post("/predict", response_model=ChurnPrediction, tags=["Predictions"])
-async def predict_churn(customer: CustomerData):
+@app.get("/ready", tags=["General"])
+async def readiness_check():
+    """
+    Readiness: 200 solo cuando el modelo está cargado y caliente.
+    
+    Los orquestadores deben retener el tráfico mientras responda 503.
+    
+    Returns:
+        dict: Estado del calentamiento y latencias por tamaño de lote
+    """
+    if MODEL is None:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"ready": False, "state": "no_model"}
+        )
+    
+    report = WARMUP.report() if WARMUP is not None else {"ready": False, "state": "pending"}
+    if not report["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=report,
+            headers={"Retry-After": "1"}
+        )
+    return report
+
+
+def _check_predictor(mode: str):
+    """
+    Verifica que el predictor del modo solicitado esté disponible.
+    """
+    if mode == "ensemble":
+        if ENSEMBLE is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El ensemble no está disponible."
+            )
+    elif mode == "cascade" and CASCADE is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La cascada no está disponible."
+        )
+    elif MODEL is None:
+        logger.error("Intento de predicción sin modelo cargado")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modelo no está cargado. Por favor, contacte al administrador."
+        )
+
+
+@asynccontextmanager
+async def _admit(rows: int):
+    """
+    Reserva capacidad de inferencia; bajo sobrecarga responde 429/503 con Retry-After.
+    """
+    try:
+        await ADMISSION.acquire(rows)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ADMISSION.release(rows, (time.perf_counter() - start) * 1000)
+
+
+def _served_version(mode: str) -> str:
+    """
+    Versión con la que se registran las predicciones para /feedback (incluye el modo si no es 'single').
+    """
+    return MODEL_VERSION if mode == "single" else f"{mode}:{MODEL_VERSION}"
+
+
+def _predict_one(record: Dict[str, Any], mode: str, budget_ms: Optional[float]):
+    """
+    Inferencia de un cliente con el modelo principal o el ensemble.
+    
+    Returns:
+        tuple: (probabilidades (1, 2), información del ensemble o None, latencia en ms)
+    """
+    input_data = pd.DataFrame([record])
+    start = time.perf_counter()
+    ensemble_info = None
+    if mode == "ensemble":
+        churn_proba, ensemble_info = ENSEMBLE.predict_proba(input_data, budget_ms or ENSEMBLE_BUDGET_MS)
+        prediction_proba = np.column_stack([1 - churn_proba, churn_proba])
+    elif mode == "cascade":
+        churn_proba, _ = CASCADE.predict_proba(input_data)
+        prediction_proba = np.column_stack([1 - churn_proba, churn_proba])
+    else:
+        prediction_proba = MODEL.predict_proba(input_data, **PREDICT_KWARGS)
+    return prediction_proba, ensemble_info, (time.perf_counter() - start) * 1000
+
+
+@app.post("/predict", response_model=ChurnPrediction, response_model_exclude_none=True,
+          tags=["Predictions"])
+async def predict_churn(
+    customer: CustomerData,
+    mode: Literal["single", "ensemble", "cascade"] = Query("single", description="Modelo principal, ensemble o cascada"),
+    budget_ms: Optional[float] = Query(None, gt=0, description="Presupuesto de latencia del ensemble (ms)")
+):
     """
     Predice la probabilidad de churn para un cliente.
     
     Args:
         customer: Datos del cliente (CustomerData schema)
+        mode: 'single' (modelo principal), 'ensemble' (CatBoost + LightGBM + XGBoost) o
+            'cascade' (modelo lineal; el principal solo para clientes dudosos)
+        budget_ms: Presupuesto de latencia en modo ensemble (por defecto, ENSEMBLE_BUDGET_MS)
     
     Returns:
         ChurnPrediction: Predicción con probabilidad, clasificación y nivel de riesgo.
@@ -176,22 +642,26 @@ async def predict_churn(customer: CustomerData):
         HTTPException: Si el modelo no está cargado o hay un error en la predicción.
     """
     # Verificar que el modelo esté cargado
-    if MODEL is None:
-        logger.error("Intento de predicción sin modelo cargado")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="El modelo no está cargado. Por favor, contacte al administrador."
-        )
+    _check_predictor(mode)
     
     try:
-        # Convertir datos de entrada a DataFrame
-        input_data = pd.DataFrame([customer.dict()])
+        record = customer.dict()
         
         logger.info(f"Predicción solicitada para cliente con tenure={customer.tenure}, "
                    f"Contract={customer.Contract}, MonthlyCharges={customer.MonthlyCharges}")
         
-        # Realizar predicción
-        prediction_proba = MODEL.predict_proba(input_data)
+        # Realizar predicción (las peticiones idénticas en curso comparten la inferencia)
+        async with _admit(1):
+            if COALESCER is not None:
+                key = (MODEL_VERSION, mode, budget_ms, customer_key(record))
+                (prediction_proba, ensemble_info, latency_ms), coalesced = await COALESCER.run(
+                    key, _predict_one, record, mode, budget_ms
+                )
+            else:
+                prediction_proba, ensemble_info, latency_ms = await run_in_threadpool(
+                    _predict_one, record, mode, budget_ms
+                )
+                coalesced = False
         churn_probability = float(prediction_proba[0][1])
         
         # Determinar predicción binaria
@@ -206,13 +676,26 @@ async def predict_churn(customer: CustomerData):
         logger.info(f"Predicción exitosa: Churn={prediction_binary}, "
                    f"Probabilidad={churn_probability:.4f}, Riesgo={risk}")
         
+        if DRIFT_MONITOR is not None:
+            DRIFT_MONITOR.record([record], [churn_probability])
+        # Bajo sobrecarga el trabajo en sombra es lo primero que se descarta
+        if SHADOW_SCORER is not None and not coalesced and not ADMISSION.overloaded:
+            SHADOW_SCORER.submit([record], [churn_probability], latency_ms)
+        
+        request_id = uuid.uuid4().hex
+        PREDICTION_LOG.add([request_id], [churn_probability], _served_version(mode))
+        
         return ChurnPrediction(
             churn_probability=churn_probability,
             prediction=prediction_binary,
             risk_level=risk,
-            confidence=confidence
+            confidence=confidence,
+            ensemble=ensemble_info,
+            request_id=request_id
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error en predicción: {str(e)}")
         raise HTTPException(
@@ -221,47 +704,196 @@ async def predict_churn(customer: CustomerData):
         )
 
 
+def _check_batch_size(rows: int):
+    if rows > MAX_BATCH_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El lote tiene {rows} clientes; el máximo es {MAX_BATCH_ROWS} (usar /jobs para lotes mayores)"
+        )
+
+
+def _predict_frame(frame: pd.DataFrame, mode: str, budget_ms: Optional[float]):
+    """
+    Inferencia vectorizada de un bloque con el modelo principal o el ensemble.
+    
+    Args:
+        budget_ms: Presupuesto restante del ensemble (None = ENSEMBLE_BUDGET_MS; 0 = solo el primer miembro)
+    
+    Returns:
+        tuple: (probabilidades de churn (n,), información del ensemble o None)
+    """
+    if mode == "ensemble":
+        return ENSEMBLE.predict_proba(frame, ENSEMBLE_BUDGET_MS if budget_ms is None else budget_ms)
+    if mode == "cascade":
+        return CASCADE.predict_proba(frame)[0], None
+    return MODEL.predict_proba(frame, **PREDICT_KWARGS)[:, 1], None
+
+
+class _BatchBudget:
+    """
+    Presupuesto de latencia del ensemble para un lote completo.
+    
+    Todos los bloques comparten un único plazo, contado desde que llega la
+    petición (incluida la espera en el control de admisión); cada bloque
+    recibe el tiempo que queda.
+    """
+    
+    def __init__(self, budget_ms: Optional[float]):
+        self.budget_ms = budget_ms or ENSEMBLE_BUDGET_MS
+        self.deadline = time.perf_counter() + self.budget_ms / 1000
+    
+    def remaining_ms(self) -> float:
+        return max(self.deadline - time.perf_counter(), 0.0) * 1000
+
+
+def _merge_ensemble_info(infos: list, budget_ms: float) -> Dict[str, Any]:
+    """
+    Combina la información del ensemble de los bloques de un mismo lote.
+    
+    Cada bloque puede combinar miembros distintos según el tiempo restante,
+    así que los pesos se reportan por bloque ('chunks', con su 'offset' y
+    'rows'); en el nivel superior solo van las uniones de miembros.
+    """
+    return {
+        "members_used": sorted(set().union(*(i["members_used"] for i in infos))),
+        "members_timed_out": sorted(set().union(*(i["members_timed_out"] for i in infos))),
+        "members_failed": sorted(set().union(*(i["members_failed"] for i in infos))),
+        "partial": any(i["partial"] for i in infos),
+        "budget_ms": budget_ms,
+        "latency_ms": round(sum(i["latency_ms"] for i in infos), 3),
+        "chunks": infos,
+    }
+
+
+async def _score_records(records: list) -> np.ndarray:
+    """
+    Puntúa un micro-lote del canal WebSocket con el modelo principal.
+    """
+    frame = customers_to_frame(records)
+    async with _admit(len(records)):
+        start = time.perf_counter()
+        probabilities = await run_in_threadpool(lambda: MODEL.predict_proba(frame, **PREDICT_KWARGS)[:, 1])
+        latency_ms = (time.perf_counter() - start) * 1000
+    churn_probabilities = probabilities.astype(np.float64).tolist()
+    
+    if DRIFT_MONITOR is not None:
+        DRIFT_MONITOR.record(records, churn_probabilities)
+    if SHADOW_SCORER is not None and not ADMISSION.overloaded:
+        SHADOW_SCORER.submit(records, churn_probabilities, latency_ms)
+    return churn_probabilities
+
+
+@app.websocket("/ws/predict")
+async def predict_ws(websocket: WebSocket):
+    """
+    Canal de puntuación de larga duración para clientes internos.
+    
+    Cada mensaje {"id": ..., "customer": CustomerData} recibe una respuesta
+    con el mismo id y los campos de ChurnPrediction (o "error" y
+    "status_code"). Los mensajes que llegan juntos se puntúan en un mismo
+    lote; ver app/ws_scoring.py para el protocolo y el control de flujo.
+    
+    Si el modelo no está cargado la conexión se cierra con el código 1013
+    (intentar más tarde).
+    """
+    await websocket.accept()
+    if MODEL is None:
+        await websocket.close(code=1013, reason="El modelo no está cargado")
+        return
+    
+    channel = ScoringChannel(
+        _score_records, max_batch=WS_MAX_BATCH, max_wait_ms=WS_MAX_WAIT_MS, max_pending=WS_MAX_PENDING
+    )
+    await channel.serve(websocket)
+
+
 @app.post("/predict-batch", tags=["Predictions"])
-async def predict_batch(customers: list[CustomerData]):
+async def predict_batch(
+    customers: list[CustomerData],
+    mode: Literal["single", "ensemble", "cascade"] = Query("single", description="Modelo principal, ensemble o cascada"),
+    budget_ms: Optional[float] = Query(None, gt=0, description="Presupuesto de latencia del ensemble (ms)")
+):
     """
     Predice la probabilidad de churn para múltiples clientes.
     
+    El lote se puntúa en bloques de BATCH_CHUNK_ROWS clientes, con una sola
+    llamada vectorizada por bloque; cada bloque pasa por el control de
+    admisión. Lotes de más de MAX_BATCH_ROWS clientes se rechazan con 413.
+    En modo ensemble el presupuesto es de la petición completa: cada bloque
+    recibe el tiempo restante y 'ensemble.chunks' detalla miembros y pesos
+    de cada bloque.
+    
     Args:
         customers: Lista de datos de clientes
+        mode: 'single' (modelo principal), 'ensemble' o 'cascade'
+        budget_ms: Presupuesto de latencia en modo ensemble (del lote completo)
     
     Returns:
         dict: Predicciones para cada cliente
     """
-    if MODEL is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="El modelo no está cargado."
-        )
+    _check_predictor(mode)
+    _check_batch_size(len(customers))
     
     try:
-        predictions = []
+        records = [customer.dict() for customer in customers]
+        frame = customers_to_frame(records)
+        start = time.perf_counter()
+        budget = _BatchBudget(budget_ms)
+        ensemble_info = None
         
-        for idx, customer in enumerate(customers):
-            input_data = pd.DataFrame([customer.dict()])
-            prediction_proba = MODEL.predict_proba(input_data)
-            churn_probability = float(prediction_proba[0][1])
-            
+        # Por bloques: cada bloque pasa por el control de admisión por separado,
+        # de modo que un lote grande no monopoliza la capacidad de inferencia
+        chunk_probabilities, chunk_infos = [], []
+        for offset in range(0, len(frame), BATCH_CHUNK_ROWS):
+            chunk = frame.iloc[offset:offset + BATCH_CHUNK_ROWS]
+            async with _admit(len(chunk)):
+                probabilities, info = await run_in_threadpool(
+                    _predict_frame, chunk, mode, budget.remaining_ms()
+                )
+            chunk_probabilities.append(probabilities)
+            if info is not None:
+                chunk_infos.append({"offset": offset, "rows": len(chunk), **info})
+        churn_probabilities = np.concatenate(chunk_probabilities) if chunk_probabilities else []
+        if mode == "ensemble" and chunk_infos:
+            ensemble_info = _merge_ensemble_info(chunk_infos, budget.budget_ms)
+        
+        batch_id = uuid.uuid4().hex
+        predictions = []
+        for idx, churn_probability in enumerate(churn_probabilities):
+            churn_probability = float(churn_probability)
             predictions.append({
                 "customer_index": idx,
                 "churn_probability": churn_probability,
                 "prediction": "Yes" if churn_probability > 0.5 else "No",
                 "risk_level": get_risk_level(churn_probability),
-                "confidence": float(max(prediction_proba[0]))
+                "confidence": max(churn_probability, 1 - churn_probability),
+                "request_id": f"{batch_id}-{idx}"
             })
+        PREDICTION_LOG.add(
+            [p["request_id"] for p in predictions], [p["churn_probability"] for p in predictions],
+            _served_version(mode)
+        )
         
+        latency_ms = (time.perf_counter() - start) * 1000
         logger.info(f"Predicción batch exitosa: {len(predictions)} clientes procesados")
         
-        return {
+        # Un lote vacío no aporta al drift ni al modo sombra
+        if records and DRIFT_MONITOR is not None:
+            DRIFT_MONITOR.record(records, [p["churn_probability"] for p in predictions])
+        if records and SHADOW_SCORER is not None and not ADMISSION.overloaded:
+            SHADOW_SCORER.submit(records, [p["churn_probability"] for p in predictions], latency_ms)
+        
+        response = {
             "total_customers": len(customers),
             "timestamp": datetime.now().isoformat(),
             "predictions": predictions
         }
+        if ensemble_info is not None:
+            response["ensemble"] = ensemble_info
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f" Error en predicción batch: {str(e)}")
         raise HTTPException(
@@ -270,47 +902,947 @@ async def predict_batch(customers: list[CustomerData]):
         )
 
 
-@app.get("/model-info", tags=["Model"])
-async def get_model_info():
+@app.post("/predict-batch/stream", tags=["Predictions"])
+async def predict_batch_stream(
+    customers: list[CustomerData],
+    mode: Literal["single", "ensemble", "cascade"] = Query("single", description="Modelo principal, ensemble o cascada"),
+    budget_ms: Optional[float] = Query(None, gt=0, description="Presupuesto de latencia del ensemble (ms)"),
+    accept_encoding: Optional[str] = Header(None)
+):
     """
-    Obtiene información sobre el modelo cargado.
-    
+    Predice un lote y devuelve las predicciones como NDJSON en streaming.
+
+    Cada bloque de BATCH_CHUNK_ROWS clientes se envía en cuanto termina,
+    una línea por cliente con los mismos campos que /predict-batch
+    (incluido request_id, registrado para /feedback), sin construir la
+    respuesta completa en memoria. Un lote vacío devuelve un flujo vacío. La respuesta se comprime
+    con zstd o gzip según Accept-Encoding.
+
+    El primer bloque se puntúa antes de responder, de modo que los errores
+    de admisión (429/503) o de inferencia se devuelven con su código HTTP.
+    Si un bloque posterior falla, el flujo termina con una línea
+    {"error": ...} en lugar de la siguiente predicción.
+
+    Args:
+        customers: Lista de datos de clientes
+        mode: 'single' (modelo principal), 'ensemble' o 'cascade'
+        budget_ms: Presupuesto de latencia en modo ensemble (del lote completo)
+
     Returns:
-        dict: Información del modelo
+        StreamingResponse: Predicciones en formato application/x-ndjson
     """
-    if MODEL is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="El modelo no está cargado."
+    _check_predictor(mode)
+    _check_batch_size(len(customers))
+
+    encoding = negotiate_encoding(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if not customers:
+        compressor = StreamCompressor(encoding)
+        return StreamingResponse(
+            iter([compressor.finish()]), media_type=NDJSON_MEDIA_TYPE, headers=headers
         )
-    
+
+    records = [customer.dict() for customer in customers]
+    frame = customers_to_frame(records)
+    del customers
+    batch_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    budget = _BatchBudget(budget_ms)
+
+    async def score_chunk(offset: int) -> np.ndarray:
+        chunk = frame.iloc[offset:offset + BATCH_CHUNK_ROWS]
+        async with _admit(len(chunk)):
+            probabilities, _ = await run_in_threadpool(_predict_frame, chunk, mode, budget.remaining_ms())
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        PREDICTION_LOG.add(
+            [f"{batch_id}-{offset + i}" for i in range(len(probabilities))], probabilities.tolist(),
+            _served_version(mode)
+        )
+        return probabilities
+
     try:
-        info = {
-            "model_type": MODEL_TYPE,
-            "model_path": str(MODEL_PATH),
-            "pipeline_steps": list(MODEL.named_steps.keys()) if hasattr(MODEL, 'named_steps') else [],
-        }
-        
-        # Intentar obtener información adicional del clasificador
-        if hasattr(MODEL, 'named_steps'):
-            classifier = MODEL.named_steps.get('classifier')
-            if classifier:
-                if hasattr(classifier, 'n_estimators'):
-                    info['n_estimators'] = classifier.n_estimators
-                if hasattr(classifier, 'max_depth'):
-                    info['max_depth'] = classifier.max_depth
-                if hasattr(classifier, 'learning_rate'):
-                    info['learning_rate'] = classifier.learning_rate
-        
-        return info
-        
+        first = await score_chunk(0)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error al obtener información del modelo: {str(e)}")
+        logger.error(f" Error en predicción batch (stream): {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener información del modelo: {str(e)}"
+            detail=f"Error al realizar la predicción batch: {str(e)}"
         )
 
+    async def body():
+        compressor = StreamCompressor(encoding)
+        probabilities = [first]
+        yield compressor.compress(ndjson_predictions(first, 0, batch_id))
+        try:
+            for offset in range(BATCH_CHUNK_ROWS, len(frame), BATCH_CHUNK_ROWS):
+                chunk_probabilities = await score_chunk(offset)
+                probabilities.append(chunk_probabilities)
+                yield compressor.compress(ndjson_predictions(chunk_probabilities, offset, batch_id))
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f" Error en predicción batch (stream) tras {sum(map(len, probabilities))} clientes: {detail}")
+            yield compressor.compress(ndjson_line({"error": detail}))
+        else:
+            churn_probabilities = np.concatenate(probabilities).tolist()
+            latency_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Predicción batch (stream) exitosa: {len(churn_probabilities)} clientes procesados")
+            if DRIFT_MONITOR is not None:
+                DRIFT_MONITOR.record(records, churn_probabilities)
+            if SHADOW_SCORER is not None and not ADMISSION.overloaded:
+                SHADOW_SCORER.submit(records, churn_probabilities, latency_ms)
+        yield compressor.finish()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+def _check_feature_store():
+    """
+    Verifica que el almacén de características esté disponible y lo recarga si cambió.
+    """
+    if MODEL is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modelo no está cargado."
+        )
+    if FEATURE_STORE is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El almacén de características no está disponible (ejecutar jobs.build_feature_store)."
+        )
+    FEATURE_STORE.refresh()
+
+
+async def _predict_by_ids(customer_ids: list) -> Dict[str, Any]:
+    """
+    Puntúa clientes del almacén: vectores ya preprocesados directos al clasificador.
+    
+    Returns:
+        dict: Predicciones de los clientes encontrados e identificadores no encontrados
+    """
+    found, missing, encoded = FEATURE_STORE.lookup(customer_ids)
+    predictions = []
+    if found:
+        _, classifier = split_pipeline(MODEL)
+        async with _admit(len(found)):
+            probabilities = await run_in_threadpool(lambda: classifier.predict_proba(encoded, **PREDICT_KWARGS)[:, 1])
+        for customer_id, churn_probability in zip(found, probabilities.astype(np.float64).tolist()):
+            predictions.append({
+                "customerID": customer_id,
+                "churn_probability": churn_probability,
+                "prediction": "Yes" if churn_probability > 0.5 else "No",
+                "risk_level": get_risk_level(churn_probability),
+                "confidence": max(churn_probability, 1 - churn_probability)
+            })
+        PREDICTION_LOG.add([f"customer:{c}" for c in found], probabilities.tolist(), MODEL_VERSION)
+    return {"predictions": predictions, "not_found": missing}
+
+
+@app.get("/predict/{customer_id}", tags=["Predictions"])
+async def predict_by_id(customer_id: str):
+    """
+    Predice la probabilidad de churn de un cliente conocido a partir de su customerID.
+    
+    Los campos del cliente y su vector preprocesado se leen del almacén de
+    características (jobs/build_feature_store.py), así que no hay validación
+    ni preprocesado por petición. Son clientes de la base ya registrada, por
+    lo que no se registran en el monitor de deriva ni en los modelos en sombra.
+    
+    Args:
+        customer_id: Identificador del cliente
+        
+    Returns:
+        dict: customerID y campos de ChurnPrediction
+        
+    Raises:
+        HTTPException: 404 si el cliente no está en el almacén, 503 si no hay almacén o modelo
+    """
+    _check_feature_store()
+    
+    try:
+        result = await _predict_by_ids([customer_id])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error en predicción por customerID: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al realizar la predicción: {str(e)}"
+        )
+    
+    if not result["predictions"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cliente no encontrado en el almacén de características: {customer_id}"
+        )
+    return result["predictions"][0]
+
+
+@app.post("/predict/by-ids", tags=["Predictions"])
+async def predict_by_ids(request: CustomerIdsRequest):
+    """
+    Predice la probabilidad de churn de varios clientes conocidos a partir de sus customerID.
+    
+    Todos los vectores encontrados se puntúan con una sola llamada al
+    clasificador. Los identificadores desconocidos se devuelven en
+    'not_found' en lugar de hacer fallar la petición.
+    
+    Args:
+        request: Lista de customerID
+        
+    Returns:
+        dict: Predicciones de los clientes encontrados e identificadores no encontrados
+    """
+    _check_feature_store()
+    _check_batch_size(len(request.customer_ids))
+    
+    try:
+        start = time.perf_counter()
+        result = await _predict_by_ids(request.customer_ids)
+        logger.info(f"Predicción por customerID: {len(result['predictions'])} clientes, "
+                   f"{len(result['not_found'])} no encontrados "
+                   f"({(time.perf_counter() - start) * 1000:.2f} ms)")
+        return {
+            "total_customers": len(request.customer_ids),
+            "timestamp": datetime.now().isoformat(),
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f" Error en predicción por customerID: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al realizar la predicción batch: {str(e)}"
+        )
+
+
+@app.post("/what-if", tags=["Predictions"])
+async def what_if(request: WhatIfRequest):
+    """
+    Efecto de intervenciones de retención sobre la probabilidad de churn.
+    
+    Cada cliente se combina con cada escenario (cambio de contrato, pago
+    automático, TechSupport...) y todas las combinaciones de un bloque se
+    puntúan con una sola llamada al clasificador. Cada cliente cuesta
+    1 + escenarios filas de inferencia: los bloques tienen
+    BATCH_CHUNK_ROWS // (1 + escenarios) clientes y reservan esas filas en
+    el control de admisión. El preprocesado se hace una vez por cliente (ver
+    app/scenarios.py). Los escenarios que no cambian nada o dejan un registro
+    incoherente no se evalúan para ese cliente.
+    
+    Args:
+        request: Clientes, escenarios (por defecto DEFAULT_SCENARIOS) y top_k
+        
+    Returns:
+        dict: Efecto medio por escenario y, por cliente, los escenarios
+        ordenados de mayor a menor reducción de la probabilidad de churn
+    """
+    if MODEL is None or SCENARIO_SCORER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Los escenarios what-if no están disponibles."
+        )
+    _check_batch_size(len(request.customers))
+    
+    scenarios = request.scenarios or DEFAULT_SCENARIOS
+    if len(scenarios) > MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Se pidieron {len(scenarios)} escenarios; el máximo es {MAX_SCENARIOS}"
+        )
+    try:
+        scenarios = validate_scenarios(scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    try:
+        frame = customers_to_frame([customer.dict() for customer in request.customers])
+        start = time.perf_counter()
+        
+        # Filas puntuadas por cliente: la base más un escenario como máximo cada uno
+        rows_per_customer = 1 + len(scenarios)
+        chunk_customers = max(1, BATCH_CHUNK_ROWS // rows_per_customer)
+        baselines, chunk_results = [], []
+        for offset in range(0, len(frame), chunk_customers):
+            chunk = frame.iloc[offset:offset + chunk_customers]
+            async with _admit(len(chunk) * rows_per_customer):
+                baseline, results = await run_in_threadpool(SCENARIO_SCORER.score, chunk, scenarios)
+            results["customer_index"] += offset
+            baselines.append(baseline)
+            chunk_results.append(results)
+        baseline = np.concatenate(baselines) if baselines else np.array([])
+        results = pd.concat(chunk_results, ignore_index=True) if chunk_results else pd.DataFrame(
+            columns=["customer_index", "scenario", "churn_probability", "delta", "risk_level"]
+        )
+        summary = summarize(results, len(frame))
+        
+        if request.top_k is not None:
+            results = results.groupby("customer_index", sort=False).head(request.top_k)
+        columns = ["scenario", "churn_probability", "delta", "risk_level"]
+        # Una sola conversión a registros (un groupby por cliente es mucho más lento)
+        by_customer: Dict[int, list] = {}
+        for idx, record in zip(results["customer_index"].tolist(), results[columns].to_dict("records")):
+            by_customer.setdefault(idx, []).append(record)
+        customers = [
+            {
+                "customer_index": idx,
+                "churn_probability": p,
+                "risk_level": get_risk_level(p),
+                "scenarios": by_customer.get(idx, [])
+            }
+            for idx, p in enumerate(baseline.tolist())
+        ]
+        
+        logger.info(f"What-if: {len(frame)} clientes x {len(scenarios)} escenarios "
+                   f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return {
+            "total_customers": len(frame),
+            "timestamp": datetime.now().isoformat(),
+            "scenarios": summary.to_dict("records"),
+            "customers": customers
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error en escenarios what-if: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al evaluar los escenarios: {str(e)}"
+        )
+
+
+def _match_outcome(outcome) -> Optional[tuple]:
+    """
+    Predicción servida de un resultado: (probabilidad, versión del modelo) o None.
+    """
+    if outcome.request_id is not None:
+        return PREDICTION_LOG.pop(outcome.request_id)
+    if outcome.customerID is not None:
+        served = PREDICTION_LOG.pop(f"customer:{outcome.customerID}")
+        if served is None and SCORE_STORE is not None:
+            # Última puntuación batch del cliente (jobs.score_customers), una sola vez
+            # por puntuación: un reenvío del mismo resultado no se cuenta dos veces
+            stored = SCORE_STORE.get(outcome.customerID)
+            if stored is not None and PREDICTION_LOG.claim(f"store:{outcome.customerID}:{stored['scored_at']}"):
+                served = (stored["churn_probability"], stored["model_version"])
+        return served
+    return None
+
+
+@app.post("/feedback", tags=["Monitoring"])
+async def post_feedback(request: FeedbackRequest):
+    """
+    Registra resultados reales de churn de predicciones ya servidas.
+    
+    Cada resultado se empareja por request_id (devuelto por /predict y
+    /predict-batch) o por customerID (/predict/{customer_id}, /predict/by-ids
+    o, en su defecto, el almacén de puntuaciones) y actualiza las métricas
+    en ventana deslizante de la versión del modelo que hizo la predicción.
+    Cada predicción se empareja con un único resultado.
+    
+    Args:
+        request: Resultados observados
+        
+    Returns:
+        dict: Resultados recibidos, emparejados y no emparejados
+    """
+    by_version: Dict[str, tuple] = {}
+    unmatched = []
+    for outcome in request.outcomes:
+        served = _match_outcome(outcome)
+        if served is None:
+            unmatched.append(outcome.request_id or outcome.customerID)
+            continue
+        probability, version = served
+        probabilities, labels = by_version.setdefault(version, ([], []))
+        probabilities.append(probability)
+        labels.append(int(outcome.churned))
+    
+    for version, (probabilities, labels) in by_version.items():
+        FEEDBACK.record(version, probabilities, labels)
+    
+    matched = len(request.outcomes) - len(unmatched)
+    logger.info(f"Feedback: {matched} resultados emparejados, {len(unmatched)} sin predicción")
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "received": len(request.outcomes),
+        "matched": matched,
+        "unmatched": unmatched
+    }
+
+
+@app.get("/performance", tags=["Monitoring"])
+async def get_performance_report():
+    """
+    Rendimiento real del modelo según los resultados recibidos en /feedback.
+    
+    ROC-AUC, precisión/recall con umbral 0.5 y calibración sobre las últimas
+    FEEDBACK_WINDOW observaciones de cada versión del modelo, junto a las
+    métricas offline del notebook 2 (model_metrics.csv). Una versión se marca
+    'degraded' si su ROC-AUC cae más de 0.05 por debajo de la offline.
+    
+    Returns:
+        dict: Métricas por versión del modelo y métricas offline
+    """
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model_version": MODEL_VERSION,
+        "pending_predictions": len(PREDICTION_LOG),
+        "evicted_predictions": PREDICTION_LOG.evicted,
+        **FEEDBACK.report(OFFLINE_METRICS)
+    }
+
+
+def _check_explainer():
+    """
+    Verifica que el modelo y su explicador estén disponibles.
+    """
+    if MODEL is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modelo no está cargado."
+        )
+    if EXPLAINER is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"El modelo {MODEL_TYPE} no soporta explicaciones nativas."
+        )
+
+
+@app.post("/explain", response_model=ExplanationResponse, tags=["Explanations"])
+async def explain_churn(customer: CustomerData):
+    """
+    Explica la predicción de churn de un cliente.
+    
+    Devuelve la contribución exacta (TreeSHAP nativo del booster) de cada
+    campo de entrada, en escala log-odds y ordenada por magnitud.
+    
+    Args:
+        customer: Datos del cliente (CustomerData schema)
+    
+    Returns:
+        ExplanationResponse: Probabilidad, valor base y contribuciones por campo.
+    """
+    _check_explainer()
+    
+    try:
+        async with _admit(1):
+            explanations = await run_in_threadpool(EXPLAINER.explain, [customer])
+        return explanations[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error en explicación: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar la explicación: {str(e)}"
+        )
+
+
+@app.post("/explain-batch", tags=["Explanations"])
+async def explain_batch(customers: list[CustomerData]):
+    """
+    Explica las predicciones de churn de múltiples clientes.
+    
+    Igual que /predict-batch: bloques de BATCH_CHUNK_ROWS clientes, cada uno
+    con una llamada al booster y su paso por el control de admisión; lotes
+    de más de MAX_BATCH_ROWS clientes se rechazan con 413.
+    
+    Args:
+        customers: Lista de datos de clientes
+    
+    Returns:
+        dict: Explicaciones para cada cliente
+    """
+    _check_explainer()
+    _check_batch_size(len(customers))
+    
+    try:
+        explanations = []
+        for offset in range(0, len(customers), BATCH_CHUNK_ROWS):
+            chunk = customers[offset:offset + BATCH_CHUNK_ROWS]
+            async with _admit(len(chunk)):
+                explanations.extend(await run_in_threadpool(EXPLAINER.explain, chunk))
+        
+        return {
+            "total_customers": len(customers),
+            "timestamp": datetime.now().isoformat(),
+            "explanations": [
+                {"customer_index": idx, **explanation}
+                for idx, explanation in enumerate(explanations)
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f" Error en explicación batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar las explicaciones batch: {str(e)}"
+        )
+
+
+@app.get("/drift", tags=["Monitoring"])
+async def get_drift_report():
+    """
+    Reporta el drift del tráfico en vivo frente al perfil de entrenamiento.
+    
+    Returns:
+        dict: PSI/KS por característica y para la probabilidad de churn
+    """
+    if DRIFT_MONITOR is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El monitor de drift no está activo."
+        )
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **DRIFT_MONITOR.report()
+    }
+
+
+@app.get("/shadow", tags=["Monitoring"])
+async def get_shadow_report():
+    """
+    Compara los modelos retadores en sombra con el modelo principal.
+    
+    Returns:
+        dict: Concordancia, diferencia de probabilidad y latencias por retador
+    """
+    if SHADOW_SCORER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modo sombra no está activo (configurar SHADOW_MODELS)."
+        )
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **SHADOW_SCORER.report()
+    }
+
+
+def _check_job_manager():
+    if JOB_MANAGER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Los trabajos batch no están disponibles (modelo no cargado)."
+        )
+
+
+def _read_csv_body(body: bytes) -> pd.DataFrame:
+    try:
+        return pd.read_csv(io.BytesIO(body))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"CSV no válido: {str(e)}"
+        )
+
+
+def _submit_job(data: pd.DataFrame):
+    try:
+        job = JOB_MANAGER.submit(data)
+    except InvalidJobInput as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Cola de trabajos llena: {str(e)}",
+            headers={"Retry-After": "30"}
+        )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job)
+
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED, tags=["Jobs"])
+async def create_job(customers: list[CustomerData]):
+    """
+    Crea un trabajo batch asíncrono a partir de una lista de clientes.
+    
+    La respuesta es inmediata; el progreso se consulta en /jobs/{job_id}.
+    
+    Args:
+        customers: Lista de datos de clientes
+        
+    Returns:
+        dict: Identificador y estado inicial del trabajo
+    """
+    _check_job_manager()
+    # Conversión, validación y escritura de la entrada fuera del event loop
+    return await run_in_threadpool(
+        lambda: _submit_job(customers_to_frame([customer.dict() for customer in customers]))
+    )
+
+
+@app.post("/jobs/csv", status_code=status.HTTP_202_ACCEPTED, tags=["Jobs"])
+async def create_job_from_csv(request: Request):
+    """
+    Crea un trabajo batch a partir de un CSV enviado como cuerpo (text/csv).
+    
+    El CSV debe tener las columnas de CustomerData; customerID es opcional
+    y se copia a los resultados.
+    
+    Returns:
+        dict: Identificador y estado inicial del trabajo
+    """
+    _check_job_manager()
+    
+    body = await request.body()
+    # Lectura, validación y escritura de la entrada fuera del event loop
+    return await run_in_threadpool(lambda: _submit_job(_read_csv_body(body)))
+
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str):
+    """
+    Estado, progreso y throughput (filas/s) de un trabajo batch.
+    """
+    _check_job_manager()
+    
+    job = JOB_MANAGER.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trabajo no encontrado: {job_id}")
+    return job
+
+
+@app.get("/jobs/{job_id}/results", tags=["Jobs"])
+async def get_job_results(job_id: str):
+    """
+    Descarga en streaming (CSV) los resultados de un trabajo completado.
+    """
+    _check_job_manager()
+    
+    job = JOB_MANAGER.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trabajo no encontrado: {job_id}")
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo no está completado (estado: {job['status']})"
+        )
+    
+    return StreamingResponse(
+        JOB_MANAGER.iter_results(job_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.csv"'}
+    )
+
+
+@app.delete("/jobs/{job_id}", tags=["Jobs"])
+async def delete_job(job_id: str):
+    """
+    Elimina un trabajo terminado y sus archivos en disco.
+    """
+    _check_job_manager()
+    
+    if not JOB_MANAGER.delete(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Solo se pueden eliminar trabajos existentes y terminados"
+        )
+    return {"job_id": job_id, "deleted": True}
+
+
+def _check_score_store():
+    if SCORE_STORE is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El almacén de puntuaciones no está disponible (ejecutar jobs.score_customers)."
+        )
+
+
+@app.get("/at-risk", tags=["Scores"])
+async def get_at_risk(
+    k: int = Query(100, ge=1, le=10000, description="Número de clientes"),
+    risk_level: Optional[Literal["Low", "Medium", "High"]] = Query(None, description="Filtrar por nivel de riesgo"),
+):
+    """
+    Clientes con mayor probabilidad de churn según la última puntuación.
+    
+    Args:
+        k: Número de clientes a devolver
+        risk_level: Nivel de riesgo por el que filtrar (opcional)
+        
+    Returns:
+        dict: Clientes ordenados por probabilidad de churn descendente
+    """
+    _check_score_store()
+    
+    customers = SCORE_STORE.top_at_risk(k, risk_level)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "k": k,
+        "count": len(customers),
+        "customers": customers
+    }
+
+
+@app.get("/segments", tags=["Scores"])
+async def get_segments():
+    """
+    Riesgo medio y distribución de niveles por Contract x PaymentMethod.
+    
+    Returns:
+        dict: Agregados por segmento y totales por cada dimensión
+    """
+    _check_score_store()
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **SCORE_STORE.stats(),
+        **SCORE_STORE.segments()
+    }
+
+
+@app.get("/admission", tags=["Monitoring"])
+async def get_admission_report():
+    """
+    Estado del control de admisión: filas en curso, en cola y rechazos.
+    
+    Returns:
+        dict: Capacidad, contadores de rechazo y espera en cola (p50/p99)
+    """
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "max_batch_rows": MAX_BATCH_ROWS,
+        "batch_chunk_rows": BATCH_CHUNK_ROWS,
+        **ADMISSION.report()
+    }
+
+
+@app.get("/coalescing", tags=["Monitoring"])
+async def get_coalescing_report():
+    """
+    Contadores de coalescencia de predicciones idénticas en curso.
+    
+    Returns:
+        dict: Peticiones, inferencias ejecutadas y peticiones coalescidas
+    """
+    if COALESCER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La coalescencia de peticiones está desactivada (COALESCE_REQUESTS=0)."
+        )
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model_version": MODEL_VERSION,
+        **COALESCER.report()
+    }
+
+
+@app.get("/model-info", tags=["Model"])
+async def get_model_info():
+    """
+    Obtiene información sobre el modelo cargado.
+    
+    Returns:
+        dict: Información del modelo
+    """
+    if MODEL is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modelo no está cargado."
+        )
+    
+    try:
+        info = {
+            "model_type": MODEL_TYPE,
+            "model_version": MODEL_VERSION,
+            "model_path": str(MODEL_PATH),
+            "pipeline_steps": list(MODEL.named_steps.keys()) if hasattr(MODEL, 'named_steps') else [],
+        }
+        
+        # Intentar obtener información adicional del clasificador
+        if hasattr(MODEL, 'named_steps'):
+            classifier = MODEL.named_steps.get('classifier')
+            if classifier:
+                if hasattr(classifier, 'n_estimators'):
+                    info['n_estimators'] = classifier.n_estimators
+                if hasattr(classifier, 'max_depth'):
+                    info['max_depth'] = classifier.max_depth
+                if hasattr(classifier, 'learning_rate'):
+                    info['learning_rate'] = classifier.learning_rate
+        
+        if CASCADE is not None:
+            info['cascade'] = CASCADE.report()
+        if FEATURE_STORE is not None:
+            info['feature_store'] = FEATURE_STORE.report()
+        info['batch_chunk_rows'] = BATCH_CHUNK_ROWS
+        if AUTOTUNER is not None:
+            info['autotune'] = AUTOTUNER.report()
+        
+        return info
+        
+    except Exception as e:
+        logger.error(f"Error al obtener información del modelo: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener información del modelo: {str(e)}"
+        )
+
+
+def _check_admin(token: Optional[str]):
+    """
+    Los endpoints de administración no existen (404) si ADMIN_TOKEN no está definido.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administrador no válido")
+
+
+@app.get("/admin/profile", tags=["Admin"], include_in_schema=False)
+async def admin_profile(
+    seconds: float = Query(5.0, gt=0, le=60, description="Duración del muestreo"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Intervalo entre muestras"),
+    format: Literal["folded", "json"] = Query("folded", description="Pilas folded o resumen por función"),
+    include_idle: bool = Query(False, description="Incluir hilos inactivos"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Perfil de muestreo del proceso en vivo durante `seconds` segundos.
+    
+    El formato folded se puede pasar directamente a flamegraph.pl o abrir en
+    speedscope. El event loop sigue atendiendo peticiones mientras se muestrea.
+    """
+    _check_admin(x_admin_token)
+    
+    if not PROFILE_LOCK.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay un perfil en curso")
+    try:
+        profiler = SamplingProfiler(interval_ms=interval_ms, include_idle=include_idle)
+        counts = await run_in_threadpool(profiler.sample, seconds)
+    finally:
+        PROFILE_LOCK.release()
+    
+    if format == "folded":
+        return PlainTextResponse(SamplingProfiler.folded(counts))
+    return {
+        "seconds": seconds,
+        "samples": profiler.samples,
+        "stacks": len(counts),
+        "top_self": SamplingProfiler.top_functions(counts, sort_by="self"),
+        "top_total": SamplingProfiler.top_functions(counts, sort_by="total")
+    }
+
+
+@app.post("/admin/shadow/pause", tags=["Admin"], include_in_schema=False)
+async def admin_shadow_pause(x_admin_token: Optional[str] = Header(None)):
+    """
+    Descarta todo el trabajo en sombra nuevo hasta reanudarlo (p. ej. durante un pico de carga).
+    """
+    _check_admin(x_admin_token)
+    
+    if SHADOW_SCORER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modo sombra no está activo (configurar SHADOW_MODELS)."
+        )
+    SHADOW_SCORER.pause()
+    return {"paused": True}
+
+
+@app.post("/admin/shadow/resume", tags=["Admin"], include_in_schema=False)
+async def admin_shadow_resume(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reanuda la evaluación en sombra.
+    """
+    _check_admin(x_admin_token)
+    
+    if SHADOW_SCORER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modo sombra no está activo (configurar SHADOW_MODELS)."
+        )
+    SHADOW_SCORER.resume()
+    return {"paused": False}
+
+
+@app.post("/admin/autotune", tags=["Admin"], include_in_schema=False)
+async def admin_autotune(x_admin_token: Optional[str] = Header(None)):
+    """
+    Repite la medición del autoajuste (p. ej. tras mover el servicio a otro tipo de nodo).
+    
+    Mide una copia del modelo cargado y guarda el resultado en
+    AUTOTUNE_CACHE_PATH, sin cambiar el modelo en servicio: se aplica al
+    reiniciar los workers. El tráfico en curso compite por la CPU con la
+    medición; conviene lanzarlo con poca carga.
+    """
+    _check_admin(x_admin_token)
+    
+    if AUTOTUNER is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El modelo no está cargado."
+        )
+    if not AUTOTUNE_LOCK.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay un autoajuste en curso")
+    try:
+        tuner = build_autotuner(AUTOTUNER.model)
+        choice = await run_in_threadpool(tuner.run)
+        if choice is not None:
+            await run_in_threadpool(tuner.save, AUTOTUNE_CACHE_PATH, _autotune_key(tuner))
+    finally:
+        AUTOTUNE_LOCK.release()
+    return {
+        "applied": False,
+        "serving": AUTOTUNER.report()["choice"],
+        **tuner.report()
+    }
+
+
+@app.post("/admin/tracemalloc/start", tags=["Admin"], include_in_schema=False)
+async def admin_tracemalloc_start(x_admin_token: Optional[str] = Header(None)):
+    """
+    Activa tracemalloc y toma la instantánea de referencia.
+    
+    Mientras está activo, todas las asignaciones del proceso son más lentas.
+    """
+    _check_admin(x_admin_token)
+    ALLOCATION_TRACER.start()
+    return {"tracing": True, "nframes": ALLOCATION_TRACER.nframes}
+
+
+@app.get("/admin/tracemalloc/snapshot", tags=["Admin"], include_in_schema=False)
+async def admin_tracemalloc_snapshot(
+    limit: int = Query(20, ge=1, le=200),
+    group_by: Literal["lineno", "filename", "traceback"] = Query("lineno"),
+    scope: Optional[str] = Query(
+        "*/app/api.py",
+        description="Solo asignaciones con este archivo en la pila (vacío = todas)"
+    ),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Principales sitios de asignación (por defecto, los alcanzados desde app/api.py:
+    predict_churn, predict_batch y sus funciones de inferencia).
+    """
+    _check_admin(x_admin_token)
+    
+    if not ALLOCATION_TRACER.active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="tracemalloc no está activo (POST /admin/tracemalloc/start)"
+        )
+    return await run_in_threadpool(ALLOCATION_TRACER.snapshot, limit, group_by, scope or None)
+
+
+@app.post("/admin/tracemalloc/stop", tags=["Admin"], include_in_schema=False)
+async def admin_tracemalloc_stop(x_admin_token: Optional[str] = Header(None)):
+    """
+    Desactiva tracemalloc y libera sus trazas.
+    """
+    _check_admin(x_admin_token)
+    ALLOCATION_TRACER.stop()
+    return {"tracing": False}
+
 
 # Manejador de errores globales
 @app.exception_handler(Exception)
@@ -0,0 +1,329 @@
+"""
+Autoajuste del tamaño de bloque y de los hilos de inferencia del modelo.
+
+La velocidad de inferencia depende del tamaño de lote y de los hilos que
+usan XGBoost, LightGBM y CatBoost, y el óptimo cambia según el tipo de nodo.
+Los modelos se entrenan con ``n_jobs=-1``: con varios workers de uvicorn,
+cada proceso lanza un pool con todos los núcleos y se sobresuscriben.
+
+El autoajuste mide una copia del modelo cargado sobre una rejilla de
+tamaños de bloque y de hilos por proceso, con los hilos acotados por los
+núcleos disponibles entre el número de workers, y elige la combinación de
+mayor throughput cuya latencia p95 por llamada no supera el límite:
+
+- Entre las combinaciones a menos de ``tolerance`` del mejor throughput se
+  prefiere la de menos hilos y, después, la de menor bloque.
+- Si un bloque supera el límite (mediana), los bloques mayores con esos
+  hilos no se miden.
+- Si ninguna combinación cumple el límite se elige la de menor p95.
+
+El autoajuste no modifica el modelo: quien lo usa aplica la elección antes
+de atender peticiones (la API, al cargar el modelo). Con varios workers en
+el nodo el resultado se comparte en un archivo (``load_or_run``): el primer
+worker mide con el archivo bloqueado y el resto espera y reutiliza su
+resultado, en lugar de medir todos a la vez compitiendo por los núcleos.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from .features import limit_classifier_threads, set_classifier_threads, split_pipeline
+from .warmup import warmup_frames
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = (1, 8, 32, 128, 512, 2048)
+DEFAULT_LATENCY_CAP_MS = 50.0
+
+
+def available_cores() -> int:
+    """
+    Núcleos que puede usar el proceso (afinidad de CPU si está disponible).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_candidates(workers: int = 1, cores: Optional[int] = None) -> List[int]:
+    """
+    Hilos por proceso a medir: potencias de dos hasta los núcleos por worker.
+
+    Args:
+        workers: Procesos que atienden peticiones en el nodo
+        cores: Núcleos disponibles (por defecto, los del proceso)
+    """
+    budget = max(1, (cores or available_cores()) // max(1, workers))
+    counts = {budget}
+    n = 1
+    while n < budget:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """
+    Bloqueo exclusivo entre procesos sobre ``<path>.lock`` (espera si otro lo tiene).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def select(curve: List[Dict[str, Any]], tolerance: float = 0.05) -> Optional[Dict[str, Any]]:
+    """
+    Elige la combinación de la curva medida.
+
+    Args:
+        curve: Mediciones con threads, batch_size, p95_ms, rows_per_second y within_cap
+        tolerance: Pérdida relativa de throughput aceptada a cambio de menos hilos o menor bloque
+
+    Returns:
+        dict: Medición elegida (None si la curva está vacía)
+    """
+    candidates = [point for point in curve if point["within_cap"]]
+    if not candidates:
+        return min(curve, key=lambda point: point["p95_ms"]) if curve else None
+    best = max(point["rows_per_second"] for point in candidates)
+    close = [point for point in candidates if point["rows_per_second"] >= best * (1 - tolerance)]
+    return min(close, key=lambda point: (point["threads"] or 0, point["batch_size"]))
+
+
+class Autotuner:
+    """
+    Mide el modelo sobre una rejilla de bloque x hilos y elige la mejor combinación.
+
+    Args:
+        model: Pipeline a medir (con pasos 'preprocessor' y 'classifier'); no se modifica
+        batch_sizes: Tamaños de bloque a medir
+        thread_counts: Hilos por proceso a medir (por defecto, según workers y núcleos)
+        workers: Procesos que atienden peticiones en el nodo
+        latency_cap_ms: Latencia p95 máxima por llamada
+        repeats: Llamadas medidas por combinación
+        max_seconds: Tiempo máximo de medición
+        tolerance: Ver ``select``
+    """
+
+    def __init__(self, model: Any, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+                 thread_counts: Optional[Sequence[int]] = None, workers: int = 1,
+                 latency_cap_ms: float = DEFAULT_LATENCY_CAP_MS, repeats: int = 7,
+                 max_seconds: float = 15.0, tolerance: float = 0.05):
+        self.model = model
+        self.batch_sizes = tuple(sorted(set(batch_sizes)))
+        self.workers = workers
+        self.thread_counts = tuple(thread_counts or thread_candidates(workers))
+        self.latency_cap_ms = latency_cap_ms
+        self.repeats = repeats
+        self.max_seconds = max_seconds
+        self.tolerance = tolerance
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.curve: List[Dict[str, Any]] = []
+        self.choice: Optional[Dict[str, Any]] = None
+        self.source: Optional[str] = None
+        self.elapsed_ms: Optional[float] = None
+        self.tuned_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _measure(self, predict: Callable[[pd.DataFrame], Any], frame: pd.DataFrame) -> Dict[str, float]:
+        predict(frame)
+        latencies = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            predict(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50 = float(np.median(latencies))
+        return {
+            "p50_ms": round(p50, 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "rows_per_second": round(len(frame) * 1000 / p50),
+        }
+
+    def benchmark(self) -> List[Dict[str, Any]]:
+        """
+        Mide una copia del modelo con cada combinación de hilos y bloque.
+
+        Returns:
+            list: Una medición por combinación medida
+        """
+        model = copy.deepcopy(self.model)
+        _, classifier = split_pipeline(model)
+        # Clasificadores sin control de hilos: una sola pasada con su configuración
+        controllable = set_classifier_threads(classifier, 1) or type(classifier).__name__ == 'CatBoostClassifier'
+        thread_counts = self.thread_counts if controllable else (None,)
+
+        frames = warmup_frames(self.batch_sizes)
+        deadline = time.perf_counter() + self.max_seconds
+        curve = []
+        for threads in thread_counts:
+            kwargs = limit_classifier_threads(classifier, threads) if threads else {}
+            for size in self.batch_sizes:
+                if time.perf_counter() >= deadline:
+                    logger.warning("Autoajuste: tiempo máximo alcanzado; rejilla incompleta")
+                    return curve
+                point = {"threads": threads, "batch_size": size,
+                         **self._measure(lambda frame: model.predict_proba(frame, **kwargs), frames[size])}
+                point["within_cap"] = point["p95_ms"] <= self.latency_cap_ms
+                curve.append(point)
+                # La latencia crece con el bloque: los mayores tampoco cumplirían
+                if point["p50_ms"] > self.latency_cap_ms:
+                    break
+        return curve
+
+    def run(self) -> Optional[Dict[str, Any]]:
+        """
+        Mide y elige la combinación (sin modificar el modelo).
+
+        Los errores quedan registrados en el estado y no se propagan.
+
+        Returns:
+            dict: Combinación elegida (None si falla o ya hay un ajuste en curso)
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        self.state = "running"
+        self.error = None
+        start = time.perf_counter()
+        try:
+            curve = self.benchmark()
+            choice = select(curve, self.tolerance)
+            if choice is None:
+                raise RuntimeError("No se pudo medir ninguna combinación")
+            self.curve, self.choice = curve, choice
+            self.tuned_at = time.time()
+            self.source = "measured"
+            self.state = "done"
+            if not choice["within_cap"]:
+                logger.warning(
+                    f"Autoajuste: ninguna combinación cumple p95 <= {self.latency_cap_ms} ms; "
+                    f"se usa la de menor latencia"
+                )
+            logger.info(
+                f"Autoajuste: hilos={choice['threads']}, bloque={choice['batch_size']} "
+                f"({choice['rows_per_second']} filas/s, p95={choice['p95_ms']:.1f} ms)"
+            )
+            return choice
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Error en el autoajuste: {str(e)}")
+            return None
+        finally:
+            self.elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+            self._lock.release()
+
+    def cache_key(self, **extra: Any) -> Dict[str, Any]:
+        """
+        Condiciones de la medición: un resultado guardado solo se reutiliza si coinciden.
+
+        Args:
+            **extra: Datos adicionales del llamador (p. ej. la versión del modelo)
+        """
+        return {
+            **extra,
+            "cores": available_cores(),
+            "workers": self.workers,
+            "latency_cap_ms": self.latency_cap_ms,
+            "thread_counts": list(self.thread_counts),
+            "batch_sizes": list(self.batch_sizes),
+        }
+
+    def save(self, path: Path, key: Dict[str, Any]):
+        """
+        Guarda la elección y la curva medida en ``path`` (escritura atómica).
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "key": key,
+            "choice": self.choice,
+            "curve": self.curve,
+            "tuned_at": self.tuned_at,
+            "tuning_ms": self.elapsed_ms,
+        }, indent=2))
+        os.replace(tmp, path)
+
+    def load_or_run(self, path: Path, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Reutiliza el resultado guardado en ``path`` si coincide ``key``; si no, mide y lo guarda.
+
+        El archivo se bloquea durante la medición: con varios workers solo
+        mide uno y los demás esperan y leen su resultado.
+
+        Args:
+            path: Archivo JSON con el último resultado
+            key: Ver ``cache_key``
+
+        Returns:
+            dict: Combinación elegida (None si la medición falla)
+        """
+        path = Path(path)
+        with _file_lock(path):
+            try:
+                cached = json.loads(path.read_text()) if path.exists() else None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Resultado de autoajuste ilegible en {path}: {str(e)}")
+                cached = None
+            if cached and cached.get("key") == key and cached.get("choice"):
+                self.choice, self.curve = cached["choice"], cached.get("curve", [])
+                self.tuned_at, self.elapsed_ms = cached.get("tuned_at"), cached.get("tuning_ms")
+                self.source = "cached"
+                self.state = "done"
+                logger.info(f"Autoajuste reutilizado de {path}: hilos={self.choice['threads']}, "
+                            f"bloque={self.choice['batch_size']}")
+                return self.choice
+            choice = self.run()
+            if choice is not None:
+                self.save(path, key)
+            return choice
+
+    def report(self) -> Dict[str, Any]:
+        choice = None
+        if self.choice is not None:
+            choice = {
+                **self.choice,
+                "node_rows_per_second": self.choice["rows_per_second"] * self.workers,
+            }
+        return {
+            "state": self.state,
+            "error": self.error,
+            "workers": self.workers,
+            "cores": available_cores(),
+            "latency_cap_ms": self.latency_cap_ms,
+            "thread_counts": list(self.thread_counts),
+            "batch_sizes": list(self.batch_sizes),
+            "tuning_ms": self.elapsed_ms,
+            "tuned_at": self.tuned_at,
+            "source": self.source,
+            "choice": choice,
+            "curve": self.curve,
+        }
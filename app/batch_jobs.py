@@ -0,0 +1,386 @@
+"""
+Trabajos batch asíncronos con un pool local y resultados en disco.
+
+``POST /jobs`` guarda la entrada en disco y devuelve un identificador de
+inmediato; un pool acotado de hilos puntúa la entrada por bloques y escribe
+cada bloque terminado como un archivo parcial. Todo el estado vive en el
+directorio del trabajo::
+
+    <jobs_dir>/<job_id>/
+        input.csv           entrada validada
+        status.json         estado, progreso y throughput
+        part-00000.csv ...  resultados por bloque
+
+Los bloques se leen con los campos categóricos como códigos int8 y, si el
+modelo es un Pipeline separable por campo, se puntúan sobre la matriz
+compacta de ``app/compact.py`` en lugar del ColumnTransformer.
+
+Si el proceso se reinicia, los trabajos pendientes se reanudan desde el
+último bloque escrito. Los bloques que fallan se reintentan con espera
+exponencial antes de marcar el trabajo como fallido.
+"""
+
+import json
+import logging
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .compact import CompactScorer, read_compact_csv
+from .features import CATEGORY_VALUES, DATA_DIR, FEATURE_COLUMNS, NUMERIC_FEATURES
+from .schemas import CustomerData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = DATA_DIR / "jobs"
+
+# Columnas de salida de cada fila (mismas que /predict-batch)
+RESULT_COLUMNS = ['customer_index', 'customerID', 'churn_probability', 'prediction', 'risk_level', 'confidence']
+
+# Estados terminales
+FINISHED = ('completed', 'failed')
+
+# Reglas de los campos numéricos tomadas del esquema de CustomerData (rangos, enteros y
+# valores permitidos), para que /jobs rechace lo mismo que /predict sin validar fila a fila
+NUMERIC_RULES: Dict[str, Dict[str, Any]] = {
+    column: CustomerData.schema()['properties'][column] for column in NUMERIC_FEATURES
+}
+
+
+def _invalid_numeric(values: pd.Series, rule: Dict[str, Any]) -> pd.Series:
+    """
+    Máscara de valores que CustomerData rechazaría según su esquema JSON.
+    """
+    invalid = values.isnull()
+    if 'minimum' in rule:
+        invalid |= values < rule['minimum']
+    if 'exclusiveMinimum' in rule:
+        invalid |= values <= rule['exclusiveMinimum']
+    if 'maximum' in rule:
+        invalid |= values > rule['maximum']
+    if rule.get('type') == 'integer':
+        invalid |= values % 1 != 0
+    if 'enum' in rule:
+        invalid |= ~values.isin(rule['enum'])
+    return invalid
+
+
+class JobQueueFull(Exception):
+    """
+    Se alcanzó el máximo de trabajos pendientes; el cliente debe reintentar.
+    """
+
+
+class InvalidJobInput(ValueError):
+    """
+    La entrada del trabajo no tiene el formato de CustomerData.
+    """
+
+
+def validate_input(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valida y normaliza una entrada tabular con los campos de CustomerData.
+
+    Args:
+        df: DataFrame leído del CSV o construido desde JSON
+
+    Returns:
+        pd.DataFrame: Campos de CustomerData (y customerID si existe)
+
+    Raises:
+        InvalidJobInput: Si faltan columnas o hay valores no permitidos
+    """
+    missing = [c for c in FEATURE_COLUMNS if c not in df.columns]
+    if missing:
+        raise InvalidJobInput(f"Faltan columnas: {', '.join(missing)}")
+    if df.empty:
+        raise InvalidJobInput("La entrada no contiene filas")
+
+    df = df.copy()
+    for column in NUMERIC_FEATURES:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    # Misma imputación que el notebook 1
+    missing_total = df['TotalCharges'].isnull()
+    df.loc[missing_total, 'TotalCharges'] = df.loc[missing_total, 'MonthlyCharges'] * df.loc[missing_total, 'tenure']
+
+    errors = []
+    for column in NUMERIC_FEATURES:
+        invalid = _invalid_numeric(df[column], NUMERIC_RULES[column])
+        if invalid.any():
+            errors.append(f"{column}: {int(invalid.sum())} valores no válidos")
+    for column, allowed in CATEGORY_VALUES.items():
+        invalid = ~df[column].isin(allowed)
+        if invalid.any():
+            sample = df.loc[invalid, column].astype(str).unique()[:3]
+            errors.append(f"{column}: valores no permitidos {', '.join(sample)}")
+    if errors:
+        raise InvalidJobInput("; ".join(errors))
+
+    columns = (['customerID'] if 'customerID' in df.columns else []) + FEATURE_COLUMNS
+    return df[columns]
+
+
+class BatchJobManager:
+    """
+    Cola acotada de trabajos batch puntuados por un pool local de hilos.
+
+    Args:
+        model: Pipeline entrenado (o cualquier objeto con predict_proba)
+        jobs_dir: Directorio donde se guardan entradas, estado y resultados
+        max_workers: Trabajos puntuados en paralelo
+        max_pending: Máximo de trabajos en cola o en ejecución
+        chunk_size: Filas por bloque (por llamada a predict_proba)
+        max_retries: Reintentos por bloque ante errores transitorios
+        retry_backoff: Espera inicial entre reintentos (segundos, se duplica)
+        n_threads: Hilos de inferencia del clasificador (None = los del modelo)
+    """
+
+    def __init__(self, model: Any, jobs_dir: Path = DEFAULT_JOBS_DIR, max_workers: int = 1,
+                 max_pending: int = 16, chunk_size: int = 5000, max_retries: int = 3,
+                 retry_backoff: float = 0.5, n_threads: Optional[int] = None):
+        self.model = model
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-job")
+        try:
+            self._compact = CompactScorer(model, n_threads=n_threads)
+        except ValueError as e:
+            # Modelos que no son un Pipeline separable por campo: se usa su predict_proba
+            logger.info(f"Trabajos batch sin representación compacta: {str(e)}")
+            self._compact = None
+
+    # Estado persistido
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def _save_status(self, job: Dict[str, Any]):
+        path = self._job_dir(job['job_id']) / "status.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job, indent=2))
+        tmp.replace(path)
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            snapshot = dict(job)
+        self._save_status(snapshot)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return sum(job['status'] not in FINISHED for job in self._jobs.values())
+
+    def recover(self) -> int:
+        """
+        Carga los trabajos existentes en disco y reanuda los no terminados.
+
+        Returns:
+            int: Número de trabajos reanudados
+        """
+        resumed = 0
+        for status_path in sorted(self.jobs_dir.glob("*/status.json")):
+            try:
+                job = json.loads(status_path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Estado de trabajo ilegible {status_path}: {str(e)}")
+                continue
+            with self._lock:
+                self._jobs[job['job_id']] = job
+            if job['status'] not in FINISHED:
+                self._update(job['job_id'], status='queued')
+                self._executor.submit(self._run, job['job_id'])
+                resumed += 1
+        if resumed:
+            logger.info(f"Trabajos batch reanudados: {resumed}")
+        return resumed
+
+    # API pública
+
+    def submit(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Registra un trabajo y lo encola (no bloqueante).
+
+        Args:
+            data: Entrada con los campos de CustomerData
+
+        Returns:
+            dict: Estado inicial del trabajo
+
+        Raises:
+            InvalidJobInput: Si la entrada no es válida
+            JobQueueFull: Si ya hay max_pending trabajos sin terminar
+        """
+        data = validate_input(data)
+        with self._lock:
+            if self._closed:
+                raise JobQueueFull("El gestor de trabajos se está cerrando")
+            if sum(job['status'] not in FINISHED for job in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull(f"Hay {self.max_pending} trabajos pendientes")
+            job_id = uuid.uuid4().hex
+            job = {
+                "job_id": job_id,
+                "status": "queued",
+                "rows_total": len(data),
+                "rows_done": 0,
+                "chunks_total": -(-len(data) // self.chunk_size),
+                "chunks_done": 0,
+                "chunk_size": self.chunk_size,
+                "rows_per_second": None,
+                "error": None,
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            self._jobs[job_id] = job
+
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True)
+        data.to_csv(job_dir / "input.csv", index=False)
+        snapshot = dict(job)
+        self._save_status(snapshot)
+        self._executor.submit(self._run, job_id)
+        logger.info(f"Trabajo batch {job_id} encolado: {len(data)} filas")
+        return snapshot
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado y progreso de un trabajo (None si no existe).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def iter_results(self, job_id: str) -> Iterator[bytes]:
+        """
+        Resultados del trabajo como CSV, bloque a bloque desde disco.
+        """
+        job_dir = self._job_dir(job_id)
+        yield (",".join(RESULT_COLUMNS) + "\n").encode()
+        for part in sorted(job_dir.glob("part-*.csv")):
+            with open(part, 'rb') as f:
+                next(f)  # cabecera del bloque
+                for block in iter(lambda: f.read(1 << 16), b''):
+                    yield block
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Elimina un trabajo terminado y sus archivos.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] not in FINISHED:
+                return False
+            del self._jobs[job_id]
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return True
+
+    def shutdown(self, wait: bool = False):
+        """
+        Deja de aceptar trabajos; los pendientes se reanudan en el próximo arranque.
+        """
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # Ejecución
+
+    def _score_chunk(self, chunk: pd.DataFrame, offset: int) -> pd.DataFrame:
+        if self._compact is not None:
+            probabilities = self._compact.predict_proba(chunk)
+        else:
+            probabilities = self.model.predict_proba(chunk[FEATURE_COLUMNS])[:, 1].astype(np.float64)
+        return pd.DataFrame({
+            'customer_index': np.arange(offset, offset + len(chunk)),
+            'customerID': chunk['customerID'].to_numpy() if 'customerID' in chunk.columns else None,
+            'churn_probability': probabilities,
+            'prediction': np.where(probabilities > 0.5, "Yes", "No"),
+            # Umbrales de get_risk_level, vectorizados
+            'risk_level': np.where(probabilities < 0.3, "Low", np.where(probabilities < 0.7, "Medium", "High")),
+            'confidence': np.maximum(probabilities, 1 - probabilities),
+        }, columns=RESULT_COLUMNS)
+
+    def _run(self, job_id: str):
+        job_dir = self._job_dir(job_id)
+        job = self.status(job_id)
+        if self._closed or job is None:
+            return
+
+        # Tamaño de bloque del trabajo (puede venir de una ejecución anterior)
+        chunk_size = job['chunk_size']
+        chunks_done = job['chunks_done']
+        rows_done = job['rows_done']
+        started = time.perf_counter()
+        rows_this_run = 0
+        self._update(job_id, status='running', started_at=job['started_at'] or datetime.now().isoformat())
+
+        try:
+            reader = read_compact_csv(job_dir / "input.csv", chunksize=chunk_size)
+            for idx, chunk in enumerate(reader):
+                # Reanudación: los bloques ya escritos no se vuelven a puntuar
+                if idx < chunks_done:
+                    continue
+                if self._closed:
+                    return
+
+                offset = idx * chunk_size
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        result = self._score_chunk(chunk, offset)
+                        break
+                    except Exception as e:
+                        if attempt == self.max_retries:
+                            raise
+                        logger.warning(f"Trabajo {job_id}, bloque {idx}: reintento tras error: {str(e)}")
+                        time.sleep(self.retry_backoff * 2 ** attempt)
+
+                part = job_dir / f"part-{idx:05d}.csv"
+                tmp = part.with_suffix(".tmp")
+                result.to_csv(tmp, index=False)
+                tmp.replace(part)
+
+                rows_done += len(chunk)
+                rows_this_run += len(chunk)
+                elapsed = time.perf_counter() - started
+                self._update(
+                    job_id,
+                    chunks_done=idx + 1,
+                    rows_done=rows_done,
+                    rows_per_second=round(rows_this_run / elapsed, 1) if elapsed > 0 else None,
+                )
+
+            self._update(job_id, status='completed', finished_at=datetime.now().isoformat())
+            logger.info(f"Trabajo batch {job_id} completado: {rows_done} filas")
+        except Exception as e:
+            logger.error(f"Error en trabajo batch {job_id}: {str(e)}")
+            self._update(job_id, status='failed', error=str(e), finished_at=datetime.now().isoformat())
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Número de trabajos por estado.
+        """
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {
+            "jobs": counts,
+            "max_pending": self.max_pending,
+            "matrix_format": self._compact.fmt if self._compact is not None else None,
+        }
@@ -0,0 +1,275 @@
+"""
+Inferencia en cascada: modelo lineal barato primero, modelo completo solo si hay duda.
+
+La mayoría de los clientes caen con claridad en riesgo Low o High. La
+primera etapa (regresión logística sobre las columnas ya codificadas por el
+preprocesador del modelo completo) puntúa todas las filas; solo las que
+quedan dentro de la banda de incertidumbre ``[low, high]`` se escalan al
+pipeline completo.
+
+En la API el coste de una predicción lo domina el ColumnTransformer, no el
+clasificador, así que la primera etapa no usa el preprocesador: como
+StandardScaler y OneHotEncoder transforman cada campo por separado, el
+modelo lineal se compila en una tabla de contribuciones por categoría y una
+recta por campo numérico, y se evalúa directamente sobre el DataFrame de
+entrada. Solo las filas escaladas pasan por el preprocesador.
+
+``jobs/train_cascade.py`` entrena la primera etapa con la misma división
+del notebook 2 y mide, sobre el conjunto de prueba, la fracción escalada y
+la pérdida frente al modelo completo para varias bandas
+(``app/cascade_metrics.csv``).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import _probe_frame
+from .features import (
+    APP_DIR,
+    CATEGORY_VALUES,
+    FEATURE_COLUMNS,
+    NUMERIC_FEATURES,
+    build_feature_map,
+    split_pipeline,
+    thread_limited_pipeline,
+    to_dense,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_STAGE_PATH = APP_DIR / "cascade_first_stage.joblib"
+DEFAULT_BAND = (0.15, 0.85)
+
+# Por debajo de este tamaño de lote las categorías se codifican con un diccionario
+SMALL_BATCH_ROWS = 256
+
+# Umbrales de get_risk_level
+_LOW_RISK, _HIGH_RISK = 0.3, 0.7
+
+
+def parse_band(spec: str) -> Tuple[float, float]:
+    """
+    Interpreta una banda de incertidumbre en formato 'low,high' (p. ej. '0.15,0.85').
+
+    Raises:
+        ValueError: Si el formato no es válido o low > high.
+    """
+    low, _, high = spec.partition(",")
+    band = (float(low), float(high))
+    if not 0 <= band[0] <= band[1] <= 1:
+        raise ValueError(f"Banda de incertidumbre no válida: {spec}")
+    return band
+
+
+def _risk_codes(probabilities: np.ndarray) -> np.ndarray:
+    # 0 = Low, 1 = Medium, 2 = High (mismos umbrales que get_risk_level)
+    return np.digitize(probabilities, [_LOW_RISK, _HIGH_RISK])
+
+
+class LinearScorer:
+    """
+    Pipeline (preprocesador por campo + modelo lineal) compilado en tablas de contribución.
+
+    logit = intercepto + sum(tabla[campo][categoría]) + sum(pendiente * x + desplazamiento)
+
+    Args:
+        pipeline: Pipeline con pasos 'preprocessor' y 'classifier' (con coef_ e intercept_)
+
+    Raises:
+        ValueError: Si el pipeline no es separable por campo o no es lineal
+    """
+
+    def __init__(self, pipeline: Any):
+        preprocessor, classifier = split_pipeline(pipeline)
+        if not hasattr(classifier, 'coef_'):
+            raise ValueError("La primera etapa debe ser un modelo lineal (coef_)")
+        coef = np.ravel(classifier.coef_)
+        feature_map = build_feature_map(preprocessor)
+        base = _probe_frame().iloc[[0]]
+
+        def contributions(field: str, values) -> np.ndarray:
+            frame = pd.concat([base] * len(values), ignore_index=True)
+            frame[field] = list(values)
+            columns = np.flatnonzero(feature_map[:, FEATURE_COLUMNS.index(field)])
+            return to_dense(preprocessor.transform(frame))[:, columns] @ coef[columns]
+
+        self.intercept = float(np.ravel(classifier.intercept_)[0])
+        self.categories: Dict[str, pd.Index] = {}
+        self.codes: Dict[str, Dict[Any, int]] = {}
+        self.tables: Dict[str, np.ndarray] = {}
+        self.numeric: Dict[str, Tuple[float, float]] = {}
+        for field in FEATURE_COLUMNS:
+            if field in NUMERIC_FEATURES:
+                at = contributions(field, [0.0, 1.0])
+                self.numeric[field] = (float(at[1] - at[0]), float(at[0]))
+            else:
+                values = CATEGORY_VALUES[field]
+                self.categories[field] = pd.Index(values)
+                self.codes[field] = {value: code for code, value in enumerate(values)}
+                # Categoría desconocida (código -1): sin contribución, como handle_unknown='ignore'
+                self.tables[field] = np.append(contributions(field, values), 0.0)
+
+        # Comprobación de equivalencia con el pipeline original
+        probe = _probe_frame()
+        expected = pipeline.predict_proba(probe)[:, 1]
+        if not np.allclose(self.predict_proba(probe), expected, atol=1e-6):
+            raise ValueError("El pipeline no es separable por campo; no se puede compilar")
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Probabilidad de churn (n,) calculada directamente sobre los campos de entrada.
+        """
+        logit = np.full(len(X), self.intercept)
+        for field, index in self.categories.items():
+            column = X[field]
+            if len(column) <= SMALL_BATCH_ROWS:
+                # Lotes pequeños: un diccionario es más rápido que indexar con pandas
+                codes = self.codes[field]
+                codes = np.fromiter((codes.get(v, -1) for v in column.to_numpy()), np.intp, len(column))
+            else:
+                codes = index.get_indexer(column)
+            logit += self.tables[field][codes]
+        for field, (slope, offset) in self.numeric.items():
+            logit += slope * X[field].to_numpy(dtype=np.float64) + offset
+        return 1.0 / (1.0 + np.exp(-logit))
+
+
+class CascadePredictor:
+    """
+    Cascada de dos etapas con banda de incertidumbre configurable.
+
+    Args:
+        first_stage: Pipeline barato (preprocesador + clasificador lineal)
+        full_model: Pipeline completo (el modelo principal de la API)
+        band: Probabilidades de la primera etapa que se escalan (inclusive)
+        n_threads: Hilos de inferencia del modelo completo (None = los del modelo)
+    """
+
+    def __init__(self, first_stage: Any, full_model: Any, band: Tuple[float, float] = DEFAULT_BAND,
+                 n_threads: Optional[int] = None):
+        self.first_stage = first_stage
+        self.full_model, self.predict_kwargs = (
+            thread_limited_pipeline(full_model, n_threads) if n_threads else (full_model, {})
+        )
+        self.band = band
+        try:
+            self.scorer = LinearScorer(first_stage)
+        except ValueError as e:
+            logger.warning(f"Primera etapa sin compilar (se usa el pipeline): {str(e)}")
+            self.scorer = None
+        self.rows = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def first_stage_proba(self, X: pd.DataFrame) -> np.ndarray:
+        if self.scorer is not None:
+            return self.scorer.predict_proba(X)
+        return self.first_stage.predict_proba(X)[:, 1].astype(np.float64)
+
+    def predict_proba(self, X: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Predice con la primera etapa y escala al modelo completo las filas dudosas.
+
+        Returns:
+            tuple: (probabilidades de churn (n,), información de la cascada)
+        """
+        start = time.perf_counter()
+        proba = self.first_stage_proba(X)
+
+        low, high = self.band
+        uncertain = np.flatnonzero((proba >= low) & (proba <= high))
+        if len(uncertain):
+            proba[uncertain] = self.full_model.predict_proba(X.iloc[uncertain], **self.predict_kwargs)[:, 1]
+
+        with self._lock:
+            self.rows += len(proba)
+            self.escalated += len(uncertain)
+        info = {
+            "rows": int(len(proba)),
+            "escalated": int(len(uncertain)),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        return proba, info
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, escalated = self.rows, self.escalated
+        return {
+            "band": list(self.band),
+            "compiled_first_stage": self.scorer is not None,
+            "rows": rows,
+            "escalated": escalated,
+            "escalated_fraction": round(escalated / rows, 6) if rows else None,
+        }
+
+
+def evaluate_bands(first_proba: np.ndarray, full_proba: np.ndarray, y_true: np.ndarray,
+                   bands: Iterable[Tuple[float, float]]) -> pd.DataFrame:
+    """
+    Compara la cascada con el modelo completo para varias bandas de incertidumbre.
+
+    Args:
+        first_proba: Probabilidades de la primera etapa en el conjunto de prueba
+        full_proba: Probabilidades del modelo completo en el mismo conjunto
+        y_true: Etiquetas reales (0/1)
+        bands: Bandas (low, high) a evaluar
+
+    Returns:
+        pd.DataFrame: Una fila por banda con la fracción escalada, el acuerdo
+        con el modelo completo (predicción y nivel de riesgo) y la pérdida de
+        accuracy y ROC-AUC
+    """
+    from sklearn.metrics import roc_auc_score
+
+    first_proba = np.asarray(first_proba, dtype=np.float64)
+    full_proba = np.asarray(full_proba, dtype=np.float64)
+    y_true = np.asarray(y_true)
+    full_accuracy = np.mean((full_proba > 0.5) == y_true)
+    full_auc = roc_auc_score(y_true, full_proba)
+    full_risk = _risk_codes(full_proba)
+
+    rows = []
+    for low, high in bands:
+        escalate = (first_proba >= low) & (first_proba <= high)
+        cascade_proba = np.where(escalate, full_proba, first_proba)
+        cascade_risk = _risk_codes(cascade_proba)
+        # Decisiones de alta confianza: filas no escaladas que la cascada deja en Low o High
+        confident = ~escalate & (cascade_risk != 1)
+        cascade_accuracy = np.mean((cascade_proba > 0.5) == y_true)
+        cascade_auc = roc_auc_score(y_true, cascade_proba)
+        rows.append({
+            "band_low": low,
+            "band_high": high,
+            "escalated_pct": round(100 * escalate.mean(), 2),
+            "prediction_agreement": round(np.mean((cascade_proba > 0.5) == (full_proba > 0.5)), 4),
+            "risk_agreement": round(np.mean(cascade_risk == full_risk), 4),
+            "high_confidence_agreement": (
+                round(np.mean(cascade_risk[confident] == full_risk[confident]), 4) if confident.any() else None
+            ),
+            "accuracy_full": round(full_accuracy, 4),
+            "accuracy_cascade": round(cascade_accuracy, 4),
+            "accuracy_loss": round(full_accuracy - cascade_accuracy, 4),
+            "roc_auc_full": round(full_auc, 4),
+            "roc_auc_cascade": round(cascade_auc, 4),
+            "roc_auc_loss": round(full_auc - cascade_auc, 4),
+        })
+    return pd.DataFrame(rows)
+
+
+def select_band(metrics: pd.DataFrame, min_agreement: float = 0.99) -> Optional[Tuple[float, float]]:
+    """
+    Banda que escala menos filas manteniendo el acuerdo de decisiones de alta confianza.
+
+    Returns:
+        tuple: (low, high) o None si ninguna banda cumple min_agreement
+    """
+    eligible = metrics[metrics["high_confidence_agreement"].fillna(0) >= min_agreement]
+    if eligible.empty:
+        return None
+    best = eligible.sort_values("escalated_pct").iloc[0]
+    return float(best["band_low"]), float(best["band_high"])
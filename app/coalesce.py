@@ -0,0 +1,75 @@
+"""
+Coalescencia (single-flight) de predicciones idénticas en curso.
+
+Cuando llegan varias peticiones con la misma entrada canónica y la misma
+versión de modelo mientras la primera todavía se está calculando, solo la
+primera ejecuta la inferencia; el resto espera el mismo resultado. No es
+una cache: en cuanto el cálculo termina la clave se libera, y la siguiente
+petición idéntica vuelve a ejecutar la inferencia.
+
+La inferencia se ejecuta en el pool de hilos de Starlette como una tarea
+independiente, de modo que si el cliente que la inició se desconecta, los
+que esperan el mismo resultado no se ven afectados.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+
+    Debe usarse desde un único event loop (no requiere locks).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: Hashable, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    async def run(self, key: Hashable, fn: Callable, *args) -> Tuple[Any, bool]:
+        """
+        Ejecuta fn(*args) en un hilo, o espera la ejecución en curso con la misma clave.
+
+        Args:
+            key: Clave canónica (entrada + versión del modelo)
+            fn: Función síncrona a ejecutar
+
+        Returns:
+            tuple: (resultado, True si se reutilizó una ejecución en curso)
+        """
+        self.requests += 1
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            self.executed += 1
+        return await asyncio.shield(task), shared
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / self.requests, 6) if self.requests else None,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+        }
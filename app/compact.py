@@ -0,0 +1,247 @@
+"""
+Representación compacta de lotes grandes: códigos int8 y matriz CSR/float32.
+
+El camino estándar (``pd.read_csv`` + ColumnTransformer) mantiene los campos
+categóricos como columnas ``object`` (un objeto Python por celda) y produce
+una matriz densa float64 con 30 columnas de las que unas 20 son no nulas.
+Con lotes de millones de filas esos intermedios son los que agotan la
+memoria. Aquí:
+
+- Los campos categóricos se leen y guardan como códigos int8 frente a los
+  valores permitidos de CustomerData (``pd.CategoricalDtype``), sin pasar
+  por ``object``.
+- ``CompactEncoder`` compila el preprocesador ajustado (separable por campo:
+  StandardScaler y OneHotEncoder) en una tabla columna/valor por categoría y
+  una recta por campo numérico, y construye la matriz codificada
+  directamente desde los códigos, como CSR o densa float32.
+- El formato se elige por densidad: la CSR cuesta 8 bytes por valor no nulo
+  (float32 + índice int32) y la densa 4 por celda. Con este preprocesador
+  (30 columnas, hasta 19 no nulas por fila) la densa float32 es menor, y es
+  la que reciben todos los clasificadores, C-contigua y sin copias de
+  conversión. La CSR se usa con preprocesadores más dispersos, nunca con
+  XGBoost, que interpreta los ceros implícitos como valores faltantes.
+
+Los modelos de árboles trabajan internamente en float32, así que las
+probabilidades coinciden con las del pipeline original.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .ensemble import _probe_frame
+from .features import (
+    CATEGORICAL_FEATURES,
+    CATEGORY_VALUES,
+    FEATURE_COLUMNS,
+    NUMERIC_FEATURES,
+    build_feature_map,
+    split_pipeline,
+    thread_limited_classifier,
+    to_dense,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tipos de lectura: categorías fijas de CustomerData (códigos int8) y numéricos sin object
+CATEGORICAL_DTYPES: Dict[str, pd.CategoricalDtype] = {
+    field: pd.CategoricalDtype(list(CATEGORY_VALUES[field])) for field in CATEGORICAL_FEATURES
+}
+NUMERIC_DTYPES: Dict[str, Any] = {
+    'SeniorCitizen': np.int8,
+    'tenure': np.int16,
+    'MonthlyCharges': np.float64,
+    'TotalCharges': np.float64,
+}
+
+# Clasificadores que tratan los ceros implícitos de una matriz dispersa como faltantes
+SPARSE_AS_MISSING = ("XGBClassifier",)
+
+
+def read_compact_csv(path, **kwargs):
+    """
+    ``pd.read_csv`` con los campos categóricos como categorías y los numéricos sin object.
+
+    Los blancos de TotalCharges (CSV original) se leen como NaN; los valores
+    categóricos no permitidos quedan como NaN (código -1).
+
+    Args:
+        path: CSV con los campos de CustomerData
+        **kwargs: Argumentos adicionales de pd.read_csv (p. ej. chunksize)
+    """
+    dtypes = {**CATEGORICAL_DTYPES, **NUMERIC_DTYPES}
+    return pd.read_csv(path, dtype=dtypes, na_values={'TotalCharges': [' ', '']}, **kwargs)
+
+
+def to_compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte los campos categóricos de un DataFrame a categorías de CustomerData.
+    """
+    df = df.copy()
+    for field, dtype in CATEGORICAL_DTYPES.items():
+        if field in df.columns and df[field].dtype != dtype:
+            df[field] = df[field].astype(dtype)
+    return df
+
+
+def category_codes(column: pd.Series, field: str) -> np.ndarray:
+    """
+    Códigos int8 de un campo categórico (-1 = valor no permitido).
+
+    Si la columna ya tiene el tipo de CATEGORICAL_DTYPES los códigos se
+    devuelven sin copia.
+    """
+    if column.dtype == CATEGORICAL_DTYPES[field]:
+        return column.cat.codes.to_numpy()
+    # get_indexer devuelve -1 para valores fuera de las categorías (sin construir un Categorical)
+    return CATEGORICAL_DTYPES[field].categories.get_indexer(column).astype(np.int8)
+
+
+def matrix_format(encoder: "CompactEncoder", classifier: Any) -> str:
+    """
+    Formato de la matriz codificada para el clasificador: 'csr' si ocupa menos que la densa.
+    """
+    if type(classifier).__name__ in SPARSE_AS_MISSING:
+        return "dense"
+    # Cota superior de valores no nulos por fila: uno por campo
+    return "csr" if 8 * len(encoder.field_order) < 4 * encoder.n_columns else "dense"
+
+
+class CompactEncoder:
+    """
+    Preprocesador ajustado compilado para construir la matriz codificada desde códigos int8.
+
+    Args:
+        preprocessor: ColumnTransformer ajustado (separable por campo, salida one-hot)
+
+    Raises:
+        ValueError: Si el preprocesador no es separable por campo o no es one-hot/afín
+    """
+
+    def __init__(self, preprocessor: Any):
+        self.preprocessor = preprocessor
+        feature_map = build_feature_map(preprocessor)
+        self.n_columns = feature_map.shape[0]
+        base = _probe_frame().iloc[[0]]
+
+        def encode(field: str, values) -> np.ndarray:
+            frame = pd.concat([base] * len(values), ignore_index=True)
+            frame[field] = list(values)
+            return to_dense(preprocessor.transform(frame))[:, np.flatnonzero(feature_map[:, FEATURE_COLUMNS.index(field)])]
+
+        # Campos numéricos: una columna, transformación afín (x * pendiente + desplazamiento)
+        self.numeric: Dict[str, tuple] = {}
+        for field in NUMERIC_FEATURES:
+            columns = np.flatnonzero(feature_map[:, FEATURE_COLUMNS.index(field)])
+            at = encode(field, [0.0, 1.0, 1000.0])
+            if len(columns) != 1 or not np.isclose(at[2, 0], at[0, 0] + 1000 * (at[1, 0] - at[0, 0])):
+                raise ValueError(f"{field}: transformación no afín")
+            self.numeric[field] = (int(columns[0]), float(at[1, 0] - at[0, 0]), float(at[0, 0]))
+
+        # Campos categóricos: columna (-1 = ninguna, categoría eliminada o desconocida) y valor
+        self.category_columns: Dict[str, np.ndarray] = {}
+        self.category_values: Dict[str, np.ndarray] = {}
+        for field in CATEGORICAL_FEATURES:
+            columns = np.flatnonzero(feature_map[:, FEATURE_COLUMNS.index(field)])
+            encoded = encode(field, CATEGORY_VALUES[field])
+            if ((encoded != 0).sum(axis=1) > 1).any():
+                raise ValueError(f"{field}: codificación no one-hot")
+            hot = np.argmax(encoded != 0, axis=1)
+            present = encoded[np.arange(len(encoded)), hot] != 0
+            # Posición extra al final para el código -1
+            self.category_columns[field] = np.append(np.where(present, columns[hot], -1), -1).astype(np.int32)
+            self.category_values[field] = np.append(encoded[np.arange(len(encoded)), hot], 0).astype(np.float32)
+
+        # Campos ordenados por columna de salida: los índices de cada fila de la CSR quedan ordenados
+        first_column = {field: column for field, (column, _, _) in self.numeric.items()}
+        for field in CATEGORICAL_FEATURES:
+            used = self.category_columns[field][self.category_columns[field] >= 0]
+            first_column[field] = int(used.min()) if len(used) else self.n_columns
+        self.field_order = sorted(FEATURE_COLUMNS, key=first_column.get)
+
+        # Comprobación de equivalencia con el preprocesador original
+        probe = _probe_frame()
+        expected = to_dense(preprocessor.transform(probe)).astype(np.float32)
+        if not np.allclose(self.transform(probe, "dense"), expected, atol=1e-6):
+            raise ValueError("El preprocesador no es separable por campo; no se puede compilar")
+
+    def _slots(self, X: pd.DataFrame):
+        """
+        Columna y valor de cada campo para cada fila: dos matrices (n x campos).
+        """
+        n_rows = len(X)
+        columns = np.empty((n_rows, len(self.field_order)), dtype=np.int32)
+        values = np.empty((n_rows, len(self.field_order)), dtype=np.float32)
+        for slot, field in enumerate(self.field_order):
+            if field in self.numeric:
+                column, slope, offset = self.numeric[field]
+                columns[:, slot] = column
+                values[:, slot] = X[field].to_numpy(dtype=np.float64) * slope + offset
+            else:
+                codes = category_codes(X[field], field)
+                columns[:, slot] = self.category_columns[field][codes]
+                values[:, slot] = self.category_values[field][codes]
+        return columns, values
+
+    def transform(self, X: pd.DataFrame, fmt: str = "dense"):
+        """
+        Matriz codificada (n x columnas del preprocesador) en float32.
+
+        Args:
+            X: Campos de CustomerData (categóricos como texto o como categorías)
+            fmt: 'dense' (ndarray C-contiguo) o 'csr' (scipy.sparse.csr_matrix, índices int32)
+        """
+        n_rows = len(X)
+        if fmt == "dense":
+            # Campo a campo: solo temporales de tamaño n
+            matrix = np.zeros((n_rows, self.n_columns), dtype=np.float32)
+            for field, (column, slope, offset) in self.numeric.items():
+                matrix[:, column] = X[field].to_numpy(dtype=np.float64) * slope + offset
+            for field in CATEGORICAL_FEATURES:
+                codes = category_codes(X[field], field)
+                columns = self.category_columns[field][codes]
+                rows = np.flatnonzero(columns >= 0)
+                matrix[rows, columns[rows]] = self.category_values[field][codes[rows]]
+            return matrix
+
+        columns, values = self._slots(X)
+        present = columns >= 0
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        matrix = sparse.csr_matrix(
+            (values[present], columns[present], indptr), shape=(n_rows, self.n_columns), copy=False
+        )
+        matrix.has_sorted_indices = True
+        return matrix
+
+
+class CompactScorer:
+    """
+    Pipeline (preprocesador + clasificador) puntuado sobre la representación compacta.
+
+    Args:
+        pipeline: Pipeline con pasos 'preprocessor' y 'classifier'
+        fmt: Formato de la matriz (por defecto, el preferido por el clasificador)
+        n_threads: Hilos de inferencia del clasificador (None = no cambiarlos)
+
+    Raises:
+        ValueError: Si el preprocesador no se puede compilar
+    """
+
+    def __init__(self, pipeline: Any, fmt: Optional[str] = None, n_threads: Optional[int] = None):
+        preprocessor, self.classifier = split_pipeline(pipeline)
+        self.encoder = CompactEncoder(preprocessor)
+        self.fmt = fmt or matrix_format(self.encoder, self.classifier)
+        self.predict_kwargs: Dict[str, Any] = {}
+        if n_threads:
+            self.classifier, self.predict_kwargs = thread_limited_classifier(self.classifier, n_threads)
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Probabilidad de churn (n,).
+        """
+        matrix = self.encoder.transform(X, self.fmt)
+        return self.classifier.predict_proba(matrix, **self.predict_kwargs)[:, 1].astype(np.float64)
@@ -0,0 +1,266 @@
+"""
+Monitor de drift de características en streaming con memoria constante.
+
+Cada predicción actualiza contadores fijos: histogramas con bordes fijos
+para las variables numéricas, conteos por categoría para los campos
+Literal de CustomerData y un histograma de la probabilidad de churn.
+Los contadores se comparan (PSI y KS) con un perfil de referencia
+calculado una sola vez a partir del dataset limpio.
+
+Las actualizaciones se encolan sin bloquear y las procesa un hilo en
+segundo plano, fuera del camino de la petición.
+
+Con pocas observaciones el PSI es ruido de muestreo (unas pocas peticiones
+dejan la mayoría de bins vacíos y dan PSI > 10): hasta ``min_observations``
+el estado es ``insufficient_data`` y no se alerta.
+"""
+
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .features import CATEGORY_VALUES, CLEAN_DATA_PATH, FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_FEATURES = ['tenure', 'MonthlyCharges', 'TotalCharges']
+PROBABILITY_EDGES = np.linspace(0, 1, 11)[1:-1]
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+DEFAULT_MIN_OBSERVATIONS = 500
+_EPS = 1e-6
+
+
+def _bin_counts(values: np.ndarray, inner_edges: np.ndarray) -> np.ndarray:
+    """
+    Cuenta valores en bins definidos por bordes interiores (extremos abiertos).
+    """
+    idx = np.searchsorted(inner_edges, values, side='right')
+    return np.bincount(idx, minlength=len(inner_edges) + 1)
+
+
+def _category_counts(values: Sequence, categories: Sequence) -> np.ndarray:
+    """
+    Cuenta valores por categoría; la última posición acumula valores desconocidos.
+    """
+    lookup = {c: i for i, c in enumerate(categories)}
+    idx = np.fromiter((lookup.get(v, len(categories)) for v in values), dtype=np.int64)
+    return np.bincount(idx, minlength=len(categories) + 1)
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Calcula el PSI entre dos distribuciones de conteos sobre los mismos bins.
+    """
+    e = expected / max(expected.sum(), 1) + _EPS
+    a = actual / max(actual.sum(), 1) + _EPS
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Estadístico KS sobre histogramas: máxima diferencia entre las CDF por bin.
+    """
+    e = np.cumsum(expected) / max(expected.sum(), 1)
+    a = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(a - e)))
+
+
+def _status(psi: float) -> str:
+    if psi < PSI_MODERATE:
+        return "stable"
+    elif psi < PSI_SIGNIFICANT:
+        return "moderate"
+    return "significant"
+
+
+class ReferenceProfile:
+    """
+    Perfil de referencia con bordes fijos y conteos del dataset de entrenamiento.
+
+    Args:
+        data: DataFrame con los campos de CustomerData
+        probabilities: Probabilidades de churn del modelo sobre ``data`` (opcional)
+        n_bins: Número de bins por cuantiles para las variables numéricas
+    """
+
+    def __init__(self, data: pd.DataFrame, probabilities: Optional[np.ndarray] = None, n_bins: int = 10):
+        self.size = len(data)
+        self.edges: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, np.ndarray] = {}
+
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        for feature in HISTOGRAM_FEATURES:
+            values = data[feature].to_numpy(dtype=np.float64)
+            self.edges[feature] = np.unique(np.quantile(values, quantiles))
+            self.counts[feature] = _bin_counts(values, self.edges[feature])
+
+        for feature, categories in CATEGORY_VALUES.items():
+            self.counts[feature] = _category_counts(data[feature].tolist(), categories)
+
+        self.probability_counts = (
+            _bin_counts(np.asarray(probabilities), PROBABILITY_EDGES)
+            if probabilities is not None else None
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path = CLEAN_DATA_PATH, model=None) -> "ReferenceProfile":
+        """
+        Construye el perfil desde el CSV limpio, puntuándolo con el modelo si se indica.
+        """
+        data = pd.read_csv(path)[FEATURE_COLUMNS]
+        probabilities = model.predict_proba(data)[:, 1] if model is not None else None
+        return cls(data, probabilities)
+
+
+class DriftMonitor:
+    """
+    Acumula estadísticas de las peticiones en vivo y reporta drift frente a la referencia.
+
+    ``record`` solo encola y nunca bloquea. La cola se acota por filas (cada
+    actualización guarda los registros de una petición, hasta MAX_BATCH_ROWS),
+    así que la memoria pendiente no depende del tamaño de los lotes; si no
+    caben, la actualización se descarta y se contabiliza en ``dropped``.
+
+    Args:
+        reference: Perfil de referencia
+        max_queued_rows: Filas máximas pendientes de procesar en la cola
+        min_observations: Observaciones mínimas para evaluar el drift
+    """
+
+    def __init__(self, reference: ReferenceProfile, max_queued_rows: int = 50000,
+                 min_observations: int = DEFAULT_MIN_OBSERVATIONS):
+        self.reference = reference
+        self.min_observations = min_observations
+        self.observations = 0
+        self.dropped = 0
+        self._counts = {name: np.zeros_like(c) for name, c in reference.counts.items()}
+        self._probability_counts = np.zeros(len(PROBABILITY_EDGES) + 1, dtype=np.int64)
+        self.max_queued_rows = max_queued_rows
+        self._queued_rows = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Arranca el hilo de actualización en segundo plano.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Procesa las actualizaciones pendientes y detiene el hilo.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def flush(self):
+        """
+        Espera a que se procesen todas las actualizaciones encoladas.
+        """
+        self._queue.join()
+
+    def record(self, records: List[Dict[str, Any]], probabilities: Sequence[float]):
+        """
+        Encola las entradas y probabilidades de una petición (no bloqueante).
+        """
+        if not records:
+            return
+        with self._lock:
+            if self._queued_rows + len(records) > self.max_queued_rows:
+                self.dropped += len(records)
+                return
+            self._queued_rows += len(records)
+        self._queue.put_nowait((records, probabilities))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._update(*item)
+            except Exception as e:
+                logger.error(f"Error actualizando el monitor de drift: {str(e)}")
+            finally:
+                if item is not None:
+                    with self._lock:
+                        self._queued_rows -= len(item[0])
+                self._queue.task_done()
+
+    def _update(self, records: List[Dict[str, Any]], probabilities: Sequence[float]):
+        batch = {
+            name: _bin_counts(
+                np.fromiter((r[name] for r in records), dtype=np.float64, count=len(records)),
+                self.reference.edges[name]
+            )
+            for name in HISTOGRAM_FEATURES
+        }
+        for name, categories in CATEGORY_VALUES.items():
+            batch[name] = _category_counts([r[name] for r in records], categories)
+        probability_counts = _bin_counts(np.asarray(probabilities, dtype=np.float64), PROBABILITY_EDGES)
+
+        with self._lock:
+            for name, counts in batch.items():
+                self._counts[name] += counts
+            self._probability_counts += probability_counts
+            self.observations += len(records)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Compara los contadores acumulados con la referencia.
+
+        Returns:
+            dict: PSI (y KS para histogramas) por característica y para la probabilidad;
+            el estado es ``insufficient_data`` hasta reunir ``min_observations``
+        """
+        with self._lock:
+            counts = {name: c.copy() for name, c in self._counts.items()}
+            probability_counts = self._probability_counts.copy()
+            observations = self.observations
+
+        def status(psi: float) -> str:
+            return _status(psi) if observations >= self.min_observations else "insufficient_data"
+
+        features = {}
+        if observations:
+            for name, actual in counts.items():
+                expected = self.reference.counts[name]
+                psi = population_stability_index(expected, actual)
+                entry = {"psi": round(psi, 6), "status": status(psi)}
+                if name in HISTOGRAM_FEATURES:
+                    entry["ks"] = round(ks_statistic(expected, actual), 6)
+                else:
+                    entry["unknown_categories"] = int(actual[-1])
+                features[name] = entry
+
+        prediction = None
+        if observations and self.reference.probability_counts is not None:
+            psi = population_stability_index(self.reference.probability_counts, probability_counts)
+            prediction = {
+                "psi": round(psi, 6),
+                "ks": round(ks_statistic(self.reference.probability_counts, probability_counts), 6),
+                "status": status(psi),
+                "histogram": probability_counts.tolist(),
+            }
+
+        return {
+            "observations": observations,
+            "min_observations": self.min_observations,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+            "pending_rows": self._queued_rows,
+            "reference_size": self.reference.size,
+            "features": features,
+            "churn_probability": prediction,
+        }
@@ -0,0 +1,213 @@
+"""
+Ensemble de CatBoost, LightGBM y XGBoost con presupuesto de latencia.
+
+Los miembros comparten una única matriz preprocesada (los tres pipelines
+del notebook 2 ajustan el mismo preprocesador sobre el mismo X_train) y se
+ejecutan en paralelo en un pool de hilos. Las probabilidades se combinan
+con pesos configurables. Si un miembro no termina dentro del presupuesto
+de la petición, la respuesta se construye con los que sí terminaron y se
+informa en el resultado.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .features import (
+    APP_DIR,
+    CATEGORY_VALUES,
+    FEATURE_COLUMNS,
+    load_pipeline,
+    shipped_models,
+    split_pipeline,
+    thread_limited_pipeline,
+    to_dense,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Interpreta pesos en formato 'catboost:2,lightgbm:1,xgboost:1'.
+
+    Raises:
+        ValueError: Si el formato no es válido o algún peso es negativo.
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition(":")
+        weight = float(value) if value else 1.0
+        if weight < 0:
+            raise ValueError(f"Peso negativo para {name}: {weight}")
+        weights[name.strip()] = weight
+    return weights
+
+
+def _probe_frame() -> pd.DataFrame:
+    """
+    Filas sintéticas que recorren todas las categorías y varios valores numéricos.
+    """
+    n_rows = max(len(values) for values in CATEGORY_VALUES.values())
+    data = {
+        name: [values[i % len(values)] for i in range(n_rows)]
+        for name, values in CATEGORY_VALUES.items()
+    }
+    data['tenure'] = np.linspace(0, 72, n_rows).astype(int)
+    data['MonthlyCharges'] = np.linspace(18, 120, n_rows)
+    data['TotalCharges'] = np.linspace(0, 8000, n_rows)
+    return pd.DataFrame(data)[FEATURE_COLUMNS]
+
+
+class EnsemblePredictor:
+    """
+    Combina varios pipelines en paralelo respetando un presupuesto de latencia.
+
+    Args:
+        members: Nombre -> pipeline entrenado
+        weights: Nombre -> peso (por defecto, pesos iguales)
+        max_workers: Hilos del pool (por defecto, dos por miembro para que los
+            miembros rezagados no bloqueen la siguiente petición)
+        n_threads: Hilos de inferencia por miembro (None = los de cada modelo)
+    """
+
+    def __init__(self, members: Dict[str, Any], weights: Optional[Dict[str, float]] = None,
+                 max_workers: Optional[int] = None, n_threads: Optional[int] = None):
+        if not members:
+            raise ValueError("El ensemble necesita al menos un modelo")
+        weights = weights or {name: 1.0 for name in members}
+        unknown = set(weights) - set(members)
+        if unknown:
+            raise ValueError(f"Pesos para modelos no cargados: {', '.join(sorted(unknown))}")
+
+        # Los pipelines precargados se comparten: los hilos se limitan sin modificarlos
+        self.predict_kwargs: Dict[str, Dict[str, Any]] = {name: {} for name in members}
+        if n_threads:
+            limited = {name: thread_limited_pipeline(model, n_threads) for name, model in members.items()}
+            members = {name: model for name, (model, _) in limited.items()}
+            self.predict_kwargs = {name: kwargs for name, (_, kwargs) in limited.items()}
+        self.members = {name: split_pipeline(model) for name, model in members.items()}
+        self.pipelines = dict(members)
+        self.weights = {name: float(weights.get(name, 0.0)) for name in members}
+        if sum(self.weights.values()) <= 0:
+            raise ValueError("La suma de pesos del ensemble debe ser positiva")
+
+        self.preprocessor = self._shared_preprocessor()
+        self.timeouts = {name: 0 for name in members}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 2 * len(members),
+            thread_name_prefix="ensemble"
+        )
+
+    @classmethod
+    def from_names(cls, names: Optional[Sequence[str]] = None, weights: Optional[Dict[str, float]] = None,
+                   model_dir: Path = APP_DIR, **kwargs) -> "EnsemblePredictor":
+        """
+        Carga los miembros entre los ``model_*.joblib`` disponibles.
+
+        Args:
+            names: Modelos a incluir (por defecto, los de ``weights`` o todos)
+            weights: Pesos por modelo
+        """
+        available = shipped_models(model_dir)
+        names = list(names or weights or available)
+        unknown = [n for n in names if n not in available]
+        if unknown:
+            raise ValueError(
+                f"Modelos desconocidos: {', '.join(unknown)} (disponibles: {', '.join(available)})"
+            )
+        return cls({name: load_pipeline(available[name]) for name in names}, weights, **kwargs)
+
+    def _shared_preprocessor(self):
+        """
+        Devuelve un preprocesador común si todos los miembros transforman igual.
+        """
+        probe = _probe_frame()
+        preprocessors = [pre for pre, _ in self.members.values()]
+        reference = to_dense(preprocessors[0].transform(probe))
+        for pre in preprocessors[1:]:
+            other = to_dense(pre.transform(probe))
+            if other.shape != reference.shape or not np.allclose(other, reference):
+                logger.warning("Los preprocesadores del ensemble difieren; se preprocesa por miembro")
+                return None
+        return preprocessors[0]
+
+    @property
+    def normalized_weights(self) -> Dict[str, float]:
+        total = sum(self.weights.values())
+        return {name: w / total for name, w in self.weights.items()}
+
+    def _member_proba(self, name: str, X: Any) -> np.ndarray:
+        _, classifier = self.members[name]
+        if self.preprocessor is None:
+            return self.pipelines[name].predict_proba(X, **self.predict_kwargs[name])[:, 1]
+        return classifier.predict_proba(X, **self.predict_kwargs[name])[:, 1]
+
+    def predict_proba(self, X: pd.DataFrame, budget_ms: Optional[float] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Predice la probabilidad de churn combinando los miembros disponibles a tiempo.
+
+        Si ningún miembro termina dentro del presupuesto, se espera al primero.
+
+        Args:
+            X: DataFrame con las columnas de CustomerData
+            budget_ms: Presupuesto de latencia de la petición (None = esperar a todos)
+
+        Returns:
+            tuple: (probabilidades (n,), información del ensemble)
+        """
+        start = time.perf_counter()
+        shared = to_dense(self.preprocessor.transform(X)) if self.preprocessor is not None else X
+
+        active = [name for name, w in self.weights.items() if w > 0]
+        futures = {
+            self._executor.submit(self._member_proba, name, shared): name for name in active
+        }
+        remaining = None
+        if budget_ms is not None:
+            remaining = max(budget_ms / 1000 - (time.perf_counter() - start), 0)
+        done, not_done = wait(futures, timeout=remaining)
+        if not done:
+            done, not_done = wait(futures, return_when=FIRST_COMPLETED)
+
+        results, failed = {}, []
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failed.append(name)
+                logger.error(f"Error en miembro del ensemble {name}: {str(e)}")
+        if not results:
+            raise RuntimeError(f"Ningún miembro del ensemble respondió ({', '.join(failed)})")
+
+        timed_out = sorted(futures[f] for f in not_done)
+        with self._lock:
+            for name in timed_out:
+                self.timeouts[name] += 1
+
+        used = sorted(results)
+        total_weight = sum(self.weights[name] for name in used)
+        weights = {name: self.weights[name] / total_weight for name in used}
+        proba = sum(weights[name] * results[name] for name in used)
+
+        info = {
+            "members_used": used,
+            "members_timed_out": timed_out,
+            "members_failed": sorted(failed),
+            "weights": {name: round(w, 6) for name, w in weights.items()},
+            "partial": bool(timed_out or failed),
+            "budget_ms": budget_ms,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        return np.asarray(proba, dtype=np.float64), info
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,175 @@
+"""
+Explicaciones locales exactas basadas en las contribuciones nativas de los boosters.
+
+Sustituye el muestreo de LIME del notebook 3 por la salida TreeSHAP que
+exponen XGBoost (``pred_contribs``), LightGBM (``pred_contrib``) y CatBoost
+(``ShapValues``). Una sola pasada por el modelo devuelve contribuciones
+aditivas en escala log-odds, que se agregan a los campos originales de
+CustomerData.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .features import (
+    FEATURE_COLUMNS,
+    build_feature_map,
+    customer_key,
+    customers_to_frame,
+    split_pipeline,
+    thread_limited_classifier,
+    to_dense,
+)
+
+SUPPORTED_CLASSIFIERS = ('XGBClassifier', 'LGBMClassifier', 'CatBoostClassifier')
+
+
+class LRUCache:
+    """
+    Cache LRU acotada y segura entre hilos.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class TreeContributionExplainer:
+    """
+    Explicador de contribuciones por característica para pipelines con boosters.
+
+    Args:
+        model: Pipeline con pasos 'preprocessor' y 'classifier'
+        cache_size: Número máximo de explicaciones individuales en cache
+        n_threads: Hilos de inferencia del clasificador (None = los del modelo)
+
+    Raises:
+        ValueError: Si el clasificador no ofrece contribuciones nativas.
+    """
+
+    def __init__(self, model, cache_size: int = 1024, n_threads: Optional[int] = None):
+        self.preprocessor, self.classifier = split_pipeline(model)
+        self.classifier_name = type(self.classifier).__name__
+        if self.classifier_name not in SUPPORTED_CLASSIFIERS:
+            raise ValueError(
+                f"El clasificador {self.classifier_name} no soporta contribuciones nativas "
+                f"(soportados: {', '.join(SUPPORTED_CLASSIFIERS)})"
+            )
+        # LightGBM y CatBoost reciben los hilos en cada llamada (num_threads / thread_count)
+        self.predict_kwargs: Dict[str, Any] = {}
+        if n_threads:
+            self.classifier, self.predict_kwargs = thread_limited_classifier(self.classifier, n_threads)
+        self.feature_map = build_feature_map(self.preprocessor)
+        self.cache = LRUCache(cache_size)
+
+    def raw_contributions(self, X_transformed: np.ndarray) -> np.ndarray:
+        """
+        Calcula las contribuciones sobre la matriz ya preprocesada.
+
+        Returns:
+            np.ndarray: Matriz (n, n_transformadas + 1); la última columna es el valor base
+        """
+        if self.classifier_name == 'XGBClassifier':
+            import xgboost as xgb
+            booster = self.classifier.get_booster()
+            return booster.predict(xgb.DMatrix(X_transformed), pred_contribs=True)
+
+        if self.classifier_name == 'LGBMClassifier':
+            return np.asarray(self.classifier.predict(X_transformed, pred_contrib=True, **self.predict_kwargs))
+
+        from catboost import Pool
+        return self.classifier.get_feature_importance(Pool(X_transformed), type='ShapValues', **self.predict_kwargs)
+
+    def explain_frame(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Explica un DataFrame completo con una única llamada al booster.
+
+        Args:
+            X: DataFrame con las columnas originales de CustomerData
+
+        Returns:
+            tuple: (contribuciones (n, n_campos), valor base (n,), probabilidad de churn (n,))
+        """
+        X_transformed = to_dense(self.preprocessor.transform(X))
+        raw = np.asarray(self.raw_contributions(X_transformed), dtype=np.float64)
+        contributions = raw[:, :-1] @ self.feature_map
+        base_values = raw[:, -1]
+        probabilities = _sigmoid(raw.sum(axis=1))
+        return contributions, base_values, probabilities
+
+    def explain(self, customers: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Explica una lista de clientes, reutilizando la cache por entrada.
+
+        Solo los clientes que no están en cache pasan por el modelo, y lo
+        hacen en un único lote.
+
+        Args:
+            customers: Instancias de CustomerData o diccionarios equivalentes
+
+        Returns:
+            list: Una explicación por cliente, en el mismo orden de entrada
+        """
+        records = [c.dict() if hasattr(c, 'dict') else dict(c) for c in customers]
+        keys = [customer_key(r) for r in records]
+        results: List[Any] = [self.cache.get(k) for k in keys]
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            X = customers_to_frame([records[i] for i in missing])
+            contributions, base_values, probabilities = self.explain_frame(X)
+            for row, i in enumerate(missing):
+                explanation = self._format(
+                    records[i], contributions[row], base_values[row], probabilities[row]
+                )
+                self.cache.put(keys[i], explanation)
+                results[i] = explanation
+
+        return results
+
+    @staticmethod
+    def _format(record: Dict[str, Any], contributions: np.ndarray,
+                base_value: float, probability: float) -> Dict[str, Any]:
+        order = np.argsort(-np.abs(contributions))
+        return {
+            "churn_probability": float(probability),
+            "base_value": float(base_value),
+            "contributions": [
+                {
+                    "feature": FEATURE_COLUMNS[j],
+                    "value": record[FEATURE_COLUMNS[j]],
+                    "contribution": float(contributions[j]),
+                }
+                for j in order
+            ],
+        }
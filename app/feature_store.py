@@ -0,0 +1,254 @@
+"""
+Almacén local de características por cliente (archivos columnares memory-mapped).
+
+Guarda, para cada ``customerID``, los campos originales de CustomerData y
+su vector ya preprocesado por el ColumnTransformer del modelo. Con él,
+``/predict/{customer_id}`` y ``/predict/by-ids`` puntúan clientes conocidos
+sin validación ni preprocesado: buscan las filas por identificador y pasan
+el bloque de vectores directamente al clasificador. Estructura::
+
+    <store>/
+        manifest.json        firma del preprocesador, columnas y número de filas
+        ids.npy              customerID por fila
+        encoded.npy          matriz preprocesada (n_clientes x n_columnas), float64
+        raw/<campo>.npy      campos originales (numéricos o códigos de categoría)
+
+Los ``.npy`` se abren con ``mmap_mode='r'``: el sistema operativo carga solo
+las páginas consultadas y varios workers comparten la misma copia. El
+almacén se regenera con ``jobs/build_feature_store.py``, que escribe en un
+directorio temporal y lo sustituye de forma atómica; la API detecta el
+cambio por la fecha del manifiesto y lo vuelve a abrir.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import _probe_frame
+from .features import CATEGORY_VALUES, DATA_DIR, FEATURE_COLUMNS, NUMERIC_FEATURES, to_dense
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_STORE_PATH = DATA_DIR / "feature_store"
+
+
+def preprocessor_signature(preprocessor) -> str:
+    """
+    Huella del preprocesador: nombres de salida y transformación de filas de prueba.
+
+    Dos modelos con el mismo preprocesador ajustado (los del notebook 2)
+    tienen la misma firma y pueden usar el mismo almacén.
+    """
+    digest = hashlib.sha256()
+    digest.update("|".join(preprocessor.get_feature_names_out()).encode())
+    digest.update(np.ascontiguousarray(to_dense(preprocessor.transform(_probe_frame())), dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _encode_raw(column: str, values: pd.Series) -> np.ndarray:
+    if column in NUMERIC_FEATURES:
+        return values.to_numpy(dtype=np.float64)
+    # Categorías como códigos int8 en el orden de CustomerData
+    codes = pd.Categorical(values, categories=CATEGORY_VALUES[column]).codes
+    if (codes < 0).any():
+        raise ValueError(f"{column}: valores no permitidos en el CSV")
+    return codes.astype(np.int8)
+
+
+class _StoreState(NamedTuple):
+    index: Dict[str, int]
+    encoded: np.ndarray
+    raw: Dict[str, np.ndarray]
+    manifest: Dict[str, Any]
+    mtime: int
+
+
+def build_feature_store(customers: pd.DataFrame, preprocessor, path: Path = DEFAULT_FEATURE_STORE_PATH,
+                        chunk_size: int = 5000) -> Dict[str, Any]:
+    """
+    Construye el almacén desde un DataFrame indexado por customerID y lo publica de forma atómica.
+
+    Args:
+        customers: Campos de CustomerData indexados por customerID (ver load_customers)
+        preprocessor: ColumnTransformer ajustado del modelo
+        path: Directorio del almacén
+        chunk_size: Filas preprocesadas por bloque
+
+    Returns:
+        dict: Manifiesto del almacén
+
+    Raises:
+        ValueError: Si hay customerID duplicados o valores no permitidos
+    """
+    path = Path(path)
+    if customers.index.has_duplicates:
+        raise ValueError("Hay customerID duplicados")
+
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / "raw").mkdir(parents=True)
+
+    columns = list(preprocessor.get_feature_names_out())
+    n_rows = len(customers)
+    encoded = np.lib.format.open_memmap(tmp / "encoded.npy", mode="w+", dtype=np.float64,
+                                        shape=(n_rows, len(columns)))
+    for start in range(0, n_rows, chunk_size):
+        chunk = customers.iloc[start:start + chunk_size][FEATURE_COLUMNS]
+        encoded[start:start + len(chunk)] = to_dense(preprocessor.transform(chunk))
+    encoded.flush()
+    del encoded
+
+    np.save(tmp / "ids.npy", customers.index.to_numpy(dtype=str))
+    for column in FEATURE_COLUMNS:
+        np.save(tmp / "raw" / f"{column}.npy", _encode_raw(column, customers[column]))
+
+    manifest = {
+        "signature": preprocessor_signature(preprocessor),
+        "rows": n_rows,
+        "columns": columns,
+        "built_at": datetime.now().isoformat(),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    # Sustitución atómica: los lectores ven el almacén anterior o el nuevo completo
+    old = path.with_name(f"{path.name}.old-{os.getpid()}")
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+class FeatureStore:
+    """
+    Lectura del almacén: búsqueda por customerID y acceso a vectores y campos.
+
+    Al recargarse se sustituye de una vez el conjunto (índice, matrices,
+    manifiesto), de modo que una consulta en curso nunca mezcla dos versiones.
+
+    Args:
+        path: Directorio del almacén
+        signature: Firma esperada del preprocesador (None = no comprobar)
+
+    Raises:
+        ValueError: Si el almacén se generó con otro preprocesador
+    """
+
+    def __init__(self, path: Path = DEFAULT_FEATURE_STORE_PATH, signature: Optional[str] = None):
+        self.path = Path(path)
+        self.expected_signature = signature
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> _StoreState:
+        manifest_path = self.path / "manifest.json"
+        mtime = manifest_path.stat().st_mtime_ns
+        manifest = json.loads(manifest_path.read_text())
+        if self.expected_signature is not None and manifest["signature"] != self.expected_signature:
+            raise ValueError("El almacén de características se generó con otro preprocesador")
+        ids = np.load(self.path / "ids.npy")
+        raw = {
+            column: np.load(self.path / "raw" / f"{column}.npy", mmap_mode="r")
+            for column in FEATURE_COLUMNS
+        }
+        return _StoreState(
+            index={customer_id: row for row, customer_id in enumerate(ids.tolist())},
+            encoded=np.load(self.path / "encoded.npy", mmap_mode="r"),
+            raw=raw,
+            manifest=manifest,
+            mtime=mtime,
+        )
+
+    @property
+    def signature(self) -> str:
+        return self._state.manifest["signature"]
+
+    def __len__(self) -> int:
+        return len(self._state.index)
+
+    def refresh(self) -> bool:
+        """
+        Vuelve a abrir el almacén si el cargador lo regeneró.
+
+        Si la nueva versión no es compatible se sigue sirviendo la anterior
+        (sus archivos siguen mapeados aunque se hayan borrado del disco).
+
+        Returns:
+            bool: True si se recargó
+        """
+        try:
+            mtime = (self.path / "manifest.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._state.mtime:
+            return False
+        with self._lock:
+            if mtime == self._state.mtime:
+                return False
+            try:
+                self._state = self._load()
+            except (OSError, ValueError) as e:
+                logger.warning(f"No se pudo recargar el almacén de características: {str(e)}")
+                return False
+            self.reloads += 1
+        logger.info(f"Almacén de características recargado: {len(self)} clientes")
+        return True
+
+    def lookup(self, customer_ids: Sequence[str]) -> Tuple[List[str], List[str], np.ndarray]:
+        """
+        Busca clientes por identificador y devuelve sus vectores preprocesados.
+
+        Returns:
+            tuple: (identificadores encontrados, identificadores no encontrados,
+            matriz (n_encontrados x n_columnas) lista para el clasificador)
+        """
+        state = self._state
+        found, missing, rows = [], [], []
+        for customer_id in customer_ids:
+            row = state.index.get(customer_id)
+            if row is None:
+                missing.append(customer_id)
+            else:
+                found.append(customer_id)
+                rows.append(row)
+        # Indexado con un array: copia contigua de las filas pedidas
+        return found, missing, state.encoded[np.array(rows, dtype=np.intp)]
+
+    def records(self, customer_ids: Sequence[str]) -> pd.DataFrame:
+        """
+        Campos originales de CustomerData de los clientes indicados (los desconocidos se omiten).
+        """
+        state = self._state
+        rows = np.array([state.index[c] for c in customer_ids if c in state.index], dtype=np.intp)
+        data = {}
+        for column in FEATURE_COLUMNS:
+            values = state.raw[column][rows]
+            if column in NUMERIC_FEATURES:
+                data[column] = values
+            else:
+                data[column] = np.asarray(CATEGORY_VALUES[column], dtype=object)[values]
+        frame = pd.DataFrame(data, columns=FEATURE_COLUMNS)
+        frame['SeniorCitizen'] = frame['SeniorCitizen'].astype(np.int64)
+        frame['tenure'] = frame['tenure'].astype(np.int64)
+        return frame
+
+    def report(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "path": str(self.path),
+            "customers": len(state.index),
+            "columns": len(state.manifest["columns"]),
+            "signature": state.manifest["signature"],
+            "built_at": state.manifest["built_at"],
+            "reloads": self.reloads,
+        }
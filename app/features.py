@@ -0,0 +1,380 @@
+"""
+Utilidades de características compartidas por la API y los procesos offline.
+
+Centraliza la conversión de clientes a DataFrame, la separación del pipeline
+en preprocesador y clasificador, y el mapeo de las columnas transformadas
+(one-hot) de vuelta a los campos originales de CustomerData.
+"""
+
+import copy
+import hashlib
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, get_args
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .schemas import CustomerData
+
+APP_DIR = Path(__file__).parent
+DATA_DIR = APP_DIR.parent / "data"
+RAW_DATA_PATH = DATA_DIR / "telco_churn.csv"
+CLEAN_DATA_PATH = DATA_DIR / "telco_churn_clean.csv"
+RANDOM_STATE = 42
+
+# Orden canónico de los campos de entrada (mismo orden que el CSV limpio)
+FEATURE_COLUMNS: List[str] = list(CustomerData.__fields__.keys())
+NUMERIC_FEATURES: List[str] = ['SeniorCitizen', 'tenure', 'MonthlyCharges', 'TotalCharges']
+CATEGORICAL_FEATURES: List[str] = [c for c in FEATURE_COLUMNS if c not in NUMERIC_FEATURES]
+
+# Pipelines precargados por el proceso maestro en modo pre-fork (ver app/prefork.py)
+_PRELOADED: Dict[str, Any] = {}
+
+# Clasificadores XGBoost cargados en el proceso y sus hilos de inferencia
+# (ver set_xgboost_threads)
+_XGBOOST_CLASSIFIERS: 'weakref.WeakSet' = weakref.WeakSet()
+_XGBOOST_THREADS: Optional[int] = None
+
+# Valores permitidos de los campos Literal de CustomerData
+CATEGORY_VALUES: Dict[str, Tuple] = {
+    name: get_args(field.annotation)
+    for name, field in CustomerData.__fields__.items()
+    if get_args(field.annotation)
+}
+
+
+def get_risk_level(probability: float) -> str:
+    """
+    Determina el nivel de riesgo basado en la probabilidad de churn.
+
+    Args:
+        probability: Probabilidad de churn (0-1)
+
+    Returns:
+        str: 'Low', 'Medium', o 'High'
+    """
+    if probability < 0.3:
+        return "Low"
+    elif probability < 0.7:
+        return "Medium"
+    else:
+        return "High"
+
+
+def customers_to_frame(customers: Iterable[Any]) -> pd.DataFrame:
+    """
+    Convierte una colección de clientes en un DataFrame con las columnas en orden canónico.
+
+    Args:
+        customers: Instancias de CustomerData o diccionarios con los mismos campos
+
+    Returns:
+        pd.DataFrame: Una fila por cliente
+    """
+    records = [c.dict() if hasattr(c, 'dict') else dict(c) for c in customers]
+    return pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+
+
+def customer_key(record: Dict[str, Any]) -> Tuple:
+    """
+    Clave canónica y hashable de un cliente, usada para caches y deduplicación.
+
+    Args:
+        record: Diccionario con los campos de CustomerData
+
+    Returns:
+        tuple: Valores de los campos en orden canónico
+    """
+    return tuple(record[c] for c in FEATURE_COLUMNS)
+
+
+def split_pipeline(model) -> Tuple[Any, Any]:
+    """
+    Separa un Pipeline entrenado en su preprocesador y su clasificador.
+
+    Args:
+        model: Pipeline de scikit-learn con pasos 'preprocessor' y 'classifier'
+
+    Returns:
+        tuple: (preprocessor, classifier)
+
+    Raises:
+        ValueError: Si el modelo no tiene la estructura esperada.
+    """
+    steps = getattr(model, 'named_steps', None)
+    if not steps or 'preprocessor' not in steps or 'classifier' not in steps:
+        raise ValueError("El modelo debe ser un Pipeline con pasos 'preprocessor' y 'classifier'")
+    return steps['preprocessor'], steps['classifier']
+
+
+def to_dense(matrix) -> np.ndarray:
+    """
+    Devuelve la matriz transformada como ndarray denso.
+    """
+    if hasattr(matrix, 'toarray'):
+        return matrix.toarray()
+    return np.asarray(matrix)
+
+
+def build_feature_map(preprocessor, original_columns: List[str] = FEATURE_COLUMNS) -> np.ndarray:
+    """
+    Construye la matriz indicadora que agrega columnas transformadas en campos originales.
+
+    Usa ``preprocessor.get_feature_names_out()``: cada nombre tiene la forma
+    ``<transformador>__<columna>`` o ``<transformador>__<columna>_<categoría>``.
+
+    Args:
+        preprocessor: ColumnTransformer ajustado
+        original_columns: Campos originales de entrada
+
+    Returns:
+        np.ndarray: Matriz (n_transformadas, n_originales) con un 1 por fila
+    """
+    transformed_names = preprocessor.get_feature_names_out()
+    # Probar primero los nombres más largos para evitar prefijos ambiguos
+    candidates = sorted(original_columns, key=len, reverse=True)
+    mapping = np.zeros((len(transformed_names), len(original_columns)), dtype=np.float64)
+
+    for i, name in enumerate(transformed_names):
+        base = name.split('__', 1)[1] if '__' in name else name
+        match = next(
+            (c for c in candidates if base == c or base.startswith(c + '_')),
+            None
+        )
+        if match is None:
+            raise ValueError(f"No se pudo mapear la característica transformada '{name}'")
+        mapping[i, original_columns.index(match)] = 1.0
+
+    return mapping
+
+
+def preload_pipeline(path: Path, model: Any):
+    """
+    Registra un pipeline ya cargado para que ``load_pipeline`` lo reutilice.
+    """
+    _PRELOADED[str(Path(path).resolve())] = model
+
+
+def load_pipeline(path: Path):
+    """
+    Carga un pipeline desde disco, o devuelve el precargado si existe.
+
+    En modo pre-fork los workers heredan los modelos del proceso maestro y
+    comparten sus páginas de memoria (copy-on-write) en lugar de cargar
+    una copia propia.
+
+    Args:
+        path: Ruta al artefacto .joblib
+
+    Returns:
+        Pipeline entrenado
+    """
+    preloaded = _PRELOADED.get(str(Path(path).resolve()))
+    if preloaded is not None:
+        return preloaded
+    pipeline = joblib.load(path)
+    classifier = getattr(pipeline, 'named_steps', {}).get('classifier')
+    if type(classifier).__name__ == 'XGBClassifier':
+        _XGBOOST_CLASSIFIERS.add(classifier)
+        if _XGBOOST_THREADS is not None:
+            set_classifier_threads(classifier, _XGBOOST_THREADS)
+    return pipeline
+
+
+def shipped_models(model_dir: Path = APP_DIR) -> Dict[str, Path]:
+    """
+    Lista los modelos entrenados por el notebook 2 ('model_<nombre>.joblib').
+
+    Returns:
+        dict: Nombre del modelo en minúsculas -> ruta del artefacto
+    """
+    return {
+        path.stem.replace('model_', '', 1): path
+        for path in sorted(Path(model_dir).glob('model_*.joblib'))
+    }
+
+
+def row_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """
+    Huella de 64 bits de los campos de CustomerData de cada fila (vectorizada).
+
+    Las columnas se normalizan (numéricas a float64, categóricas a texto)
+    para que la huella no dependa de cómo se leyó el CSV.
+
+    Returns:
+        np.ndarray: Huellas como int64 (representable en SQLite)
+    """
+    canonical = pd.DataFrame({
+        column: (
+            df[column].astype(np.float64) if column in NUMERIC_FEATURES
+            else df[column].astype(str)
+        )
+        for column in FEATURE_COLUMNS
+    })
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy().view(np.int64)
+
+
+def model_version(path: Path) -> str:
+    """
+    Identificador de versión de un artefacto: nombre más hash de su contenido.
+
+    Returns:
+        str: Por ejemplo 'model_xgboost-3f2a9c1b0d4e'
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return f"{path.stem}-{digest.hexdigest()[:12]}"
+
+
+def load_customers(path: Path = RAW_DATA_PATH) -> pd.DataFrame:
+    """
+    Carga el CSV original indexado por customerID y aplica la limpieza del notebook 1.
+
+    TotalCharges se convierte a numérico y los valores faltantes se imputan
+    como MonthlyCharges * tenure.
+
+    Args:
+        path: Ruta al CSV con columna customerID
+
+    Returns:
+        pd.DataFrame: Campos de CustomerData (y Churn si existe) indexados por customerID
+    """
+    df = pd.read_csv(path)
+    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
+    missing = df['TotalCharges'].isnull()
+    df.loc[missing, 'TotalCharges'] = df.loc[missing, 'MonthlyCharges'] * df.loc[missing, 'tenure']
+    columns = FEATURE_COLUMNS + (['Churn'] if 'Churn' in df.columns else [])
+    return df.set_index('customerID')[columns]
+
+
+def load_clean_split(path: Path = CLEAN_DATA_PATH):
+    """
+    Reproduce la división estratificada 80/20 del notebook 2.
+
+    Args:
+        path: Ruta al CSV limpio
+
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test)
+    """
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(path)
+    X = df[FEATURE_COLUMNS]
+    y = df['Churn'].map({'No': 0, 'Yes': 1})
+    return train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y)
+
+
+def set_classifier_threads(classifier, n_threads: int) -> bool:
+    """
+    Fija el número de hilos de inferencia de un clasificador ya entrenado.
+
+    CatBoost no permite cambiar parámetros de un modelo entrenado; en ese
+    caso los hilos se deben pasar en cada llamada (``thread_count``).
+
+    Args:
+        classifier: Clasificador del pipeline
+        n_threads: Número de hilos
+
+    Returns:
+        bool: True si se pudo aplicar el cambio
+    """
+    name = type(classifier).__name__
+    if name == 'XGBClassifier':
+        classifier.set_params(n_jobs=n_threads)
+        classifier.get_booster().set_param({'nthread': n_threads})
+        return True
+    if name in ('LGBMClassifier', 'RandomForestClassifier'):
+        classifier.set_params(n_jobs=n_threads)
+        return True
+    return False
+
+
+def set_xgboost_threads(n_threads: int):
+    """
+    Fija los hilos de inferencia de todos los modelos XGBoost del proceso.
+
+    XGBoost no acepta los hilos por llamada (viven en el booster) y copiar
+    el booster para cada componente rompería el copy-on-write del modo
+    pre-fork, así que el límite es uno por proceso: el maestro lo fija con
+    el reparto de núcleos antes del fork y cada worker con el valor del
+    autoajuste. Los modelos que se carguen después lo heredan.
+
+    Args:
+        n_threads: Número de hilos
+    """
+    global _XGBOOST_THREADS
+    _XGBOOST_THREADS = n_threads
+    for classifier in list(_XGBOOST_CLASSIFIERS):
+        set_classifier_threads(classifier, n_threads)
+
+
+def limit_classifier_threads(classifier, n_threads: int) -> Dict[str, Any]:
+    """
+    Limita los hilos de inferencia y devuelve los kwargs a pasar en cada predicción.
+
+    Args:
+        classifier: Clasificador del pipeline
+        n_threads: Número de hilos
+
+    Returns:
+        dict: ``{}`` si el límite quedó aplicado al modelo, o ``{'thread_count': n}``
+        para CatBoost, que solo lo acepta por llamada
+    """
+    if set_classifier_threads(classifier, n_threads):
+        return {}
+    if type(classifier).__name__ == 'CatBoostClassifier':
+        return {'thread_count': n_threads}
+    return {}
+
+
+def thread_limited_classifier(classifier, n_threads: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Clasificador con los hilos de inferencia limitados, sin modificar el original.
+
+    Los pipelines precargados en modo pre-fork se comparten entre todos sus
+    usuarios (y sus páginas entre workers), así que nunca se modifican:
+    LightGBM y CatBoost reciben los hilos en cada llamada y RandomForest se
+    copia en superficie (los árboles se comparten). XGBoost se devuelve tal
+    cual y usa el límite del proceso (``set_xgboost_threads``).
+
+    Args:
+        classifier: Clasificador del pipeline
+        n_threads: Número de hilos
+
+    Returns:
+        tuple: (clasificador a usar, kwargs a pasar en cada predicción)
+    """
+    name = type(classifier).__name__
+    if name == 'CatBoostClassifier':
+        return classifier, {'thread_count': n_threads}
+    if name == 'LGBMClassifier':
+        return classifier, {'num_threads': n_threads}
+    if name != 'RandomForestClassifier':
+        return classifier, {}
+    limited = copy.copy(classifier)
+    set_classifier_threads(limited, n_threads)
+    return limited, {}
+
+
+def thread_limited_pipeline(pipeline, n_threads: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Pipeline con los hilos de inferencia limitados, sin modificar el original.
+
+    El preprocesador se comparte; ver ``thread_limited_classifier``.
+
+    Returns:
+        tuple: (pipeline a usar, kwargs a pasar en cada predicción)
+    """
+    _, classifier = split_pipeline(pipeline)
+    limited, predict_kwargs = thread_limited_classifier(classifier, n_threads)
+    if limited is classifier:
+        return pipeline, predict_kwargs
+    pipeline = copy.copy(pipeline)
+    pipeline.steps = [(name, limited if name == 'classifier' else step) for name, step in pipeline.steps]
+    return pipeline, predict_kwargs
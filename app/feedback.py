@@ -0,0 +1,299 @@
+"""
+Resultados reales de churn y métricas de rendimiento en ventana deslizante.
+
+Las predicciones servidas se guardan en un registro acotado (identificador
+de petición o customerID -> probabilidad y versión del modelo). Cuando llega
+el resultado observado por ``/feedback`` se empareja con su predicción y se
+actualizan las métricas de la versión del modelo que la hizo.
+
+Las métricas se mantienen de forma incremental sobre las últimas ``window``
+observaciones, con memoria constante: un búfer circular con la probabilidad
+y la etiqueta de cada observación, y contadores que se suman al entrar y se
+restan al salir de la ventana:
+
+- ROC-AUC a partir de histogramas de probabilidad por clase (``n_bins``
+  bins; el empate dentro de un bin cuenta como 1/2, error < 1/n_bins).
+- Precisión, recall y accuracy con umbral 0.5 (matriz de confusión).
+- Calibración: probabilidad media frente a tasa observada en 10 bins, ECE y
+  Brier score.
+
+El informe no recorre el histórico: cuesta O(n_bins).
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .features import APP_DIR
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_METRICS_PATH = APP_DIR / "model_metrics.csv"
+
+# Nombre del clasificador -> fila de model_metrics.csv (notebook 2)
+OFFLINE_MODEL_NAMES = {
+    "XGBClassifier": "XGBoost",
+    "LGBMClassifier": "LightGBM",
+    "CatBoostClassifier": "CatBoost",
+    "RandomForestClassifier": "RandomForest",
+}
+
+CALIBRATION_BINS = 10
+
+
+def load_offline_metrics(model_type: Optional[str], path: Path = OFFLINE_METRICS_PATH) -> Optional[Dict[str, float]]:
+    """
+    Métricas de test del notebook 2 para el tipo de clasificador indicado.
+
+    Returns:
+        dict: accuracy, precision, recall, f1 y roc_auc, o None si no están disponibles
+    """
+    name = OFFLINE_MODEL_NAMES.get(model_type or "")
+    if name is None or not Path(path).exists():
+        return None
+    metrics = pd.read_csv(path).set_index("Modelo")
+    if name not in metrics.index:
+        return None
+    row = metrics.loc[name]
+    return {
+        "model": name,
+        "accuracy": round(float(row["Accuracy"]), 4),
+        "precision": round(float(row["Precision"]), 4),
+        "recall": round(float(row["Recall"]), 4),
+        "f1": round(float(row["F1-Score"]), 4),
+        "roc_auc": round(float(row["ROC-AUC"]), 4),
+    }
+
+
+class PredictionLog:
+    """
+    Predicciones servidas pendientes de resultado, con tamaño máximo.
+
+    Al llenarse se descartan las más antiguas. Cada predicción se empareja
+    como mucho con un resultado: ``pop`` la elimina del registro, y
+    ``claim`` marca como emparejadas las que no están en él (puntuaciones
+    del almacén batch).
+
+    Args:
+        max_entries: Predicciones recordadas como máximo
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.evicted = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._claimed: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, keys: Sequence[str], probabilities: Sequence[float], model_version: str):
+        """
+        Registra predicciones (una clave por predicción; una clave repetida se sustituye).
+        """
+        with self._lock:
+            for key, probability in zip(keys, probabilities):
+                self._entries.pop(key, None)
+                self._entries[key] = (float(probability), model_version)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(overflow, 0)):
+                self._entries.popitem(last=False)
+            self.evicted += max(overflow, 0)
+
+    def pop(self, key: str) -> Optional[Tuple[float, str]]:
+        """
+        Extrae la predicción de una clave: (probabilidad, versión del modelo) o None.
+        """
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def claim(self, key: str) -> bool:
+        """
+        Marca como emparejada una predicción servida fuera del registro.
+
+        Se recuerdan como mucho ``max_entries`` claves (las más antiguas se olvidan).
+
+        Returns:
+            bool: True la primera vez; False si la clave ya tenía resultado
+        """
+        with self._lock:
+            if key in self._claimed:
+                return False
+            self._claimed[key] = None
+            if len(self._claimed) > self.max_entries:
+                self._claimed.popitem(last=False)
+            return True
+
+
+class RollingMetrics:
+    """
+    Métricas de clasificación sobre las últimas ``window`` observaciones.
+
+    Args:
+        window: Observaciones en la ventana
+        n_bins: Bins de probabilidad para el ROC-AUC
+    """
+
+    def __init__(self, window: int = 5000, n_bins: int = 1000):
+        self.window = window
+        self.n_bins = n_bins
+        self.total = 0
+        self._probabilities = np.zeros(window, dtype=np.float64)
+        self._labels = np.zeros(window, dtype=np.int8)
+        self._size = 0
+        self._next = 0
+        # Contadores de la ventana
+        self._positive_hist = np.zeros(n_bins, dtype=np.int64)
+        self._negative_hist = np.zeros(n_bins, dtype=np.int64)
+        self._confusion = np.zeros((2, 2), dtype=np.int64)  # [real, predicho]
+        self._calibration_count = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self._calibration_positives = np.zeros(CALIBRATION_BINS, dtype=np.int64)
+        self._calibration_sum = np.zeros(CALIBRATION_BINS, dtype=np.float64)
+        self._squared_error = 0.0
+
+    def _apply(self, probabilities: np.ndarray, labels: np.ndarray, sign: int):
+        bins = np.minimum((probabilities * self.n_bins).astype(np.intp), self.n_bins - 1)
+        np.add.at(self._positive_hist, bins[labels == 1], sign)
+        np.add.at(self._negative_hist, bins[labels == 0], sign)
+        np.add.at(self._confusion, (labels, (probabilities > 0.5).astype(np.intp)), sign)
+        calibration = np.minimum((probabilities * CALIBRATION_BINS).astype(np.intp), CALIBRATION_BINS - 1)
+        np.add.at(self._calibration_count, calibration, sign)
+        np.add.at(self._calibration_positives, calibration, sign * labels)
+        np.add.at(self._calibration_sum, calibration, sign * probabilities)
+        self._squared_error += sign * float(np.sum((probabilities - labels) ** 2))
+
+    def update(self, probabilities: Sequence[float], labels: Sequence[int]):
+        """
+        Añade observaciones; las que salen de la ventana se restan de los contadores.
+        """
+        probabilities = np.clip(np.asarray(probabilities, dtype=np.float64), 0.0, 1.0)
+        labels = np.asarray(labels, dtype=np.int8).astype(np.intp)
+        self.total += len(labels)
+        # Si el lote es mayor que la ventana solo cuentan las últimas observaciones
+        probabilities, labels = probabilities[-self.window:], labels[-self.window:]
+
+        positions = (self._next + np.arange(len(labels))) % self.window
+        # Hasta llenarse el búfer ocupa las posiciones [0, size); después, todas
+        old = positions if self._size == self.window else positions[positions < self._size]
+        if len(old):
+            self._apply(self._probabilities[old], self._labels[old].astype(np.intp), -1)
+
+        self._probabilities[positions] = probabilities
+        self._labels[positions] = labels
+        self._apply(probabilities, labels, 1)
+        self._next = (self._next + len(labels)) % self.window
+        self._size = min(self._size + len(labels), self.window)
+
+    def roc_auc(self) -> Optional[float]:
+        positives, negatives = self._positive_hist.sum(), self._negative_hist.sum()
+        if positives == 0 or negatives == 0:
+            return None
+        negatives_below = np.cumsum(self._negative_hist) - self._negative_hist
+        pairs = np.sum(self._positive_hist * (negatives_below + 0.5 * self._negative_hist))
+        return float(pairs / (positives * negatives))
+
+    def report(self) -> Dict[str, Any]:
+        n = self._size
+        (tn, fp), (fn, tp) = self._confusion.tolist()
+        calibration = []
+        ece = 0.0
+        for i in range(CALIBRATION_BINS):
+            count = int(self._calibration_count[i])
+            if count == 0:
+                continue
+            mean_predicted = self._calibration_sum[i] / count
+            observed = self._calibration_positives[i] / count
+            ece += count / n * abs(mean_predicted - observed)
+            calibration.append({
+                "bin": f"{i / CALIBRATION_BINS:.1f}-{(i + 1) / CALIBRATION_BINS:.1f}",
+                "count": count,
+                "mean_predicted": round(float(mean_predicted), 4),
+                "observed_rate": round(float(observed), 4),
+            })
+
+        def ratio(a, b):
+            return round(a / b, 4) if b else None
+
+        auc = self.roc_auc()
+        precision, recall = ratio(tp, tp + fp), ratio(tp, tp + fn)
+        return {
+            "observations": n,
+            "total_observations": self.total,
+            "positive_rate": ratio(tp + fn, n),
+            "roc_auc": round(auc, 4) if auc is not None else None,
+            "accuracy": ratio(tp + tn, n),
+            "precision": precision,
+            "recall": recall,
+            "f1": round(2 * precision * recall / (precision + recall), 4) if precision and recall else None,
+            "brier": ratio(self._squared_error, n),
+            "ece": round(ece, 4) if n else None,
+            "calibration": calibration,
+        }
+
+
+class FeedbackMonitor:
+    """
+    Métricas en ventana deslizante por versión del modelo, comparadas con las offline.
+
+    Args:
+        window: Observaciones en la ventana de cada versión
+        max_versions: Versiones del modelo con métricas (se descartan las más antiguas)
+        min_observations: Observaciones mínimas para evaluar la degradación
+        auc_tolerance: Caída de ROC-AUC frente a la métrica offline que se considera degradación
+    """
+
+    def __init__(self, window: int = 5000, max_versions: int = 5, min_observations: int = 200,
+                 auc_tolerance: float = 0.05):
+        self.window = window
+        self.max_versions = max_versions
+        self.min_observations = min_observations
+        self.auc_tolerance = auc_tolerance
+        self._versions: "OrderedDict[str, RollingMetrics]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, model_version: str, probabilities: Sequence[float], labels: Sequence[int]):
+        """
+        Añade resultados observados de predicciones de una versión del modelo.
+        """
+        with self._lock:
+            metrics = self._versions.get(model_version)
+            if metrics is None:
+                metrics = self._versions[model_version] = RollingMetrics(self.window)
+                while len(self._versions) > self.max_versions:
+                    self._versions.popitem(last=False)
+            self._versions.move_to_end(model_version)
+            metrics.update(probabilities, labels)
+
+    def status(self, metrics: Dict[str, Any], offline: Optional[Dict[str, float]]) -> str:
+        if metrics["observations"] < self.min_observations or metrics["roc_auc"] is None:
+            return "insufficient_data"
+        if offline is not None and metrics["roc_auc"] < offline["roc_auc"] - self.auc_tolerance:
+            return "degraded"
+        return "ok"
+
+    def report(self, offline: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Args:
+            offline: Métricas offline del modelo en servicio (ver load_offline_metrics)
+
+        Returns:
+            dict: Métricas por versión del modelo (la más reciente primero) y las offline
+        """
+        with self._lock:
+            versions: List[Dict[str, Any]] = []
+            for version, metrics in reversed(self._versions.items()):
+                report = metrics.report()
+                versions.append({"model_version": version, "status": self.status(report, offline), **report})
+        return {
+            "window": self.window,
+            "min_observations": self.min_observations,
+            "auc_tolerance": self.auc_tolerance,
+            "offline": offline,
+            "versions": versions,
+        }
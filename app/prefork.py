@@ -0,0 +1,280 @@
+"""
+Servidor pre-fork: los modelos se cargan una vez y se comparten entre workers.
+
+Con ``uvicorn --workers N`` cada proceso ejecuta ``load_model`` y guarda su
+propia copia de los pipelines, así que la memoria crece linealmente con el
+número de workers. En este modo el proceso maestro:
+
+1. Carga y calienta los modelos (modelo principal y ``model_*.joblib``).
+2. Congela los objetos rastreados por el GC (``gc.freeze``) para que las
+   recolecciones posteriores no escriban en sus páginas.
+3. Abre el socket de escucha y hace ``fork`` de los workers, que heredan
+   las páginas del modelo en modo copy-on-write.
+
+Los workers arrancan la API con normalidad; ``load_pipeline`` devuelve los
+modelos precargados en lugar de leerlos de disco. El maestro reinicia los
+workers que terminan inesperadamente y reporta periódicamente la memoria
+única (USS) frente a la compartida de cada worker.
+
+Uso:
+    python -m app.prefork --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .autotune import thread_candidates
+from .features import (
+    customers_to_frame,
+    load_pipeline,
+    preload_pipeline,
+    set_classifier_threads,
+    set_xgboost_threads,
+    shipped_models,
+    split_pipeline,
+)
+from .schemas import CustomerData
+
+logger = logging.getLogger(__name__)
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def warm_up(model, batch_sizes=(1, 64)):
+    """
+    Ejecuta predicciones de calentamiento con un solo hilo.
+
+    Se usa un hilo para no crear pools de OpenMP en el maestro antes del
+    fork; los parámetros de hilos originales se restauran al terminar.
+    """
+    _, classifier = split_pipeline(model)
+    original_n_jobs = getattr(classifier, 'n_jobs', None)
+    # CatBoost no admite cambiar hilos tras entrenar: se pasan en cada llamada
+    predict_kwargs = {} if set_classifier_threads(classifier, 1) else {'thread_count': 1}
+
+    example = CustomerData.Config.schema_extra["example"]
+    try:
+        for size in batch_sizes:
+            model.predict_proba(customers_to_frame([example] * size), **predict_kwargs)
+    finally:
+        if not predict_kwargs:
+            set_classifier_threads(classifier, original_n_jobs)
+
+
+def preload_models(paths: List[Path]) -> Dict[str, Any]:
+    """
+    Carga, calienta y registra los pipelines para que los workers los hereden.
+
+    Returns:
+        dict: Ruta -> pipeline cargado
+    """
+    loaded = {}
+    for path in paths:
+        if not Path(path).exists():
+            logger.warning(f"Modelo no encontrado, se omite la precarga: {path}")
+            continue
+        model = load_pipeline(path)
+        warm_up(model)
+        preload_pipeline(path, model)
+        loaded[str(path)] = model
+        logger.info(f" Modelo precargado: {path}")
+    return loaded
+
+
+def read_memory(pid: int) -> Dict[str, int]:
+    """
+    Lee el resumen de memoria de un proceso desde /proc/<pid>/smaps_rollup (kB).
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in SMAPS_FIELDS:
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def memory_report(pids: List[int]) -> Dict[str, Any]:
+    """
+    Memoria única (privada) frente a compartida por worker.
+
+    Returns:
+        dict: Detalle por worker y totales en kB
+    """
+    workers = []
+    for pid in pids:
+        try:
+            mem = read_memory(pid)
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        workers.append({
+            "pid": pid,
+            "rss_kb": mem.get('Rss', 0),
+            "pss_kb": mem.get('Pss', 0),
+            "unique_kb": mem.get('Private_Clean', 0) + mem.get('Private_Dirty', 0),
+            "shared_kb": mem.get('Shared_Clean', 0) + mem.get('Shared_Dirty', 0),
+        })
+    return {
+        "workers": workers,
+        "total_rss_kb": sum(w["rss_kb"] for w in workers),
+        "total_pss_kb": sum(w["pss_kb"] for w in workers),
+        "total_unique_kb": sum(w["unique_kb"] for w in workers),
+    }
+
+
+class PreforkServer:
+    """
+    Maestro pre-fork que comparte los modelos cargados con sus workers.
+
+    Args:
+        host: Dirección de escucha
+        port: Puerto de escucha
+        workers: Número de workers (por defecto, uno por núcleo)
+        report_interval: Segundos entre reportes de memoria (0 = desactivado)
+        report_path: Archivo JSON donde escribir el último reporte (opcional)
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8000, workers: Optional[int] = None,
+                 report_interval: float = 60, report_path: Optional[Path] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.report_interval = report_interval
+        self.report_path = report_path
+        self.children: Dict[int, int] = {}
+        self._running = True
+        self._socket: Optional[socket.socket] = None
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+            os._exit(0)
+        self.children[pid] = slot
+        logger.info(f"Worker {slot} iniciado (pid {pid})")
+
+    def _run_worker(self):
+        import uvicorn
+        from . import api
+
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+        # El autoajuste reparte los núcleos del nodo entre los workers
+        api.SERVING_WORKERS = self.workers
+
+        config = uvicorn.Config(api.app, log_level="info")
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _stop(self, signum, frame):
+        logger.info("Deteniendo workers...")
+        self._running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Genera (y opcionalmente guarda) el reporte de memoria de los workers.
+        """
+        result = memory_report(list(self.children))
+        result["master"] = memory_report([os.getpid()])["workers"]
+        result["timestamp"] = pd.Timestamp.now().isoformat()
+        if self.report_path is not None:
+            Path(self.report_path).write_text(json.dumps(result, indent=2))
+        for w in result["workers"]:
+            logger.info(
+                f"Worker pid={w['pid']}: RSS={w['rss_kb'] / 1024:.1f} MB, "
+                f"único={w['unique_kb'] / 1024:.1f} MB, compartido={w['shared_kb'] / 1024:.1f} MB"
+            )
+        return result
+
+    def run(self):
+        """
+        Precarga los modelos, hace fork de los workers y los supervisa.
+        """
+        from . import api
+
+        # Sin recolecciones durante la carga: los objetos del modelo se
+        # congelan antes del fork para no ensuciar sus páginas después
+        gc.disable()
+        preload_models([api.MODEL_PATH] + list(shipped_models().values()))
+        # XGBoost solo admite un límite de hilos por modelo: se reparte una
+        # vez aquí, antes del fork, para que los workers no se pisen
+        set_xgboost_threads(thread_candidates(self.workers)[-1])
+        gc.collect()
+        gc.freeze()
+
+        self._socket = self._bind()
+        logger.info(f"Escuchando en http://{self.host}:{self.port} con {self.workers} workers")
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        next_report = time.monotonic() + min(self.report_interval, 10) if self.report_interval else None
+        while self._running or self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                slot = self.children.pop(pid, None)
+                if self._running and slot is not None:
+                    logger.warning(f"Worker {slot} (pid {pid}) terminó; reiniciando")
+                    self._spawn(slot)
+                continue
+            if next_report is not None and self._running and time.monotonic() >= next_report:
+                self.report()
+                next_report = time.monotonic() + self.report_interval
+            time.sleep(0.5)
+
+        self._socket.close()
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Servidor pre-fork con modelos compartidos")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Workers (por defecto, uno por núcleo)")
+    parser.add_argument("--report-interval", type=float, default=60,
+                        help="Segundos entre reportes de memoria (0 = desactivado)")
+    parser.add_argument("--report-path", type=Path, default=None, help="JSON con el último reporte de memoria")
+    args = parser.parse_args()
+
+    PreforkServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        report_interval=args.report_interval,
+        report_path=args.report_path,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
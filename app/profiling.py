@@ -0,0 +1,207 @@
+"""
+Perfilado bajo demanda del proceso en producción (solo administradores).
+
+- ``SamplingProfiler``: muestrea periódicamente las pilas de todos los hilos
+  con ``sys._current_frames()`` durante un tiempo acotado y devuelve las
+  pilas en formato "folded" (``hilo;f1;f2;f3 N``), compatible con
+  flamegraph.pl, speedscope o inferno.
+- ``AllocationTracer``: activa ``tracemalloc`` y devuelve los sitios con más
+  memoria asignada, opcionalmente solo los que tienen un frame de un archivo
+  dado (por ejemplo ``app/api.py``) en la pila, y la diferencia frente a la
+  instantánea tomada al activarlo.
+
+Nada de esto se ejecuta hasta que se invoca: sin perfilado activo no hay
+hooks, hilos ni middleware adicionales.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Funciones hoja que indican un hilo inactivo (esperando trabajo o E/S)
+IDLE_FUNCTIONS = {
+    'wait', 'select', 'poll', 'epoll', 'get', 'sleep', 'accept',
+    '_wait_for_tstate_lock', '_worker', 'run_forever', '_run_once',
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Profiler de muestreo de pilas para el proceso en ejecución.
+
+    Args:
+        interval_ms: Intervalo entre muestras
+        max_seconds: Duración máxima permitida de un perfil
+        include_idle: Incluir hilos inactivos (esperando en locks, colas o E/S)
+    """
+
+    def __init__(self, interval_ms: float = 5.0, max_seconds: float = 60.0, include_idle: bool = False):
+        self.interval_ms = interval_ms
+        self.max_seconds = max_seconds
+        self.include_idle = include_idle
+        self.samples = 0
+
+    def sample(self, seconds: float) -> Counter:
+        """
+        Muestrea las pilas de los demás hilos durante `seconds` (bloqueante).
+
+        Returns:
+            Counter: (hilo, frame raíz, ..., frame hoja) -> número de muestras
+        """
+        seconds = min(seconds, self.max_seconds)
+        own = threading.get_ident()
+        interval = self.interval_ms / 1000
+        counts: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                counts[(names.get(thread_id, str(thread_id)),) + tuple(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(interval)
+
+        return counts
+
+    @staticmethod
+    def folded(counts: Counter) -> str:
+        """
+        Pilas en formato folded, una por línea: 'hilo;raíz;...;hoja muestras'.
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {n}" for stack, n in sorted(counts.items(), key=lambda x: -x[1])
+        ) + "\n"
+
+    @staticmethod
+    def top_functions(counts: Counter, limit: int = 20, sort_by: str = "self") -> List[Dict[str, Any]]:
+        """
+        Funciones con más muestras propias (self) o acumuladas (total).
+
+        Args:
+            counts: Resultado de sample()
+            limit: Número de funciones
+            sort_by: 'self' (la función está en la hoja) o 'total' (en cualquier punto de la pila)
+        """
+        total_samples = sum(counts.values()) or 1
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, n in counts.items():
+            frames = stack[1:]
+            if frames:
+                own[frames[-1]] += n
+            for label in set(frames):
+                cumulative[label] += n
+        return [
+            {
+                "function": label,
+                "self_pct": round(100 * own[label] / total_samples, 2),
+                "total_pct": round(100 * cumulative[label] / total_samples, 2),
+            }
+            for label, _ in (own if sort_by == "self" else cumulative).most_common(limit)
+        ]
+
+
+class AllocationTracer:
+    """
+    Instantáneas de tracemalloc con los principales sitios de asignación.
+
+    Args:
+        nframes: Frames guardados por asignación (más frames, más coste)
+    """
+
+    def __init__(self, nframes: int = 25):
+        self.nframes = nframes
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _filtered(self, snapshot: tracemalloc.Snapshot, scope: Optional[str]) -> tracemalloc.Snapshot:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        snapshot = snapshot.filter_traces(filters)
+        if scope:
+            # Solo asignaciones con un frame del archivo indicado en cualquier punto de la pila
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(True, scope, all_frames=True)])
+        return snapshot
+
+    def snapshot(self, limit: int = 20, group_by: str = "lineno",
+                 scope: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Principales sitios de asignación y crecimiento desde start().
+
+        Args:
+            limit: Número de sitios
+            group_by: 'lineno', 'filename' o 'traceback'
+            scope: Patrón de archivo que debe aparecer en la pila (opcional)
+
+        Raises:
+            RuntimeError: Si tracemalloc no está activo
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc no está activo")
+
+        current = self._filtered(tracemalloc.take_snapshot(), scope)
+        current_size, peak_size = tracemalloc.get_traced_memory()
+
+        def describe(stat) -> Tuple[str, List[str]]:
+            frames = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+            return frames[0], frames
+
+        top = []
+        for stat in current.statistics(group_by)[:limit]:
+            site, frames = describe(stat)
+            entry = {"site": site, "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            if group_by == "traceback":
+                entry["traceback"] = frames
+            top.append(entry)
+
+        growth = []
+        if self._baseline is not None:
+            baseline = self._filtered(self._baseline, scope)
+            for stat in current.compare_to(baseline, group_by)[:limit]:
+                site, _ = describe(stat)
+                growth.append({
+                    "site": site,
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff,
+                })
+
+        return {
+            "traced_kb": round(current_size / 1024, 1),
+            "peak_kb": round(peak_size / 1024, 1),
+            "group_by": group_by,
+            "scope": scope,
+            "top": top,
+            "growth_since_start": growth,
+        }
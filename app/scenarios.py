@@ -0,0 +1,200 @@
+"""
+Escenarios what-if de retención: efecto de cambiar campos del cliente sobre el churn.
+
+Un escenario es un conjunto de cambios sobre CustomerData, p. ej.
+``{"Contract": "One year", "PaymentMethod": "Credit card (automatic)"}``.
+Para cada combinación cliente x escenario se calcula la probabilidad de
+churn con los cambios aplicados y su diferencia con la probabilidad actual.
+
+Todas las combinaciones se puntúan con una sola llamada al clasificador.
+El ColumnTransformer (el paso caro) solo se aplica una vez a los clientes
+originales: como StandardScaler y OneHotEncoder transforman cada campo por
+separado, las columnas de un campo modificado se sustituyen por la
+codificación del nuevo valor, que se calcula una vez por escenario.
+
+Un escenario no se aplica a un cliente si no cambia nada (ya tiene ese
+contrato) o si deja un registro incoherente (TechSupport=Yes sin servicio de
+Internet, MultipleLines=Yes sin servicio telefónico).
+"""
+
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import _probe_frame
+from .features import FEATURE_COLUMNS, build_feature_map, split_pipeline, thread_limited_classifier, to_dense
+from .schemas import CustomerData
+
+logger = logging.getLogger(__name__)
+
+# Intervenciones habituales del equipo de retención
+DEFAULT_SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "contract_one_year": {"Contract": "One year"},
+    "contract_two_year": {"Contract": "Two year"},
+    "auto_payment_bank": {"PaymentMethod": "Bank transfer (automatic)"},
+    "auto_payment_card": {"PaymentMethod": "Credit card (automatic)"},
+    "add_tech_support": {"TechSupport": "Yes"},
+    "add_online_security": {"OnlineSecurity": "Yes"},
+    "one_year_auto_payment": {"Contract": "One year", "PaymentMethod": "Credit card (automatic)"},
+}
+
+# Servicios que requieren Internet ('No internet service' si InternetService == 'No')
+INTERNET_SERVICES = [
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies'
+]
+
+
+def validate_scenarios(scenarios: Mapping[str, Mapping[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Comprueba que cada escenario modifica campos de CustomerData con valores permitidos.
+
+    Returns:
+        dict: Escenarios con los valores convertidos al tipo de CustomerData
+
+    Raises:
+        ValueError: Si un escenario está vacío o tiene campos o valores no válidos
+    """
+    example = CustomerData.Config.schema_extra["example"]
+    validated = {}
+    for name, changes in scenarios.items():
+        if not changes:
+            raise ValueError(f"El escenario '{name}' no modifica ningún campo")
+        unknown = set(changes) - set(FEATURE_COLUMNS)
+        if unknown:
+            raise ValueError(f"El escenario '{name}' modifica campos desconocidos: {sorted(unknown)}")
+        try:
+            record = CustomerData(**{**example, **changes}).dict()
+        except ValueError as e:
+            raise ValueError(f"El escenario '{name}' no es válido: {str(e)}")
+        validated[name] = {field: record[field] for field in changes}
+    return validated
+
+
+def applicable_mask(customers: pd.DataFrame, changes: Mapping[str, Any]) -> np.ndarray:
+    """
+    Clientes a los que el escenario cambia algo y deja con un registro coherente.
+    """
+    changed = np.zeros(len(customers), dtype=bool)
+    for field, value in changes.items():
+        changed |= (customers[field] != value).to_numpy()
+
+    def after(field):
+        return customers[field].to_numpy() if field not in changes else np.full(len(customers), changes[field])
+
+    no_internet = after('InternetService') == 'No'
+    consistent = np.ones(len(customers), dtype=bool)
+    for field in INTERNET_SERVICES:
+        if field in changes or 'InternetService' in changes:
+            consistent &= no_internet == (after(field) == 'No internet service')
+    if 'MultipleLines' in changes or 'PhoneService' in changes:
+        consistent &= (after('PhoneService') == 'No') == (after('MultipleLines') == 'No phone service')
+    return changed & consistent
+
+
+class ScenarioScorer:
+    """
+    Puntúa combinaciones cliente x escenario sobre el pipeline del modelo.
+
+    Args:
+        pipeline: Pipeline con pasos 'preprocessor' y 'classifier'
+        n_threads: Hilos de inferencia del clasificador (None = los del modelo)
+    """
+
+    def __init__(self, pipeline: Any, n_threads: Optional[int] = None):
+        self.preprocessor, self.classifier = split_pipeline(pipeline)
+        self.predict_kwargs: Dict[str, Any] = {}
+        if n_threads:
+            self.classifier, self.predict_kwargs = thread_limited_classifier(self.classifier, n_threads)
+        feature_map = build_feature_map(self.preprocessor)
+        self.field_columns = {
+            field: np.flatnonzero(feature_map[:, i]) for i, field in enumerate(FEATURE_COLUMNS)
+        }
+        self._base = _probe_frame().iloc[[0]]
+        self._encoded_values: Dict[tuple, np.ndarray] = {}
+
+    def _encode_value(self, field: str, value: Any) -> np.ndarray:
+        """
+        Columnas transformadas de un campo con el valor indicado (en caché).
+        """
+        key = (field, value)
+        if key not in self._encoded_values:
+            frame = self._base.copy()
+            frame[field] = [value]
+            encoded = to_dense(self.preprocessor.transform(frame))[0]
+            self._encoded_values[key] = encoded[self.field_columns[field]]
+        return self._encoded_values[key]
+
+    def expand(self, customers: pd.DataFrame, scenarios: Mapping[str, Mapping[str, Any]]):
+        """
+        Construye la matriz de entrada del clasificador con todas las combinaciones.
+
+        Returns:
+            tuple: (matriz con los clientes originales seguidos de un bloque por
+            escenario, lista de (escenario, índices de cliente) de cada bloque)
+        """
+        base = to_dense(self.preprocessor.transform(customers[FEATURE_COLUMNS]))
+        blocks, layout = [base], []
+        for name, changes in scenarios.items():
+            rows = np.flatnonzero(applicable_mask(customers, changes))
+            block = base[rows]
+            for field, value in changes.items():
+                block[:, self.field_columns[field]] = self._encode_value(field, value)
+            blocks.append(block)
+            layout.append((name, rows))
+        return np.vstack(blocks), layout
+
+    def score(self, customers: pd.DataFrame, scenarios: Mapping[str, Mapping[str, Any]]):
+        """
+        Probabilidad de churn de cada combinación aplicable y su diferencia con la actual.
+
+        Args:
+            customers: Campos de CustomerData (un cliente por fila)
+            scenarios: Nombre -> cambios (ver validate_scenarios)
+
+        Returns:
+            tuple: (probabilidad actual de cada cliente (n,), DataFrame con columnas
+            customer_index, scenario, baseline_probability, churn_probability,
+            delta (negativo = reduce el riesgo) y risk_level, ordenado por cliente y por delta
+            ascendente)
+        """
+        customers = customers.reset_index(drop=True)
+        matrix, layout = self.expand(customers, scenarios)
+        proba = self.classifier.predict_proba(matrix, **self.predict_kwargs)[:, 1].astype(np.float64)
+
+        baseline = proba[:len(customers)]
+        offset = len(customers)
+        parts = []
+        for name, rows in layout:
+            scenario_proba = proba[offset:offset + len(rows)]
+            offset += len(rows)
+            parts.append(pd.DataFrame({
+                "customer_index": rows,
+                "scenario": name,
+                "baseline_probability": baseline[rows],
+                "churn_probability": scenario_proba,
+                "delta": scenario_proba - baseline[rows],
+                # Umbrales de get_risk_level, vectorizados
+                "risk_level": np.where(scenario_proba < 0.3, "Low", np.where(scenario_proba < 0.7, "Medium", "High")),
+            }))
+        results = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            columns=["customer_index", "scenario", "baseline_probability", "churn_probability", "delta", "risk_level"]
+        )
+        results = results.sort_values(["customer_index", "delta"], kind="stable", ignore_index=True)
+        return baseline, results
+
+
+def summarize(results: pd.DataFrame, n_customers: int) -> pd.DataFrame:
+    """
+    Efecto medio de cada escenario, ordenado del que más reduce el churn al que menos.
+
+    Args:
+        results: Salida de ScenarioScorer.score
+        n_customers: Número total de clientes evaluados
+    """
+    summary = results.groupby("scenario", sort=False)["delta"].agg(
+        applicable="size", mean_delta="mean", min_delta="min", max_delta="max"
+    )
+    summary["applicable_pct"] = 100 * summary["applicable"] / max(n_customers, 1)
+    return summary.sort_values("mean_delta").reset_index()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import Literal
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import Dict, List, Literal, Optional, Union
 
 
 class CustomerData(BaseModel):
@@ -147,6 +147,19 @@ class CustomerData(BaseModel):
         }
 
 
+class EnsembleInfo(BaseModel):
+    """
+    Detalle de una predicción del ensemble con presupuesto de latencia.
+    """
+    members_used: List[str] = Field(..., description="Modelos que respondieron a tiempo")
+    members_timed_out: List[str] = Field(..., description="Modelos que excedieron el presupuesto")
+    members_failed: List[str] = Field(..., description="Modelos que fallaron")
+    weights: Dict[str, float] = Field(..., description="Pesos normalizados aplicados")
+    partial: bool = Field(..., description="Indica si faltó algún miembro del ensemble")
+    budget_ms: Optional[float] = Field(None, description="Presupuesto de latencia solicitado")
+    latency_ms: float = Field(..., description="Latencia del ensemble en milisegundos")
+
+
 class ChurnPrediction(BaseModel):
     """
     Esquema de respuesta de la API con la predicción de churn.
@@ -172,6 +185,14 @@ class ChurnPrediction(BaseModel):
         le=1, 
         description="Confianza de la predicción (max de las dos probabilidades)"
     )
+    ensemble: Optional[EnsembleInfo] = Field(
+        None,
+        description="Detalle del ensemble (solo con mode=ensemble)"
+    )
+    request_id: Optional[str] = Field(
+        None,
+        description="Identificador de la predicción para enviar su resultado a /feedback"
+    )
     
     class Config:
         schema_extra = {
@@ -191,3 +212,109 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Estado del servicio")
     model_loaded: bool = Field(..., description="Indica si el modelo está cargado")
     model_type: str = Field(..., description="Tipo de modelo cargado")
+    ready: bool = Field(False, description="Indica si el calentamiento terminó y el servicio puede recibir tráfico")
+
+
+class FeatureContribution(BaseModel):
+    """
+    Contribución de un campo original de CustomerData a la predicción.
+    """
+    feature: str = Field(..., description="Nombre del campo de entrada")
+    value: Union[int, float, str] = Field(..., description="Valor del campo para el cliente")
+    contribution: float = Field(
+        ...,
+        description="Contribución en escala log-odds (positiva aumenta el riesgo de churn)"
+    )
+
+
+class ExplanationResponse(BaseModel):
+    """
+    Esquema de respuesta con la explicación de una predicción.
+    """
+    churn_probability: float = Field(..., ge=0, le=1, description="Probabilidad de churn (0-1)")
+    base_value: float = Field(..., description="Valor base del modelo en escala log-odds")
+    contributions: List[FeatureContribution] = Field(
+        ...,
+        description="Contribuciones ordenadas por magnitud absoluta"
+    )
+
+
+class CustomerIdsRequest(BaseModel):
+    """
+    Esquema de entrada de /predict/by-ids: clientes del almacén de características.
+    """
+    customer_ids: List[str] = Field(..., description="Identificadores customerID a puntuar")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "customer_ids": ["7590-VHVEG", "5575-GNVDE", "3668-QPYBK"]
+            }
+        }
+
+
+class WhatIfRequest(BaseModel):
+    """
+    Esquema de entrada de /what-if: clientes y escenarios de retención a evaluar.
+    """
+    customers: List[CustomerData] = Field(..., description="Clientes a evaluar")
+    scenarios: Optional[Dict[str, Dict[str, Union[int, float, str]]]] = Field(
+        None,
+        description="Nombre del escenario -> campos modificados (por defecto, los escenarios predefinidos)"
+    )
+    top_k: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Escenarios devueltos por cliente, de mayor a menor reducción del riesgo"
+    )
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "customers": [CustomerData.Config.schema_extra["example"]],
+                "scenarios": {
+                    "contract_one_year": {"Contract": "One year"},
+                    "auto_payment_card": {"PaymentMethod": "Credit card (automatic)"},
+                    "add_tech_support": {"TechSupport": "Yes"}
+                },
+                "top_k": 3
+            }
+        }
+
+
+class OutcomeFeedback(BaseModel):
+    """
+    Resultado observado de una predicción servida.
+    """
+    request_id: Optional[str] = Field(None, description="request_id devuelto por /predict o /predict-batch")
+    customerID: Optional[str] = Field(
+        None,
+        description="Cliente puntuado por /predict/{customer_id}, /predict/by-ids o el almacén de puntuaciones"
+    )
+    churned: bool = Field(..., description="Indica si el cliente abandonó finalmente")
+    
+    @root_validator(skip_on_failure=True)
+    def validate_identifier(cls, values):
+        """
+        Exige exactamente uno de request_id o customerID.
+        """
+        if (values.get('request_id') is None) == (values.get('customerID') is None):
+            raise ValueError("Se debe indicar exactamente uno de request_id o customerID")
+        return values
+
+
+class FeedbackRequest(BaseModel):
+    """
+    Esquema de entrada de /feedback.
+    """
+    outcomes: List[OutcomeFeedback] = Field(..., description="Resultados observados")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "outcomes": [
+                    {"request_id": "3f2c9a7e5b1d4e0f8a6c2b9d7e1f0a3c", "churned": True},
+                    {"customerID": "7590-VHVEG", "churned": False}
+                ]
+            }
+        }
@@ -0,0 +1,295 @@
+"""
+Almacén persistente de puntuaciones de churn por cliente (SQLite).
+
+Guarda la última probabilidad, nivel de riesgo y versión del modelo de cada
+``customerID``. La tabla tiene un índice por probabilidad, de modo que el
+top-K de clientes en riesgo se lee directamente del índice sin ordenar. Los
+agregados por segmento (``Contract`` x ``PaymentMethod``) se mantienen en
+una tabla aparte que unos triggers actualizan de forma incremental en cada
+alta, re-puntuación o baja: consultar los segmentos no recorre los clientes.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .features import DATA_DIR, get_risk_level
+
+DEFAULT_STORE_PATH = DATA_DIR / "scores.db"
+
+# Campos de CustomerData por los que se agregan los segmentos
+SEGMENT_FIELDS = ('Contract', 'PaymentMethod')
+
+# Columnas expuestas en las consultas (la huella es interna del re-puntuado incremental)
+_SCORE_COLUMNS = "customer_id, churn_probability, risk_level, model_version, contract, payment_method, scored_at"
+
+# Los triggers no usan INSERT OR IGNORE: dentro de un UPSERT, SQLite aplica la
+# política de conflicto de la sentencia externa también a la del trigger
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    customer_id TEXT PRIMARY KEY,
+    churn_probability REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    scored_at TEXT NOT NULL,
+    fingerprint INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_scores_probability ON scores (churn_probability DESC);
+
+CREATE TABLE IF NOT EXISTS segments (
+    contract TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    customers INTEGER NOT NULL DEFAULT 0,
+    sum_probability REAL NOT NULL DEFAULT 0,
+    high INTEGER NOT NULL DEFAULT 0,
+    medium INTEGER NOT NULL DEFAULT 0,
+    low INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (contract, payment_method)
+);
+
+CREATE TRIGGER IF NOT EXISTS scores_insert AFTER INSERT ON scores
+BEGIN
+    INSERT INTO segments (contract, payment_method)
+    SELECT NEW.contract, NEW.payment_method
+    WHERE NOT EXISTS (
+        SELECT 1 FROM segments WHERE contract = NEW.contract AND payment_method = NEW.payment_method
+    );
+    UPDATE segments SET
+        customers = customers + 1,
+        sum_probability = sum_probability + NEW.churn_probability,
+        high = high + (NEW.risk_level = 'High'),
+        medium = medium + (NEW.risk_level = 'Medium'),
+        low = low + (NEW.risk_level = 'Low')
+    WHERE contract = NEW.contract AND payment_method = NEW.payment_method;
+END;
+
+CREATE TRIGGER IF NOT EXISTS scores_delete AFTER DELETE ON scores
+BEGIN
+    UPDATE segments SET
+        customers = customers - 1,
+        sum_probability = sum_probability - OLD.churn_probability,
+        high = high - (OLD.risk_level = 'High'),
+        medium = medium - (OLD.risk_level = 'Medium'),
+        low = low - (OLD.risk_level = 'Low')
+    WHERE contract = OLD.contract AND payment_method = OLD.payment_method;
+END;
+
+CREATE TRIGGER IF NOT EXISTS scores_update AFTER UPDATE ON scores
+BEGIN
+    UPDATE segments SET
+        customers = customers - 1,
+        sum_probability = sum_probability - OLD.churn_probability,
+        high = high - (OLD.risk_level = 'High'),
+        medium = medium - (OLD.risk_level = 'Medium'),
+        low = low - (OLD.risk_level = 'Low')
+    WHERE contract = OLD.contract AND payment_method = OLD.payment_method;
+    INSERT INTO segments (contract, payment_method)
+    SELECT NEW.contract, NEW.payment_method
+    WHERE NOT EXISTS (
+        SELECT 1 FROM segments WHERE contract = NEW.contract AND payment_method = NEW.payment_method
+    );
+    UPDATE segments SET
+        customers = customers + 1,
+        sum_probability = sum_probability + NEW.churn_probability,
+        high = high + (NEW.risk_level = 'High'),
+        medium = medium + (NEW.risk_level = 'Medium'),
+        low = low + (NEW.risk_level = 'Low')
+    WHERE contract = NEW.contract AND payment_method = NEW.payment_method;
+END;
+"""
+
+
+class ScoreStore:
+    """
+    Puntuaciones más recientes por cliente con top-K y agregados por segmento.
+
+    Una misma conexión se comparte entre hilos protegida por un lock; el
+    modo WAL permite que un proceso batch escriba mientras la API lee.
+
+    Args:
+        path: Ruta al archivo SQLite (se crea si no existe)
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(scores)")}
+            if 'fingerprint' not in columns:
+                self._conn.execute("ALTER TABLE scores ADD COLUMN fingerprint INTEGER")
+
+    def upsert(self, customer_ids: Sequence[str], probabilities: Sequence[float],
+               segments: pd.DataFrame, model_version: str,
+               fingerprints: Optional[Sequence[int]] = None) -> int:
+        """
+        Inserta o actualiza las puntuaciones de un lote de clientes.
+
+        Args:
+            customer_ids: Identificadores de cliente
+            probabilities: Probabilidad de churn de cada cliente
+            segments: DataFrame con las columnas de SEGMENT_FIELDS, alineado con customer_ids
+            model_version: Versión del modelo que generó las puntuaciones
+            fingerprints: Huellas de las características puntuadas (ver ``row_fingerprints``)
+
+        Returns:
+            int: Número de filas escritas
+        """
+        scored_at = datetime.now().isoformat()
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if fingerprints is None:
+            fingerprints = [None] * len(probabilities)
+        rows = [
+            (customer_id, float(p), get_risk_level(p), model_version, contract, payment, scored_at,
+             None if fp is None else int(fp))
+            for customer_id, p, contract, payment, fp in zip(
+                customer_ids,
+                probabilities,
+                segments[SEGMENT_FIELDS[0]],
+                segments[SEGMENT_FIELDS[1]],
+                fingerprints,
+            )
+        ]
+        with self._lock, self._conn:
+            # ON CONFLICT ... DO UPDATE dispara el trigger de UPDATE (no DELETE + INSERT)
+            self._conn.executemany(
+                """
+                INSERT INTO scores (customer_id, churn_probability, risk_level, model_version,
+                                    contract, payment_method, scored_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (customer_id) DO UPDATE SET
+                    churn_probability = excluded.churn_probability,
+                    risk_level = excluded.risk_level,
+                    model_version = excluded.model_version,
+                    contract = excluded.contract,
+                    payment_method = excluded.payment_method,
+                    scored_at = excluded.scored_at,
+                    fingerprint = excluded.fingerprint
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def delete(self, customer_ids: Sequence[str]) -> int:
+        """
+        Elimina clientes del almacén (por ejemplo, bajas de la base).
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "DELETE FROM scores WHERE customer_id = ?", [(c,) for c in customer_ids]
+            )
+        return cursor.rowcount
+
+    def fingerprints(self) -> pd.DataFrame:
+        """
+        Huella y versión del modelo de la última puntuación de cada cliente.
+
+        Returns:
+            pd.DataFrame: Columnas fingerprint y model_version indexadas por customer_id
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT customer_id, fingerprint, model_version FROM scores"
+            ).fetchall()
+        return pd.DataFrame(
+            [tuple(row) for row in rows],
+            columns=['customer_id', 'fingerprint', 'model_version'],
+        ).set_index('customer_id')
+
+    def top_at_risk(self, k: int = 100, risk_level: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Los k clientes con mayor probabilidad de churn (lectura por índice).
+
+        Args:
+            k: Número de clientes
+            risk_level: Filtrar por nivel de riesgo (opcional)
+        """
+        query = f"SELECT {_SCORE_COLUMNS} FROM scores"
+        params: list = []
+        if risk_level is not None:
+            query += " WHERE risk_level = ?"
+            params.append(risk_level)
+        query += " ORDER BY churn_probability DESC LIMIT ?"
+        params.append(int(k))
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Puntuación almacenada de un cliente (None si no existe).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_SCORE_COLUMNS} FROM scores WHERE customer_id = ?", (customer_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def segments(self) -> Dict[str, Any]:
+        """
+        Riesgo medio y distribución de niveles por Contract x PaymentMethod.
+
+        Los totales por cada dimensión se obtienen sumando las celdas de la
+        tabla de segmentos (como mucho unas decenas de filas).
+
+        Returns:
+            dict: Celdas del cruce y totales por Contract y por PaymentMethod
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM segments WHERE customers > 0 ORDER BY contract, payment_method"
+            ).fetchall()
+        cells = pd.DataFrame(
+            [dict(row) for row in rows],
+            columns=['contract', 'payment_method', 'customers', 'sum_probability', 'high', 'medium', 'low'],
+        )
+
+        def summarize(df: pd.DataFrame) -> pd.DataFrame:
+            df = df.copy()
+            df['mean_probability'] = (df['sum_probability'] / df['customers']).round(6)
+            return df.drop(columns='sum_probability')
+
+        by_contract = cells.drop(columns='payment_method').groupby('contract', as_index=False).sum()
+        by_payment = cells.drop(columns='contract').groupby('payment_method', as_index=False).sum()
+        customers = int(cells['customers'].sum())
+
+        return {
+            "customers": customers,
+            "mean_probability": round(float(cells['sum_probability'].sum()) / customers, 6) if customers else None,
+            "segments": summarize(cells).to_dict(orient='records'),
+            "by_contract": summarize(by_contract).to_dict(orient='records'),
+            "by_payment_method": summarize(by_payment).to_dict(orient='records'),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Número de clientes, versiones de modelo y fecha de la última puntuación.
+        """
+        with self._lock:
+            versions = self._conn.execute(
+                "SELECT model_version, COUNT(*) AS customers, MAX(scored_at) AS last_scored_at "
+                "FROM scores GROUP BY model_version"
+            ).fetchall()
+        return {
+            "customers": sum(row['customers'] for row in versions),
+            "model_versions": {row['model_version']: row['customers'] for row in versions},
+            "last_scored_at": max((row['last_scored_at'] for row in versions), default=None),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
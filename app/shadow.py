@@ -0,0 +1,214 @@
+"""
+Evaluación en sombra (shadow mode) de modelos retadores sobre tráfico real.
+
+El modelo principal responde la petición como siempre; después, las mismas
+entradas se envían a un pool de hilos en segundo plano donde los retadores
+(artefactos ``model_*.joblib``) las puntúan. Se agregan la concordancia de
+decisiones, la diferencia de probabilidad y la latencia frente al modelo
+principal.
+
+El trabajo en sombra es lo primero que se descarta bajo presión: si hay
+demasiadas tareas pendientes o el servicio está pausado, la petición se
+omite y se contabiliza como descartada, sin esperar nunca en la petición.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .features import (
+    APP_DIR,
+    customers_to_frame,
+    get_risk_level,
+    load_pipeline,
+    shipped_models,
+    thread_limited_pipeline,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _percentiles(values) -> Dict[str, float]:
+    if not values:
+        return {"p50": None, "p99": None}
+    arr = np.fromiter(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+class _ChallengerStats:
+    """
+    Agregados acumulados de un retador frente al modelo principal.
+    """
+
+    def __init__(self, latency_window: int):
+        self.rows = 0
+        self.agreements = 0
+        self.risk_agreements = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.errors = 0
+        self.latencies_ms: deque = deque(maxlen=latency_window)
+
+    def update(self, primary: np.ndarray, challenger: np.ndarray, latency_ms: float):
+        delta = challenger - primary
+        self.rows += len(primary)
+        self.agreements += int(np.sum((primary > 0.5) == (challenger > 0.5)))
+        self.risk_agreements += sum(
+            get_risk_level(p) == get_risk_level(c) for p, c in zip(primary, challenger)
+        )
+        self.sum_delta += float(delta.sum())
+        self.sum_abs_delta += float(np.abs(delta).sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(np.abs(delta).max()))
+        self.latencies_ms.append(latency_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        rows = max(self.rows, 1)
+        return {
+            "rows": self.rows,
+            "agreement_rate": round(self.agreements / rows, 6) if self.rows else None,
+            "risk_level_agreement_rate": round(self.risk_agreements / rows, 6) if self.rows else None,
+            "mean_delta": round(self.sum_delta / rows, 6) if self.rows else None,
+            "mean_abs_delta": round(self.sum_abs_delta / rows, 6) if self.rows else None,
+            "max_abs_delta": round(self.max_abs_delta, 6),
+            "errors": self.errors,
+            "latency_ms": _percentiles(self.latencies_ms),
+        }
+
+
+class ShadowScorer:
+    """
+    Puntúa en segundo plano con modelos retadores y compara con el principal.
+
+    Args:
+        challengers: Nombre -> pipeline entrenado
+        max_workers: Hilos del pool en segundo plano
+        max_pending: Máximo de peticiones en sombra pendientes antes de descartar
+        sample_rate: Fracción de peticiones que se evalúan en sombra (0-1)
+        latency_window: Número de latencias recientes usadas para los percentiles
+    """
+
+    def __init__(self, challengers: Dict[str, Any], max_workers: int = 1, max_pending: int = 64,
+                 sample_rate: float = 1.0, latency_window: int = 1000):
+        self.challengers = {}
+        for name, model in challengers.items():
+            # Un hilo por retador para no competir con el modelo principal (sin modificar
+            # el pipeline, que puede estar precargado y compartido con el ensemble)
+            self.challengers[name] = thread_limited_pipeline(model, 1)
+
+        self.max_pending = max_pending
+        self.sample_rate = sample_rate
+        self.submitted = 0
+        self.completed = 0
+        self.shed = 0
+        self.paused = False
+        self._pending = 0
+        self._primary_latencies_ms: deque = deque(maxlen=latency_window)
+        self._stats = {name: _ChallengerStats(latency_window) for name in self.challengers}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shadow")
+
+    @classmethod
+    def from_names(cls, names: Sequence[str], model_dir: Path = APP_DIR, **kwargs) -> "ShadowScorer":
+        """
+        Carga los retadores indicados por nombre entre los ``model_*.joblib`` disponibles.
+
+        Raises:
+            ValueError: Si algún nombre no corresponde a un modelo disponible.
+        """
+        available = shipped_models(model_dir)
+        unknown = [n for n in names if n not in available]
+        if unknown:
+            raise ValueError(
+                f"Modelos retadores desconocidos: {', '.join(unknown)} "
+                f"(disponibles: {', '.join(available)})"
+            )
+        return cls({name: load_pipeline(available[name]) for name in names}, **kwargs)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def pause(self):
+        """
+        Descarta todo el trabajo en sombra nuevo (por ejemplo, bajo sobrecarga).
+        """
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def submit(self, records: List[Dict[str, Any]], primary_probabilities: Sequence[float],
+               primary_latency_ms: float) -> bool:
+        """
+        Encola una petición ya respondida por el modelo principal (no bloqueante).
+
+        Returns:
+            bool: True si se encoló, False si se descartó, no fue muestreada o está vacía
+        """
+        if not records:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            if self.paused or self._pending >= self.max_pending:
+                self.shed += 1
+                return False
+            self._pending += 1
+            self.submitted += 1
+            self._primary_latencies_ms.append(primary_latency_ms)
+
+        self._executor.submit(
+            self._score, records, np.asarray(primary_probabilities, dtype=np.float64)
+        )
+        return True
+
+    def _score(self, records: List[Dict[str, Any]], primary: np.ndarray):
+        try:
+            X = customers_to_frame(records)
+            for name, (model, predict_kwargs) in self.challengers.items():
+                stats = self._stats[name]
+                try:
+                    start = time.perf_counter()
+                    challenger = model.predict_proba(X, **predict_kwargs)[:, 1]
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    with self._lock:
+                        stats.update(primary, challenger, latency_ms)
+                except Exception as e:
+                    with self._lock:
+                        stats.errors += 1
+                    logger.error(f"Error en modelo en sombra {name}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Resumen de la comparación entre el modelo principal y los retadores.
+        """
+        with self._lock:
+            return {
+                "challengers": {name: stats.as_dict() for name, stats in self._stats.items()},
+                "primary_latency_ms": _percentiles(self._primary_latencies_ms),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "shed": self.shed,
+                "pending": self._pending,
+                "paused": self.paused,
+                "sample_rate": self.sample_rate,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,150 @@
+"""
+Respuestas NDJSON en streaming con compresión negociada.
+
+``/predict-batch/stream`` escribe una línea JSON por cliente en cuanto
+termina cada bloque, en lugar de construir la lista completa de
+predicciones y un único documento JSON. La respuesta se comprime con zstd
+(si el paquete opcional ``zstandard`` está instalado) o gzip según el
+encabezado ``Accept-Encoding`` del cliente.
+"""
+
+import json
+import zlib
+from typing import Optional
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # dependencia opcional
+    zstandard = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Preferencia del servidor ante valores q iguales
+_PREFERENCE = ("zstd", "gzip", "identity")
+
+
+def supported_encodings() -> tuple:
+    """
+    Codificaciones disponibles en este proceso, por orden de preferencia.
+    """
+    return tuple(e for e in _PREFERENCE if e != "zstd" or zstandard is not None)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    Elige la codificación de la respuesta a partir de Accept-Encoding.
+
+    Args:
+        accept_encoding: Valor del encabezado (p. ej. 'gzip;q=0.8, zstd')
+
+    Returns:
+        str: 'zstd', 'gzip' o 'identity'
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    wildcard = weights.get("*")
+    best, best_q = "identity", 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, wildcard if encoding != "identity" else None)
+        if q is None:
+            q = 0.001 if encoding == "identity" else 0.0
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StreamCompressor:
+    """
+    Compresor incremental: cada bloque comprimido se puede enviar de inmediato.
+
+    Args:
+        encoding: 'zstd', 'gzip' o 'identity'
+        level: Nivel de compresión (bajo: prima la latencia sobre el tamaño)
+    """
+
+    def __init__(self, encoding: str, level: int = 3):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd no disponible (instalar el paquete 'zstandard')")
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "identity":
+            self._compressor = None
+        else:
+            raise ValueError(f"Codificación no soportada: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Comprime un bloque y vacía el buffer para que el cliente lo reciba ya.
+        """
+        if self._compressor is None:
+            return data
+        if self.encoding == "gzip":
+            return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        """
+        Cierra el flujo comprimido (trailer de gzip / marco de zstd).
+        """
+        if self._compressor is None:
+            return b""
+        return self._compressor.flush()
+
+
+def ndjson_predictions(probabilities: np.ndarray, offset: int = 0, batch_id: Optional[str] = None) -> bytes:
+    """
+    Serializa un bloque de predicciones como NDJSON (una línea por cliente).
+
+    Mismos campos que cada elemento de /predict-batch; los umbrales de
+    riesgo son los de get_risk_level, aplicados de forma vectorizada.
+
+    Args:
+        probabilities: Probabilidades de churn del bloque
+        offset: Índice del primer cliente del bloque dentro del lote
+        batch_id: Identificador del lote; si se indica, cada línea incluye su
+            request_id ("<batch_id>-<índice>") como en /predict-batch
+
+    Returns:
+        bytes: Líneas NDJSON terminadas en salto de línea
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    predictions = np.where(probabilities > 0.5, "Yes", "No")
+    risk_levels = np.where(probabilities < 0.3, "Low", np.where(probabilities < 0.7, "Medium", "High"))
+    confidences = np.maximum(probabilities, 1 - probabilities)
+    request_id = f',"request_id":"{batch_id}-{{}}"' if batch_id is not None else ""
+    lines = [
+        f'{{"customer_index":{offset + i},"churn_probability":{p!r},"prediction":"{pred}",'
+        f'"risk_level":"{risk}","confidence":{c!r}{request_id.format(offset + i)}}}\n'
+        for i, (p, pred, risk, c) in enumerate(zip(
+            probabilities.tolist(), predictions.tolist(), risk_levels.tolist(), confidences.tolist()
+        ))
+    ]
+    return "".join(lines).encode()
+
+
+def ndjson_line(payload: dict) -> bytes:
+    """
+    Una línea NDJSON con un objeto arbitrario (resumen o error final).
+    """
+    return (json.dumps(payload, separators=(",", ":")) + "\n").encode()
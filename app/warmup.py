@@ -0,0 +1,163 @@
+"""
+Calentamiento del modelo al arrancar y control de disponibilidad (readiness).
+
+Las primeras predicciones tras un despliegue pagan la inicialización
+perezosa de los boosters, las primeras reservas de memoria y el primer paso
+por pandas y el ColumnTransformer. El calentamiento ejecuta predicciones
+representativas (ejemplo del esquema y filas muestreadas del CSV limpio)
+a varios tamaños de lote hasta que la latencia se estabiliza, y solo
+entonces marca el servicio como listo.
+
+Un tamaño de lote se considera estable cuando la mediana de la última
+ventana de iteraciones no supera en más de ``tolerance`` la mediana de la
+ventana anterior.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .features import CLEAN_DATA_PATH, FEATURE_COLUMNS, RANDOM_STATE, customers_to_frame
+from .schemas import CustomerData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = (1, 8, 64, 256)
+
+
+def warmup_frames(batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+                  seed: int = RANDOM_STATE) -> Dict[int, pd.DataFrame]:
+    """
+    Lotes representativos por tamaño: ejemplo del esquema más filas muestreadas.
+
+    Si el CSV limpio no está disponible se repite el ejemplo del esquema.
+    """
+    example = customers_to_frame([CustomerData.Config.schema_extra["example"]])
+    try:
+        sample = pd.read_csv(CLEAN_DATA_PATH)[FEATURE_COLUMNS]
+    except (FileNotFoundError, KeyError):
+        sample = example
+
+    frames = {}
+    for size in batch_sizes:
+        if size == 1:
+            frames[size] = example
+            continue
+        rows = sample.sample(n=size - 1, replace=len(sample) < size - 1, random_state=seed)
+        frames[size] = pd.concat([example, rows], ignore_index=True)
+    return frames
+
+
+class ModelWarmup:
+    """
+    Calienta una función de predicción y expone el estado de disponibilidad.
+
+    Args:
+        predict: Función que recibe un DataFrame de CustomerData y predice
+        batch_sizes: Tamaños de lote a calentar
+        window: Iteraciones por ventana para comparar medianas
+        tolerance: Diferencia relativa máxima entre ventanas para considerar estable
+        max_iterations: Iteraciones máximas por tamaño de lote
+        max_seconds: Tiempo máximo total de calentamiento
+    """
+
+    def __init__(self, predict: Callable[[pd.DataFrame], Any],
+                 batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, window: int = 5,
+                 tolerance: float = 0.2, max_iterations: int = 60, max_seconds: float = 30.0):
+        self.predict = predict
+        self.batch_sizes = tuple(batch_sizes)
+        self.window = window
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.max_seconds = max_seconds
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def _is_steady(self, latencies: List[float]) -> bool:
+        if len(latencies) < 2 * self.window:
+            return False
+        previous = np.median(latencies[-2 * self.window:-self.window])
+        current = np.median(latencies[-self.window:])
+        return current <= previous * (1 + self.tolerance)
+
+    def _warm_batch(self, frame: pd.DataFrame, deadline: float) -> Dict[str, Any]:
+        if time.perf_counter() >= deadline:
+            # Tiempo agotado antes de empezar este tamaño
+            return {"first_ms": None, "steady_p50_ms": None, "iterations": 0, "steady": False, "skipped": True}
+        latencies: List[float] = []
+        steady = False
+        while len(latencies) < self.max_iterations and time.perf_counter() < deadline:
+            start = time.perf_counter()
+            self.predict(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if self._is_steady(latencies):
+                steady = True
+                break
+        return {
+            "first_ms": round(latencies[0], 3),
+            "steady_p50_ms": round(float(np.median(latencies[-self.window:])), 3),
+            "iterations": len(latencies),
+            "steady": steady,
+        }
+
+    def run(self):
+        """
+        Ejecuta el calentamiento (bloqueante) y marca el servicio como listo.
+
+        Si algún tamaño no se estabiliza antes de max_iterations o
+        max_seconds, el servicio se marca listo igualmente para no bloquear
+        el tráfico indefinidamente; el resultado queda registrado.
+        """
+        self.state = "warming_up"
+        self.started_at = time.perf_counter()
+        deadline = self.started_at + self.max_seconds
+        try:
+            for size, frame in warmup_frames(self.batch_sizes).items():
+                self.results[size] = self._warm_batch(frame, deadline)
+                result = self.results[size]
+                if result.get("skipped"):
+                    logger.warning(f"Calentamiento lote={size}: omitido (tiempo máximo agotado)")
+                    continue
+                logger.info(
+                    f"Calentamiento lote={size}: primera={result['first_ms']:.1f} ms, "
+                    f"estable={result['steady_p50_ms']:.1f} ms ({result['iterations']} iteraciones)"
+                )
+            self.state = "ready"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Error en el calentamiento del modelo: {str(e)}")
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def start(self) -> threading.Thread:
+        """
+        Ejecuta el calentamiento en segundo plano (el servidor acepta conexiones mientras tanto).
+        """
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round(((self.finished_at or time.perf_counter()) - self.started_at) * 1000, 3)
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "warmup_ms": elapsed,
+            "batch_sizes": {str(size): result for size, result in self.results.items()},
+        }
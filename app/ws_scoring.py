@@ -0,0 +1,181 @@
+"""
+Canal WebSocket de puntuación con micro-batching y control de flujo.
+
+Pensado para clientes internos de alta frecuencia: una conexión de larga
+duración en lugar de una petición HTTP por cliente. Protocolo (un objeto
+JSON por mensaje de texto)::
+
+    -> {"id": "abc", "customer": {...CustomerData...}}
+    <- {"id": "abc", "churn_probability": 0.78, "prediction": "Yes",
+        "risk_level": "High", "confidence": 0.78}
+    <- {"id": "abc", "error": "...", "status_code": 422}
+
+Las respuestas llegan en el orden de los mensajes. Los mensajes que llegan
+juntos (hasta ``max_batch``, esperando como mucho ``max_wait_ms`` a que se
+complete el lote) se puntúan con una sola llamada vectorizada.
+
+Control de flujo: entre la lectura y la puntuación hay una cola de
+``max_pending`` mensajes. Si el cliente no lee las respuestas, el envío se
+bloquea, la cola se llena y se deja de leer del socket, de modo que la
+presión vuelve al cliente por TCP y la memoria por conexión queda acotada.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from .features import get_risk_level
+from .schemas import CustomerData
+
+logger = logging.getLogger(__name__)
+
+# Recibe los registros de un lote y devuelve sus probabilidades de churn
+ScoreFn = Callable[[List[Dict[str, Any]]], Awaitable[Sequence[float]]]
+
+
+class ScoringChannel:
+    """
+    Atiende una conexión WebSocket: lee, agrupa, puntúa y responde.
+
+    Args:
+        score: Corrutina que puntúa una lista de registros de CustomerData
+        max_batch: Mensajes máximos por lote
+        max_wait_ms: Espera máxima para completar un lote tras el primer mensaje
+        max_pending: Mensajes leídos pendientes de puntuar (límite de memoria)
+    """
+
+    def __init__(self, score: ScoreFn, max_batch: int = 64, max_wait_ms: float = 2.0,
+                 max_pending: int = 256):
+        self.score = score
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_pending = max_pending
+        self.messages = 0
+        self.batches = 0
+        self.rows_scored = 0
+        self.errors = 0
+
+    @staticmethod
+    def parse(text: str) -> Dict[str, Any]:
+        """
+        Valida un mensaje entrante.
+
+        Returns:
+            dict: {'id', 'record'} si es válido o {'id', 'error', 'status_code'} si no
+        """
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return {"id": None, "error": "El mensaje no es JSON válido", "status_code": 400}
+        if not isinstance(message, dict):
+            return {"id": None, "error": "El mensaje debe ser un objeto JSON", "status_code": 400}
+
+        message_id = message.get("id")
+        try:
+            customer = CustomerData(**(message.get("customer") or {}))
+        except (TypeError, ValueError) as e:
+            return {"id": message_id, "error": str(e), "status_code": 422}
+        return {"id": message_id, "record": customer.dict()}
+
+    @staticmethod
+    def prediction(message_id: Any, churn_probability: float) -> Dict[str, Any]:
+        churn_probability = float(churn_probability)
+        return {
+            "id": message_id,
+            "churn_probability": churn_probability,
+            "prediction": "Yes" if churn_probability > 0.5 else "No",
+            "risk_level": get_risk_level(churn_probability),
+            "confidence": max(churn_probability, 1 - churn_probability),
+        }
+
+    async def _next_batch(self, queue: asyncio.Queue) -> List[Dict[str, Any]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _score_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        valid = [item for item in batch if "record" in item]
+        results: Dict[int, Dict[str, Any]] = {}
+        if valid:
+            try:
+                probabilities = await self.score([item["record"] for item in valid])
+                for item, p in zip(valid, probabilities):
+                    results[id(item)] = self.prediction(item["id"], p)
+                self.rows_scored += len(valid)
+            except Exception as e:
+                # Sobrecarga (429/503) o error de inferencia: se informa a cada mensaje del lote
+                detail = getattr(e, "detail", str(e))
+                status_code = getattr(e, "status_code", 500)
+                for item in valid:
+                    results[id(item)] = {"id": item["id"], "error": detail, "status_code": status_code}
+            self.batches += 1
+
+        responses = []
+        for item in batch:
+            response = results.get(id(item)) or {
+                "id": item["id"], "error": item["error"], "status_code": item["status_code"]
+            }
+            if "error" in response:
+                self.errors += 1
+            responses.append(response)
+        return responses
+
+    async def _reader(self, websocket: WebSocket, queue: asyncio.Queue):
+        while True:
+            text = await websocket.receive_text()
+            self.messages += 1
+            # Bloquea si la cola está llena: se deja de leer del socket
+            await queue.put(self.parse(text))
+
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        while True:
+            batch = await self._next_batch(queue)
+            for response in await self._score_batch(batch):
+                await websocket.send_text(json.dumps(response))
+
+    async def serve(self, websocket: WebSocket):
+        """
+        Atiende la conexión (ya aceptada) hasta que el cliente la cierra.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        tasks = [
+            asyncio.create_task(self._reader(websocket, queue)),
+            asyncio.create_task(self._writer(websocket, queue)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None and not isinstance(error, WebSocketDisconnect):
+                    logger.error(f"Error en canal WebSocket: {str(error)}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.wait(tasks)
+            logger.info(f"Canal WebSocket cerrado: {self.report()}")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "batches": self.batches,
+            "rows_scored": self.rows_scored,
+            "mean_batch_size": round(self.rows_scored / self.batches, 2) if self.batches else None,
+            "errors": self.errors,
+        }
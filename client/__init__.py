@@ -0,0 +1,14 @@
+"""
+Cliente Python asíncrono de la API de predicción de churn.
+
+Ejemplo::
+
+    from client import ChurnClient
+
+    async with ChurnClient("http://localhost:8000") as churn:
+        prediction = await churn.predict(customer)
+"""
+
+from .churn_client import ChurnAPIError, ChurnClient
+
+__all__ = ["ChurnAPIError", "ChurnClient"]
@@ -0,0 +1,214 @@
+"""
+Cliente asíncrono con conexiones persistentes, agrupación automática y reintentos.
+
+- Un único ``httpx.AsyncClient`` con pool de conexiones keep-alive (sin
+  establecer una conexión TCP por predicción).
+- Las llamadas individuales a ``predict()`` que coinciden en el tiempo se
+  agrupan de forma transparente en una sola petición a ``/predict-batch``
+  (hasta ``batch_size`` clientes o ``batch_wait_ms`` de espera).
+- Concurrencia acotada: como mucho ``max_concurrency`` peticiones en curso.
+- Reintentos con espera exponencial ante 429/503 (respetando ``Retry-After``)
+  y errores de conexión.
+
+Los tipos de entrada y salida son los de ``app/schemas.py``, de modo que el
+cliente y el servicio no pueden divergir.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from app.schemas import ChurnPrediction, CustomerData
+
+# Códigos que indican sobrecarga o indisponibilidad temporal
+RETRY_STATUS_CODES = (429, 503)
+
+Customer = Union[CustomerData, Dict[str, Any]]
+
+
+class ChurnAPIError(Exception):
+    """
+    Error devuelto por la API (o agotados los reintentos).
+
+    Args:
+        status_code: Código HTTP (None si no hubo respuesta)
+        detail: Detalle del error devuelto por la API
+    """
+
+    def __init__(self, status_code: Optional[int], detail: Any):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _as_dict(customer: Customer) -> Dict[str, Any]:
+    if isinstance(customer, CustomerData):
+        return customer.dict()
+    # Valida en el cliente con el mismo esquema que el servicio
+    return CustomerData(**customer).dict()
+
+
+class ChurnClient:
+    """
+    Cliente de la API de churn para asyncio.
+
+    Args:
+        base_url: URL de la API (p. ej. 'http://localhost:8000')
+        mode: 'single' (modelo principal) o 'ensemble'
+        batch_size: Clientes máximos por petición a /predict-batch
+        batch_wait_ms: Espera máxima para completar un lote de predict()
+        max_concurrency: Peticiones simultáneas como máximo
+        max_connections: Tamaño del pool de conexiones keep-alive
+        max_retries: Reintentos ante 429/503 o errores de conexión
+        backoff: Espera inicial entre reintentos (segundos, se duplica)
+        timeout: Timeout por petición (segundos)
+        transport: Transporte httpx alternativo (p. ej. para pruebas)
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", mode: str = "single",
+                 batch_size: int = 64, batch_wait_ms: float = 5.0, max_concurrency: int = 8,
+                 max_connections: int = 10, max_retries: int = 3, backoff: float = 0.2,
+                 timeout: float = 10.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+        self.requests = 0
+        self.retries = 0
+
+    async def __aenter__(self) -> "ChurnClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    # Peticiones HTTP
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+        # Espera exponencial con jitter para no reintentar todos a la vez
+        return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """
+        Petición con concurrencia acotada y reintentos ante 429/503.
+
+        Raises:
+            ChurnAPIError: Si la API responde con error o se agotan los reintentos
+        """
+        for attempt in range(self.max_retries + 1):
+            response = None
+            async with self._semaphore:
+                self.requests += 1
+                try:
+                    response = await self._http.request(method, path, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise ChurnAPIError(None, f"Error de conexión: {str(e)}") from e
+                else:
+                    if response.status_code < 400:
+                        return response.json()
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                        try:
+                            detail = response.json().get("detail")
+                        except ValueError:
+                            detail = response.text
+                        raise ChurnAPIError(response.status_code, detail)
+            # La espera se hace fuera del semáforo para no bloquear otras peticiones
+            self.retries += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    async def health(self) -> Dict[str, Any]:
+        return await self._request("GET", "/health")
+
+    async def model_info(self) -> Dict[str, Any]:
+        return await self._request("GET", "/model-info")
+
+    # Predicciones
+
+    async def predict_many(self, customers: Sequence[Customer]) -> List[ChurnPrediction]:
+        """
+        Predice una lista de clientes en lotes de batch_size enviados en paralelo.
+
+        Returns:
+            list: Una ChurnPrediction por cliente, en el mismo orden
+        """
+        records = [_as_dict(customer) for customer in customers]
+        chunks = [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+        results = await asyncio.gather(*(self._predict_batch(chunk) for chunk in chunks))
+        return [prediction for chunk in results for prediction in chunk]
+
+    async def _predict_batch(self, records: List[Dict[str, Any]]) -> List[ChurnPrediction]:
+        data = await self._request("POST", "/predict-batch", json=records, params={"mode": self.mode})
+        predictions = sorted(data["predictions"], key=lambda p: p["customer_index"])
+        # Se conservan request_id (para /feedback) y el detalle del ensemble
+        return [
+            ChurnPrediction(**{key: value for key, value in p.items() if key != "customer_index"})
+            for p in predictions
+        ]
+
+    async def predict(self, customer: Customer) -> ChurnPrediction:
+        """
+        Predice un cliente; las llamadas concurrentes se agrupan en /predict-batch.
+        """
+        record = _as_dict(customer)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        task = asyncio.ensure_future(self._send_pending(pending))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        if self._pending:
+            self._flush()
+
+    async def _send_pending(self, pending: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        try:
+            predictions = await self._predict_batch([record for record, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(pending, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    async def aclose(self):
+        """
+        Envía las predicciones pendientes, espera las que están en curso y cierra el pool.
+        """
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self._http.aclose()
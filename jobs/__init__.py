@@ -0,0 +1,3 @@
+"""
+Procesos offline (batch) que reutilizan los artefactos y utilidades de la API.
+"""
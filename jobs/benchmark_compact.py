@@ -0,0 +1,154 @@
+"""
+Memoria máxima y throughput de la puntuación de lotes grandes: pandas frente a compacta.
+
+Genera un CSV de ``--rows`` clientes (muestreados con reemplazo de
+``data/telco_churn.csv``) y lo puntúa entero, de una vez, con cada modelo
+por dos caminos:
+
+- ``pandas``: ``pd.read_csv`` (categóricos como object) + ``predict_proba``
+  del pipeline (ColumnTransformer, matriz densa float64).
+- ``compact``: ``read_compact_csv`` (códigos int8) + ``CompactScorer``
+  (matriz CSR o densa float32 construida desde los códigos).
+
+Cada medición se ejecuta en un proceso nuevo y la memoria máxima es el
+incremento de ``ru_maxrss`` durante la lectura y la puntuación (incluye las
+copias internas de los clasificadores, que tracemalloc no ve).
+
+Uso:
+    python -m jobs.benchmark_compact --rows 1000000 --models xgboost lightgbm catboost
+"""
+
+import argparse
+import json
+import logging
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from app.features import APP_DIR, FEATURE_COLUMNS, RANDOM_STATE, RAW_DATA_PATH
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MODES = ("pandas", "compact")
+
+
+def make_batch(rows: int, path: Path, data_path: Path = RAW_DATA_PATH) -> Path:
+    """
+    Escribe un CSV de ``rows`` clientes muestreados con reemplazo del CSV original.
+    """
+    customers = pd.read_csv(data_path)
+    sample = customers.sample(rows, replace=True, random_state=RANDOM_STATE)
+    sample.to_csv(path, index=False)
+    return path
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, model_path: Path, input_path: Path) -> Dict[str, Any]:
+    """
+    Lee y puntúa el CSV completo por el camino indicado (en el proceso actual).
+
+    Returns:
+        dict: Segundos de lectura y puntuación, filas por segundo, memoria máxima
+        adicional (MB) y media de las probabilidades
+    """
+    from app.compact import CompactScorer, read_compact_csv
+    from app.features import load_pipeline
+
+    model = load_pipeline(model_path)
+    scorer = CompactScorer(model) if mode == "compact" else None
+    baseline = _max_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "compact":
+        frame = read_compact_csv(input_path)
+    else:
+        frame = pd.read_csv(input_path)
+        frame['TotalCharges'] = pd.to_numeric(frame['TotalCharges'], errors='coerce')
+    # Misma imputación que el notebook 1
+    missing = frame['TotalCharges'].isnull()
+    frame.loc[missing, 'TotalCharges'] = frame.loc[missing, 'MonthlyCharges'] * frame.loc[missing, 'tenure']
+    read_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == "compact":
+        probabilities = scorer.predict_proba(frame)
+    else:
+        probabilities = model.predict_proba(frame[FEATURE_COLUMNS])[:, 1]
+    score_seconds = time.perf_counter() - start
+
+    total = read_seconds + score_seconds
+    return {
+        "mode": mode,
+        "matrix_format": scorer.fmt if scorer is not None else "dense float64",
+        "rows": len(frame),
+        "frame_mb": round(frame.memory_usage(deep=True).sum() / 1e6, 1),
+        "read_seconds": round(read_seconds, 2),
+        "score_seconds": round(score_seconds, 2),
+        "rows_per_second": round(len(frame) / total),
+        "peak_mb": round(_max_rss_mb() - baseline, 1),
+        "mean_probability": float(np.mean(probabilities)),
+    }
+
+
+def run_benchmark(rows: int, models, workdir: Path) -> pd.DataFrame:
+    """
+    Mide cada modelo y camino en un proceso nuevo.
+
+    Returns:
+        pd.DataFrame: Una fila por (modelo, camino)
+    """
+    input_path = make_batch(rows, Path(workdir) / "batch.csv")
+    results = []
+    for name in models:
+        model_path = APP_DIR / f"model_{name}.joblib"
+        for mode in MODES:
+            logger.info(f"Midiendo {name} ({mode}) con {rows} filas")
+            output = subprocess.run(
+                [sys.executable, "-m", "jobs.benchmark_compact", "--worker", mode,
+                 "--model", str(model_path), "--input", str(input_path)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append({"model": name, **json.loads(output.strip().splitlines()[-1])})
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria y throughput de la representación compacta")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--models", nargs="*", default=["xgboost", "lightgbm", "catboost"])
+    parser.add_argument("--output", type=Path, default=None, help="CSV con los resultados")
+    # Uso interno: una medición en este proceso
+    parser.add_argument("--worker", choices=MODES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--model", type=Path, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--input", type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.model, args.input)))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_benchmark(args.rows, args.models, Path(workdir))
+    logger.info("Resultados:\n" + results.to_string(index=False))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
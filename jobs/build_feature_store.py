@@ -0,0 +1,85 @@
+"""
+Carga masiva del almacén de características desde el CSV de clientes.
+
+Lee ``data/telco_churn.csv`` con la limpieza del notebook 1, preprocesa
+todos los clientes con el ColumnTransformer del modelo y publica el
+almacén que usan ``/predict/{customer_id}`` y ``/predict/by-ids``. El
+almacén se reconstruye entero y se sustituye de forma atómica; la API lo
+vuelve a abrir en la siguiente consulta.
+
+Debe regenerarse al cambiar el preprocesador del modelo: la API compara la
+firma guardada en el manifiesto con la del modelo cargado y no usa un
+almacén incompatible.
+
+Uso:
+    python -m jobs.build_feature_store --model app/model.joblib --store data/feature_store
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from app.feature_store import DEFAULT_FEATURE_STORE_PATH, build_feature_store
+from app.features import APP_DIR, RAW_DATA_PATH, load_customers, load_pipeline, split_pipeline
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = APP_DIR / "model.joblib"
+
+
+def refresh_feature_store(
+    model_path: Path = DEFAULT_MODEL_PATH,
+    data_path: Path = RAW_DATA_PATH,
+    store_path: Path = DEFAULT_FEATURE_STORE_PATH,
+    chunk_size: int = 5000,
+) -> Dict[str, Any]:
+    """
+    Reconstruye el almacén de características con los clientes del CSV.
+
+    Args:
+        model_path: Pipeline entrenado (se usa su preprocesador)
+        data_path: CSV con columna customerID
+        store_path: Directorio del almacén
+        chunk_size: Filas preprocesadas por bloque
+
+    Returns:
+        dict: Estadísticas de la carga
+    """
+    preprocessor, _ = split_pipeline(load_pipeline(model_path))
+    customers = load_customers(data_path)
+
+    start = time.perf_counter()
+    manifest = build_feature_store(customers, preprocessor, store_path, chunk_size)
+    elapsed = time.perf_counter() - start
+
+    size_bytes = sum(f.stat().st_size for f in Path(store_path).rglob("*") if f.is_file())
+    return {
+        "customers": manifest["rows"],
+        "columns": len(manifest["columns"]),
+        "signature": manifest["signature"],
+        "size_mb": round(size_bytes / 1e6, 3),
+        "elapsed_seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye el almacén de características desde el CSV")
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", type=Path, default=RAW_DATA_PATH)
+    parser.add_argument("--store", type=Path, default=DEFAULT_FEATURE_STORE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    stats = refresh_feature_store(args.model, args.data, args.store, args.chunk_size)
+    logger.info(f"Almacén de características generado: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Reporte offline de motivos de churn para los clientes con mayor riesgo.
+
+Puntúa toda la base, selecciona los top-N clientes por probabilidad de
+churn y calcula sus explicaciones en paralelo en un pool de procesos.
+Cada proceso carga el modelo y el estado del explicador una sola vez
+(initializer), en lugar de recrearlo por caso como en el notebook 3.
+
+Uso:
+    python -m jobs.explain_report --top-n 5000 --workers 8 --output reports/reason_codes.csv
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.explain import SUPPORTED_CLASSIFIERS, TreeContributionExplainer
+from app.features import (
+    APP_DIR,
+    FEATURE_COLUMNS,
+    RANDOM_STATE,
+    RAW_DATA_PATH,
+    build_feature_map,
+    get_risk_level,
+    load_clean_split,
+    load_customers,
+    set_classifier_threads,
+    split_pipeline,
+    to_dense,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = APP_DIR / "model.joblib"
+
+# Estado del explicador, inicializado una vez por proceso del pool
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, method: str, lime_samples: int):
+    """
+    Inicializa el estado compartido del proceso: modelo, explicador y datos de fondo.
+    """
+    model = joblib.load(model_path)
+    preprocessor, classifier = split_pipeline(model)
+    # Un hilo por proceso: el paralelismo viene del pool
+    set_classifier_threads(classifier, 1)
+
+    _WORKER['method'] = method
+    if method == 'native':
+        _WORKER['explainer'] = TreeContributionExplainer(model)
+        return
+
+    from lime.lime_tabular import LimeTabularExplainer
+
+    X_train, _, _, _ = load_clean_split()
+    X_train_transformed = to_dense(preprocessor.transform(X_train))
+    _WORKER['preprocessor'] = preprocessor
+    _WORKER['classifier'] = classifier
+    _WORKER['feature_map'] = build_feature_map(preprocessor)
+    _WORKER['lime_samples'] = lime_samples
+    _WORKER['explainer'] = LimeTabularExplainer(
+        training_data=X_train_transformed,
+        feature_names=list(preprocessor.get_feature_names_out()),
+        class_names=['No Churn', 'Churn'],
+        mode='classification',
+        random_state=RANDOM_STATE
+    )
+
+
+def _explain_chunk(chunk: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula las contribuciones por campo original para un bloque de clientes.
+
+    Returns:
+        np.ndarray: Matriz (n_clientes, n_campos)
+    """
+    if _WORKER['method'] == 'native':
+        contributions, _, _ = _WORKER['explainer'].explain_frame(chunk)
+        return contributions
+
+    explainer = _WORKER['explainer']
+    feature_map = _WORKER['feature_map']
+    X_transformed = to_dense(_WORKER['preprocessor'].transform(chunk))
+    contributions = np.zeros((len(chunk), feature_map.shape[1]))
+
+    for i, row in enumerate(X_transformed):
+        explanation = explainer.explain_instance(
+            data_row=row,
+            predict_fn=_WORKER['classifier'].predict_proba,
+            num_features=feature_map.shape[0],
+            labels=(1,),
+            num_samples=_WORKER['lime_samples']
+        )
+        weights = np.zeros(feature_map.shape[0])
+        for idx, weight in explanation.as_map()[1]:
+            weights[idx] = weight
+        contributions[i] = weights @ feature_map
+
+    return contributions
+
+
+def _reason_codes(row: pd.Series, contributions: np.ndarray, n_reasons: int) -> list:
+    """
+    Devuelve los campos que más empujan hacia churn, como 'Campo=Valor'.
+    """
+    order = np.argsort(-contributions)[:n_reasons]
+    return [
+        f"{FEATURE_COLUMNS[j]}={row[FEATURE_COLUMNS[j]]}" if contributions[j] > 0 else ""
+        for j in order
+    ]
+
+
+def build_report(
+    model_path: Path = DEFAULT_MODEL_PATH,
+    data_path: Path = RAW_DATA_PATH,
+    top_n: int = 5000,
+    workers: int = None,
+    n_reasons: int = 3,
+    method: str = 'auto',
+    chunk_size: int = 256,
+    lime_samples: int = 1000,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Genera el reporte de motivos de churn para los top-N clientes en riesgo.
+
+    Args:
+        model_path: Ruta al pipeline entrenado
+        data_path: CSV con customerID y los campos de CustomerData
+        top_n: Número de clientes a explicar
+        workers: Procesos del pool (por defecto, núcleos disponibles)
+        n_reasons: Motivos por cliente
+        method: 'native' (TreeSHAP del booster), 'lime' o 'auto'
+        chunk_size: Clientes por tarea enviada al pool
+        lime_samples: Perturbaciones por cliente cuando method='lime'
+
+    Returns:
+        tuple: (DataFrame del reporte, estadísticas de throughput)
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    model = joblib.load(model_path)
+    _, classifier = split_pipeline(model)
+    if method == 'auto':
+        method = 'native' if type(classifier).__name__ in SUPPORTED_CLASSIFIERS else 'lime'
+
+    # 1. Puntuar toda la base en una sola llamada vectorizada
+    customers = load_customers(data_path)
+    X = customers[FEATURE_COLUMNS]
+    probabilities = model.predict_proba(X)[:, 1]
+    scoring_time = time.perf_counter() - start
+
+    # 2. Seleccionar los top-N por probabilidad de churn
+    top_n = min(top_n, len(X))
+    top_idx = np.argsort(-probabilities, kind='stable')[:top_n]
+    X_top = X.iloc[top_idx]
+    logger.info(f"Explicando {top_n} clientes con {workers} procesos (método: {method})")
+
+    # 3. Explicar en paralelo, un bloque por tarea
+    explain_start = time.perf_counter()
+    chunks = [X_top.iloc[i:i + chunk_size] for i in range(0, top_n, chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(model_path), method, lime_samples)
+    ) as pool:
+        results = list(pool.map(_explain_chunk, chunks))
+    contributions = np.vstack(results) if results else np.zeros((0, len(FEATURE_COLUMNS)))
+    explain_time = time.perf_counter() - explain_start
+
+    # 4. Reporte compacto con códigos de motivo
+    reasons = [
+        _reason_codes(X_top.iloc[i], contributions[i], n_reasons) for i in range(top_n)
+    ]
+    report = pd.DataFrame(
+        reasons,
+        index=X_top.index,
+        columns=[f"reason_{k + 1}" for k in range(n_reasons)]
+    )
+    top_probabilities = probabilities[top_idx]
+    report.insert(0, 'churn_probability', np.round(top_probabilities, 6))
+    report.insert(1, 'risk_level', [get_risk_level(p) for p in top_probabilities])
+    report = report.reset_index()
+
+    total_time = time.perf_counter() - start
+    stats = {
+        "model_path": str(model_path),
+        "method": method,
+        "workers": workers,
+        "customers_scored": int(len(X)),
+        "customers_explained": int(top_n),
+        "scoring_seconds": round(scoring_time, 4),
+        "explain_seconds": round(explain_time, 4),
+        "total_seconds": round(total_time, 4),
+        "explanations_per_second": round(top_n / explain_time, 2) if explain_time > 0 else None,
+    }
+    return report, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de motivos de churn para los clientes en riesgo")
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL_PATH, help="Pipeline entrenado (.joblib)")
+    parser.add_argument("--data", type=Path, default=RAW_DATA_PATH, help="CSV con customerID")
+    parser.add_argument("--top-n", type=int, default=5000, help="Número de clientes a explicar")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool")
+    parser.add_argument("--reasons", type=int, default=3, help="Motivos por cliente")
+    parser.add_argument("--method", choices=["auto", "native", "lime"], default="auto")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--output", type=Path, default=Path("reports") / "reason_codes.csv")
+    args = parser.parse_args()
+
+    report, stats = build_report(
+        model_path=args.model,
+        data_path=args.data,
+        top_n=args.top_n,
+        workers=args.workers,
+        n_reasons=args.reasons,
+        method=args.method,
+        chunk_size=args.chunk_size,
+    )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(args.output, index=False)
+    stats_path = args.output.with_suffix(".stats.json")
+    stats_path.write_text(json.dumps(stats, indent=2))
+
+    logger.info(f"Reporte guardado en: {args.output}")
+    logger.info(f"Estadísticas guardadas en: {stats_path}")
+    logger.info(f"Throughput: {stats['explanations_per_second']} explicaciones/seg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Importancia por permutación sobre los campos originales de CustomerData.
+
+Sustituye los ``feature_importance_*.csv`` del notebook 2 (conteos de splits
+o ganancias sobre columnas one-hot, no comparables entre modelos) por la
+caída de ROC-AUC en el conjunto de prueba al permutar cada campo, con
+intervalos de confianza.
+
+Como el preprocesador transforma fila a fila, permutar un campo original
+equivale a permutar conjuntamente sus columnas transformadas. El conjunto
+de prueba se transforma una sola vez y, para cada campo, todas las
+repeticiones se construyen como un único bloque vectorizado que se puntúa
+con una sola llamada a ``predict_proba``. Las tareas (modelo, campo,
+bloque de repeticiones) se reparten entre los núcleos.
+
+Uso:
+    python -m jobs.permutation_importance --repeats 10 --workers 8
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.metrics import roc_auc_score
+
+from app.features import (
+    APP_DIR,
+    CLEAN_DATA_PATH,
+    FEATURE_COLUMNS,
+    RANDOM_STATE,
+    build_feature_map,
+    limit_classifier_threads,
+    load_clean_split,
+    split_pipeline,
+    to_dense,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Estado por proceso: modelos y conjunto de prueba ya transformado
+_WORKER: Dict[str, Any] = {}
+
+
+def model_name_from_path(path: Path) -> str:
+    """
+    Extrae el nombre del modelo de 'model_<nombre>.joblib'.
+    """
+    return path.stem.replace("model_", "", 1)
+
+
+def _init_worker(model_paths: List[str], data_path: str):
+    """
+    Carga los modelos y transforma el conjunto de prueba una sola vez por proceso.
+    """
+    _, X_test, _, y_test = load_clean_split(data_path)
+    _WORKER['y'] = y_test.to_numpy()
+    _WORKER['models'] = {}
+
+    for path in model_paths:
+        preprocessor, classifier = split_pipeline(joblib.load(path))
+        # Un hilo por proceso: el paralelismo viene del pool
+        predict_kwargs = limit_classifier_threads(classifier, 1)
+        _WORKER['models'][path] = {
+            'classifier': classifier,
+            'predict_kwargs': predict_kwargs,
+            'X': to_dense(preprocessor.transform(X_test)),
+            'feature_map': build_feature_map(preprocessor),
+        }
+
+
+def _baseline_score(model_path: str) -> float:
+    state = _WORKER['models'][model_path]
+    proba = state['classifier'].predict_proba(state['X'], **state['predict_kwargs'])[:, 1]
+    return roc_auc_score(_WORKER['y'], proba)
+
+
+def _permuted_scores(model_path: str, feature_idx: int, n_repeats: int, seed: int) -> np.ndarray:
+    """
+    Puntúa n_repeats permutaciones de un campo con una sola llamada al clasificador.
+
+    Returns:
+        np.ndarray: ROC-AUC de cada repetición
+    """
+    state = _WORKER['models'][model_path]
+    X, y = state['X'], _WORKER['y']
+    n_rows = X.shape[0]
+    columns = np.flatnonzero(state['feature_map'][:, feature_idx])
+
+    # Bloque (n_repeats * n_rows) con las columnas del campo permutadas por repetición
+    rng = np.random.default_rng(seed)
+    permutations = rng.permuted(np.tile(np.arange(n_rows), (n_repeats, 1)), axis=1)
+    block = np.tile(X, (n_repeats, 1))
+    block[:, columns] = X[permutations.ravel()][:, columns]
+
+    proba = state['classifier'].predict_proba(block, **state['predict_kwargs'])[:, 1]
+    proba = proba.reshape(n_repeats, n_rows)
+    return np.array([roc_auc_score(y, p) for p in proba])
+
+
+def compute_importances(
+    model_paths: List[Path],
+    n_repeats: int = 10,
+    workers: int = None,
+    repeats_per_task: int = 5,
+    confidence: float = 0.95,
+    seed: int = RANDOM_STATE,
+    data_path: Path = CLEAN_DATA_PATH,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Calcula la importancia por permutación de cada campo para varios modelos.
+
+    Args:
+        model_paths: Pipelines entrenados
+        n_repeats: Permutaciones por campo
+        workers: Procesos del pool (por defecto, núcleos disponibles)
+        repeats_per_task: Repeticiones agrupadas en cada bloque vectorizado
+        confidence: Nivel del intervalo de confianza
+        seed: Semilla base
+        data_path: CSV limpio del que se obtiene el conjunto de prueba
+
+    Returns:
+        dict: Nombre del modelo -> DataFrame con Feature, Importance, Std, CI_Lower, CI_Upper
+    """
+    workers = workers or os.cpu_count() or 1
+    paths = [str(p) for p in model_paths]
+
+    # Tareas: (modelo, campo, bloque de repeticiones)
+    tasks = []
+    for path in paths:
+        for feature_idx in range(len(FEATURE_COLUMNS)):
+            for start in range(0, n_repeats, repeats_per_task):
+                size = min(repeats_per_task, n_repeats - start)
+                task_seed = seed + feature_idx * n_repeats + start
+                tasks.append((path, feature_idx, size, task_seed))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(paths, str(data_path))
+    ) as pool:
+        baselines = dict(zip(paths, pool.map(_baseline_score, paths)))
+        scores = list(pool.map(_permuted_scores, *zip(*tasks)))
+
+    drops: Dict[str, Dict[int, List[float]]] = {p: {} for p in paths}
+    for (path, feature_idx, _, _), task_scores in zip(tasks, scores):
+        drops[path].setdefault(feature_idx, []).extend(baselines[path] - task_scores)
+
+    results = {}
+    t_value = stats.t.ppf((1 + confidence) / 2, df=max(n_repeats - 1, 1))
+    for path in paths:
+        rows = []
+        for feature_idx, feature in enumerate(FEATURE_COLUMNS):
+            values = np.asarray(drops[path][feature_idx])
+            mean = values.mean()
+            std = values.std(ddof=1) if len(values) > 1 else 0.0
+            half_width = t_value * std / np.sqrt(len(values))
+            rows.append({
+                'Feature': feature,
+                'Importance': mean,
+                'Std': std,
+                'CI_Lower': mean - half_width,
+                'CI_Upper': mean + half_width,
+            })
+        results[model_name_from_path(Path(path))] = (
+            pd.DataFrame(rows).sort_values('Importance', ascending=False).reset_index(drop=True)
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importancia por permutación de los modelos entrenados")
+    parser.add_argument("--models", type=Path, nargs="*", default=None,
+                        help="Pipelines a evaluar (por defecto, app/model_*.joblib)")
+    parser.add_argument("--repeats", type=int, default=10, help="Permutaciones por campo")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool")
+    parser.add_argument("--output-dir", type=Path, default=APP_DIR)
+    args = parser.parse_args()
+
+    model_paths = args.models or sorted(APP_DIR.glob("model_*.joblib"))
+    logger.info(f"Calculando importancia por permutación para {len(model_paths)} modelos")
+
+    start = time.perf_counter()
+    results = compute_importances(model_paths, n_repeats=args.repeats, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for name, importance_df in results.items():
+        output_path = args.output_dir / f"feature_importance_{name}.csv"
+        importance_df.to_csv(output_path, index=False)
+        logger.info(f" Importancia de {name} guardada en: {output_path}")
+
+    logger.info(f"Completado en {elapsed:.2f} segundos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,626 @@
+"""
+Pipeline de entrenamiento con caché: limpieza, división, preprocesador, modelos y evaluación.
+
+Sustituye la ejecución manual de los notebooks 1 y 2 (y la importancia de
+características) por un grafo de etapas::
+
+    clean -> split -> preprocessor -> train_<modelo> (x4) -> evaluate
+    clean + train_<modelo> -> explain_<modelo>
+
+Cada etapa escribe sus salidas en ``<cache>/<etapa>/<clave>/``. La clave es
+un hash del código de la etapa, sus parámetros (grid de hiperparámetros,
+versiones de las librerías...), el contenido de sus archivos de entrada y la
+huella de las salidas de sus dependencias. Una etapa con clave ya en caché no
+se vuelve a ejecutar; como la clave depende del contenido de las salidas y no
+de las claves anteriores, si una etapa se re-ejecuta y produce lo mismo sus
+dependientes siguen en caché. Cambiar el grid de XGBoost solo re-entrena
+XGBoost (y re-evalúa): la limpieza, la división y los otros tres modelos
+salen de la caché.
+
+Las etapas listas se ejecutan en paralelo en un pool de procesos (en
+particular, el entrenamiento de los cuatro modelos). Al terminar, los
+artefactos se publican donde los dejaba el notebook 2 (solo los que
+cambian, para no alterar su versión).
+
+Uso:
+    python -m jobs.pipeline --workers 4
+    python -m jobs.pipeline --grids grids.json --target train_xgboost
+    python -m jobs.pipeline --dry-run
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import joblib
+import pandas as pd
+
+from app.compact import to_compact_frame
+from app.features import (
+    APP_DIR,
+    CATEGORICAL_FEATURES,
+    CLEAN_DATA_PATH,
+    DATA_DIR,
+    NUMERIC_FEATURES,
+    RANDOM_STATE,
+    RAW_DATA_PATH,
+    load_clean_split,
+    load_customers,
+)
+from jobs import permutation_importance
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = DATA_DIR / "pipeline_cache"
+META_FILE = "_stage.json"
+
+# Modelos y grids de hiperparámetros del notebook 2
+MODELS: Dict[str, Dict[str, Any]] = {
+    'RandomForest': {
+        'estimator': 'sklearn.ensemble.RandomForestClassifier',
+        'package': 'scikit-learn',
+        'params': {'random_state': RANDOM_STATE, 'n_jobs': -1},
+        'grid': {
+            'classifier__n_estimators': [100, 200],
+            'classifier__max_depth': [10, 20, None],
+            'classifier__min_samples_split': [2, 5],
+            'classifier__min_samples_leaf': [1, 2],
+            'classifier__max_features': ['sqrt', 'log2'],
+            'classifier__bootstrap': [True],
+            'classifier__criterion': ['gini', 'entropy'],
+            'classifier__class_weight': ['balanced', None],
+        },
+    },
+    'XGBoost': {
+        'estimator': 'xgboost.XGBClassifier',
+        'package': 'xgboost',
+        'params': {'random_state': RANDOM_STATE, 'n_jobs': -1, 'eval_metric': 'logloss'},
+        'grid': {
+            'classifier__n_estimators': [100, 200],
+            'classifier__max_depth': [3, 5, 7],
+            'classifier__learning_rate': [0.01, 0.1],
+            'classifier__subsample': [0.8, 1.0],
+            'classifier__colsample_bytree': [0.8, 1.0],
+            'classifier__gamma': [0, 0.1],
+            'classifier__min_child_weight': [1, 3],
+            'classifier__reg_alpha': [0, 0.1],
+            'classifier__reg_lambda': [1, 1.5],
+            'classifier__scale_pos_weight': [1, 3],
+        },
+    },
+    'CatBoost': {
+        'estimator': 'catboost.CatBoostClassifier',
+        'package': 'catboost',
+        'params': {'random_state': RANDOM_STATE, 'verbose': 0, 'allow_writing_files': False},
+        'grid': {
+            'classifier__iterations': [100, 200],
+            'classifier__depth': [4, 6, 8],
+            'classifier__learning_rate': [0.01, 0.1],
+            'classifier__l2_leaf_reg': [1, 3, 5],
+            'classifier__bagging_temperature': [0, 1],
+            'classifier__border_count': [32, 64],
+            'classifier__random_strength': [1, 5],
+            'classifier__subsample': [0.8, 1.0],
+        },
+    },
+    'LightGBM': {
+        'estimator': 'lightgbm.LGBMClassifier',
+        'package': 'lightgbm',
+        'params': {'random_state': RANDOM_STATE, 'n_jobs': -1, 'verbose': -1},
+        'grid': {
+            'classifier__n_estimators': [100, 200],
+            'classifier__max_depth': [5, 10, -1],
+            'classifier__learning_rate': [0.01, 0.1],
+            'classifier__num_leaves': [31, 50],
+            'classifier__min_child_samples': [20, 30],
+            'classifier__subsample': [0.8, 1.0],
+            'classifier__colsample_bytree': [0.8, 1.0],
+            'classifier__reg_alpha': [0, 0.1],
+            'classifier__reg_lambda': [0, 0.1],
+            'classifier__max_bin': [255, 500],
+        },
+    },
+}
+
+
+def _versions(*packages: str) -> Dict[str, str]:
+    """
+    Versiones instaladas de las librerías de las que depende una etapa.
+    """
+    return {package: metadata.version(package) for package in packages}
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _output_digest(directory: Path) -> str:
+    """
+    Huella del contenido de las salidas de una etapa (nombres y bytes de los archivos).
+    """
+    digest = hashlib.sha256()
+    for path in sorted(directory.rglob('*')):
+        if path.is_file() and path.name != META_FILE:
+            digest.update(path.relative_to(directory).as_posix().encode())
+            digest.update(_file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def model_file_name(model: str) -> str:
+    """
+    Nombre del artefacto de un modelo como lo guardaba el notebook 2 ('model_<nombre>.joblib').
+    """
+    return f"model_{model.lower().replace(' ', '_')}.joblib"
+
+
+class Stage:
+    """
+    Etapa del pipeline.
+
+    Args:
+        name: Nombre único de la etapa
+        fn: Función ``fn(inputs, output_dir, **params, **options)``; ``inputs`` mapea cada
+            dependencia a su directorio de salida y cada archivo de entrada a su ruta
+        deps: Etapas de las que depende
+        params: Parámetros que forman parte de la clave de caché
+        files: Archivos de entrada externos (nombre -> ruta), se hashea su contenido
+        code: Funciones o módulos adicionales cuyo código forma parte de la clave
+        packages: Librerías cuya versión forma parte de la clave
+        options: Parámetros que no cambian el resultado (p. ej. número de procesos)
+    """
+
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str] = (), params: Optional[Dict[str, Any]] = None,
+                 files: Optional[Dict[str, Path]] = None, code: Sequence[Any] = (),
+                 packages: Sequence[str] = (), options: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.files = {key: Path(path) for key, path in (files or {}).items()}
+        self.code = tuple(code)
+        self.packages = tuple(packages)
+        self.options = options or {}
+
+    def key(self, upstream: Dict[str, str]) -> str:
+        """
+        Clave de caché a partir del código, los parámetros, las versiones de las
+        librerías, los archivos y las salidas de las dependencias.
+
+        Args:
+            upstream: Etapa -> huella de sus salidas
+        """
+        digest = hashlib.sha256()
+        digest.update(self.name.encode())
+        for obj in (self.fn, *self.code):
+            digest.update(inspect.getsource(obj).encode())
+        digest.update(json.dumps(self.params, sort_keys=True, default=repr).encode())
+        digest.update(json.dumps(_versions(*self.packages), sort_keys=True).encode())
+        for name, path in sorted(self.files.items()):
+            digest.update(f"{name}={_file_digest(path)}".encode())
+        for dep in self.deps:
+            digest.update(f"{dep}={upstream[dep]}".encode())
+        return digest.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Etapas (funciones de módulo para poder ejecutarse en el pool de procesos)
+# ---------------------------------------------------------------------------
+
+def clean_stage(inputs: Dict[str, Path], output_dir: Path) -> Dict[str, Any]:
+    """
+    Limpieza del notebook 1: TotalCharges numérico e imputado, sin customerID.
+    """
+    df = load_customers(inputs['raw']).reset_index(drop=True)
+    df.to_csv(output_dir / "telco_churn_clean.csv", index=False)
+    return {"rows": len(df), "churn_rate": round(float((df['Churn'] == 'Yes').mean()), 4)}
+
+
+def split_stage(inputs: Dict[str, Path], output_dir: Path) -> Dict[str, Any]:
+    """
+    División estratificada 80/20 del notebook 2.
+
+    Los campos categóricos se guardan como categorías (códigos int8), no como
+    object; el preprocesador ajustado y sus salidas son los mismos.
+    """
+    X_train, X_test, y_train, y_test = load_clean_split(inputs['clean'] / "telco_churn_clean.csv")
+    X_train, X_test = to_compact_frame(X_train), to_compact_frame(X_test)
+    joblib.dump((X_train, X_test, y_train, y_test), output_dir / "split.joblib")
+    return {"train_rows": len(X_train), "test_rows": len(X_test)}
+
+
+def preprocessor_stage(inputs: Dict[str, Path], output_dir: Path) -> Dict[str, Any]:
+    """
+    Ajusta el ColumnTransformer del notebook 2 sobre el conjunto de entrenamiento.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    X_train, _, _, _ = joblib.load(inputs['split'] / "split.joblib")
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), NUMERIC_FEATURES),
+            ('cat', OneHotEncoder(drop='first', handle_unknown='ignore'), CATEGORICAL_FEATURES)
+        ],
+        remainder='passthrough'
+    )
+    preprocessor.fit(X_train)
+    joblib.dump(preprocessor, output_dir / "preprocessor.joblib")
+    return {"columns": len(preprocessor.get_feature_names_out())}
+
+
+def train_stage(inputs: Dict[str, Path], output_dir: Path, model: str, estimator: str,
+                estimator_params: Dict[str, Any], param_grid: Dict[str, List[Any]], cv_folds: int,
+                search_jobs: int = 1) -> Dict[str, Any]:
+    """
+    GridSearchCV del notebook 2 para un modelo (ROC-AUC, StratifiedKFold).
+
+    La búsqueda re-ajusta el preprocesador en cada fold, como el notebook.
+    El pipeline final usa el preprocesador de la etapa ``preprocessor`` (el
+    mismo ajuste que haría el refit), de modo que todos los modelos
+    publicados comparten exactamente el mismo preprocesador.
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+    from sklearn.pipeline import Pipeline
+
+    X_train, _, y_train, _ = joblib.load(inputs['split'] / "split.joblib")
+    preprocessor = joblib.load(inputs['preprocessor'] / "preprocessor.joblib")
+    module_name, class_name = estimator.rsplit('.', 1)
+    classifier = getattr(importlib.import_module(module_name), class_name)(**estimator_params)
+
+    search = GridSearchCV(
+        estimator=Pipeline([('preprocessor', clone(preprocessor)), ('classifier', classifier)]),
+        param_grid=param_grid,
+        cv=StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=RANDOM_STATE),
+        scoring='roc_auc',
+        n_jobs=search_jobs,
+        refit=False,
+    )
+    start = time.perf_counter()
+    search.fit(X_train, y_train)
+
+    best_params = {key.replace('classifier__', '', 1): value for key, value in search.best_params_.items()}
+    final_classifier = clone(classifier).set_params(**best_params)
+    final_classifier.fit(preprocessor.transform(X_train), y_train)
+    pipeline = Pipeline([('preprocessor', preprocessor), ('classifier', final_classifier)])
+    elapsed = time.perf_counter() - start
+
+    joblib.dump(pipeline, output_dir / model_file_name(model))
+    summary = {
+        "model": model,
+        "cv_roc_auc": round(float(search.best_score_), 4),
+        "candidates": len(search.cv_results_['params']),
+        "best_params": search.best_params_,
+        "training_seconds": round(elapsed, 2),
+    }
+    (output_dir / "search.json").write_text(json.dumps(summary, indent=2, default=repr))
+    return summary
+
+
+def evaluate_stage(inputs: Dict[str, Path], output_dir: Path) -> Dict[str, Any]:
+    """
+    Métricas de test del notebook 2 y selección del mejor modelo (máximo F1-Score).
+    """
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    _, X_test, _, y_test = joblib.load(inputs['split'] / "split.joblib")
+    rows = []
+    for dep, directory in sorted(inputs.items()):
+        if not dep.startswith('train_'):
+            continue
+        model = json.loads((directory / "search.json").read_text())['model']
+        pipeline = joblib.load(directory / model_file_name(model))
+        y_pred = pipeline.predict(X_test)
+        y_proba = pipeline.predict_proba(X_test)[:, 1]
+        rows.append({
+            'Modelo': model,
+            'Accuracy': accuracy_score(y_test, y_pred),
+            'Precision': precision_score(y_test, y_pred),
+            'Recall': recall_score(y_test, y_pred),
+            'F1-Score': f1_score(y_test, y_pred),
+            'ROC-AUC': roc_auc_score(y_test, y_proba),
+        })
+
+    metrics_df = pd.DataFrame(rows).sort_values('ROC-AUC', ascending=False)
+    metrics_df.to_csv(output_dir / "model_metrics.csv", index=False)
+    best_model = metrics_df.loc[metrics_df['F1-Score'].idxmax(), 'Modelo']
+    selection = {"best_model": best_model, "criterion": "F1-Score"}
+    (output_dir / "selection.json").write_text(json.dumps(selection, indent=2))
+    return selection
+
+
+def explain_stage(inputs: Dict[str, Path], output_dir: Path, model: str, n_repeats: int,
+                  workers: int = 1) -> Dict[str, Any]:
+    """
+    Importancia por permutación del modelo (ver jobs/permutation_importance.py).
+    """
+    results = permutation_importance.compute_importances(
+        [inputs[f'train_{model.lower()}'] / model_file_name(model)],
+        n_repeats=n_repeats,
+        workers=workers,
+        data_path=inputs['clean'] / "telco_churn_clean.csv",
+    )
+    (name, importance_df), = results.items()
+    importance_df.to_csv(output_dir / f"feature_importance_{name}.csv", index=False)
+    return {"top_features": importance_df['Feature'].head(3).tolist()}
+
+
+def build_stages(
+    raw_path: Path = RAW_DATA_PATH,
+    models: Optional[Dict[str, Dict[str, Any]]] = None,
+    cv_folds: int = 5,
+    n_repeats: int = 10,
+    search_jobs: int = 1,
+) -> List[Stage]:
+    """
+    Grafo de etapas del entrenamiento.
+
+    Args:
+        raw_path: CSV original de clientes
+        models: Modelo -> estimador, parámetros y grid (por defecto, MODELS)
+        cv_folds: Folds de la validación cruzada
+        n_repeats: Permutaciones por campo en la importancia
+        search_jobs: Procesos de cada GridSearchCV (no forma parte de la clave)
+
+    Returns:
+        list: Etapas en orden topológico
+    """
+    models = MODELS if models is None else models
+    stages = [
+        Stage('clean', clean_stage, files={'raw': raw_path}, code=(load_customers,), packages=('pandas',)),
+        Stage('split', split_stage, deps=('clean',), code=(load_clean_split, to_compact_frame),
+              packages=('pandas', 'scikit-learn')),
+        Stage('preprocessor', preprocessor_stage, deps=('split',), packages=('scikit-learn',)),
+    ]
+    for model, spec in models.items():
+        stages.append(Stage(
+            f'train_{model.lower()}', train_stage, deps=('split', 'preprocessor'),
+            params={
+                'model': model,
+                'estimator': spec['estimator'],
+                'estimator_params': spec['params'],
+                'param_grid': spec['grid'],
+                'cv_folds': cv_folds,
+            },
+            packages=('scikit-learn', spec['package']),
+            options={'search_jobs': search_jobs},
+        ))
+    stages.append(Stage(
+        'evaluate', evaluate_stage, deps=('split', *[f'train_{m.lower()}' for m in models]),
+    ))
+    for model in models:
+        stages.append(Stage(
+            f'explain_{model.lower()}', explain_stage, deps=('clean', f'train_{model.lower()}'),
+            params={'model': model, 'n_repeats': n_repeats}, code=(permutation_importance,),
+        ))
+    return stages
+
+
+def _execute(fn: Callable, inputs: Dict[str, Path], output_dir: Path, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    summary = fn(inputs, output_dir, **kwargs) or {}
+    return {"summary": summary, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def select_stages(stages: List[Stage], targets: Optional[Iterable[str]] = None) -> List[Stage]:
+    """
+    Etapas necesarias para obtener ``targets`` (ellas y sus dependencias), en orden.
+
+    Raises:
+        ValueError: Si una etapa pedida no existe
+    """
+    by_name = {stage.name: stage for stage in stages}
+    if not targets:
+        return list(stages)
+    unknown = set(targets) - set(by_name)
+    if unknown:
+        raise ValueError(f"Etapas desconocidas: {sorted(unknown)}")
+    needed, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def run_pipeline(
+    stages: List[Stage],
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    workers: Optional[int] = None,
+    force: Iterable[str] = (),
+    dry_run: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Ejecuta las etapas obsoletas, en paralelo cuando sus dependencias están listas.
+
+    Args:
+        stages: Etapas (ver build_stages / select_stages)
+        cache_dir: Directorio de la caché
+        workers: Procesos del pool (por defecto, núcleos disponibles)
+        force: Etapas que se re-ejecutan aunque estén en caché
+        dry_run: Solo informa de qué etapas se ejecutarían
+
+    Returns:
+        dict: Etapa -> status ('cached', 'run' o 'stale' en dry_run), key, path,
+        seconds y summary
+
+    Raises:
+        RuntimeError: Si falla una etapa (las que dependen de ella no se ejecutan)
+    """
+    cache_dir = Path(cache_dir)
+    force = set(force)
+    by_name = {stage.name: stage for stage in stages}
+    digests: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = [stage.name for stage in stages]
+    running = {}
+
+    def schedule(pool):
+        progress = True
+        while progress:
+            progress = False
+            for name in list(pending):
+                stage = by_name[name]
+                if any(dep not in digests for dep in stage.deps):
+                    if dry_run and any(results.get(dep, {}).get('status') == 'stale' for dep in stage.deps):
+                        results[name] = {"status": "stale", "key": None}
+                        pending.remove(name)
+                        progress = True
+                    continue
+                pending.remove(name)
+                progress = True
+                key = stage.key(digests)
+                output_dir = cache_dir / name / key
+                meta_path = output_dir / META_FILE
+                if meta_path.exists() and name not in force:
+                    meta = json.loads(meta_path.read_text())
+                    digests[name] = meta['digest']
+                    results[name] = {"status": "cached", "key": key, "path": output_dir,
+                                     "seconds": meta['seconds'], "summary": meta['summary']}
+                    continue
+                if dry_run:
+                    results[name] = {"status": "stale", "key": key}
+                    continue
+                tmp_dir = cache_dir / name / f"{key}.tmp-{os.getpid()}"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                tmp_dir.mkdir(parents=True)
+                inputs = {dep: results[dep]['path'] for dep in stage.deps}
+                inputs.update(stage.files)
+                logger.info(f"Ejecutando etapa {name} ({key})")
+                future = pool.submit(_execute, stage.fn, inputs, tmp_dir, {**stage.params, **stage.options})
+                running[future] = (name, key, tmp_dir, output_dir)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        schedule(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key, tmp_dir, output_dir = running.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    raise RuntimeError(f"La etapa {name} falló: {str(e)}") from e
+                digest = _output_digest(tmp_dir)
+                meta = {"key": key, "digest": digest, "created": datetime.now().isoformat(), **outcome}
+                (tmp_dir / META_FILE).write_text(json.dumps(meta, indent=2, default=repr))
+                shutil.rmtree(output_dir, ignore_errors=True)
+                tmp_dir.rename(output_dir)
+                digests[name] = digest
+                results[name] = {"status": "run", "key": key, "path": output_dir, **outcome}
+                logger.info(f"Etapa {name} completada en {outcome['seconds']:.2f} segundos")
+            schedule(pool)
+
+    return results
+
+
+def publish(results: Dict[str, Dict[str, Any]], app_dir: Path = APP_DIR,
+            clean_path: Path = CLEAN_DATA_PATH) -> List[Path]:
+    """
+    Copia los artefactos a las rutas del notebook 2 (solo los que cambian).
+
+    Publica el CSV limpio, ``model_<nombre>.joblib`` de cada modelo,
+    ``model.joblib`` (el mejor por F1-Score), ``model_metrics.csv`` y
+    ``feature_importance_<nombre>.csv``.
+
+    Returns:
+        list: Rutas actualizadas
+    """
+    app_dir = Path(app_dir)
+    copies = [(results['clean']['path'] / "telco_churn_clean.csv", Path(clean_path))]
+    for name, result in results.items():
+        if name.startswith('train_'):
+            model = result['summary']['model']
+            copies.append((result['path'] / model_file_name(model), app_dir / model_file_name(model)))
+        elif name.startswith('explain_'):
+            for path in result['path'].glob("feature_importance_*.csv"):
+                copies.append((path, app_dir / path.name))
+    evaluate = results['evaluate']['path']
+    best_model = json.loads((evaluate / "selection.json").read_text())['best_model']
+    copies.append((evaluate / "model_metrics.csv", app_dir / "model_metrics.csv"))
+    copies.append((results[f'train_{best_model.lower()}']['path'] / model_file_name(best_model),
+                   app_dir / "model.joblib"))
+
+    updated = []
+    for source, target in copies:
+        if target.exists() and _file_digest(source) == _file_digest(target):
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+        updated.append(target)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de entrenamiento con caché por etapas")
+    parser.add_argument("--data", type=Path, default=RAW_DATA_PATH, help="CSV original de clientes")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--grids", type=Path, default=None,
+                        help="JSON con grids que sustituyen a los del notebook 2 (modelo -> grid)")
+    parser.add_argument("--cv-folds", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=10, help="Permutaciones por campo en la importancia")
+    parser.add_argument("--workers", type=int, default=None, help="Etapas ejecutadas en paralelo")
+    parser.add_argument("--search-jobs", type=int, default=1, help="Procesos de cada GridSearchCV")
+    parser.add_argument("--target", nargs="*", default=None,
+                        help="Ejecutar solo estas etapas y sus dependencias (no publica)")
+    parser.add_argument("--force", nargs="*", default=(), help="Etapas a re-ejecutar aunque estén en caché")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué etapas están obsoletas")
+    parser.add_argument("--no-publish", action="store_true", help="No copiar los artefactos a app/ y data/")
+    args = parser.parse_args()
+
+    models = {name: dict(spec) for name, spec in MODELS.items()}
+    if args.grids:
+        for name, grid in json.loads(args.grids.read_text()).items():
+            if name not in models:
+                parser.error(f"Modelo desconocido en {args.grids}: {name}")
+            models[name]['grid'] = grid
+
+    stages = build_stages(args.data, models, args.cv_folds, args.repeats, args.search_jobs)
+    try:
+        stages = select_stages(stages, args.target)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    results = run_pipeline(stages, args.cache_dir, args.workers, args.force, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    for name, result in results.items():
+        logger.info(f" {name:<22} {result['status']:<7} {result['key']}")
+    if args.dry_run:
+        return
+
+    if not args.target and not args.no_publish:
+        for path in publish(results):
+            logger.info(f" Artefacto actualizado: {path}")
+    executed = sum(result['status'] == 'run' for result in results.values())
+    logger.info(f"Completado en {elapsed:.2f} segundos ({executed} de {len(results)} etapas ejecutadas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Replay diferencial de tráfico grabado entre versiones del modelo.
+
+Lee registros de peticiones en JSONL (una línea por cliente con los campos
+de CustomerData, o un cuerpo de ``/predict-batch`` con la lista
+``customers``), los puntúa con dos o más artefactos y compara cada uno con
+el primero (la referencia, normalmente el modelo en producción):
+
+- Cambios de predicción (umbral 0.5): No -> Yes y Yes -> No.
+- Migraciones de nivel de riesgo: matriz 3x3 Low/Medium/High.
+- Distribución de la diferencia de probabilidad: media, desviación,
+  percentiles (histograma con bins de 0.001) y los registros con mayor
+  diferencia.
+- Throughput de cada modelo (filas por segundo y núcleo, solo puntuación).
+
+Los archivos se reparten en bloques de bytes alineados a líneas; cada
+proceso del pool lee, valida y puntúa su bloque con todos los modelos (sobre
+la representación compacta de ``app/compact.py``) y devuelve solo
+agregados, que se combinan al terminar. La memoria está acotada por el
+tamaño de bloque y el número de procesos, no por el de los archivos.
+
+Uso:
+    python -m jobs.replay logs/requests-*.jsonl --models app/model.joblib app/model_catboost.joblib
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.compact import CATEGORICAL_DTYPES, CompactScorer
+from app.features import FEATURE_COLUMNS, NUMERIC_FEATURES, load_pipeline, model_version
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ["Low", "Medium", "High"]
+DELTA_BINS = 2000  # bins de 0.001 en [-1, 1]
+
+# Valor -> código int8 de cada campo categórico (orden de CATEGORICAL_DTYPES)
+_CATEGORY_CODES = {
+    field: {value: code for code, value in enumerate(dtype.categories)} for field, dtype in CATEGORICAL_DTYPES.items()
+}
+
+# Estado por proceso: modelos cargados una sola vez
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(model_paths: List[str]):
+    _WORKER['models'] = {}
+    for path in model_paths:
+        model = load_pipeline(path)
+        try:
+            # Un hilo por proceso: el paralelismo viene del pool
+            scorer = CompactScorer(model, n_threads=1)
+            _WORKER['models'][path] = scorer.predict_proba
+        except ValueError:
+            _WORKER['models'][path] = lambda X, model=model: model.predict_proba(X[FEATURE_COLUMNS])[:, 1]
+
+
+def chunk_ranges(paths: Sequence[Path], chunk_bytes: int) -> List[Tuple[str, int, int]]:
+    """
+    Divide los archivos en rangos de bytes; cada línea pertenece al rango donde empieza.
+    """
+    ranges = []
+    for path in paths:
+        size = Path(path).stat().st_size
+        for start in range(0, size, chunk_bytes):
+            ranges.append((str(path), start, min(start + chunk_bytes, size)))
+    return ranges
+
+
+def _read_lines(path: str, start: int, end: int) -> List[bytes]:
+    with open(path, 'rb') as f:
+        if start > 0:
+            # Si el rango empieza a mitad de línea, esa línea es del rango anterior
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                f.readline()
+        if f.tell() >= end:
+            return []
+        data = f.read(end - f.tell())
+        if not data.endswith(b'\n'):
+            data += f.readline()
+    return data.splitlines()
+
+
+def _decode(lines: Sequence[bytes]) -> Tuple[List[Any], int]:
+    lines = [line for line in lines if line.strip()]
+    try:
+        # Todo el bloque como un único array JSON: una sola llamada al decodificador
+        return json.loads(b'[' + b','.join(lines) + b']'), 0
+    except ValueError:
+        payloads, invalid = [], 0
+        for line in lines:
+            try:
+                payloads.append(json.loads(line))
+            except ValueError:
+                invalid += 1
+        return payloads, invalid
+
+
+def parse_records(lines: Sequence[bytes]) -> Tuple[pd.DataFrame, List[Any], int]:
+    """
+    Convierte líneas JSONL en un DataFrame compacto y descarta los registros no válidos.
+
+    Returns:
+        tuple: (campos de CustomerData con categóricos como códigos int8,
+        identificador de cada fila válida (customerID o request_id si existen),
+        número de registros no válidos)
+    """
+    payloads, invalid = _decode(lines)
+    records = []
+    for payload in payloads:
+        if isinstance(payload, dict) and isinstance(payload.get('customers'), list):
+            records.extend(payload['customers'])
+        else:
+            records.append(payload)
+    try:
+        columns = {field: [record[field] for record in records] for field in FEATURE_COLUMNS}
+    except (KeyError, TypeError):
+        complete = [r for r in records if isinstance(r, dict) and all(field in r for field in FEATURE_COLUMNS)]
+        invalid += len(records) - len(complete)
+        records = complete
+        columns = {field: [record[field] for record in records] for field in FEATURE_COLUMNS}
+
+    data = {}
+    for field, values in columns.items():
+        if field in NUMERIC_FEATURES:
+            data[field] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+        else:
+            # Códigos con un diccionario: más rápido que pd.Categorical sobre una lista de str
+            lookup = _CATEGORY_CODES[field]
+            codes = np.fromiter((lookup.get(v, -1) if isinstance(v, str) else -1 for v in values),
+                                np.int8, len(values))
+            data[field] = pd.Categorical.from_codes(codes, dtype=CATEGORICAL_DTYPES[field])
+    frame = pd.DataFrame(data, columns=FEATURE_COLUMNS)
+    # Mismas reglas que la validación de trabajos batch: numéricos no negativos y categorías permitidas
+    valid = np.ones(len(frame), dtype=bool)
+    for field in FEATURE_COLUMNS:
+        if field in NUMERIC_FEATURES:
+            valid &= (frame[field] >= 0).to_numpy()
+        else:
+            valid &= (frame[field].cat.codes >= 0).to_numpy()
+    invalid += int((~valid).sum())
+    ids = [record.get('customerID', record.get('request_id')) for record, ok in zip(records, valid) if ok]
+    return frame[valid].reset_index(drop=True), ids, invalid
+
+
+def _risk_codes(probabilities: np.ndarray) -> np.ndarray:
+    # 0 = Low, 1 = Medium, 2 = High (mismos umbrales que get_risk_level)
+    return np.digitize(probabilities, [0.3, 0.7])
+
+
+class ReplayStats:
+    """
+    Agregados combinables de un replay: por modelo y por modelo frente a la referencia.
+
+    Args:
+        models: Nombres de los modelos; el primero es la referencia
+        top_k: Registros con mayor diferencia guardados por comparación
+    """
+
+    def __init__(self, models: Sequence[str], top_k: int = 10):
+        self.models = list(models)
+        self.top_k = top_k
+        self.rows = 0
+        self.invalid = 0
+        self.seconds = {name: 0.0 for name in self.models}
+        self.positives = {name: 0 for name in self.models}
+        self.risk_counts = {name: np.zeros(3, dtype=np.int64) for name in self.models}
+        self.flips = {name: np.zeros((2, 2), dtype=np.int64) for name in self.models[1:]}
+        self.migrations = {name: np.zeros((3, 3), dtype=np.int64) for name in self.models[1:]}
+        self.delta_hist = {name: np.zeros(DELTA_BINS, dtype=np.int64) for name in self.models[1:]}
+        self.delta_sums = {name: np.zeros(2) for name in self.models[1:]}  # suma y suma de cuadrados
+        self.top = {name: [] for name in self.models[1:]}
+
+    def update(self, probabilities: Dict[str, np.ndarray], seconds: Dict[str, float],
+               frame: pd.DataFrame, ids: Sequence[Any]):
+        """
+        Añade un bloque puntuado (probabilidades de cada modelo para las mismas filas).
+        """
+        self.rows += len(frame)
+        for name in self.models:
+            self.seconds[name] += seconds[name]
+            self.positives[name] += int((probabilities[name] > 0.5).sum())
+            self.risk_counts[name] += np.bincount(_risk_codes(probabilities[name]), minlength=3)
+
+        reference = probabilities[self.models[0]]
+        reference_risk = _risk_codes(reference)
+        for name in self.models[1:]:
+            candidate = probabilities[name]
+            flips = 2 * (reference > 0.5) + (candidate > 0.5)
+            self.flips[name] += np.bincount(flips, minlength=4).reshape(2, 2)
+            migrations = 3 * reference_risk + _risk_codes(candidate)
+            self.migrations[name] += np.bincount(migrations, minlength=9).reshape(3, 3)
+            delta = candidate - reference
+            bins = np.clip(((delta + 1) * DELTA_BINS / 2).astype(np.intp), 0, DELTA_BINS - 1)
+            self.delta_hist[name] += np.bincount(bins, minlength=DELTA_BINS)
+            self.delta_sums[name] += [delta.sum(), np.square(delta).sum()]
+
+            # Registros con mayor |delta| del bloque (distintos entre sí)
+            heap = self.top[name]
+            for i in np.argsort(-np.abs(delta), kind="stable"):
+                if len(heap) == self.top_k and abs(delta[i]) <= heap[0][0]:
+                    break
+                record = {field: frame[field].iat[i] for field in FEATURE_COLUMNS}
+                self._push(name, (float(abs(delta[i])), {
+                    "id": ids[i],
+                    "reference_probability": round(float(reference[i]), 4),
+                    "probability": round(float(candidate[i]), 4),
+                    "delta": round(float(delta[i]), 4),
+                    "record": {key: value.item() if hasattr(value, 'item') else value for key, value in record.items()},
+                }))
+
+    def _push(self, name: str, entry: Tuple[float, Dict[str, Any]]):
+        heap = self.top[name]
+        # Un registro repetido en el tráfico aparece una sola vez
+        if any(other["record"] == entry[1]["record"] for _, _, other in heap):
+            return
+        # El id de Python desempata sin comparar diccionarios
+        item = (entry[0], id(entry[1]), entry[1])
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def merge(self, other: "ReplayStats"):
+        """
+        Combina los agregados de otro bloque.
+        """
+        self.rows += other.rows
+        self.invalid += other.invalid
+        for name in self.models:
+            self.seconds[name] += other.seconds[name]
+            self.positives[name] += other.positives[name]
+            self.risk_counts[name] += other.risk_counts[name]
+        for name in self.models[1:]:
+            self.flips[name] += other.flips[name]
+            self.migrations[name] += other.migrations[name]
+            self.delta_hist[name] += other.delta_hist[name]
+            self.delta_sums[name] += other.delta_sums[name]
+            for _, _, entry in other.top[name]:
+                self._push(name, (abs(entry["delta"]), entry))
+
+    def _delta_percentiles(self, name: str) -> Dict[str, float]:
+        hist = self.delta_hist[name]
+        cumulative = np.cumsum(hist)
+        centers = -1 + (np.arange(DELTA_BINS) + 0.5) * 2 / DELTA_BINS
+        result = {}
+        for q in (1, 5, 25, 50, 75, 95, 99):
+            index = int(np.searchsorted(cumulative, q / 100 * cumulative[-1]))
+            result[f"p{q}"] = round(float(centers[min(index, DELTA_BINS - 1)]), 4)
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        rows = max(self.rows, 1)
+        report: Dict[str, Any] = {
+            "rows": self.rows,
+            "invalid": self.invalid,
+            "reference": self.models[0],
+            "models": {},
+            "comparisons": {},
+        }
+        for name in self.models:
+            report["models"][name] = {
+                "positive_rate": round(self.positives[name] / rows, 6),
+                "risk_levels": dict(zip(RISK_LEVELS, self.risk_counts[name].tolist())),
+                "scoring_seconds": round(self.seconds[name], 3),
+                "rows_per_second_per_core": round(self.rows / self.seconds[name]) if self.seconds[name] else None,
+            }
+        for name in self.models[1:]:
+            (_, no_to_yes), (yes_to_no, _) = self.flips[name].tolist()
+            total, squares = self.delta_sums[name]
+            mean = total / rows
+            migrations = self.migrations[name]
+            report["comparisons"][name] = {
+                "flips": no_to_yes + yes_to_no,
+                "flip_rate": round((no_to_yes + yes_to_no) / rows, 6),
+                "no_to_yes": no_to_yes,
+                "yes_to_no": yes_to_no,
+                "risk_level_agreement_rate": round(float(np.trace(migrations)) / rows, 6),
+                "risk_migrations": {
+                    f"{RISK_LEVELS[i]}->{RISK_LEVELS[j]}": int(migrations[i, j])
+                    for i in range(3) for j in range(3) if i != j
+                },
+                "delta": {
+                    "mean": round(float(mean), 6),
+                    "std": round(float(np.sqrt(max(squares / rows - mean ** 2, 0.0))), 6),
+                    **self._delta_percentiles(name),
+                },
+                "largest_deltas": [entry for _, _, entry in sorted(self.top[name], key=lambda e: -e[0])],
+            }
+        return report
+
+
+def _replay_chunk(path: str, start: int, end: int, model_paths: List[str], top_k: int) -> ReplayStats:
+    frame, ids, invalid = parse_records(_read_lines(path, start, end))
+    stats = ReplayStats(model_paths, top_k)
+    stats.invalid = invalid
+    if len(frame):
+        probabilities, seconds = {}, {}
+        for name, predict in _WORKER['models'].items():
+            started = time.perf_counter()
+            probabilities[name] = predict(frame)
+            seconds[name] = time.perf_counter() - started
+        stats.update(probabilities, seconds, frame, ids)
+    return stats
+
+
+def replay(
+    paths: Sequence[Path],
+    model_paths: Sequence[Path],
+    workers: int = None,
+    chunk_bytes: int = 32 << 20,
+    top_k: int = 10,
+) -> Dict[str, Any]:
+    """
+    Puntúa el tráfico grabado con varios modelos y los compara con el primero.
+
+    Args:
+        paths: Archivos JSONL
+        model_paths: Pipelines entrenados; el primero es la referencia
+        workers: Procesos del pool (por defecto, núcleos disponibles)
+        chunk_bytes: Bytes de JSONL por bloque (acota la memoria por proceso)
+        top_k: Registros con mayor diferencia reportados por comparación
+
+    Returns:
+        dict: Informe (ver ReplayStats.report) con tiempo total y throughput global
+
+    Raises:
+        ValueError: Si hay menos de dos modelos
+    """
+    if len(model_paths) < 2:
+        raise ValueError("Se necesitan al menos dos modelos para comparar")
+    workers = workers or os.cpu_count() or 1
+    names = [str(p) for p in model_paths]
+    ranges = chunk_ranges(paths, chunk_bytes)
+
+    start = time.perf_counter()
+    stats = ReplayStats(names, top_k)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(names,)) as pool:
+        futures = [pool.submit(_replay_chunk, path, begin, end, names, top_k) for path, begin, end in ranges]
+        for done, future in enumerate(as_completed(futures), 1):
+            stats.merge(future.result())
+            if done % 10 == 0:
+                logger.info(f" Bloques: {done}/{len(futures)} ({stats.rows} registros)")
+    elapsed = time.perf_counter() - start
+
+    report = stats.report()
+    for name in names:
+        report["models"][name]["model_version"] = model_version(Path(name))
+    report["chunks"] = len(ranges)
+    report["workers"] = workers
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(stats.rows / elapsed) if elapsed > 0 else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay diferencial de tráfico grabado entre modelos")
+    parser.add_argument("logs", type=Path, nargs="+", help="Archivos JSONL con registros de CustomerData")
+    parser.add_argument("--models", type=Path, nargs="+", required=True,
+                        help="Pipelines a comparar; el primero es la referencia")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool")
+    parser.add_argument("--chunk-mb", type=int, default=32, help="MB de JSONL por bloque")
+    parser.add_argument("--top-k", type=int, default=10, help="Registros con mayor diferencia a reportar")
+    parser.add_argument("--output", type=Path, default=None, help="Informe JSON")
+    args = parser.parse_args()
+
+    if len(args.models) < 2:
+        parser.error("Se necesitan al menos dos modelos (--models referencia candidato ...)")
+    report = replay(args.logs, args.models, args.workers, args.chunk_mb << 20, args.top_k)
+
+    logger.info(f"{report['rows']} registros ({report['invalid']} no válidos) en "
+                f"{report['elapsed_seconds']:.2f} s con {report['workers']} procesos")
+    for name, model in report["models"].items():
+        logger.info(f" {name}: {model['rows_per_second_per_core']} filas/s por núcleo, "
+                    f"positivos {model['positive_rate']:.2%}")
+    for name, comparison in report["comparisons"].items():
+        logger.info(f" {name} frente a {report['reference']}: {comparison['flips']} cambios de predicción "
+                    f"({comparison['flip_rate']:.2%}), acuerdo de riesgo "
+                    f"{comparison['risk_level_agreement_rate']:.2%}, delta p5/p50/p95 "
+                    f"{comparison['delta']['p5']}/{comparison['delta']['p50']}/{comparison['delta']['p95']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2, default=str))
+        logger.info(f"Informe guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
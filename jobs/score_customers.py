@@ -0,0 +1,148 @@
+"""
+Puntuación de toda la base de clientes en el almacén de puntuaciones.
+
+Lee ``data/telco_churn.csv``, puntúa en bloques con el pipeline entrenado y
+escribe la probabilidad, el nivel de riesgo y la versión del modelo de cada
+``customerID`` en el almacén SQLite que consultan ``/at-risk`` y
+``/segments``. Los agregados por segmento se actualizan de forma incremental
+al escribir.
+
+El re-puntuado es incremental: se calcula una huella de los campos de
+CustomerData de cada cliente y solo se envían al modelo los clientes nuevos,
+los que cambiaron desde la última ejecución o los puntuados con otra versión
+del modelo. El resto conserva su puntuación anterior. Los bloques se
+puntúan sobre la matriz compacta de ``app/compact.py`` (sin ColumnTransformer
+ni intermedios float64) cuando el pipeline lo permite.
+
+Uso:
+    python -m jobs.score_customers --model app/model.joblib --store data/scores.db
+    python -m jobs.score_customers --full      # re-puntuar todos los clientes
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from app.compact import CompactScorer
+from app.features import (
+    APP_DIR,
+    FEATURE_COLUMNS,
+    RAW_DATA_PATH,
+    load_customers,
+    load_pipeline,
+    model_version,
+    row_fingerprints,
+)
+from app.score_store import DEFAULT_STORE_PATH, SEGMENT_FIELDS, ScoreStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = APP_DIR / "model.joblib"
+
+
+def score_customers(
+    model_path: Path = DEFAULT_MODEL_PATH,
+    data_path: Path = RAW_DATA_PATH,
+    store_path: Path = DEFAULT_STORE_PATH,
+    chunk_size: int = 5000,
+    full: bool = False,
+    prune: bool = False,
+) -> Dict[str, Any]:
+    """
+    Puntúa los clientes nuevos o modificados del CSV y actualiza el almacén.
+
+    Args:
+        model_path: Pipeline entrenado
+        data_path: CSV con columna customerID
+        store_path: Archivo SQLite del almacén
+        chunk_size: Filas por llamada a predict_proba y por transacción
+        full: Re-puntuar todos los clientes aunque no hayan cambiado
+        prune: Eliminar del almacén los clientes que ya no están en el CSV
+
+    Returns:
+        dict: Estadísticas de la ejecución (incluye filas omitidas)
+    """
+    model = load_pipeline(model_path)
+    version = model_version(model_path)
+    try:
+        scorer = CompactScorer(model)
+    except ValueError as e:
+        logger.info(f"Puntuación sin representación compacta: {str(e)}")
+        scorer = None
+    customers = load_customers(data_path)
+
+    store = ScoreStore(store_path)
+    start = time.perf_counter()
+    written = removed = 0
+    try:
+        fingerprints = pd.Series(row_fingerprints(customers), index=customers.index)
+        previous = store.fingerprints()
+        gone = previous.index.difference(customers.index)
+
+        if full:
+            stale = np.ones(len(customers), dtype=bool)
+        else:
+            # Nuevos, modificados o puntuados con otra versión del modelo
+            known = previous.reindex(customers.index)
+            stale = (
+                known['fingerprint'].isna().to_numpy()
+                | (known['model_version'] != version).to_numpy()
+                | (known['fingerprint'].to_numpy() != fingerprints.to_numpy())
+            )
+        to_score = customers[stale]
+
+        for offset in range(0, len(to_score), chunk_size):
+            chunk = to_score.iloc[offset:offset + chunk_size]
+            if scorer is not None:
+                probabilities = scorer.predict_proba(chunk)
+            else:
+                probabilities = model.predict_proba(chunk[FEATURE_COLUMNS])[:, 1]
+            written += store.upsert(
+                chunk.index, probabilities, chunk[list(SEGMENT_FIELDS)], version,
+                fingerprints=fingerprints.loc[chunk.index].to_numpy()
+            )
+
+        if prune and len(gone):
+            removed = store.delete(list(gone))
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "model_version": version,
+        "customers": len(customers),
+        "scored": written,
+        "skipped": len(customers) - written,
+        "removed": removed,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(len(customers) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntúa la base de clientes en el almacén de puntuaciones")
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", type=Path, default=RAW_DATA_PATH)
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--full", action="store_true", help="Re-puntuar todos los clientes")
+    parser.add_argument("--prune", action="store_true",
+                        help="Eliminar del almacén los clientes que ya no están en el CSV")
+    args = parser.parse_args()
+
+    stats = score_customers(args.model, args.data, args.store, args.chunk_size, args.full, args.prune)
+    logger.info(f"Puntuación completada: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Entrena la primera etapa de la cascada y mide su efecto frente al modelo completo.
+
+La primera etapa es una regresión logística sobre las columnas que ya
+produce el preprocesador ajustado del modelo completo, entrenada con la
+misma división estratificada 80/20 del notebook 2. Sobre el conjunto de
+prueba se evalúa una rejilla de bandas de incertidumbre: fracción de filas
+escaladas al modelo completo, acuerdo de decisiones y pérdida de accuracy y
+ROC-AUC. También se mide el coste de inferencia de cada etapa tal como se
+usa en la API: la primera etapa compilada sobre los campos de entrada y el
+pipeline completo (preprocesador incluido), por lotes y fila a fila.
+
+Uso:
+    python -m jobs.train_cascade --model app/model_xgboost.joblib
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from app.cascade import DEFAULT_FIRST_STAGE_PATH, LinearScorer, evaluate_bands, select_band
+from app.features import APP_DIR, RANDOM_STATE, load_clean_split, split_pipeline
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Bandas evaluadas (centradas en el umbral 0.5, de más estrecha a más ancha)
+BANDS = [(0.3, 0.7), (0.25, 0.75), (0.2, 0.8), (0.15, 0.85), (0.1, 0.9), (0.05, 0.95)]
+
+
+def _per_row_us(fn, X, repeats: int = 5) -> float:
+    """
+    Mediana del tiempo por fila (µs) de fn(X).
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) / len(X) * 1e6
+
+
+def _single_row_us(fn, X, n_rows: int = 200) -> float:
+    """
+    Tiempo medio (µs) de fn sobre filas sueltas, como en /predict.
+    """
+    rows = [X.iloc[[i]] for i in range(min(n_rows, len(X)))]
+    fn(rows[0])
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def train_cascade(model_path: Path, output_path: Path = DEFAULT_FIRST_STAGE_PATH,
+                  metrics_path: Path = APP_DIR / "cascade_metrics.csv") -> Dict[str, Any]:
+    """
+    Entrena y guarda la primera etapa; guarda las métricas por banda.
+
+    Args:
+        model_path: Pipeline completo (segunda etapa)
+        output_path: Destino del pipeline de la primera etapa
+        metrics_path: Destino de las métricas por banda
+
+    Returns:
+        dict: Métricas por banda, banda recomendada y coste por etapa
+    """
+    X_train, X_test, y_train, y_test = load_clean_split()
+    full_model = joblib.load(model_path)
+    preprocessor, classifier = split_pipeline(full_model)
+
+    # El preprocesador ya está ajustado sobre X_train: se reutiliza tal cual
+    encoded_train = preprocessor.transform(X_train)
+    linear = LogisticRegression(max_iter=2000, random_state=RANDOM_STATE)
+    linear.fit(encoded_train, y_train)
+    first_stage = Pipeline([('preprocessor', preprocessor), ('classifier', linear)])
+
+    encoded_test = preprocessor.transform(X_test)
+    first_proba = linear.predict_proba(encoded_test)[:, 1]
+    full_proba = classifier.predict_proba(encoded_test)[:, 1]
+
+    metrics = evaluate_bands(first_proba, full_proba, y_test.to_numpy(), BANDS)
+    scorer = LinearScorer(first_stage)
+    costs = {
+        "first_stage_us_per_row": round(_per_row_us(scorer.predict_proba, X_test), 3),
+        "full_model_us_per_row": round(_per_row_us(full_model.predict_proba, X_test), 3),
+        "first_stage_us_single": round(_single_row_us(scorer.predict_proba, X_test), 1),
+        "full_model_us_single": round(_single_row_us(full_model.predict_proba, X_test), 1),
+    }
+    # Coste esperado de una petición individual relativo al modelo completo
+    metrics["relative_cost_single"] = (
+        (costs["first_stage_us_single"] + metrics["escalated_pct"] / 100 * costs["full_model_us_single"])
+        / costs["full_model_us_single"]
+    ).round(4)
+
+    joblib.dump(first_stage, output_path)
+    metrics.to_csv(metrics_path, index=False)
+    return {"metrics": metrics, "recommended_band": select_band(metrics), "costs": costs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena la primera etapa de la cascada")
+    parser.add_argument("--model", type=Path, default=APP_DIR / "model.joblib",
+                        help="Pipeline completo (segunda etapa)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_FIRST_STAGE_PATH)
+    parser.add_argument("--metrics", type=Path, default=APP_DIR / "cascade_metrics.csv")
+    args = parser.parse_args()
+
+    logger.info(f"Entrenando primera etapa de la cascada para: {args.model}")
+    result = train_cascade(args.model, args.output, args.metrics)
+
+    logger.info(f"\n{result['metrics'].to_string(index=False)}")
+    costs = result['costs']
+    logger.info(
+        f"Coste por fila en lote: primera etapa {costs['first_stage_us_per_row']:.2f} µs, "
+        f"modelo completo {costs['full_model_us_per_row']:.2f} µs"
+    )
+    logger.info(
+        f"Coste por petición individual: primera etapa {costs['first_stage_us_single']:.1f} µs, "
+        f"modelo completo {costs['full_model_us_single']:.1f} µs"
+    )
+    band = result['recommended_band']
+    if band is not None:
+        logger.info(f"Banda recomendada: CASCADE_BAND={band[0]},{band[1]}")
+    else:
+        logger.warning("Ninguna banda mantiene las decisiones de alta confianza; no usar la cascada")
+    logger.info(f" Primera etapa guardada en: {args.output}")
+    logger.info(f" Métricas guardadas en: {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
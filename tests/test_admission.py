@@ -0,0 +1,134 @@
+"""
+Pruebas del control de admisión y el descarte de carga.
+"""
+
+import pytest
+import asyncio
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.admission import AdmissionController, Overloaded
+
+
+async def _hold(controller, rows, seconds):
+    async with controller.admit(rows):
+        await asyncio.sleep(seconds)
+
+
+def test_admits_within_capacity():
+    """Test: sin contención las peticiones se admiten sin esperar"""
+    controller = AdmissionController(max_inflight_rows=10)
+
+    async def scenario():
+        await asyncio.gather(*(_hold(controller, 3, 0.01) for _ in range(3)))
+
+    asyncio.run(scenario())
+
+    report = controller.report()
+    assert report["admitted"] == 3
+    assert report["inflight_rows"] == 0
+    assert report["queue_wait_ms"]["p99"] == 0.0
+
+
+def test_capacity_counts_rows_not_requests():
+    """Test: una petición de muchas filas hace esperar a las siguientes"""
+    controller = AdmissionController(max_inflight_rows=10, queue_timeout_ms=1000)
+
+    async def scenario():
+        big = asyncio.ensure_future(_hold(controller, 8, 0.05))
+        await asyncio.sleep(0)
+        assert controller.inflight_rows == 8
+        wait_ms = await controller.acquire(5)
+        controller.release(5, 1.0)
+        await big
+        return wait_ms
+
+    wait_ms = asyncio.run(scenario())
+    assert wait_ms >= 30
+
+
+def test_oversized_request_admitted_when_idle():
+    """Test: una petición mayor que la capacidad se admite si no hay otras en curso"""
+    controller = AdmissionController(max_inflight_rows=10)
+
+    async def scenario():
+        assert await controller.acquire(50) == 0.0
+        controller.release(50, 5.0)
+
+    asyncio.run(scenario())
+    assert controller.inflight_rows == 0
+
+
+def test_queue_full_rejects_immediately_with_429():
+    """Test: con la cola llena se rechaza al instante con 429 y Retry-After"""
+    controller = AdmissionController(max_inflight_rows=1, max_queued_rows=2, queue_timeout_ms=1000)
+
+    async def scenario():
+        holder = asyncio.ensure_future(_hold(controller, 1, 0.1))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(controller.acquire(2))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.acquire(1)
+        await holder
+        await waiter
+        controller.release(2, 1.0)
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert controller.rejected_queue_full == 1
+
+
+def test_slo_timeout_rejects_with_503():
+    """Test: si la espera supera el SLO se rechaza con 503 y se libera la cola"""
+    controller = AdmissionController(max_inflight_rows=1, queue_timeout_ms=20)
+
+    async def scenario():
+        holder = asyncio.ensure_future(_hold(controller, 1, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.acquire(1)
+        assert controller.queued_rows == 0
+        await holder
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert controller.rejected_timeout == 1
+    assert controller.inflight_rows == 0
+
+
+def test_fifo_order_and_cancellation():
+    """Test: la cola es FIFO y una espera cancelada no bloquea a las demás"""
+    controller = AdmissionController(max_inflight_rows=1, queue_timeout_ms=1000)
+    order = []
+
+    async def worker(name):
+        async with controller.admit(1):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        holder = asyncio.ensure_future(_hold(controller, 1, 0.05))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(worker("cancelada"))
+        first = asyncio.ensure_future(worker("a"))
+        second = asyncio.ensure_future(worker("b"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.gather(holder, first, second)
+
+    asyncio.run(scenario())
+
+    assert order == ["a", "b"]
+    assert controller.inflight_rows == 0
+    assert controller.queued_rows == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
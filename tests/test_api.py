@@ -11,6 +11,18 @@ from app.api import app
 client = TestClient(app)
 
 
+@pytest.fixture
+def loaded_model(monkeypatch):
+    """
+    Modelo XGBoost cargado en la API sin ejecutar el arranque completo.
+    """
+    import app.api as api
+    from app.features import APP_DIR, load_pipeline
+    monkeypatch.setattr(api, "MODEL", load_pipeline(APP_DIR / "model_xgboost.joblib"))
+    monkeypatch.setattr(api, "MODEL_VERSION", "test")
+    return api
+
+
 def test_root_endpoint():
     """
     Test del endpoint raíz.
@@ -33,6 +45,17 @@ def test_health_endpoint():
     assert "model_type" in data
 
 
+def test_ready_endpoint():
+    """
+    Test del endpoint de readiness.
+    """
+    response = client.get("/ready")
+    
+    # 503 mientras no haya modelo o no haya terminado el calentamiento
+    assert response.status_code in [200, 503]
+    assert "ready" in response.json()
+
+
 def test_predict_endpoint_valid_data():
     """
     Test del endpoint de predicción con datos válidos.
@@ -183,6 +206,66 @@ def test_predict_batch_endpoint():
         assert len(data["predictions"]) == 2
 
 
+def test_predict_endpoint_ensemble_mode():
+    """
+    Test del endpoint de predicción en modo ensemble.
+    """
+    from app.schemas import CustomerData
+    
+    customer = CustomerData.Config.schema_extra["example"]
+    response = client.post("/predict?mode=ensemble&budget_ms=200", json=customer)
+    
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert 0 <= data["churn_probability"] <= 1
+        assert "members_used" in data["ensemble"]
+    
+    response = client.post("/predict?mode=unknown", json=customer)
+    assert response.status_code == 422
+
+
+def test_predict_batch_ensemble_shares_budget(loaded_model, monkeypatch):
+    """
+    Test: en un lote por bloques el presupuesto del ensemble es de la petición y los pesos se reportan por bloque.
+    """
+    import time
+    import numpy as np
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    class SlowEnsemble:
+        def __init__(self):
+            self.budgets = []
+        
+        def predict_proba(self, frame, budget_ms):
+            self.budgets.append(budget_ms)
+            time.sleep(0.03)
+            used = ["xgboost"] if budget_ms == 0 else ["catboost", "xgboost"]
+            info = {"members_used": used, "members_timed_out": sorted({"catboost", "xgboost"} - set(used)),
+                    "members_failed": [], "weights": {name: 1 / len(used) for name in used},
+                    "partial": len(used) < 2, "budget_ms": budget_ms, "latency_ms": 30.0}
+            return np.full(len(frame), 0.4), info
+    
+    ensemble = SlowEnsemble()
+    monkeypatch.setattr(loaded_model, "ENSEMBLE", ensemble)
+    monkeypatch.setattr(loaded_model, "BATCH_CHUNK_ROWS", 2)
+    
+    response = client.post("/predict-batch?mode=ensemble&budget_ms=50", json=[customer] * 6)
+    assert response.status_code == 200
+    info = response.json()["ensemble"]
+    
+    # Tres bloques de 30 ms con un presupuesto de 50 ms: el último ya no tiene tiempo
+    assert len(ensemble.budgets) == 3
+    assert ensemble.budgets[0] <= 50 and ensemble.budgets[1] < 50 - 25 and ensemble.budgets[2] == 0
+    assert info["budget_ms"] == 50 and info["partial"]
+    assert "weights" not in info
+    assert [(c["offset"], c["rows"]) for c in info["chunks"]] == [(0, 2), (2, 2), (4, 2)]
+    assert info["chunks"][0]["weights"] == {"catboost": 0.5, "xgboost": 0.5}
+    assert info["chunks"][2]["weights"] == {"xgboost": 1.0}
+
+
 def test_model_info_endpoint():
     """
     Test del endpoint de información del modelo.
@@ -197,6 +280,397 @@ def test_model_info_endpoint():
         assert "model_type" in data
 
 
+def test_explain_endpoint():
+    """
+    Test del endpoint de explicación.
+    """
+    from app.schemas import CustomerData
+    
+    customer = CustomerData.Config.schema_extra["example"]
+    response = client.post("/explain", json=customer)
+    
+    # 501 si el modelo cargado no soporta contribuciones nativas
+    assert response.status_code in [200, 501, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert 0 <= data["churn_probability"] <= 1
+        assert len(data["contributions"]) == len(customer)
+
+
+def test_explain_batch_endpoint():
+    """
+    Test del endpoint de explicación batch.
+    """
+    from app.schemas import CustomerData
+    
+    customer = CustomerData.Config.schema_extra["example"]
+    response = client.post("/explain-batch", json=[customer, customer])
+    
+    assert response.status_code in [200, 501, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert data["total_customers"] == 2
+        assert len(data["explanations"]) == 2
+
+
+def test_explain_batch_chunked_and_capped(loaded_model, monkeypatch):
+    """
+    Test: /explain-batch se puntúa por bloques y respeta MAX_BATCH_ROWS como /predict-batch.
+    """
+    from app.explain import TreeContributionExplainer
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    monkeypatch.setattr(loaded_model, "EXPLAINER", TreeContributionExplainer(loaded_model.MODEL))
+    monkeypatch.setattr(loaded_model, "BATCH_CHUNK_ROWS", 2)
+    monkeypatch.setattr(loaded_model, "MAX_BATCH_ROWS", 4)
+    
+    response = client.post("/explain-batch", json=[customer] * 3)
+    assert response.status_code == 200
+    assert [e["customer_index"] for e in response.json()["explanations"]] == [0, 1, 2]
+    
+    response = client.post("/explain-batch", json=[customer] * 5)
+    assert response.status_code == 413
+
+
+def test_drift_endpoint():
+    """
+    Test del endpoint de drift.
+    """
+    response = client.get("/drift")
+    
+    # 503 si el monitor no está activo (sin modelo cargado)
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert "observations" in data
+        assert "features" in data
+
+
+def test_shadow_endpoint():
+    """
+    Test del endpoint del modo sombra.
+    """
+    response = client.get("/shadow")
+    
+    # 503 si no hay retadores configurados
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        assert "challengers" in response.json()
+
+
+def test_admission_endpoint():
+    """
+    Test del endpoint del control de admisión.
+    """
+    response = client.get("/admission")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inflight_rows"] == 0
+    assert "rejected_timeout" in data
+
+
+def test_predict_batch_too_large():
+    """
+    Test de lote mayor que MAX_BATCH_ROWS.
+    """
+    import app.api as api
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    response = client.post("/predict-batch", json=[customer] * (api.MAX_BATCH_ROWS + 1))
+    
+    # 503 si no hay modelo cargado (se comprueba antes que el tamaño)
+    assert response.status_code in [413, 503]
+
+
+def test_predict_batch_stream():
+    """
+    Test de predicción batch en streaming (NDJSON).
+    """
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    response = client.post("/predict-batch/stream", json=[customer] * 3)
+    
+    # 503 si no hay modelo cargado
+    assert response.status_code in [200, 503]
+    if response.status_code == 200:
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert len(lines) == 3
+        assert '"customer_index":2' in lines[-1]
+
+
+def test_predict_batch_empty(loaded_model, monkeypatch):
+    """
+    Test: un lote vacío responde 200 sin enviar trabajo al modo sombra.
+    """
+    submitted = []
+    
+    class RecordingShadow:
+        def submit(self, *args):
+            submitted.append(args)
+    
+    monkeypatch.setattr(loaded_model, "SHADOW_SCORER", RecordingShadow())
+    response = client.post("/predict-batch", json=[])
+    assert response.status_code == 200
+    assert response.json()["predictions"] == []
+    assert submitted == []
+
+
+def test_predict_batch_stream_request_ids(loaded_model):
+    """
+    Test: lote vacío como flujo vacío; cada línea con request_id válido para /feedback.
+    """
+    import json
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    response = client.post("/predict-batch/stream", json=[], headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.text == ""
+    
+    response = client.post("/predict-batch/stream", json=[customer] * 3)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["request_id"].rsplit("-", 1)[1] for row in rows] == ["0", "1", "2"]
+    
+    response = client.post("/feedback", json={"outcomes": [{"request_id": rows[1]["request_id"], "churned": True}]})
+    assert response.json()["unmatched"] == []
+
+
+def test_predict_by_ids():
+    """
+    Test de predicción por customerID desde el almacén de características.
+    """
+    response = client.post("/predict/by-ids", json={"customer_ids": ["7590-VHVEG", "0000-NOPE"]})
+    
+    # 503 si no hay modelo o almacén de características
+    assert response.status_code in [200, 503]
+    if response.status_code == 200:
+        data = response.json()
+        assert data["not_found"] == ["0000-NOPE"]
+        assert data["predictions"][0]["customerID"] == "7590-VHVEG"
+    
+    response = client.get("/predict/0000-NOPE")
+    assert response.status_code in [404, 503]
+
+
+def test_what_if():
+    """
+    Test de escenarios what-if de retención.
+    """
+    from app.schemas import WhatIfRequest
+    payload = WhatIfRequest.Config.schema_extra["example"]
+    
+    response = client.post("/what-if", json=payload)
+    
+    # 503 si no hay modelo cargado
+    assert response.status_code in [200, 503]
+    if response.status_code == 200:
+        data = response.json()
+        assert len(data["scenarios"]) == 3
+        deltas = [s["delta"] for s in data["customers"][0]["scenarios"]]
+        assert deltas == sorted(deltas)
+    
+    response = client.post("/what-if", json={**payload, "scenarios": {"x": {"Contract": "Ten year"}}})
+    assert response.status_code in [422, 503]
+
+
+def test_what_if_admits_scored_rows(loaded_model, monkeypatch):
+    """
+    Test: cada bloque de what-if reserva en admisión las filas que puntúa (clientes x (1 + escenarios)).
+    """
+    from app.scenarios import ScenarioScorer
+    from app.schemas import CustomerData, WhatIfRequest
+    customer = CustomerData.Config.schema_extra["example"]
+    scenarios = WhatIfRequest.Config.schema_extra["example"]["scenarios"]
+    
+    monkeypatch.setattr(loaded_model, "SCENARIO_SCORER", ScenarioScorer(loaded_model.MODEL))
+    monkeypatch.setattr(loaded_model, "BATCH_CHUNK_ROWS", 2 * (1 + len(scenarios)))
+    reserved = []
+    acquire = loaded_model.ADMISSION.acquire
+    
+    async def recording_acquire(rows):
+        reserved.append(rows)
+        return await acquire(rows)
+    
+    monkeypatch.setattr(loaded_model.ADMISSION, "acquire", recording_acquire)
+    response = client.post("/what-if", json={"customers": [customer] * 5, "scenarios": scenarios})
+    
+    assert response.status_code == 200
+    assert len(response.json()["customers"]) == 5
+    assert reserved == [2 * (1 + len(scenarios))] * 2 + [1 + len(scenarios)]
+
+
+def test_feedback():
+    """
+    Test de registro de resultados y métricas de rendimiento.
+    """
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    request_id = None
+    response = client.post("/predict", json=customer)
+    if response.status_code == 200:
+        request_id = response.json()["request_id"]
+    
+    response = client.post("/feedback", json={"outcomes": [
+        {"request_id": request_id or "desconocido", "churned": True},
+        {"customerID": "0000-NOPE", "churned": False}
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["received"] == 2
+    assert "0000-NOPE" in data["unmatched"]
+    
+    response = client.get("/performance")
+    assert response.status_code == 200
+    assert "versions" in response.json()
+
+
+def test_feedback_store_score_matched_once(loaded_model, monkeypatch, tmp_path):
+    """
+    Test: una puntuación del almacén batch se empareja con un solo resultado aunque se reenvíe.
+    """
+    import pandas as pd
+    from app.score_store import ScoreStore
+    store = ScoreStore(tmp_path / "scores.db")
+    segments = pd.DataFrame({"Contract": ["One year"], "PaymentMethod": ["Mailed check"]})
+    store.upsert(["1234-STORE"], [0.2], segments, "batch-v1")
+    monkeypatch.setattr(loaded_model, "SCORE_STORE", store)
+    
+    outcome = {"outcomes": [{"customerID": "1234-STORE", "churned": False}]}
+    assert client.post("/feedback", json=outcome).json()["matched"] == 1
+    data = client.post("/feedback", json=outcome).json()
+    assert data["matched"] == 0 and data["unmatched"] == ["1234-STORE"]
+    store.close()
+
+
+def test_feedback_requires_one_identifier():
+    """
+    Test: cada resultado debe indicar exactamente uno de request_id o customerID.
+    """
+    response = client.post("/feedback", json={"outcomes": [{"churned": True}]})
+    assert response.status_code == 422
+    
+    response = client.post("/feedback", json={"outcomes": [
+        {"request_id": "abc", "customerID": "7590-VHVEG", "churned": True}
+    ]})
+    assert response.status_code == 422
+
+
+def test_predict_websocket():
+    """
+    Test del canal WebSocket de puntuación.
+    """
+    import json
+    from starlette.websockets import WebSocketDisconnect
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    
+    try:
+        with client.websocket_connect("/ws/predict") as websocket:
+            websocket.send_text(json.dumps({"id": "c-1", "customer": customer}))
+            data = websocket.receive_json()
+    except WebSocketDisconnect as e:
+        # 1013 si no hay modelo cargado
+        assert e.code == 1013
+        return
+    
+    assert data["id"] == "c-1"
+    assert 0 <= data["churn_probability"] <= 1
+
+
+def test_admin_endpoints_disabled_by_default():
+    """
+    Test: sin ADMIN_TOKEN los endpoints de perfilado no existen.
+    """
+    import app.api as api
+    if api.ADMIN_TOKEN:
+        pytest.skip("ADMIN_TOKEN definido en el entorno")
+    
+    assert client.get("/admin/profile").status_code == 404
+    assert client.post("/admin/tracemalloc/start").status_code == 404
+    assert client.post("/admin/autotune").status_code == 404
+    assert client.post("/admin/shadow/pause").status_code == 404
+
+
+def test_coalescing_endpoint():
+    """
+    Test del endpoint de coalescencia de peticiones.
+    """
+    response = client.get("/coalescing")
+    
+    # 503 si está desactivada con COALESCE_REQUESTS=0
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert data["executed"] + data["coalesced"] == data["requests"]
+
+
+def test_jobs_endpoint():
+    """
+    Test de creación y consulta de trabajos batch.
+    """
+    from app.schemas import CustomerData
+    customer = CustomerData.Config.schema_extra["example"]
+    response = client.post("/jobs", json=[customer, customer])
+    
+    # 503 si no hay modelo cargado
+    assert response.status_code in [202, 503]
+    
+    if response.status_code == 202:
+        job_id = response.json()["job_id"]
+        status_response = client.get(f"/jobs/{job_id}")
+        assert status_response.status_code == 200
+        assert status_response.json()["rows_total"] == 2
+
+
+def test_at_risk_endpoint():
+    """
+    Test del endpoint de clientes en riesgo.
+    """
+    response = client.get("/at-risk?k=5")
+    
+    # 503 si el almacén de puntuaciones no fue generado
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert data["count"] <= 5
+        probabilities = [c["churn_probability"] for c in data["customers"]]
+        assert probabilities == sorted(probabilities, reverse=True)
+
+
+def test_at_risk_invalid_k():
+    """
+    Test con k fuera de rango.
+    """
+    response = client.get("/at-risk?k=0")
+    assert response.status_code == 422
+
+
+def test_segments_endpoint():
+    """
+    Test del endpoint de segmentos.
+    """
+    response = client.get("/segments")
+    
+    assert response.status_code in [200, 503]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert "segments" in data
+        assert "by_contract" in data
+
+
 def test_risk_level_categorization():
     """
     Test de la categorización de niveles de riesgo.
@@ -0,0 +1,143 @@
+"""
+Pruebas del autoajuste de tamaño de bloque e hilos de inferencia.
+"""
+
+import pytest
+from pathlib import Path
+import json
+import sys
+import threading
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.autotune import Autotuner, select, thread_candidates
+from app.ensemble import EnsemblePredictor
+from app.features import APP_DIR, load_pipeline, split_pipeline
+from app.scenarios import ScenarioScorer
+from app.warmup import warmup_frames
+
+
+def point(threads, batch_size, rows_per_second, p95_ms, within_cap=True):
+    return {"threads": threads, "batch_size": batch_size, "rows_per_second": rows_per_second,
+            "p95_ms": p95_ms, "within_cap": within_cap}
+
+
+def test_thread_candidates():
+    """Test: potencias de dos hasta los núcleos por worker, al menos un hilo"""
+    assert thread_candidates(workers=1, cores=8) == [1, 2, 4, 8]
+    assert thread_candidates(workers=2, cores=12) == [1, 2, 4, 6]
+    assert thread_candidates(workers=4, cores=8) == [1, 2]
+    assert thread_candidates(workers=16, cores=8) == [1]
+
+
+def test_select():
+    """Test: mayor throughput bajo el límite, con menos hilos y menor bloque si la ganancia es pequeña"""
+    curve = [
+        point(1, 128, 10000, 12),
+        point(1, 512, 20000, 25),
+        point(2, 512, 20500, 20),
+        point(4, 512, 40000, 80, within_cap=False),
+    ]
+    assert select(curve) == curve[1]
+    assert select(curve, tolerance=0.0) == curve[2]
+
+    # Ninguna cumple el límite: la de menor p95
+    slow = [point(1, 8, 500, 90, False), point(2, 8, 600, 70, False)]
+    assert select(slow) == slow[1]
+    assert select([]) is None
+
+
+def test_autotune_real_model():
+    """Test: mide una copia del modelo sin cambiar los hilos del modelo medido"""
+    model = load_pipeline(APP_DIR / "model_xgboost.joblib")
+    _, classifier = split_pipeline(model)
+    n_jobs, booster = classifier.n_jobs, classifier.get_booster()
+    tuner = Autotuner(model, batch_sizes=(1, 64), thread_counts=(1, 2), workers=2, repeats=3)
+
+    choice = tuner.run()
+
+    assert tuner.state == "done"
+    assert {(p["threads"], p["batch_size"]) for p in tuner.curve} == {(1, 1), (1, 64), (2, 1), (2, 64)}
+    assert choice in tuner.curve
+    assert classifier.n_jobs == n_jobs and classifier.get_booster() is booster
+    report = tuner.report()
+    assert report["choice"]["node_rows_per_second"] == 2 * choice["rows_per_second"]
+    assert report["workers"] == 2
+    assert report["source"] == "measured"
+
+
+def test_autotune_shared_between_workers(tmp_path, monkeypatch):
+    """Test: con varios workers solo uno mide; el resto reutiliza su resultado mientras la clave coincida"""
+    model = load_pipeline(APP_DIR / "model_xgboost.joblib")
+    path = tmp_path / "autotune.json"
+    measured = []
+    original_run = Autotuner.run
+
+    def counting_run(self):
+        measured.append(self)
+        return original_run(self)
+
+    monkeypatch.setattr(Autotuner, "run", counting_run)
+    tuners = [Autotuner(model, batch_sizes=(8,), thread_counts=(1,), repeats=2) for _ in range(3)]
+    key = tuners[0].cache_key(model_version="v1")
+    choices = []
+    threads = [threading.Thread(target=lambda t=t: choices.append(t.load_or_run(path, key))) for t in tuners]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(measured) == 1
+    assert len(choices) == 3 and all(choice == choices[0] for choice in choices)
+    assert sorted(t.source for t in tuners) == ["cached", "cached", "measured"]
+    assert json.loads(path.read_text())["key"] == key
+
+    # Otra versión del modelo invalida el resultado guardado
+    other = Autotuner(model, batch_sizes=(8,), thread_counts=(1,), repeats=2)
+    other.load_or_run(path, other.cache_key(model_version="v2"))
+    assert len(measured) == 2 and other.source == "measured"
+
+
+def test_tuned_threads_reach_every_component():
+    """Test: los hilos elegidos llegan al ensemble y a los escenarios sin modificar los pipelines cargados"""
+    catboost = load_pipeline(APP_DIR / "model_catboost.joblib")
+    xgboost = load_pipeline(APP_DIR / "model_xgboost.joblib")
+    _, xgb_classifier = split_pipeline(xgboost)
+    n_jobs = xgb_classifier.n_jobs
+
+    ensemble = EnsemblePredictor({"catboost": catboost, "xgboost": xgboost}, n_threads=1)
+    assert ensemble.predict_kwargs["catboost"] == {"thread_count": 1}
+    # XGBoost no se copia: usa el límite del proceso (set_xgboost_threads)
+    assert ensemble.members["xgboost"][1] is xgb_classifier
+    assert xgb_classifier.n_jobs == n_jobs
+    proba, _ = ensemble.predict_proba(warmup_frames((8,))[8])
+    assert proba.shape == (8,)
+    ensemble.shutdown()
+
+    scorer = ScenarioScorer(catboost, n_threads=1)
+    assert scorer.predict_kwargs == {"thread_count": 1}
+
+
+def test_autotune_skips_batches_over_cap():
+    """Test: con un límite inalcanzable no se miden bloques mayores y se elige la menor latencia"""
+    model = load_pipeline(APP_DIR / "model_xgboost.joblib")
+    tuner = Autotuner(model, batch_sizes=(1, 64, 512), thread_counts=(1,), latency_cap_ms=0.001, repeats=2)
+
+    choice = tuner.run()
+
+    assert [p["batch_size"] for p in tuner.curve] == [1]
+    assert not choice["within_cap"]
+
+
+def test_autotune_failure_keeps_model():
+    """Test: un modelo que no es un Pipeline deja el ajuste en estado failed"""
+    tuner = Autotuner(object(), batch_sizes=(1,), thread_counts=(1,))
+
+    assert tuner.run() is None
+    assert tuner.state == "failed"
+    assert tuner.report()["choice"] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
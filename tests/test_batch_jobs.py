@@ -0,0 +1,180 @@
+"""
+Pruebas de los trabajos batch asíncronos (cola acotada, resultados en disco y reanudación).
+"""
+
+import pytest
+import io
+import threading
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.batch_jobs import BatchJobManager, InvalidJobInput, JobQueueFull
+from app.features import FEATURE_COLUMNS, RAW_DATA_PATH
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+class CountingModel:
+    """Modelo de prueba que cuenta llamadas y puede bloquearse o fallar."""
+
+    def __init__(self, fail_times=0, block_on_call=None):
+        self.calls = 0
+        self.fail_times = fail_times
+        self.block_on_call = block_on_call
+        self.blocked = threading.Event()
+        self.release = threading.Event()
+
+    def predict_proba(self, X):
+        self.calls += 1
+        if self.calls == self.block_on_call:
+            self.blocked.set()
+            self.release.wait(10)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("fallo transitorio")
+        p = (X['tenure'].to_numpy() % 10) / 10
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(RAW_DATA_PATH).head(1000)
+
+
+def _wait(manager, job_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.status(job_id)
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise TimeoutError(job_id)
+
+
+def _results(manager, job_id):
+    return pd.read_csv(io.BytesIO(b"".join(manager.iter_results(job_id))))
+
+
+def test_job_matches_direct_prediction(tmp_path, raw):
+    """Test: los resultados por bloques coinciden con predecir todo de una vez"""
+    model = joblib.load(APP_DIR / "model_xgboost.joblib")
+    manager = BatchJobManager(model, tmp_path, chunk_size=300)
+    try:
+        job = _wait(manager, manager.submit(raw)['job_id'])
+        assert job['status'] == 'completed'
+        assert job['rows_done'] == len(raw)
+        assert job['chunks_done'] == 4
+        assert job['rows_per_second'] > 0
+
+        results = _results(manager, job['job_id'])
+        assert list(results['customerID']) == list(raw['customerID'])
+        assert list(results['customer_index']) == list(range(len(raw)))
+
+        raw_clean = raw.copy()
+        raw_clean['TotalCharges'] = pd.to_numeric(raw_clean['TotalCharges'], errors='coerce')
+        missing = raw_clean['TotalCharges'].isnull()
+        raw_clean.loc[missing, 'TotalCharges'] = raw_clean.loc[missing, 'MonthlyCharges'] * raw_clean.loc[missing, 'tenure']
+        expected = model.predict_proba(raw_clean[FEATURE_COLUMNS])[:, 1]
+        np.testing.assert_allclose(results['churn_probability'], expected, rtol=1e-6)
+    finally:
+        manager.shutdown(wait=True)
+
+
+def test_invalid_input_rejected(tmp_path, raw):
+    """Test: columnas faltantes, categorías desconocidas o valores fuera de rango se rechazan al enviar"""
+    manager = BatchJobManager(CountingModel(), tmp_path)
+    try:
+        with pytest.raises(InvalidJobInput):
+            manager.submit(raw.drop(columns=['Contract']))
+        bad = raw.head(5).copy()
+        bad.loc[0, 'Contract'] = 'Weekly'
+        with pytest.raises(InvalidJobInput, match="Contract"):
+            manager.submit(bad)
+        # Mismos rangos que CustomerData (/jobs rechaza tenure > 72)
+        long_tenure = raw.head(5).copy()
+        long_tenure.loc[0, 'tenure'] = 73
+        with pytest.raises(InvalidJobInput, match="tenure"):
+            manager.submit(long_tenure)
+        # CustomerData exige tenure entero y MonthlyCharges > 0
+        fractional = raw.head(5).copy()
+        fractional['tenure'] = fractional['tenure'].astype(float)
+        fractional.loc[0, 'tenure'] = 3.5
+        with pytest.raises(InvalidJobInput, match="tenure"):
+            manager.submit(fractional)
+        free = raw.head(5).copy()
+        free.loc[0, 'MonthlyCharges'] = 0
+        with pytest.raises(InvalidJobInput, match="MonthlyCharges"):
+            manager.submit(free)
+    finally:
+        manager.shutdown()
+
+
+def test_queue_is_bounded(tmp_path, raw):
+    """Test: con max_pending trabajos sin terminar se rechazan los nuevos"""
+    model = CountingModel(block_on_call=1)
+    manager = BatchJobManager(model, tmp_path, max_pending=2)
+    try:
+        first = manager.submit(raw.head(10))
+        manager.submit(raw.head(10))
+        with pytest.raises(JobQueueFull):
+            manager.submit(raw.head(10))
+        model.release.set()
+        assert _wait(manager, first['job_id'])['status'] == 'completed'
+    finally:
+        model.release.set()
+        manager.shutdown(wait=True)
+
+
+def test_transient_errors_are_retried(tmp_path, raw):
+    """Test: un bloque que falla se reintenta antes de fallar el trabajo"""
+    manager = BatchJobManager(CountingModel(fail_times=2), tmp_path, retry_backoff=0.01)
+    try:
+        assert _wait(manager, manager.submit(raw.head(50))['job_id'])['status'] == 'completed'
+    finally:
+        manager.shutdown(wait=True)
+
+    manager = BatchJobManager(CountingModel(fail_times=10), tmp_path, max_retries=1, retry_backoff=0.01)
+    try:
+        job = _wait(manager, manager.submit(raw.head(50))['job_id'])
+        assert job['status'] == 'failed'
+        assert "fallo transitorio" in job['error']
+    finally:
+        manager.shutdown(wait=True)
+
+
+def test_resume_after_restart(tmp_path, raw):
+    """Test: un trabajo interrumpido se reanuda desde el último bloque escrito"""
+    model = CountingModel(block_on_call=2)
+    manager = BatchJobManager(model, tmp_path, chunk_size=100)
+    job_id = manager.submit(raw.head(300))['job_id']
+    assert model.blocked.wait(10)
+    manager.shutdown()
+    model.release.set()
+    time.sleep(0.2)
+
+    interrupted = manager.status(job_id)
+    assert interrupted['status'] == 'running'
+    assert interrupted['chunks_done'] == 2
+
+    resumed_model = CountingModel()
+    restarted = BatchJobManager(resumed_model, tmp_path)
+    try:
+        assert restarted.recover() == 1
+        job = _wait(restarted, job_id)
+        assert job['status'] == 'completed'
+        assert resumed_model.calls == 1
+        assert len(_results(restarted, job_id)) == 300
+    finally:
+        restarted.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
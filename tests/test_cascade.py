@@ -0,0 +1,111 @@
+"""
+Pruebas de la inferencia en cascada (primera etapa lineal + modelo completo).
+"""
+
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.cascade import CascadePredictor, LinearScorer, evaluate_bands, parse_band, select_band
+from app.features import CLEAN_DATA_PATH, FEATURE_COLUMNS
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = pd.read_csv(CLEAN_DATA_PATH)
+    return df[FEATURE_COLUMNS].head(600), df['Churn'].map({'No': 0, 'Yes': 1}).head(600)
+
+
+@pytest.fixture(scope="module")
+def full_model():
+    return joblib.load(APP_DIR / "model_xgboost.joblib")
+
+
+@pytest.fixture(scope="module")
+def first_stage(full_model, data):
+    X, y = data
+    preprocessor = full_model.named_steps["preprocessor"]
+    linear = LogisticRegression(max_iter=2000).fit(preprocessor.transform(X), y)
+    return Pipeline([("preprocessor", preprocessor), ("classifier", linear)])
+
+
+def test_parse_band():
+    assert parse_band("0.1,0.9") == (0.1, 0.9)
+    with pytest.raises(ValueError):
+        parse_band("0.9,0.1")
+    with pytest.raises(ValueError):
+        parse_band("0.5")
+
+
+def test_linear_scorer_matches_pipeline(first_stage, data):
+    """
+    La primera etapa compilada da las mismas probabilidades que el pipeline, en lotes grandes y pequeños.
+    """
+    X, _ = data
+    scorer = LinearScorer(first_stage)
+    expected = first_stage.predict_proba(X)[:, 1]
+
+    assert np.allclose(scorer.predict_proba(X), expected, atol=1e-9)
+    assert np.allclose(scorer.predict_proba(X.head(3)), expected[:3], atol=1e-9)
+
+
+def test_linear_scorer_rejects_non_linear(full_model):
+    with pytest.raises(ValueError):
+        LinearScorer(full_model)
+
+
+def test_cascade_escalates_only_uncertain_rows(first_stage, full_model, data):
+    """
+    Fuera de la banda se usa la primera etapa; dentro, el modelo completo.
+    """
+    X, _ = data
+    cascade = CascadePredictor(first_stage, full_model, band=(0.2, 0.8))
+    proba, info = cascade.predict_proba(X)
+
+    first = first_stage.predict_proba(X)[:, 1]
+    full = full_model.predict_proba(X)[:, 1]
+    uncertain = (first >= 0.2) & (first <= 0.8)
+    assert cascade.scorer is not None
+    assert info["escalated"] == uncertain.sum()
+    assert np.allclose(proba[uncertain], full[uncertain], atol=1e-6)
+    assert np.allclose(proba[~uncertain], first[~uncertain], atol=1e-9)
+    assert cascade.report()["escalated_fraction"] == pytest.approx(uncertain.mean(), abs=1e-6)
+
+    # Banda completa: equivale al modelo completo
+    everything = CascadePredictor(first_stage, full_model, band=(0.0, 1.0))
+    assert np.allclose(everything.predict_proba(X)[0], full, atol=1e-6)
+
+
+def test_evaluate_bands():
+    """
+    Métricas por banda: escalar todo reproduce el modelo completo.
+    """
+    y = np.array([0, 0, 1, 1, 0, 1])
+    full = np.array([0.1, 0.4, 0.6, 0.9, 0.2, 0.65])
+    first = np.array([0.05, 0.55, 0.45, 0.95, 0.5, 0.75])
+
+    metrics = evaluate_bands(first, full, y, [(0.0, 1.0), (0.4, 0.8), (0.5, 0.5)])
+
+    assert metrics.loc[0, "escalated_pct"] == 100
+    assert metrics.loc[0, "accuracy_loss"] == 0
+    assert metrics.loc[0, "risk_agreement"] == 1
+    assert metrics.loc[1, "escalated_pct"] == pytest.approx(66.67)
+    assert metrics.loc[1, "high_confidence_agreement"] == 1
+    # La banda más estrecha cambia una decisión de alta confianza (High frente a Medium)
+    assert metrics.loc[2, "high_confidence_agreement"] < 1
+    assert select_band(metrics) == (0.4, 0.8)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,159 @@
+"""
+Pruebas del cliente asíncrono de la API (agrupación, reintentos y errores).
+"""
+
+import pytest
+import asyncio
+import json
+import httpx
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.schemas import ChurnPrediction, CustomerData
+from client import ChurnAPIError, ChurnClient
+
+CUSTOMER = CustomerData.Config.schema_extra["example"]
+
+
+def _batch_response(records):
+    # Probabilidad determinista a partir de tenure para comprobar el orden
+    return {
+        "total_customers": len(records),
+        "predictions": [
+            {
+                "customer_index": idx,
+                "churn_probability": record["tenure"] / 100,
+                "prediction": "No",
+                "risk_level": "Low",
+                "confidence": 1 - record["tenure"] / 100,
+                "request_id": f"req-{idx}",
+            }
+            for idx, record in enumerate(records)
+        ],
+    }
+
+
+class FakeAPI:
+    """Transporte en memoria que simula /predict-batch."""
+
+    def __init__(self, failures=0, status_code=429, retry_after=None):
+        self.batch_sizes = []
+        self.failures = failures
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.failures:
+            self.failures -= 1
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return httpx.Response(self.status_code, json={"detail": "Sobrecarga"}, headers=headers)
+        records = json.loads(request.content)
+        self.batch_sizes.append(len(records))
+        return httpx.Response(200, json=_batch_response(records))
+
+
+def _client(api, **kwargs):
+    return ChurnClient("http://test", transport=httpx.MockTransport(api), backoff=0.001, **kwargs)
+
+
+def test_concurrent_predicts_are_batched():
+    """Test: llamadas concurrentes a predict() se envían en lotes de batch_size"""
+    api = FakeAPI()
+
+    async def scenario():
+        async with _client(api, batch_size=4, batch_wait_ms=20) as churn:
+            customers = [dict(CUSTOMER, tenure=t, TotalCharges=29.85 * max(t, 1)) for t in range(10)]
+            return await asyncio.gather(*(churn.predict(c) for c in customers))
+
+    predictions = asyncio.run(scenario())
+
+    assert sorted(api.batch_sizes) == [2, 4, 4]
+    assert all(isinstance(p, ChurnPrediction) for p in predictions)
+    assert [p.churn_probability for p in predictions] == [t / 100 for t in range(10)]
+
+
+def test_predict_many_preserves_order():
+    """Test: predict_many divide en lotes y devuelve en el orden de entrada"""
+    api = FakeAPI()
+
+    async def scenario():
+        async with _client(api, batch_size=3) as churn:
+            return await churn.predict_many([dict(CUSTOMER, tenure=t) for t in range(7)])
+
+    predictions = asyncio.run(scenario())
+
+    assert sorted(api.batch_sizes) == [1, 3, 3]
+    assert [p.churn_probability for p in predictions] == [t / 100 for t in range(7)]
+
+
+def test_predictions_keep_server_fields():
+    """Test: las predicciones conservan el request_id y el detalle del ensemble del servidor"""
+    ensemble = {"members_used": ["xgboost"], "members_timed_out": [], "members_failed": [], "weights": {"xgboost": 1.0},
+                "partial": False, "budget_ms": 50.0, "latency_ms": 1.0}
+
+    def api(request: httpx.Request) -> httpx.Response:
+        response = _batch_response(json.loads(request.content))
+        for prediction in response["predictions"]:
+            prediction["ensemble"] = ensemble
+        return httpx.Response(200, json=response)
+
+    async def scenario():
+        async with _client(api, batch_size=2, mode="ensemble") as churn:
+            return await churn.predict_many([dict(CUSTOMER, tenure=t) for t in range(3)])
+
+    predictions = asyncio.run(scenario())
+
+    assert [p.request_id for p in predictions] == ["req-0", "req-1", "req-0"]
+    assert all(p.ensemble is not None and p.ensemble.members_used == ["xgboost"] for p in predictions)
+
+
+def test_retries_on_overload():
+    """Test: 429/503 se reintentan y Retry-After se respeta"""
+    api = FakeAPI(failures=2, status_code=503, retry_after="0")
+
+    async def scenario():
+        async with _client(api, max_retries=3) as churn:
+            prediction = await churn.predict(CUSTOMER)
+            return prediction, churn.retries
+
+    prediction, retries = asyncio.run(scenario())
+
+    assert retries == 2
+    assert prediction.churn_probability == pytest.approx(0.01)
+
+
+def test_errors_are_raised():
+    """Test: se agotan los reintentos o el error no es reintentable"""
+    async def scenario(api, **kwargs):
+        async with _client(api, **kwargs) as churn:
+            await churn.predict(CUSTOMER)
+
+    with pytest.raises(ChurnAPIError) as exc:
+        asyncio.run(scenario(FakeAPI(failures=5, status_code=429), max_retries=1))
+    assert exc.value.status_code == 429
+
+    api = FakeAPI(failures=1, status_code=500)
+    with pytest.raises(ChurnAPIError) as exc:
+        asyncio.run(scenario(api, max_retries=3))
+    assert exc.value.status_code == 500
+    assert api.failures == 0
+
+
+def test_invalid_customer_is_rejected_locally():
+    """Test: el cliente valida con el mismo esquema que el servicio, sin enviar la petición"""
+    api = FakeAPI()
+
+    async def scenario():
+        async with _client(api) as churn:
+            await churn.predict({"tenure": 1})
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert api.batch_sizes == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,122 @@
+"""
+Pruebas de la coalescencia (single-flight) de predicciones idénticas en curso.
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.coalesce import SingleFlight
+
+
+class SlowFunction:
+    """Función de prueba lenta que cuenta sus ejecuciones."""
+
+    def __init__(self, delay=0.1, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("fallo de inferencia")
+        return value * 2
+
+
+def test_identical_requests_share_one_execution():
+    """Test: peticiones idénticas concurrentes ejecutan la función una sola vez"""
+    flight = SingleFlight()
+    fn = SlowFunction()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("a", fn, 21) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+
+    assert [value for value, _ in results] == [42] * 10
+    assert sum(shared for _, shared in results) == 9
+    assert fn.calls == 1
+    report = flight.report()
+    assert report["executed"] == 1
+    assert report["coalesced"] == 9
+    assert report["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    """Test: claves distintas no se agrupan"""
+    flight = SingleFlight()
+    fn = SlowFunction()
+
+    async def scenario():
+        return await asyncio.gather(flight.run("a", fn, 1), flight.run("b", fn, 2))
+
+    results = asyncio.run(scenario())
+
+    assert [value for value, _ in results] == [2, 4]
+    assert fn.calls == 2
+    assert flight.coalesced == 0
+
+
+def test_no_caching_after_completion():
+    """Test: al terminar, la siguiente petición idéntica vuelve a ejecutar"""
+    flight = SingleFlight()
+    fn = SlowFunction(delay=0.01)
+
+    async def scenario():
+        await flight.run("a", fn, 1)
+        await flight.run("a", fn, 1)
+
+    asyncio.run(scenario())
+
+    assert fn.calls == 2
+    assert flight.coalesced == 0
+
+
+def test_errors_propagate_to_all_waiters():
+    """Test: un error en la ejecución compartida llega a todas las peticiones"""
+    flight = SingleFlight()
+    fn = SlowFunction(fail=True)
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("a", fn, 1) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert fn.calls == 1
+    assert flight.errors == 1
+    assert flight.in_flight == 0
+
+
+def test_leader_cancellation_does_not_affect_followers():
+    """Test: si la primera petición se cancela, las demás reciben el resultado"""
+    flight = SingleFlight()
+    fn = SlowFunction(delay=0.1)
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.run("a", fn, 5))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.run("a", fn, 5))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    value, shared = asyncio.run(scenario())
+
+    assert value == 10
+    assert shared
+    assert fn.calls == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Pruebas de la representación compacta (códigos int8 y matriz CSR/float32).
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.compact import CompactEncoder, CompactScorer, matrix_format, read_compact_csv
+from app.features import (
+    APP_DIR,
+    CATEGORICAL_FEATURES,
+    FEATURE_COLUMNS,
+    RAW_DATA_PATH,
+    load_customers,
+    load_pipeline,
+    split_pipeline,
+    to_dense,
+)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return load_pipeline(APP_DIR / "model_xgboost.joblib")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return load_customers().head(2000).reset_index(drop=True)
+
+
+def test_read_compact_csv():
+    """
+    Verifica que los categóricos se leen como códigos int8 y ningún campo queda como object.
+    """
+    frame = read_compact_csv(RAW_DATA_PATH)
+    for field in CATEGORICAL_FEATURES:
+        assert frame[field].cat.codes.dtype == np.int8
+        assert (frame[field].cat.codes >= 0).all()
+    assert all(frame[field].dtype != object for field in FEATURE_COLUMNS)
+    # Los blancos de TotalCharges del CSV original se leen como NaN
+    assert frame['TotalCharges'].isna().sum() == 11
+
+
+def test_encoder_matches_preprocessor(pipeline, customers):
+    """
+    Verifica que la matriz compacta (densa y CSR) coincide con la del ColumnTransformer.
+    """
+    preprocessor, _ = split_pipeline(pipeline)
+    encoder = CompactEncoder(preprocessor)
+    expected = to_dense(preprocessor.transform(customers[FEATURE_COLUMNS])).astype(np.float32)
+
+    dense = encoder.transform(customers, "dense")
+    assert dense.dtype == np.float32 and dense.flags['C_CONTIGUOUS']
+    np.testing.assert_allclose(dense, expected, atol=1e-6)
+
+    csr = encoder.transform(customers, "csr")
+    assert csr.dtype == np.float32 and csr.indices.dtype == np.int32
+    np.testing.assert_allclose(csr.toarray(), expected, atol=1e-6)
+
+    # Categoría desconocida: sin columnas activas, como handle_unknown='ignore'
+    unknown = customers.head(1).copy()
+    unknown['Contract'] = 'Three year'
+    np.testing.assert_allclose(
+        encoder.transform(unknown, "dense"),
+        to_dense(preprocessor.transform(unknown[FEATURE_COLUMNS])).astype(np.float32),
+        atol=1e-6,
+    )
+
+
+@pytest.mark.parametrize("name", ["xgboost", "lightgbm", "catboost"])
+def test_scorer_matches_pipeline(name, customers):
+    """
+    Verifica probabilidades idénticas al pipeline desde texto y desde categorías.
+    """
+    pipeline = load_pipeline(APP_DIR / f"model_{name}.joblib")
+    scorer = CompactScorer(pipeline)
+    assert scorer.fmt == "dense"
+    expected = pipeline.predict_proba(customers[FEATURE_COLUMNS])[:, 1]
+    np.testing.assert_array_equal(scorer.predict_proba(customers), expected)
+
+    compact = read_compact_csv(RAW_DATA_PATH).head(2000)
+    compact['TotalCharges'] = compact['TotalCharges'].fillna(compact['MonthlyCharges'] * compact['tenure'])
+    np.testing.assert_array_equal(scorer.predict_proba(compact), expected)
+
+
+def test_matrix_format(pipeline):
+    """
+    Verifica que la CSR solo se elige si ocupa menos y nunca para XGBoost.
+    """
+    preprocessor, classifier = split_pipeline(pipeline)
+    encoder = CompactEncoder(preprocessor)
+    assert matrix_format(encoder, classifier) == "dense"
+
+    encoder.n_columns = 1000
+    assert matrix_format(encoder, classifier) == "dense"
+    assert matrix_format(encoder, object()) == "csr"
+
+
+def test_non_pipeline_rejected():
+    """
+    Verifica que un modelo sin pasos preprocessor/classifier no se compila.
+    """
+    with pytest.raises(ValueError):
+        CompactScorer(pd.DataFrame())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,127 @@
+"""
+Pruebas del monitor de drift en streaming.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.drift import PSI_SIGNIFICANT, DriftMonitor, ReferenceProfile, population_stability_index
+from app.features import CLEAN_DATA_PATH, FEATURE_COLUMNS
+
+
+@pytest.fixture(scope="module")
+def reference_data():
+    return pd.read_csv(CLEAN_DATA_PATH)[FEATURE_COLUMNS]
+
+
+def test_psi_is_zero_for_identical_distributions():
+    counts = np.array([10, 20, 30, 40])
+    assert population_stability_index(counts, counts * 3) == pytest.approx(0.0, abs=1e-9)
+    assert population_stability_index(counts, counts[::-1]) > 0.25
+
+
+def test_monitor_stable_on_reference_sample(reference_data):
+    """
+    Una muestra del propio dataset de referencia no debe reportar drift.
+    """
+    probabilities = np.random.default_rng(0).uniform(size=len(reference_data))
+    monitor = DriftMonitor(ReferenceProfile(reference_data, probabilities))
+    monitor.start()
+
+    sample = reference_data.sample(3000, random_state=0)
+    for chunk in np.array_split(np.arange(len(sample)), 30):
+        rows = sample.iloc[chunk]
+        monitor.record(rows.to_dict(orient="records"), probabilities[chunk])
+    monitor.flush()
+    report = monitor.report()
+    monitor.stop()
+
+    assert report["observations"] == 3000
+    assert report["dropped"] == 0
+    assert set(report["features"]) >= {"tenure", "Contract", "SeniorCitizen"}
+    assert all(f["status"] == "stable" for f in report["features"].values())
+    assert "ks" in report["features"]["tenure"]
+
+
+def test_no_alert_before_min_observations(reference_data):
+    """
+    Unas pocas peticiones no alcanzan para evaluar el drift aunque su PSI sea alto.
+    """
+    probabilities = np.random.default_rng(0).uniform(size=len(reference_data))
+    monitor = DriftMonitor(ReferenceProfile(reference_data, probabilities), min_observations=100)
+    monitor.start()
+
+    rows = reference_data.head(5)
+    monitor.record(rows.to_dict(orient="records"), probabilities[:5])
+    monitor.flush()
+    report = monitor.report()
+
+    assert report["observations"] == 5 and report["min_observations"] == 100
+    assert report["features"]["tenure"]["psi"] > PSI_SIGNIFICANT
+    assert all(f["status"] == "insufficient_data" for f in report["features"].values())
+    assert report["churn_probability"]["status"] == "insufficient_data"
+
+    sample = reference_data.sample(1000, random_state=0)
+    monitor.record(sample.to_dict(orient="records"), probabilities[:1000])
+    monitor.flush()
+    report = monitor.report()
+    monitor.stop()
+    assert report["features"]["Contract"]["status"] == "stable"
+
+
+def test_monitor_detects_shift(reference_data):
+    """
+    Un cambio fuerte en el tipo de contrato y la antigüedad se detecta.
+    """
+    monitor = DriftMonitor(ReferenceProfile(reference_data))
+    monitor.start()
+
+    shifted = reference_data.sample(1000, random_state=1).copy()
+    shifted["Contract"] = "Two year"
+    shifted["tenure"] = 72
+    monitor.record(shifted.to_dict(orient="records"), np.full(len(shifted), 0.1))
+    monitor.flush()
+    report = monitor.report()
+    monitor.stop()
+
+    assert report["features"]["Contract"]["status"] == "significant"
+    assert report["features"]["tenure"]["ks"] > 0.5
+    assert report["churn_probability"] is None
+
+
+def test_queue_bounded_by_rows(reference_data):
+    """
+    La cola pendiente se acota por filas, no por peticiones: los lotes que no caben se descartan.
+    """
+    monitor = DriftMonitor(ReferenceProfile(reference_data), max_queued_rows=250)
+    rows = reference_data.head(100).to_dict(orient="records")
+    for _ in range(5):
+        monitor.record(rows, np.zeros(len(rows)))
+    report = monitor.report()
+    assert report["pending_rows"] == 200 and report["dropped"] == 300
+
+    monitor.start()
+    monitor.flush()
+    monitor.stop()
+    report = monitor.report()
+    assert report["observations"] == 200 and report["pending_rows"] == 0
+
+
+def test_memory_is_constant(reference_data):
+    """
+    Los contadores no crecen con el número de observaciones.
+    """
+    monitor = DriftMonitor(ReferenceProfile(reference_data))
+    sizes = {name: c.size for name, c in monitor._counts.items()}
+    monitor._update(reference_data.to_dict(orient="records"), np.zeros(len(reference_data)))
+    assert {name: c.size for name, c in monitor._counts.items()} == sizes
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+"""
+Pruebas del ensemble con presupuesto de latencia.
+"""
+
+import pytest
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.pipeline import Pipeline
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.ensemble import EnsemblePredictor, parse_weights
+from app.features import CLEAN_DATA_PATH, FEATURE_COLUMNS
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+class SlowClassifier:
+    """
+    Clasificador que tarda en responder, para simular un miembro rezagado.
+    """
+
+    def __init__(self, classifier, delay):
+        self.classifier = classifier
+        self.delay = delay
+
+    def fit(self, X, y):
+        return self
+
+    def predict_proba(self, X):
+        time.sleep(self.delay)
+        return self.classifier.predict_proba(X)
+
+
+@pytest.fixture(scope="module")
+def sample_data():
+    return pd.read_csv(CLEAN_DATA_PATH)[FEATURE_COLUMNS].head(100)
+
+
+@pytest.fixture(scope="module")
+def models():
+    return {name: joblib.load(APP_DIR / f"model_{name}.joblib") for name in ["catboost", "lightgbm", "xgboost"]}
+
+
+def test_parse_weights():
+    assert parse_weights("catboost:2, lightgbm:1,xgboost") == {"catboost": 2.0, "lightgbm": 1.0, "xgboost": 1.0}
+    assert parse_weights("") == {}
+    with pytest.raises(ValueError):
+        parse_weights("catboost:-1")
+
+
+def test_weighted_average_of_members(models, sample_data):
+    """
+    Sin presupuesto, el ensemble es el promedio ponderado de los tres modelos.
+    """
+    weights = {"catboost": 2.0, "lightgbm": 1.0, "xgboost": 1.0}
+    ensemble = EnsemblePredictor(models, weights)
+    proba, info = ensemble.predict_proba(sample_data)
+    ensemble.shutdown()
+
+    expected = sum(
+        w * models[name].predict_proba(sample_data)[:, 1] for name, w in weights.items()
+    ) / sum(weights.values())
+    assert ensemble.preprocessor is not None
+    assert np.allclose(proba, expected, atol=1e-6)
+    assert info["members_used"] == ["catboost", "lightgbm", "xgboost"]
+    assert not info["partial"]
+
+
+def test_budget_drops_slow_member(models, sample_data):
+    """
+    Un miembro que excede el presupuesto se omite y se reporta.
+    """
+    slow = Pipeline([
+        ("preprocessor", models["xgboost"].named_steps["preprocessor"]),
+        ("classifier", SlowClassifier(models["xgboost"].named_steps["classifier"], delay=1.0)),
+    ])
+    members = {"catboost": models["catboost"], "lightgbm": models["lightgbm"], "slow": slow}
+    ensemble = EnsemblePredictor(members)
+    proba, info = ensemble.predict_proba(sample_data, budget_ms=300)
+    ensemble.shutdown()
+
+    assert info["members_timed_out"] == ["slow"]
+    assert info["partial"]
+    assert info["latency_ms"] < 1000
+    expected = (models["catboost"].predict_proba(sample_data)[:, 1]
+                + models["lightgbm"].predict_proba(sample_data)[:, 1]) / 2
+    assert np.allclose(proba, expected, atol=1e-6)
+    assert ensemble.timeouts["slow"] == 1
+
+
+def test_unknown_weights_raise(models):
+    with pytest.raises(ValueError):
+        EnsemblePredictor(models, {"randomforest": 1.0})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,91 @@
+"""
+Pruebas unitarias para las explicaciones con contribuciones nativas.
+"""
+
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.explain import TreeContributionExplainer
+from app.features import FEATURE_COLUMNS, build_feature_map, split_pipeline
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+DATA_PATH = Path(__file__).parent.parent / "data" / "telco_churn_clean.csv"
+
+
+@pytest.fixture(scope="module")
+def sample_data():
+    return pd.read_csv(DATA_PATH).drop(columns="Churn").head(50)
+
+
+@pytest.mark.parametrize("model_name", ["xgboost", "lightgbm", "catboost"])
+def test_contributions_match_predict_proba(model_name, sample_data):
+    """
+    Verifica que las contribuciones suman la probabilidad del modelo.
+    """
+    model = joblib.load(APP_DIR / f"model_{model_name}.joblib")
+    explainer = TreeContributionExplainer(model)
+
+    contributions, base_values, probabilities = explainer.explain_frame(sample_data)
+
+    assert contributions.shape == (len(sample_data), len(FEATURE_COLUMNS))
+    expected = model.predict_proba(sample_data)[:, 1]
+    assert np.allclose(probabilities, expected, atol=1e-4)
+    margin = contributions.sum(axis=1) + base_values
+    assert np.allclose(1 / (1 + np.exp(-margin)), expected, atol=1e-4)
+
+
+def test_feature_map_covers_every_transformed_column():
+    """
+    Verifica que cada columna one-hot se asigna a exactamente un campo original.
+    """
+    model = joblib.load(APP_DIR / "model_xgboost.joblib")
+    preprocessor, _ = split_pipeline(model)
+    mapping = build_feature_map(preprocessor)
+
+    assert mapping.shape[1] == len(FEATURE_COLUMNS)
+    assert np.all(mapping.sum(axis=1) == 1)
+    assert np.all(mapping.sum(axis=0) >= 1)
+
+
+def test_explain_uses_cache(sample_data):
+    """
+    Verifica que una misma entrada se sirve desde la cache.
+    """
+    model = joblib.load(APP_DIR / "model_lightgbm.joblib")
+    explainer = TreeContributionExplainer(model)
+    records = sample_data.head(3).to_dict(orient="records")
+
+    first = explainer.explain(records)
+    second = explainer.explain(records)
+
+    assert first == second
+    assert explainer.cache.hits == 3
+    assert [c["feature"] for c in first[0]["contributions"]] != []
+
+
+def test_unsupported_classifier_raises():
+    """
+    Verifica que un clasificador sin contribuciones nativas se rechaza.
+    """
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = joblib.load(APP_DIR / "model_xgboost.joblib")
+    pipeline = Pipeline([
+        ("preprocessor", model.named_steps["preprocessor"]),
+        ("classifier", RandomForestClassifier())
+    ])
+    with pytest.raises(ValueError):
+        TreeContributionExplainer(pipeline)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,50 @@
+"""
+Pruebas del reporte offline de motivos de churn.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jobs.explain_report import build_report
+
+
+MODEL_PATH = Path(__file__).parent.parent / "app" / "model_xgboost.joblib"
+
+
+def test_build_report_native():
+    """
+    Verifica que el reporte contiene los top-N clientes ordenados por riesgo.
+    """
+    report, stats = build_report(model_path=MODEL_PATH, top_n=50, workers=2, chunk_size=16)
+
+    assert len(report) == 50
+    assert list(report.columns) == [
+        "customerID", "churn_probability", "risk_level", "reason_1", "reason_2", "reason_3"
+    ]
+    assert report["churn_probability"].is_monotonic_decreasing
+    assert report["customerID"].is_unique
+    assert stats["method"] == "native"
+    assert stats["customers_explained"] == 50
+    assert stats["explanations_per_second"] > 0
+
+
+def test_build_report_lime_fallback():
+    """
+    Verifica el cálculo con LIME y estado compartido por proceso.
+    """
+    pytest.importorskip("lime")
+    report, stats = build_report(
+        model_path=MODEL_PATH, top_n=4, workers=2, method="lime", chunk_size=2, lime_samples=200
+    )
+
+    assert len(report) == 4
+    assert stats["method"] == "lime"
+    assert report["reason_1"].str.contains("=").all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+"""
+Pruebas del almacén local de características (puntuación por customerID).
+"""
+
+import pytest
+import joblib
+import numpy as np
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.feature_store import FeatureStore, build_feature_store, preprocessor_signature
+from app.features import FEATURE_COLUMNS, load_customers
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(APP_DIR / "model_xgboost.joblib")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return load_customers().head(300)
+
+
+@pytest.fixture
+def store(model, customers, tmp_path):
+    path = tmp_path / "feature_store"
+    build_feature_store(customers, model.named_steps["preprocessor"], path, chunk_size=128)
+    return FeatureStore(path, signature=preprocessor_signature(model.named_steps["preprocessor"]))
+
+
+def test_lookup_matches_pipeline(store, model, customers):
+    """
+    Los vectores del almacén dan las mismas predicciones que el pipeline completo.
+    """
+    ids = list(customers.index[[5, 0, 250]])
+    found, missing, encoded = store.lookup(ids + ["0000-NOPE"])
+
+    assert found == ids
+    assert missing == ["0000-NOPE"]
+    expected = model.predict_proba(customers.loc[ids, FEATURE_COLUMNS])[:, 1]
+    assert np.array_equal(model.named_steps["classifier"].predict_proba(encoded)[:, 1], expected)
+
+
+def test_records_roundtrip(store, customers):
+    """
+    Los campos originales se recuperan tal cual desde los archivos columnares.
+    """
+    ids = list(customers.index[:10])
+    records = store.records(ids)
+
+    assert records.equals(customers.loc[ids, FEATURE_COLUMNS].reset_index(drop=True))
+
+
+def test_refresh_after_rebuild(store, model, customers):
+    """
+    La reconstrucción se publica de forma atómica y el lector la recoge.
+    """
+    assert len(store) == 300
+    assert not store.refresh()
+
+    build_feature_store(customers.head(100), model.named_steps["preprocessor"], store.path)
+    assert store.refresh()
+    assert len(store) == 100
+    assert store.report()["reloads"] == 1
+
+
+def test_rejects_other_preprocessor(store):
+    with pytest.raises(ValueError):
+        FeatureStore(store.path, signature="otra-firma")
+
+
+def test_rejects_duplicate_ids(model, customers, tmp_path):
+    duplicated = customers.head(3).copy()
+    duplicated.index = ["A", "A", "B"]
+    with pytest.raises(ValueError):
+        build_feature_store(duplicated, model.named_steps["preprocessor"], tmp_path / "fs")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
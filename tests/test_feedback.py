@@ -0,0 +1,89 @@
+"""
+Pruebas de las métricas de rendimiento en ventana deslizante (/feedback).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+from sklearn.metrics import brier_score_loss, precision_score, recall_score, roc_auc_score
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.feedback import FeedbackMonitor, PredictionLog, RollingMetrics, load_offline_metrics
+
+
+def _outcomes(rng, n, noise=0.0):
+    probabilities = rng.random(n)
+    labels = (rng.random(n) < probabilities).astype(int)
+    flip = rng.random(n) < noise
+    labels[flip] = 1 - labels[flip]
+    return probabilities, labels
+
+
+def test_rolling_metrics_match_full_recompute():
+    """
+    Tras varios lotes (incluido uno mayor que la ventana) las métricas
+    incrementales coinciden con recalcularlas sobre la ventana.
+    """
+    rng = np.random.default_rng(0)
+    metrics = RollingMetrics(window=500)
+    history_p, history_y = [], []
+    for size in [3, 200, 450, 1, 700, 37]:
+        probabilities, labels = _outcomes(rng, size)
+        metrics.update(probabilities, labels)
+        history_p.extend(probabilities)
+        history_y.extend(labels)
+
+        p, y = np.array(history_p[-500:]), np.array(history_y[-500:])
+        report = metrics.report()
+        assert report["observations"] == len(y)
+        if len(set(y)) > 1:
+            assert report["roc_auc"] == pytest.approx(roc_auc_score(y, p), abs=2e-3)
+        assert report["precision"] == pytest.approx(precision_score(y, p > 0.5, zero_division=0), abs=1e-4)
+        assert report["recall"] == pytest.approx(recall_score(y, p > 0.5, zero_division=0), abs=1e-4)
+        assert report["brier"] == pytest.approx(brier_score_loss(y, p), abs=1e-4)
+
+    assert metrics.report()["total_observations"] == len(history_y)
+    assert sum(b["count"] for b in metrics.report()["calibration"]) == 500
+
+
+def test_prediction_log_is_bounded():
+    log = PredictionLog(max_entries=3)
+    log.add(["a", "b", "c", "d"], [0.1, 0.2, 0.3, 0.4], "v1")
+
+    assert len(log) == 3
+    assert log.evicted == 1
+    assert log.pop("a") is None
+    assert log.pop("d") == (0.4, "v1")
+    assert log.pop("d") is None
+
+
+def test_feedback_monitor_flags_degradation():
+    """
+    Una versión con predicciones casi aleatorias se marca como degradada frente a la offline.
+    """
+    rng = np.random.default_rng(1)
+    monitor = FeedbackMonitor(window=1000, min_observations=100)
+    offline = {"roc_auc": 0.84}
+
+    monitor.record("v1", *_outcomes(rng, 50))
+    assert monitor.report(offline)["versions"][0]["status"] == "insufficient_data"
+
+    monitor.record("v1", *_outcomes(rng, 500))
+    monitor.record("v2", *_outcomes(rng, 500, noise=0.45))
+    versions = {v["model_version"]: v for v in monitor.report(offline)["versions"]}
+    assert versions["v1"]["status"] == "ok"
+    assert versions["v2"]["status"] == "degraded"
+
+
+def test_load_offline_metrics():
+    metrics = load_offline_metrics("XGBClassifier")
+    assert metrics["model"] == "XGBoost"
+    assert 0.5 < metrics["roc_auc"] <= 1
+    assert load_offline_metrics("Desconocido") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
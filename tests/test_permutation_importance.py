@@ -0,0 +1,37 @@
+"""
+Pruebas de la importancia por permutación sobre campos originales.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import FEATURE_COLUMNS
+from jobs.permutation_importance import compute_importances
+
+
+MODEL_PATH = Path(__file__).parent.parent / "app" / "model_lightgbm.joblib"
+
+
+def test_compute_importances():
+    """
+    Verifica una fila por campo original con intervalos de confianza coherentes.
+    """
+    results = compute_importances([MODEL_PATH], n_repeats=4, workers=2, repeats_per_task=2)
+
+    assert list(results) == ["lightgbm"]
+    importance_df = results["lightgbm"]
+    assert sorted(importance_df["Feature"]) == sorted(FEATURE_COLUMNS)
+    assert (importance_df["CI_Lower"] <= importance_df["Importance"]).all()
+    assert (importance_df["Importance"] <= importance_df["CI_Upper"]).all()
+    assert importance_df["Importance"].is_monotonic_decreasing
+    # Antigüedad y contrato dominan en todos los modelos del notebook 2
+    top_features = set(importance_df["Feature"].head(4))
+    assert {"tenure", "Contract"} <= top_features
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Pruebas del pipeline de entrenamiento con caché por etapas.
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jobs.pipeline import MODELS, build_stages, publish, run_pipeline, select_stages
+
+
+RAW_DATA_PATH = Path(__file__).parent.parent / "data" / "telco_churn.csv"
+
+
+def tiny_models(lightgbm_estimators=(10,)):
+    """
+    XGBoost y LightGBM con grids de un candidato para que las pruebas sean rápidas.
+    """
+    models = {name: dict(MODELS[name]) for name in ("XGBoost", "LightGBM")}
+    models["XGBoost"]["grid"] = {"classifier__n_estimators": [10]}
+    models["LightGBM"]["grid"] = {"classifier__n_estimators": list(lightgbm_estimators)}
+    return models
+
+
+@pytest.fixture
+def raw_path(tmp_path):
+    path = tmp_path / "telco_churn.csv"
+    pd.read_csv(RAW_DATA_PATH).head(600).to_csv(path, index=False)
+    return path
+
+
+def run(raw_path, cache_dir, models, **kwargs):
+    stages = build_stages(raw_path, models, cv_folds=2, n_repeats=2)
+    results = run_pipeline(stages, cache_dir, workers=2, **kwargs)
+    return results, {name: result["status"] for name, result in results.items()}
+
+
+def test_second_run_is_fully_cached(raw_path, tmp_path):
+    """
+    Verifica que una segunda ejecución sin cambios no re-ejecuta ninguna etapa.
+    """
+    results, statuses = run(raw_path, tmp_path / "cache", tiny_models())
+    assert set(statuses.values()) == {"run"}
+    assert results["evaluate"]["summary"]["best_model"] in ("XGBoost", "LightGBM")
+
+    _, statuses = run(raw_path, tmp_path / "cache", tiny_models())
+    assert set(statuses.values()) == {"cached"}
+
+
+def test_grid_change_only_retrains_that_model(raw_path, tmp_path):
+    """
+    Verifica que cambiar el grid de un modelo no re-limpia los datos ni re-entrena los demás.
+    """
+    run(raw_path, tmp_path / "cache", tiny_models())
+
+    dry, statuses = run(raw_path, tmp_path / "cache", tiny_models((10, 20)), dry_run=True)
+    assert statuses["train_lightgbm"] == "stale" and statuses["evaluate"] == "stale"
+    assert statuses["train_xgboost"] == "cached"
+
+    results, statuses = run(raw_path, tmp_path / "cache", tiny_models((10, 20)))
+    assert {name for name, status in statuses.items() if status == "run"} == {
+        "train_lightgbm", "evaluate", "explain_lightgbm"
+    }
+    assert results["train_lightgbm"]["summary"]["candidates"] == 2
+
+
+def test_unchanged_outputs_keep_dependents_cached(raw_path, tmp_path):
+    """
+    Verifica que re-ejecutar una etapa que produce lo mismo no invalida las siguientes.
+    """
+    run(raw_path, tmp_path / "cache", tiny_models())
+    _, statuses = run(raw_path, tmp_path / "cache", tiny_models(), force=["clean"])
+    assert statuses["clean"] == "run"
+    assert all(status == "cached" for name, status in statuses.items() if name != "clean")
+
+
+def test_publish_only_changed_artifacts(raw_path, tmp_path):
+    """
+    Verifica que se publican los artefactos del notebook 2 y que una segunda publicación no toca nada.
+    """
+    results, _ = run(raw_path, tmp_path / "cache", tiny_models())
+    app_dir = tmp_path / "app"
+    updated = publish(results, app_dir, tmp_path / "telco_churn_clean.csv")
+
+    names = {path.name for path in updated}
+    assert {"model.joblib", "model_xgboost.joblib", "model_lightgbm.joblib", "model_metrics.csv",
+            "feature_importance_lightgbm.csv", "telco_churn_clean.csv"} <= names
+    assert list(pd.read_csv(app_dir / "model_metrics.csv")["Modelo"].sort_values()) == ["LightGBM", "XGBoost"]
+    assert publish(results, app_dir, tmp_path / "telco_churn_clean.csv") == []
+
+
+def test_select_stages():
+    """
+    Verifica que un objetivo arrastra solo sus dependencias.
+    """
+    stages = build_stages(RAW_DATA_PATH, tiny_models())
+    selected = [stage.name for stage in select_stages(stages, ["train_xgboost"])]
+    assert selected == ["clean", "split", "preprocessor", "train_xgboost"]
+
+    with pytest.raises(ValueError):
+        select_stages(stages, ["train_svm"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
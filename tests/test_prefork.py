@@ -0,0 +1,132 @@
+"""
+Pruebas del modo pre-fork (precarga de modelos y reporte de memoria).
+"""
+
+import pytest
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import features
+from app.features import _PRELOADED, load_pipeline, set_xgboost_threads, split_pipeline
+from app.prefork import memory_report, preload_models, read_memory, warm_up
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+XGBOOST_PATH = APP_DIR / "model_xgboost.joblib"
+CATBOOST_PATH = APP_DIR / "model_catboost.joblib"
+
+requires_smaps = pytest.mark.skipif(
+    not Path(f"/proc/{os.getpid()}/smaps_rollup").exists(),
+    reason="smaps_rollup no disponible"
+)
+
+
+@pytest.fixture
+def clean_registry():
+    _PRELOADED.clear()
+    yield
+    _PRELOADED.clear()
+
+
+def test_preloaded_pipeline_is_reused(clean_registry):
+    """Test: load_pipeline devuelve el objeto precargado, no una copia"""
+    loaded = preload_models([XGBOOST_PATH, APP_DIR / "no_existe.joblib"])
+
+    assert list(loaded) == [str(XGBOOST_PATH)]
+    assert load_pipeline(XGBOOST_PATH) is loaded[str(XGBOOST_PATH)]
+    # Rutas equivalentes apuntan al mismo modelo
+    assert load_pipeline(APP_DIR / "." / "model_xgboost.joblib") is loaded[str(XGBOOST_PATH)]
+
+
+@pytest.mark.parametrize("name", ["xgboost", "lightgbm", "catboost"])
+def test_shadow_does_not_mutate_preloaded_pipeline(clean_registry, name):
+    """Test: un retador en sombra no cambia los hilos del pipeline precargado compartido"""
+    from app.shadow import ShadowScorer
+    from app.warmup import warmup_frames
+
+    path = APP_DIR / f"model_{name}.joblib"
+    preload_models([path])
+    shared = load_pipeline(path)
+    _, classifier = split_pipeline(shared)
+    params = classifier.get_params()
+    booster_config = classifier.get_booster().save_config() if name == "xgboost" else None
+
+    scorer = ShadowScorer({name: load_pipeline(path)})
+    try:
+        challenger, _ = scorer.challengers[name]
+        frame = warmup_frames((8,))[8]
+        expected = shared.predict_proba(frame)
+        assert split_pipeline(load_pipeline(path))[1].get_params() == params
+        if booster_config is not None:
+            assert classifier.get_booster().save_config() == booster_config
+            # XGBoost comparte el booster precargado en lugar de copiarlo
+            assert challenger is shared
+        np.testing.assert_array_equal(challenger.predict_proba(frame, **scorer.challengers[name][1]), expected)
+    finally:
+        scorer.shutdown()
+
+
+def test_load_pipeline_without_preload_reads_disk(clean_registry):
+    """Test: sin precarga se lee el artefacto de disco"""
+    first = load_pipeline(XGBOOST_PATH)
+    second = load_pipeline(XGBOOST_PATH)
+    assert first is not second
+
+
+def test_xgboost_threads_set_once_per_process(clean_registry):
+    """Test: el límite de hilos de XGBoost se aplica a los modelos cargados y a los siguientes"""
+    previous = features._XGBOOST_THREADS
+    try:
+        preloaded = preload_models([XGBOOST_PATH])[str(XGBOOST_PATH)]
+        set_xgboost_threads(2)
+        assert split_pipeline(preloaded)[1].n_jobs == 2
+        assert '"nthread":"2"' in split_pipeline(preloaded)[1].get_booster().save_config()
+
+        _PRELOADED.clear()
+        later = split_pipeline(load_pipeline(XGBOOST_PATH))[1]
+        assert later.n_jobs == 2
+        assert '"nthread":"2"' in later.get_booster().save_config()
+    finally:
+        features._XGBOOST_THREADS = previous
+
+
+@pytest.mark.parametrize("path", [XGBOOST_PATH, CATBOOST_PATH])
+def test_warm_up_restores_threads(path):
+    """Test: el calentamiento monohilo no altera la configuración de hilos"""
+    model = load_pipeline(path)
+    classifier = model.named_steps['classifier']
+    before = getattr(classifier, 'n_jobs', None)
+
+    warm_up(model, batch_sizes=(1, 8))
+
+    assert getattr(classifier, 'n_jobs', None) == before
+
+
+@requires_smaps
+def test_read_memory_current_process():
+    """Test: lectura de smaps_rollup del proceso actual"""
+    mem = read_memory(os.getpid())
+    assert mem['Rss'] > 0
+    assert mem['Private_Clean'] + mem['Private_Dirty'] <= mem['Rss']
+
+
+@requires_smaps
+def test_memory_report_skips_missing_processes():
+    """Test: el reporte ignora procesos que ya terminaron"""
+    report = memory_report([os.getpid(), 2 ** 22 + 1])
+
+    assert len(report["workers"]) == 1
+    worker = report["workers"][0]
+    assert worker["pid"] == os.getpid()
+    assert worker["unique_kb"] + worker["shared_kb"] == pytest.approx(worker["rss_kb"], rel=0.05)
+    assert report["total_unique_kb"] == worker["unique_kb"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
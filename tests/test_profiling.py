@@ -0,0 +1,94 @@
+"""
+Pruebas del perfilado bajo demanda (muestreo de pilas y tracemalloc).
+"""
+
+import pytest
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.profiling import AllocationTracer, SamplingProfiler
+
+
+def busy_function(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(i * i for i in range(1000))
+    return total
+
+
+def allocating_function(n):
+    return [bytearray(1024) for _ in range(n)]
+
+
+def test_sampling_profiler_finds_busy_thread():
+    """Test: la función que consume CPU aparece en las pilas muestreadas"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_function, args=(stop,), name="busy")
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval_ms=2)
+        counts = profiler.sample(0.3)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 10
+    busy = [stack for stack in counts if stack[0] == "busy"]
+    assert busy
+    assert any("busy_function" in frame for stack in busy for frame in stack)
+
+    busy_counts = {stack: n for stack, n in counts.items() if stack[0] == "busy"}
+    top = SamplingProfiler.top_functions(busy_counts, sort_by="total")
+    busy_entry = next(entry for entry in top if "busy_function" in entry["function"])
+    assert busy_entry["total_pct"] > 90
+    assert all(entry["self_pct"] <= entry["total_pct"] <= 100 for entry in top)
+
+
+def test_folded_format():
+    """Test: una línea por pila con frames separados por ';' y el número de muestras"""
+    counts = {("MainThread", "main (a.py:1)", "f (a.py:10)"): 3, ("hilo", "g (b.py:2)"): 1}
+    lines = SamplingProfiler.folded(counts).strip().splitlines()
+
+    assert lines[0] == "MainThread;main (a.py:1);f (a.py:10) 3"
+    assert lines[1] == "hilo;g (b.py:2) 1"
+
+
+def test_sampling_duration_is_bounded():
+    """Test: la duración se limita a max_seconds"""
+    profiler = SamplingProfiler(interval_ms=5, max_seconds=0.1)
+    start = time.perf_counter()
+    profiler.sample(30)
+    assert time.perf_counter() - start < 1
+
+
+def test_allocation_tracer_reports_sites():
+    """Test: las asignaciones del archivo en el scope aparecen en top y en el crecimiento"""
+    tracer = AllocationTracer(nframes=10)
+    tracer.start()
+    try:
+        assert tracer.active
+        data = allocating_function(2000)
+        report = tracer.snapshot(limit=5, scope=__file__)
+    finally:
+        tracer.stop()
+
+    assert not tracer.active
+    assert report["top"][0]["site"].startswith(__file__)
+    assert report["top"][0]["size_kb"] >= 2000
+    assert report["growth_since_start"][0]["size_diff_kb"] >= 2000
+    assert len(data) == 2000
+
+
+def test_allocation_tracer_requires_start():
+    """Test: sin tracemalloc activo la instantánea falla"""
+    with pytest.raises(RuntimeError):
+        AllocationTracer().snapshot()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
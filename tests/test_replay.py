@@ -0,0 +1,98 @@
+"""
+Pruebas del replay diferencial de tráfico grabado.
+"""
+
+import pytest
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import APP_DIR, FEATURE_COLUMNS, load_customers, load_pipeline
+from jobs.replay import chunk_ranges, parse_records, replay
+
+
+XGBOOST_PATH = APP_DIR / "model_xgboost.joblib"
+CATBOOST_PATH = APP_DIR / "model_catboost.joblib"
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return load_customers().head(3000).reset_index()
+
+
+@pytest.fixture
+def log_path(tmp_path, customers):
+    """
+    JSONL con un registro por línea, un cuerpo de /predict-batch y dos líneas no válidas.
+    """
+    records = customers.to_dict("records")
+    path = tmp_path / "requests.jsonl"
+    with open(path, "w") as f:
+        for record in records[:2900]:
+            f.write(json.dumps(record) + "\n")
+        f.write(json.dumps({"customers": records[2900:]}) + "\n")
+        f.write("{\"gender\": \"Male\"}\n")
+        f.write("no es json\n")
+    return path
+
+
+def test_parse_records(customers):
+    """
+    Verifica que los registros incompletos o con categorías desconocidas se cuentan y descartan.
+    """
+    records = customers.head(3).to_dict("records")
+    records[1]["Contract"] = "Three year"
+    lines = [json.dumps(r).encode() for r in records] + [b"[1, 2]", b"{"]
+    frame, ids, invalid = parse_records(lines)
+    assert len(frame) == 2 and invalid == 3
+    assert ids == [records[0]["customerID"], records[2]["customerID"]]
+    assert frame["Contract"].cat.codes.dtype == np.int8
+
+
+def test_replay_matches_direct_scoring(log_path, customers):
+    """
+    Verifica cambios de predicción y migraciones frente a puntuar directamente, con bloques pequeños.
+    """
+    # Bloques de 64 KB: muchas líneas quedan partidas entre dos rangos
+    assert len(chunk_ranges([log_path], 64 << 10)) > 10
+    report = replay([log_path], [XGBOOST_PATH, CATBOOST_PATH], workers=2, chunk_bytes=64 << 10, top_k=5)
+
+    assert report["rows"] == len(customers) and report["invalid"] == 2
+    reference = load_pipeline(XGBOOST_PATH).predict_proba(customers[FEATURE_COLUMNS])[:, 1]
+    candidate = load_pipeline(CATBOOST_PATH).predict_proba(customers[FEATURE_COLUMNS])[:, 1]
+
+    comparison = report["comparisons"][str(CATBOOST_PATH)]
+    assert comparison["no_to_yes"] == int(np.sum((reference <= 0.5) & (candidate > 0.5)))
+    assert comparison["yes_to_no"] == int(np.sum((reference > 0.5) & (candidate <= 0.5)))
+    risk = lambda p: np.digitize(p, [0.3, 0.7])  # noqa: E731
+    assert comparison["risk_level_agreement_rate"] == round(float(np.mean(risk(reference) == risk(candidate))), 6)
+    assert comparison["delta"]["mean"] == pytest.approx(float(np.mean(candidate - reference)), abs=1e-6)
+
+    largest = comparison["largest_deltas"]
+    assert len(largest) == 5
+    assert abs(largest[0]["delta"]) == pytest.approx(float(np.abs(candidate - reference).max()), abs=1e-4)
+    assert report["models"][str(XGBOOST_PATH)]["rows_per_second_per_core"] > 0
+
+
+def test_replay_identical_models(log_path):
+    """
+    Verifica que un modelo comparado consigo mismo no produce cambios.
+    """
+    report = replay([log_path], [XGBOOST_PATH, XGBOOST_PATH], workers=1)
+    comparison = report["comparisons"][str(XGBOOST_PATH)]
+    assert comparison["flips"] == 0
+    assert comparison["risk_level_agreement_rate"] == 1.0
+
+
+def test_replay_requires_two_models(log_path):
+    with pytest.raises(ValueError):
+        replay([log_path], [XGBOOST_PATH])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
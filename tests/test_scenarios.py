@@ -0,0 +1,87 @@
+"""
+Pruebas de los escenarios what-if de retención.
+"""
+
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import CLEAN_DATA_PATH, FEATURE_COLUMNS
+from app.scenarios import DEFAULT_SCENARIOS, ScenarioScorer, applicable_mask, summarize, validate_scenarios
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load(APP_DIR / "model_xgboost.joblib")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return pd.read_csv(CLEAN_DATA_PATH)[FEATURE_COLUMNS].head(200)
+
+
+def test_validate_scenarios():
+    assert validate_scenarios({"s": {"tenure": 24.0}}) == {"s": {"tenure": 24}}
+    with pytest.raises(ValueError):
+        validate_scenarios({"s": {"Contract": "Ten year"}})
+    with pytest.raises(ValueError):
+        validate_scenarios({"s": {"Foo": "Yes"}})
+    with pytest.raises(ValueError):
+        validate_scenarios({"s": {}})
+
+
+def test_applicable_mask():
+    """
+    Sin cambio real o con un registro incoherente el escenario no se aplica.
+    """
+    customers = pd.DataFrame({
+        "Contract": ["One year", "Month-to-month", "Month-to-month"],
+        "InternetService": ["DSL", "DSL", "No"],
+        "TechSupport": ["No", "No", "No internet service"],
+        "PhoneService": ["Yes", "Yes", "Yes"],
+        "MultipleLines": ["No", "No", "No"],
+    })
+
+    assert applicable_mask(customers, {"Contract": "One year"}).tolist() == [False, True, True]
+    assert applicable_mask(customers, {"TechSupport": "Yes"}).tolist() == [True, True, False]
+
+
+def test_scores_match_pipeline(model, customers):
+    """
+    La expansión sobre columnas codificadas da lo mismo que modificar y re-puntuar el pipeline.
+    """
+    scenarios = validate_scenarios(DEFAULT_SCENARIOS)
+    baseline, results = ScenarioScorer(model).score(customers, scenarios)
+
+    assert np.allclose(baseline, model.predict_proba(customers)[:, 1])
+    for name, changes in scenarios.items():
+        rows = results[results["scenario"] == name]
+        modified = customers.iloc[rows["customer_index"]].copy()
+        for field, value in changes.items():
+            modified[field] = value
+        assert np.allclose(rows["churn_probability"], model.predict_proba(modified)[:, 1])
+        assert np.allclose(rows["delta"], rows["churn_probability"] - baseline[rows["customer_index"]])
+
+    # Por cliente, de mayor a menor reducción del riesgo
+    assert (results.groupby("customer_index")["delta"].diff().dropna() >= 0).all()
+
+
+def test_summarize_ranks_by_mean_delta(model, customers):
+    _, results = ScenarioScorer(model).score(customers, validate_scenarios(DEFAULT_SCENARIOS))
+    summary = summarize(results, len(customers))
+
+    assert list(summary["mean_delta"]) == sorted(summary["mean_delta"])
+    assert (summary["applicable_pct"] <= 100).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
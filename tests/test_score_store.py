@@ -0,0 +1,159 @@
+"""
+Pruebas del almacén de puntuaciones (top-K y agregados por segmento).
+"""
+
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import RAW_DATA_PATH, get_risk_level, load_customers, row_fingerprints
+from app.score_store import SEGMENT_FIELDS, ScoreStore
+from jobs.score_customers import score_customers
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+@pytest.fixture
+def customers():
+    return load_customers().head(500)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScoreStore(tmp_path / "scores.db")
+    yield store
+    store.close()
+
+
+def _expected_segments(customers, probabilities):
+    df = customers[list(SEGMENT_FIELDS)].copy()
+    df['p'] = probabilities
+    return df.groupby(list(SEGMENT_FIELDS))['p'].agg(['count', 'mean'])
+
+
+def _assert_segments_match(store, customers, probabilities):
+    expected = _expected_segments(customers, probabilities)
+    cells = store.segments()["segments"]
+    assert len(cells) == len(expected)
+    for cell in cells:
+        count, mean = expected.loc[(cell['contract'], cell['payment_method'])]
+        assert cell['customers'] == count
+        assert cell['mean_probability'] == pytest.approx(mean, abs=1e-6)
+        assert cell['high'] + cell['medium'] + cell['low'] == count
+
+
+def test_top_at_risk_ordering(store, customers):
+    """Test: el top-K coincide con ordenar todas las probabilidades"""
+    rng = np.random.default_rng(0)
+    probabilities = rng.random(len(customers))
+    store.upsert(customers.index, probabilities, customers, "v1")
+
+    top = store.top_at_risk(10)
+    expected = customers.index[np.argsort(-probabilities)[:10]]
+    assert [row['customer_id'] for row in top] == list(expected)
+    assert top[0]['risk_level'] == get_risk_level(probabilities.max())
+
+    high = store.top_at_risk(1000, risk_level="High")
+    assert all(row['risk_level'] == "High" for row in high)
+    assert len(high) == int(np.sum(probabilities > 0.7))
+
+
+def test_segments_update_incrementally(store, customers):
+    """Test: los agregados siguen siendo exactos tras re-puntuar y eliminar"""
+    rng = np.random.default_rng(1)
+    probabilities = rng.random(len(customers))
+    store.upsert(customers.index, probabilities, customers, "v1")
+    _assert_segments_match(store, customers, probabilities)
+
+    # Re-puntuar una parte, con un cambio de contrato incluido
+    changed = customers.copy()
+    changed.iloc[0, changed.columns.get_loc('Contract')] = 'Two year'
+    probabilities[:100] = rng.random(100)
+    store.upsert(changed.index[:100], probabilities[:100], changed.iloc[:100], "v2")
+    _assert_segments_match(store, changed, probabilities)
+
+    store.delete(changed.index[:50])
+    _assert_segments_match(store, changed.iloc[50:], probabilities[50:])
+
+    stats = store.stats()
+    assert stats["customers"] == len(customers) - 50
+    assert stats["model_versions"] == {"v1": len(customers) - 100, "v2": 50}
+
+
+def test_score_customers_job(tmp_path):
+    """Test: el job puntúa toda la base con la versión del modelo"""
+    model_path = APP_DIR / "model_xgboost.joblib"
+    store_path = tmp_path / "scores.db"
+    stats = score_customers(model_path, store_path=store_path, chunk_size=2000)
+
+    store = ScoreStore(store_path)
+    try:
+        assert stats["scored"] == stats["customers"] == store.stats()["customers"]
+        assert stats["model_version"].startswith("model_xgboost-")
+        assert store.segments()["customers"] == stats["customers"]
+    finally:
+        store.close()
+
+
+
+def test_row_fingerprints_detect_changes(customers):
+    """Test: la huella cambia solo en las filas modificadas y no depende del dtype"""
+    base = row_fingerprints(customers)
+
+    as_float = customers.astype({'tenure': float, 'SeniorCitizen': float})
+    assert np.array_equal(row_fingerprints(as_float), base)
+
+    changed = customers.copy()
+    changed.iloc[3, changed.columns.get_loc('MonthlyCharges')] += 1
+    assert np.flatnonzero(row_fingerprints(changed) != base).tolist() == [3]
+
+
+def test_incremental_rescoring(tmp_path):
+    """Test: solo se re-puntúan filas nuevas o modificadas, o todas tras cambiar de modelo"""
+    store_path = tmp_path / "scores.db"
+    data_path = tmp_path / "customers.csv"
+    raw = pd.read_csv(RAW_DATA_PATH).head(1000)
+    raw.to_csv(data_path, index=False)
+    xgboost_path = APP_DIR / "model_xgboost.joblib"
+
+    first = score_customers(xgboost_path, data_path, store_path)
+    assert first["scored"] == 1000
+
+    second = score_customers(xgboost_path, data_path, store_path)
+    assert second["scored"] == 0
+    assert second["skipped"] == 1000
+
+    # 10 clientes modificados, 5 nuevos y 5 eliminados
+    raw.loc[:9, 'tenure'] += 1
+    updated = pd.concat([raw.iloc[5:], pd.read_csv(RAW_DATA_PATH).iloc[1000:1005]])
+    updated.to_csv(data_path, index=False)
+    third = score_customers(xgboost_path, data_path, store_path, prune=True)
+    assert third["scored"] == 10
+    assert third["removed"] == 5
+
+    # Mismo resultado que puntuar todo desde cero
+    store = ScoreStore(store_path)
+    try:
+        stored = pd.DataFrame(store.top_at_risk(2000)).set_index('customer_id')['churn_probability']
+    finally:
+        store.close()
+    customers = load_customers(data_path)
+    model = joblib.load(xgboost_path)
+    expected = pd.Series(model.predict_proba(customers)[:, 1], index=customers.index)
+    assert len(stored) == len(expected)
+    np.testing.assert_allclose(stored.loc[expected.index], expected, rtol=1e-6)
+
+    # Cambio de modelo: se re-puntúa todo
+    fourth = score_customers(APP_DIR / "model_lightgbm.joblib", data_path, store_path)
+    assert fourth["scored"] == len(customers)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
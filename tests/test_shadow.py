@@ -0,0 +1,95 @@
+"""
+Pruebas del modo sombra con modelos retadores.
+"""
+
+import pytest
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import CLEAN_DATA_PATH, FEATURE_COLUMNS
+from app.shadow import ShadowScorer
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+@pytest.fixture(scope="module")
+def records():
+    return pd.read_csv(CLEAN_DATA_PATH)[FEATURE_COLUMNS].head(200).to_dict(orient="records")
+
+
+def _wait_idle(scorer, timeout=10):
+    deadline = time.time() + timeout
+    while scorer.pending and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_shadow_against_itself_agrees(records):
+    """
+    Un retador idéntico al principal concuerda al 100% con delta nulo.
+    """
+    primary = joblib.load(APP_DIR / "model_lightgbm.joblib")
+    scorer = ShadowScorer.from_names(["lightgbm"])
+    probabilities = primary.predict_proba(pd.DataFrame(records))[:, 1]
+
+    assert scorer.submit(records, probabilities, primary_latency_ms=5.0)
+    _wait_idle(scorer)
+    report = scorer.report()
+    scorer.shutdown(wait=True)
+
+    stats = report["challengers"]["lightgbm"]
+    assert stats["rows"] == len(records)
+    assert stats["agreement_rate"] == 1.0
+    assert stats["max_abs_delta"] == pytest.approx(0.0, abs=1e-9)
+    assert stats["latency_ms"]["p50"] is not None
+    assert report["primary_latency_ms"]["p50"] == 5.0
+
+
+def test_shadow_sheds_when_paused_or_full(records):
+    """
+    El trabajo en sombra se descarta sin bloquear cuando hay presión.
+    """
+    scorer = ShadowScorer.from_names(["xgboost"], max_pending=1)
+    probabilities = np.full(len(records), 0.5)
+
+    scorer.pause()
+    assert not scorer.submit(records, probabilities, 1.0)
+    scorer.resume()
+
+    accepted = [scorer.submit(records, probabilities, 1.0) for _ in range(20)]
+    _wait_idle(scorer)
+    report = scorer.report()
+    scorer.shutdown(wait=True)
+
+    assert report["shed"] == 1 + accepted.count(False)
+    assert report["submitted"] == accepted.count(True)
+    assert report["completed"] == report["submitted"]
+
+
+def test_shadow_ignores_empty_requests():
+    """
+    Un lote vacío no se envía a los retadores ni cuenta como error o descarte.
+    """
+    scorer = ShadowScorer.from_names(["xgboost"])
+    assert not scorer.submit([], [], 1.0)
+    report = scorer.report()
+    scorer.shutdown(wait=True)
+
+    assert report["submitted"] == 0 and report["shed"] == 0
+    assert report["challengers"]["xgboost"]["errors"] == 0
+
+
+def test_unknown_challenger_raises():
+    with pytest.raises(ValueError):
+        ShadowScorer.from_names(["randomforest_v9"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
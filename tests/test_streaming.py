@@ -0,0 +1,83 @@
+"""
+Pruebas de las respuestas NDJSON en streaming y la negociación de compresión.
+"""
+
+import pytest
+import gzip
+import json
+import zlib
+import numpy as np
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import get_risk_level
+from app.streaming import (
+    StreamCompressor, ndjson_line, ndjson_predictions, negotiate_encoding, supported_encodings, zstandard
+)
+
+
+def test_negotiate_encoding():
+    """Test: se elige la codificación soportada con mayor q"""
+    assert negotiate_encoding(None) == "identity"
+    assert negotiate_encoding("") == "identity"
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("br") == "identity"
+    assert negotiate_encoding("gzip;q=0") == "identity"
+    assert negotiate_encoding("identity;q=1, gzip;q=0.5") == "identity"
+    expected = "zstd" if zstandard is not None else "gzip"
+    assert negotiate_encoding("gzip;q=0.8, zstd") == expected
+    assert negotiate_encoding("*") == supported_encodings()[0]
+
+
+def test_ndjson_matches_batch_format():
+    """Test: cada línea tiene los mismos campos y valores que /predict-batch"""
+    probabilities = np.array([0.05, 0.3, 0.5, 0.69, 0.7, 0.99], dtype=np.float32)
+
+    lines = ndjson_predictions(probabilities, offset=10).decode().splitlines()
+
+    assert len(lines) == len(probabilities)
+    for idx, (line, p) in enumerate(zip(lines, probabilities)):
+        row = json.loads(line)
+        p = float(p)
+        assert row == {
+            "customer_index": 10 + idx,
+            "churn_probability": p,
+            "prediction": "Yes" if p > 0.5 else "No",
+            "risk_level": get_risk_level(p),
+            "confidence": max(p, 1 - p),
+        }
+
+    row = json.loads(ndjson_predictions(probabilities[:1], offset=3, batch_id="abc").decode())
+    assert row["request_id"] == "abc-3"
+
+
+def test_gzip_stream_is_decodable_incrementally():
+    """Test: cada bloque gzip se puede descomprimir sin esperar al final"""
+    compressor = StreamCompressor("gzip")
+    first = compressor.compress(ndjson_predictions(np.array([0.1, 0.9])))
+    second = compressor.compress(ndjson_line({"error": "fallo"}))
+    tail = compressor.finish()
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(first).count(b"\n") == 2
+
+    body = gzip.decompress(first + second + tail).decode().splitlines()
+    assert len(body) == 3
+    assert json.loads(body[-1]) == {"error": "fallo"}
+
+
+def test_identity_and_unsupported_encodings():
+    """Test: identity no modifica los datos y una codificación desconocida falla"""
+    compressor = StreamCompressor("identity")
+    assert compressor.compress(b"abc\n") == b"abc\n"
+    assert compressor.finish() == b""
+
+    with pytest.raises(ValueError):
+        StreamCompressor("br")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
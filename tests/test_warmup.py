@@ -0,0 +1,101 @@
+"""
+Pruebas del calentamiento del modelo y el estado de disponibilidad.
+"""
+
+import pytest
+import time
+import joblib
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.features import FEATURE_COLUMNS
+from app.warmup import ModelWarmup, warmup_frames
+
+
+APP_DIR = Path(__file__).parent.parent / "app"
+
+
+class ColdStartModel:
+    """Modelo de prueba lento en las primeras llamadas."""
+
+    def __init__(self, cold_calls=3, cold_delay=0.02, fail=False):
+        self.calls = 0
+        self.cold_calls = cold_calls
+        self.cold_delay = cold_delay
+        self.fail = fail
+
+    def __call__(self, frame):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("modelo roto")
+        if self.calls <= self.cold_calls:
+            time.sleep(self.cold_delay)
+
+
+def test_warmup_frames_sizes():
+    """Test: un lote por tamaño, empezando por el ejemplo del esquema"""
+    frames = warmup_frames((1, 16))
+
+    assert set(frames) == {1, 16}
+    assert len(frames[16]) == 16
+    assert list(frames[16].columns) == FEATURE_COLUMNS
+    assert frames[16].iloc[0].to_dict() == frames[1].iloc[0].to_dict()
+
+
+def test_warmup_reaches_steady_state():
+    """Test: las llamadas lentas iniciales quedan en first_ms, no en la latencia estable"""
+    model = ColdStartModel()
+    warmup = ModelWarmup(model, batch_sizes=(1, 8), window=3)
+    assert not warmup.ready
+
+    warmup.run()
+
+    report = warmup.report()
+    assert report["ready"]
+    first = report["batch_sizes"]["1"]
+    assert first["steady"]
+    assert first["first_ms"] > 10 * max(first["steady_p50_ms"], 0.1)
+    assert report["batch_sizes"]["8"]["iterations"] >= 6
+
+
+def test_warmup_failure_is_not_ready():
+    """Test: si la predicción falla, el servicio no se marca listo"""
+    warmup = ModelWarmup(ColdStartModel(fail=True), batch_sizes=(1,))
+    warmup.run()
+
+    assert warmup.state == "failed"
+    assert not warmup.ready
+    assert "modelo roto" in warmup.report()["error"]
+
+
+def test_warmup_real_model_in_background():
+    """Test: calentamiento en segundo plano de un pipeline real"""
+    model = joblib.load(APP_DIR / "model_xgboost.joblib")
+    warmup = ModelWarmup(model.predict_proba, batch_sizes=(1, 64), max_seconds=20)
+
+    warmup.start().join(timeout=30)
+
+    assert warmup.ready
+    assert set(warmup.report()["batch_sizes"]) == {"1", "64"}
+
+
+
+def test_warmup_deadline_expires_mid_sizes():
+    """Test: si se agota max_seconds, los tamaños restantes se omiten y el servicio queda listo"""
+    def slow(frame):
+        time.sleep(0.03)
+
+    warmup = ModelWarmup(slow, batch_sizes=(1, 8, 16), window=50, max_seconds=0.1)
+    warmup.run()
+
+    report = warmup.report()
+    assert report["ready"]
+    assert report["batch_sizes"]["1"]["iterations"] >= 1
+    assert report["batch_sizes"]["16"]["skipped"]
+    assert report["batch_sizes"]["16"]["iterations"] == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,145 @@
+"""
+Pruebas del canal WebSocket de puntuación (micro-batching y control de flujo).
+"""
+
+import pytest
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+# Añadir el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from starlette.websockets import WebSocketDisconnect
+
+from app.schemas import CustomerData
+from app.ws_scoring import ScoringChannel
+
+CUSTOMER = CustomerData.Config.schema_extra["example"]
+
+
+class FakeWebSocket:
+    """WebSocket en memoria: entrega los mensajes dados y luego se desconecta."""
+
+    def __init__(self, messages, outbox_size=0, disconnect=True):
+        self.inbox = asyncio.Queue()
+        for message in messages:
+            self.inbox.put_nowait(message)
+        self.outbox = asyncio.Queue(maxsize=outbox_size)
+        self.disconnect = disconnect
+
+    async def receive_text(self):
+        if self.disconnect and self.inbox.empty():
+            raise WebSocketDisconnect(code=1000)
+        return await self.inbox.get()
+
+    async def send_text(self, text):
+        await self.outbox.put(text)
+
+    def sent(self):
+        return [json.loads(self.outbox.get_nowait()) for _ in range(self.outbox.qsize())]
+
+
+def _message(message_id):
+    return json.dumps({"id": message_id, "customer": CUSTOMER})
+
+
+def test_messages_are_batched_and_answered_in_order():
+    """Test: mensajes juntos se puntúan en lotes de max_batch y se responde en orden"""
+    batch_sizes = []
+
+    async def score(records):
+        batch_sizes.append(len(records))
+        await asyncio.sleep(0.01)
+        return [0.8] * len(records)
+
+    async def scenario():
+        websocket = FakeWebSocket([_message(i) for i in range(10)], disconnect=False)
+        channel = ScoringChannel(score, max_batch=4, max_wait_ms=5)
+        task = asyncio.create_task(channel.serve(websocket))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return channel, websocket.sent()
+
+    channel, responses = asyncio.run(scenario())
+
+    assert batch_sizes == [4, 4, 2]
+    assert [r["id"] for r in responses] == list(range(10))
+    assert responses[0]["prediction"] == "Yes"
+    assert responses[0]["risk_level"] == "High"
+    assert channel.report()["mean_batch_size"] == pytest.approx(10 / 3, abs=0.01)
+
+
+def test_invalid_messages_and_scoring_errors():
+    """Test: los errores se devuelven por mensaje sin cerrar la conexión"""
+    class Busy(Exception):
+        status_code = 503
+        detail = "Sobrecarga"
+
+    calls = []
+
+    async def score(records):
+        calls.append(len(records))
+        if len(calls) == 1:
+            raise Busy()
+        return [0.1] * len(records)
+
+    async def scenario():
+        websocket = FakeWebSocket([_message("a"), "no es json"], disconnect=False)
+        channel = ScoringChannel(score, max_batch=8, max_wait_ms=20)
+        task = asyncio.create_task(channel.serve(websocket))
+        await asyncio.sleep(0.1)
+        websocket.inbox.put_nowait(json.dumps({"id": "b", "customer": {"tenure": 1}}))
+        websocket.inbox.put_nowait(_message("c"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return websocket.sent()
+
+    responses = asyncio.run(scenario())
+
+    assert [(r["id"], r.get("status_code")) for r in responses] == [
+        ("a", 503), (None, 400), ("b", 422), ("c", None)
+    ]
+    assert responses[0]["error"] == "Sobrecarga"
+    assert responses[-1]["prediction"] == "No"
+
+
+def test_slow_consumer_stops_reading():
+    """Test: si el cliente no lee respuestas, se deja de leer del socket"""
+    async def score(records):
+        return [0.5] * len(records)
+
+    async def scenario():
+        websocket = FakeWebSocket([_message(i) for i in range(1000)], outbox_size=1, disconnect=False)
+        channel = ScoringChannel(score, max_batch=4, max_wait_ms=1, max_pending=8)
+        task = asyncio.create_task(channel.serve(websocket))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return channel
+
+    channel = asyncio.run(scenario())
+
+    # Cola + un lote en curso + el mensaje bloqueado en put()
+    assert channel.messages <= 8 + 4 + 1
+
+
+def test_disconnect_ends_channel():
+    """Test: la desconexión del cliente termina el canal"""
+    async def score(records):
+        return [0.5] * len(records)
+
+    async def scenario():
+        websocket = FakeWebSocket([_message(1)])
+        channel = ScoringChannel(score)
+        await asyncio.wait_for(channel.serve(websocket), timeout=1)
+        return channel
+
+    assert asyncio.run(scenario()).messages == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])